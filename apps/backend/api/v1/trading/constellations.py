@@ -4,20 +4,28 @@ from typing import List, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
 
-from ...core.database import get_db
-from ...models.game_models import (
+from ....core.database import SessionLocal, get_db
+from ....models.game_models import (
     Constellation, ConstellationMembership, ConstellationBattle, 
-    ConstellationBattleParticipation, User, UserPrestige
+    ConstellationBattleParticipation, CopyTradingFollow, User, UserPrestige
 )
-from ...auth.auth import get_current_active_user as get_current_user
-from ...services.clan_trading_service import (
+from ....auth.auth import get_current_active_user as get_current_user, get_current_admin_user
+from ....services.battle_rating import (
+    BattleRecord, EloRatingEngine, battle_result, get_rating_engine, recompute_battle_ratings_once
+)
+from ....services.constellation_search import ConstellationSearchFeed, get_constellation_search
+from ....services.genesis_eligibility import GenesisEligibilityEngine, get_genesis_eligibility
+from ....services.clan_trading_service import (
     clan_trading_service, start_battle_monitoring, 
     get_real_time_battle_scores, get_clan_trading_performance
 )
-from ...tasks.clan_battle_monitor import trigger_battle_update, get_monitor_status
+from ....tasks.clan_battle_monitor import trigger_battle_update, get_monitor_status
 
 router = APIRouter(prefix="/constellations", tags=["constellations"])
 
+# Most search matches considered when sorting them by a column
+MAX_SEARCH_MATCHES = 1000
+
 
 # Pydantic models for request/response
 class ConstellationCreate(BaseModel):
@@ -109,7 +117,9 @@ class ConstellationBattleResponse(BaseModel):
 async def create_constellation(
     constellation: ConstellationCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    eligibility: GenesisEligibilityEngine = Depends(get_genesis_eligibility),
+    search_feed: ConstellationSearchFeed = Depends(get_constellation_search)
 ):
     """Create a new constellation"""
     # Check if user already owns a constellation
@@ -161,6 +171,9 @@ async def create_constellation(
     db.commit()
     db.refresh(db_constellation)
     
+    await eligibility.record_founder(current_user.id, db_constellation.id, db_constellation.name)
+    await search_feed.publish_upsert(db_constellation)
+    
     return db_constellation
 
 
@@ -169,20 +182,37 @@ async def list_constellations(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     search: Optional[str] = Query(None, min_length=1, max_length=100),
-    sort_by: str = Query("created_at", regex=r"^(name|member_count|constellation_level|battle_rating|created_at)$"),
+    sort_by: Optional[str] = Query(None, regex=r"^(relevance|name|member_count|constellation_level|battle_rating|created_at)$"),
     sort_order: str = Query("desc", regex=r"^(asc|desc)$"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    search_feed: ConstellationSearchFeed = Depends(get_constellation_search)
 ):
-    """List all public constellations with search and sorting"""
+    """
+    List all public constellations with search and sorting.
+
+    Searches are ranked by relevance, boosted by battle rating and member
+    count, unless another sort is requested.
+    """
     query = db.query(Constellation).filter(Constellation.is_public == True)
+    index = search_feed.index
     
     # Apply search filter
-    if search:
+    if search and index.loaded:
+        if sort_by in (None, "relevance"):
+            hits = index.search(search, limit=limit, offset=skip)
+            return _constellations_in_order(db, [hit.constellation_id for hit in hits])
+        matched_ids = [hit.constellation_id for hit in index.search(search, limit=MAX_SEARCH_MATCHES)]
+        query = query.filter(Constellation.id.in_(matched_ids))
+    elif search:
+        # Index still warming up
         query = query.filter(
             Constellation.name.ilike(f"%{search}%") | 
             Constellation.description.ilike(f"%{search}%")
         )
     
+    if sort_by in (None, "relevance"):
+        sort_by = "created_at"
+    
     # Apply sorting
     if sort_order == "asc":
         query = query.order_by(getattr(Constellation, sort_by).asc())
@@ -195,6 +225,18 @@ async def list_constellations(
     return constellations
 
 
+def _constellations_in_order(db: Session, constellation_ids: List[int]) -> List[Constellation]:
+    """Load public constellations, keeping the order of the given IDs"""
+    if not constellation_ids:
+        return []
+    rows = db.query(Constellation).filter(
+        Constellation.id.in_(constellation_ids),
+        Constellation.is_public == True
+    ).all()
+    by_id = {constellation.id: constellation for constellation in rows}
+    return [by_id[constellation_id] for constellation_id in constellation_ids if constellation_id in by_id]
+
+
 @router.get("/{constellation_id}", response_model=ConstellationResponse)
 async def get_constellation(
     constellation_id: int,
@@ -222,7 +264,8 @@ async def update_constellation(
     constellation_id: int,
     constellation_update: ConstellationUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    search_feed: ConstellationSearchFeed = Depends(get_constellation_search)
 ):
     """Update constellation details (owner only)"""
     constellation = db.query(Constellation).filter(
@@ -247,6 +290,8 @@ async def update_constellation(
     db.commit()
     db.refresh(constellation)
     
+    await search_feed.publish_upsert(constellation)
+    
     return constellation
 
 
@@ -255,7 +300,8 @@ async def update_constellation(
 async def join_constellation(
     constellation_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    search_feed: ConstellationSearchFeed = Depends(get_constellation_search)
 ):
     """Join a constellation"""
     constellation = db.query(Constellation).filter(
@@ -318,6 +364,8 @@ async def join_constellation(
     
     db.commit()
     
+    await search_feed.publish_stats(constellation_id, member_count=constellation.member_count)
+    
     return {"message": "Successfully joined constellation", "constellation_id": constellation_id}
 
 
@@ -325,7 +373,8 @@ async def join_constellation(
 async def leave_constellation(
     constellation_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    search_feed: ConstellationSearchFeed = Depends(get_constellation_search)
 ):
     """Leave a constellation"""
     membership = db.query(ConstellationMembership).filter(
@@ -359,6 +408,8 @@ async def leave_constellation(
     
     db.commit()
     
+    await search_feed.publish_stats(constellation_id, member_count=constellation.member_count)
+    
     return {"message": "Successfully left constellation"}
 
 
@@ -726,92 +777,130 @@ async def complete_constellation_battle(
 
 async def _complete_battle(battle: ConstellationBattle, db: Session):
     """Internal function to complete a battle and distribute rewards"""
-    # Determine winner
-    if battle.challenger_score > battle.defender_score:
-        battle.winner_constellation_id = battle.challenger_constellation_id
-    elif battle.defender_score > battle.challenger_score:
-        battle.winner_constellation_id = battle.defender_constellation_id
-    # If tied, no winner
-    
-    battle.status = "completed"
-    battle.completed_at = datetime.utcnow()
-    
-    # Calculate rewards
-    if battle.winner_constellation_id:
-        battle.winner_reward = battle.prize_pool * 0.8  # 80% to winner
-        loser_reward = battle.prize_pool * 0.2  # 20% to loser
-    else:
-        battle.winner_reward = battle.prize_pool * 0.5  # 50% each if tied
-        loser_reward = battle.prize_pool * 0.5
-    
-    # Update constellation battle statistics
-    challenger_constellation = db.query(Constellation).filter(
-        Constellation.id == battle.challenger_constellation_id
-    ).first()
-    defender_constellation = db.query(Constellation).filter(
-        Constellation.id == battle.defender_constellation_id
-    ).first()
-    
-    if challenger_constellation:
-        challenger_constellation.total_battles += 1
-        if battle.winner_constellation_id == challenger_constellation.id:
-            challenger_constellation.battles_won += 1
-        # Update battle rating (simplified ELO-like system)
-        rating_change = 20 if battle.winner_constellation_id == challenger_constellation.id else -10
-        challenger_constellation.battle_rating = max(1000, challenger_constellation.battle_rating + rating_change)
-    
-    if defender_constellation:
-        defender_constellation.total_battles += 1
-        if battle.winner_constellation_id == defender_constellation.id:
-            defender_constellation.battles_won += 1
-        # Update battle rating
-        rating_change = 20 if battle.winner_constellation_id == defender_constellation.id else -10
-        defender_constellation.battle_rating = max(1000, defender_constellation.battle_rating + rating_change)
-    
-    # Distribute individual rewards to participants
-    participations = db.query(ConstellationBattleParticipation).filter(
-        ConstellationBattleParticipation.battle_id == battle.id
-    ).all()
+    await _settle_battles([battle], db)
+
+
+async def _settle_battles(battles: List[ConstellationBattle], db: Session):
+    """Complete a batch of battles, rate them in one pass and distribute rewards"""
+    # Lock the battles and re-read their status: a concurrent settlement
+    # (the monitor or a manual complete) may have completed them already
+    battles = db.query(ConstellationBattle).filter(
+        ConstellationBattle.id.in_([battle.id for battle in battles])
+    ).order_by(ConstellationBattle.id).with_for_update().populate_existing().all()
+    battles = [battle for battle in battles if battle.status != "completed"]
+    if not battles:
+        db.commit()
+        return
+    completed_at = datetime.utcnow()
+    
+    # Lock both sides of every battle: ratings are read and written in this transaction
+    constellation_ids = {
+        constellation_id for battle in battles
+        for constellation_id in (battle.challenger_constellation_id, battle.defender_constellation_id)
+    }
+    constellations = {
+        constellation.id: constellation for constellation in db.query(Constellation).filter(
+            Constellation.id.in_(constellation_ids)
+        ).order_by(Constellation.id).with_for_update()
+    }
     
-    # Calculate total score for each constellation
-    challenger_total_score = sum(p.individual_score for p in participations 
-                                if p.constellation_id == battle.challenger_constellation_id)
-    defender_total_score = sum(p.individual_score for p in participations 
-                              if p.constellation_id == battle.defender_constellation_id)
-    
-    for participation in participations:
-        # Calculate contribution percentage
-        constellation_total = (challenger_total_score if participation.constellation_id == battle.challenger_constellation_id 
-                              else defender_total_score)
-        if constellation_total > 0:
-            participation.contribution_percentage = (participation.individual_score / constellation_total) * 100
+    rating_engine = get_rating_engine()
+    standings = {
+        constellation.id: (
+            constellation.battle_rating or rating_engine.config.initial_rating,
+            constellation.total_battles or 0
+        )
+        for constellation in constellations.values()
+    }
+    records = []
+    
+    for battle in battles:
+        # Determine winner
+        if battle.challenger_score > battle.defender_score:
+            battle.winner_constellation_id = battle.challenger_constellation_id
+        elif battle.defender_score > battle.challenger_score:
+            battle.winner_constellation_id = battle.defender_constellation_id
+        # If tied, no winner
+        
+        battle.status = "completed"
+        battle.completed_at = completed_at
+        
+        # Calculate rewards
+        if battle.winner_constellation_id:
+            battle.winner_reward = battle.prize_pool * 0.8  # 80% to winner
+            loser_reward = battle.prize_pool * 0.2  # 20% to loser
         else:
-            participation.contribution_percentage = 0
+            battle.winner_reward = battle.prize_pool * 0.5  # 50% each if tied
+            loser_reward = battle.prize_pool * 0.5
         
-        # Calculate individual reward
-        is_winner = participation.constellation_id == battle.winner_constellation_id
-        constellation_reward = battle.winner_reward if is_winner else loser_reward
-        participation.individual_reward = constellation_reward * (participation.contribution_percentage / 100)
+        # Update constellation battle statistics
+        for constellation_id in (battle.challenger_constellation_id, battle.defender_constellation_id):
+            constellation = constellations.get(constellation_id)
+            if constellation:
+                constellation.total_battles += 1
+                if battle.winner_constellation_id == constellation.id:
+                    constellation.battles_won += 1
         
-        # Bonus XP for participation
-        base_xp = 100
-        performance_multiplier = min(2.0, participation.individual_score / 1000)  # Max 2x multiplier
-        participation.bonus_xp = int(base_xp * performance_multiplier)
-        if is_winner:
-            participation.bonus_xp = int(participation.bonus_xp * 1.5)  # 50% bonus for winners
+        if battle.challenger_constellation_id in constellations and battle.defender_constellation_id in constellations:
+            records.append(BattleRecord(
+                battle.challenger_constellation_id,
+                battle.defender_constellation_id,
+                battle_result(battle.challenger_score, battle.defender_score)
+            ))
         
-        # Update constellation membership stats
-        membership = db.query(ConstellationMembership).filter(
-            ConstellationMembership.constellation_id == participation.constellation_id,
-            ConstellationMembership.user_id == participation.user_id
-        ).first()
+        # Distribute individual rewards to participants
+        participations = db.query(ConstellationBattleParticipation).filter(
+            ConstellationBattleParticipation.battle_id == battle.id
+        ).all()
+    
+        # Calculate total score for each constellation
+        challenger_total_score = sum(p.individual_score for p in participations 
+                                    if p.constellation_id == battle.challenger_constellation_id)
+        defender_total_score = sum(p.individual_score for p in participations 
+                                  if p.constellation_id == battle.defender_constellation_id)
+    
+        for participation in participations:
+            # Calculate contribution percentage
+            constellation_total = (challenger_total_score if participation.constellation_id == battle.challenger_constellation_id 
+                                  else defender_total_score)
+            if constellation_total > 0:
+                participation.contribution_percentage = (participation.individual_score / constellation_total) * 100
+            else:
+                participation.contribution_percentage = 0
+        
+            # Calculate individual reward
+            is_winner = participation.constellation_id == battle.winner_constellation_id
+            constellation_reward = battle.winner_reward if is_winner else loser_reward
+            participation.individual_reward = constellation_reward * (participation.contribution_percentage / 100)
         
-        if membership:
-            membership.battles_participated += 1
-            membership.stellar_shards_contributed += participation.stellar_shards_earned
-            membership.contribution_score += int(participation.individual_score * 0.1)
+            # Bonus XP for participation
+            base_xp = 100
+            performance_multiplier = min(2.0, participation.individual_score / 1000)  # Max 2x multiplier
+            participation.bonus_xp = int(base_xp * performance_multiplier)
+            if is_winner:
+                participation.bonus_xp = int(participation.bonus_xp * 1.5)  # 50% bonus for winners
+        
+            # Update constellation membership stats
+            membership = db.query(ConstellationMembership).filter(
+                ConstellationMembership.constellation_id == participation.constellation_id,
+                ConstellationMembership.user_id == participation.user_id
+            ).first()
+        
+            if membership:
+                membership.battles_participated += 1
+                membership.stellar_shards_contributed += participation.stellar_shards_earned
+                membership.contribution_score += int(participation.individual_score * 0.1)
+    
+    # Rate the whole batch in one vectorized pass
+    rating_changes = rating_engine.settle(standings, records)
+    for constellation_id, change in rating_changes.items():
+        constellations[constellation_id].battle_rating = change.new_rating
     
     db.commit()
+    
+    search_feed = get_constellation_search()
+    for constellation in constellations.values():
+        await search_feed.publish_stats(constellation.id, battle_rating=constellation.battle_rating)
 
 
 # Real Trading Integration Endpoints
@@ -999,10 +1088,17 @@ async def follow_trader(
     constellation_id: int,
     target_user_id: int,
     allocation_percentage: float = Field(..., ge=1.0, le=50.0),
+    max_trade_amount: Optional[float] = Query(None, gt=0),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Follow a successful trader within the constellation (social trading)."""
+    """
+    Follow a successful trader within the constellation (social trading).
+    
+    The trader's executed trades are copied into the follower's account,
+    sized to ``allocation_percentage`` of the follower's available balance.
+    Following the same trader again updates the allocation.
+    """
     # Check if user is member of the constellation
     membership = db.query(ConstellationMembership).filter(
         ConstellationMembership.constellation_id == constellation_id,
@@ -1035,16 +1131,70 @@ async def follow_trader(
             detail="Cannot follow yourself"
         )
     
-    # For now, return success message
-    # In full implementation, this would create a copy trading relationship
+    follow = db.query(CopyTradingFollow).filter(
+        CopyTradingFollow.follower_id == current_user.id,
+        CopyTradingFollow.leader_id == target_user_id
+    ).first()
+    
+    if follow:
+        follow.allocation_percentage = allocation_percentage
+        follow.max_trade_amount = max_trade_amount
+        follow.constellation_id = constellation_id
+        follow.is_active = True
+    else:
+        follow = CopyTradingFollow(
+            follower_id=current_user.id,
+            leader_id=target_user_id,
+            constellation_id=constellation_id,
+            allocation_percentage=allocation_percentage,
+            max_trade_amount=max_trade_amount
+        )
+        db.add(follow)
+    
+    db.commit()
+    db.refresh(follow)
+    
     return {
         "message": f"Successfully started following trader {target_user_id}",
         "constellation_id": constellation_id,
         "follower_id": current_user.id,
         "target_trader_id": target_user_id,
-        "allocation_percentage": allocation_percentage,
+        "allocation_percentage": follow.allocation_percentage,
+        "max_trade_amount": follow.max_trade_amount,
         "status": "active",
-        "started_at": datetime.utcnow().isoformat()
+        "started_at": follow.created_at.isoformat()
+    }
+
+
+@router.post("/{constellation_id}/copy-trading/unfollow")
+async def unfollow_trader(
+    constellation_id: int,
+    target_user_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stop copying a trader's trades."""
+    follow = db.query(CopyTradingFollow).filter(
+        CopyTradingFollow.follower_id == current_user.id,
+        CopyTradingFollow.leader_id == target_user_id,
+        CopyTradingFollow.is_active == True
+    ).first()
+    
+    if not follow:
+        raise HTTPException(
+            status_code=404,
+            detail="You are not following this trader"
+        )
+    
+    follow.is_active = False
+    db.commit()
+    
+    return {
+        "message": f"Stopped following trader {target_user_id}",
+        "constellation_id": constellation_id,
+        "follower_id": current_user.id,
+        "target_trader_id": target_user_id,
+        "status": "inactive"
     }
 
 
@@ -1128,4 +1278,39 @@ async def trigger_all_battle_updates(
         raise HTTPException(
             status_code=500,
             detail=f"Failed to trigger updates: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/ratings/recompute")
+async def recompute_constellation_ratings(
+    current_user: User = Depends(get_current_admin_user),
+    rating_engine: EloRatingEngine = Depends(get_rating_engine),
+    search_feed: ConstellationSearchFeed = Depends(get_constellation_search)
+):
+    """Recompute every constellation's battle rating from the full battle history (system admin only)."""
+    try:
+        # Concurrent requests share one replay
+        changes = await recompute_battle_ratings_once(SessionLocal, rating_engine)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to recompute ratings: {str(e)}"
+        )
+    
+    for change in changes.values():
+        await search_feed.publish_stats(change.constellation_id, battle_rating=change.new_rating)
+    
+    largest = sorted(changes.values(), key=lambda change: abs(change.delta), reverse=True)[:10]
+    return {
+        "message": "Battle ratings recomputed",
+        "constellations_changed": len(changes),
+        "largest_changes": [
+            {
+                "constellation_id": change.constellation_id,
+                "old_rating": round(change.old_rating, 2),
+                "new_rating": round(change.new_rating, 2),
+                "delta": round(change.delta, 2)
+            }
+            for change in largest
+        ]
+    }
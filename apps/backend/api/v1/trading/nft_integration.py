@@ -1,27 +1,70 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import bindparam, func, insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Union
+from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel, Field
+import asyncio
 import json
 import hashlib
 import secrets
 
-from ...core.database import get_db
-from ...models.game_models import (
-    User, Artifact, UserGameStats, ConstellationMembership, ViralContent
+from ....core.database import SessionLocal, User, get_db
+from ....core.tiered_cache import ProfileCacheKeys, TieredCache, get_profile_cache
+from ....models.game_models import (
+    Artifact, UserGameStats, Constellation, ConstellationMembership, ViralContent
+)
+from ....auth.auth import get_current_active_user as get_current_user, get_current_admin_user
+from ....services.genesis_eligibility import (
+    VIRAL_HIT_SCORE,
+    EligibilitySnapshot,
+    GenesisAchievement,
+    GenesisEligibilityEngine,
+    get_genesis_eligibility,
+)
+from ....services.genesis_batch_mint import (
+    BatchMintItem,
+    BatchMintJob,
+    GenesisBatchMinter,
+    MintItemStatus,
+    get_batch_minter,
+)
+from ....services.nft_marketplace import (
+    FEATURED_RARITY_RANK,
+    ListingRow,
+    MarketplaceError,
+    buy_listing,
+    cancel_listing,
+    create_listing,
+    query_listings,
 )
-from ...auth.auth import get_current_active_user as get_current_user
 
 router = APIRouter(prefix="/nft", tags=["nft_integration"])
 
+COLLECTION_CACHE_TTL = 300
+MAX_BATCH_MINT_ITEMS = 10000
+BULK_QUERY_CHUNK = 500
+ALREADY_MINTED = "Genesis NFT already minted for this achievement"
+GENESIS_ALREADY_MINTED = f"Not eligible for Genesis NFT: {ALREADY_MINTED}"
+
 
 # Pydantic models
 class GenesisNFTRequest(BaseModel):
-    achievement_type: str = Field(..., regex=r"^(first_trade|level_milestone|constellation_founder|viral_legend|trading_master)$")
+    achievement_type: str = Field(..., pattern=r"^(first_trade|level_milestone|constellation_founder|viral_legend|trading_master)$")
     milestone_data: Dict[str, Any]
 
 
+class BatchMintItemRequest(BaseModel):
+    user_id: int
+    achievement_type: str = Field(..., pattern=r"^(first_trade|level_milestone|constellation_founder|viral_legend|trading_master)$")
+    milestone_data: Dict[str, Any] = Field(default_factory=dict)
+
+
+class BatchMintRequest(BaseModel):
+    items: List[BatchMintItemRequest] = Field(..., min_length=1, max_length=MAX_BATCH_MINT_ITEMS)
+
+
 class GenesisNFTResponse(BaseModel):
     nft_id: str
     token_id: int
@@ -38,6 +81,7 @@ class GenesisNFTResponse(BaseModel):
 
 
 class NFTMarketplaceItem(BaseModel):
+    listing_id: Optional[int] = None
     nft_id: str
     token_id: int
     owner_address: str
@@ -53,7 +97,7 @@ class NFTMarketplaceItem(BaseModel):
 
 class ShareableNFTRequest(BaseModel):
     nft_id: str
-    share_platforms: List[str] = Field(..., min_items=1)
+    share_platforms: List[str] = Field(..., min_length=1)
     custom_message: Optional[str] = Field(None, max_length=280)
 
 
@@ -75,7 +119,9 @@ class NFTCollectionResponse(BaseModel):
 async def mint_genesis_nft(
     request: GenesisNFTRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    cache: TieredCache = Depends(get_profile_cache),
+    eligibility_engine: GenesisEligibilityEngine = Depends(get_genesis_eligibility)
 ):
     """Mint a Genesis Seed NFT for significant achievements"""
     try:
@@ -83,8 +129,8 @@ async def mint_genesis_nft(
         eligibility = await _check_genesis_eligibility(
             current_user.id,
             request.achievement_type,
-            request.milestone_data,
-            db
+            db,
+            eligibility_engine
         )
         
         if not eligibility["eligible"]:
@@ -93,6 +139,16 @@ async def mint_genesis_nft(
                 detail=f"Not eligible for Genesis NFT: {eligibility['reason']}"
             )
         
+        # The snapshot is only a pre-filter: confirm against the artifacts
+        # table in this transaction (the unique index settles races)
+        artifact_type = f"genesis_{request.achievement_type}"
+        if db.query(Artifact.id).filter(
+            Artifact.user_id == current_user.id,
+            Artifact.artifact_type == artifact_type
+        ).first():
+            await eligibility_engine.record_mint(current_user.id, request.achievement_type)
+            raise HTTPException(status_code=400, detail=GENESIS_ALREADY_MINTED)
+        
         # Generate unique NFT ID
         nft_id = _generate_nft_id(current_user.id, request.achievement_type)
         
@@ -114,14 +170,20 @@ async def mint_genesis_nft(
         # Create artifact record (representing the NFT)
         artifact = Artifact(
             user_id=current_user.id,
-            artifact_type=f"genesis_{request.achievement_type}",
+            artifact_type=artifact_type,
             rarity=rarity,
             bonus_percentage=_calculate_bonus_percentage(rarity),
             is_equipped=False
         )
         
         db.add(artifact)
-        db.flush()  # Get the artifact ID
+        try:
+            db.flush()  # Get the artifact ID
+        except IntegrityError:
+            # A concurrent request minted the same achievement first
+            db.rollback()
+            await eligibility_engine.record_mint(current_user.id, request.achievement_type)
+            raise HTTPException(status_code=400, detail=GENESIS_ALREADY_MINTED)
         
         # Simulate blockchain minting (in production, integrate with actual contract)
         minting_result = await _simulate_blockchain_minting(
@@ -151,149 +213,363 @@ async def mint_genesis_nft(
         
         db.commit()
         
+        await eligibility_engine.record_mint(current_user.id, request.achievement_type)
+        
+        # New artifact and XP change
+        await cache.invalidate(ProfileCacheKeys.GENESIS_COLLECTION, current_user.id)
+        await cache.invalidate(ProfileCacheKeys.PRESTIGE_PROFILE, current_user.id)
+        await cache.invalidate(ProfileCacheKeys.CURRENT_USER, current_user.username)
+        
         return genesis_nft
         
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to mint Genesis NFT: {str(e)}")
 
 
+@router.post("/genesis/mint/batch", status_code=202)
+async def batch_mint_genesis_nfts(
+    request: BatchMintRequest,
+    current_user: User = Depends(get_current_admin_user),
+    minter: GenesisBatchMinter = Depends(get_batch_minter),
+    eligibility_engine: GenesisEligibilityEngine = Depends(get_genesis_eligibility),
+    cache: TieredCache = Depends(get_profile_cache)
+):
+    """Mint Genesis NFTs for many users (e.g. after a battle or FOMO drop) as a background job (system admin only)"""
+    items = [
+        BatchMintItem(user_id=item.user_id, achievement_type=item.achievement_type, milestone_data=item.milestone_data)
+        for item in request.items
+    ]
+    job = minter.create_job(items, created_by=current_user.id)
+    
+    async def run(job: BatchMintJob):
+        await _run_batch_mint(job, minter, eligibility_engine, cache)
+    
+    minter.start_job(job, run)
+    return job.to_dict(limit=0)
+
+
+@router.get("/genesis/mint/batch/{job_id}")
+async def get_batch_mint_job(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_admin_user),
+    minter: GenesisBatchMinter = Depends(get_batch_minter)
+):
+    """Get a batch mint job's progress and per-item status (creator only)"""
+    job = minter.get_job(job_id)
+    if not job or job.created_by != current_user.id:
+        raise HTTPException(status_code=404, detail="Batch mint job not found")
+    return job.to_dict(offset=offset, limit=limit)
+
+
+async def _run_batch_mint(
+    job: BatchMintJob,
+    minter: GenesisBatchMinter,
+    eligibility_engine: GenesisEligibilityEngine,
+    cache: TieredCache
+) -> None:
+    """Validate, insert, submit on-chain and settle a batch mint job"""
+    # The session is only used from worker threads, one step at a time
+    db = SessionLocal()
+    try:
+        # Validate eligibility in bulk from the snapshots
+        async def load_snapshots(user_ids: List[int]):
+            return await asyncio.to_thread(_load_eligibility_snapshots, user_ids, db)
+        
+        snapshots = await eligibility_engine.get_many([item.user_id for item in job.items], load_snapshots)
+        # Snapshots may be cached; existing artifacts are checked in the database
+        users, existing = await asyncio.to_thread(_load_batch_mint_state, list(snapshots), db)
+        
+        accepted = []
+        already_minted = []
+        seen = set()
+        for item in job.items:
+            user = users.get(item.user_id)
+            snapshot = snapshots[item.user_id]
+            achievement = GenesisAchievement.from_type(item.achievement_type)
+            if user is None:
+                item.reject("User not found")
+            elif (item.user_id, item.achievement_type) in seen:
+                item.reject("Duplicate item in batch")
+            elif snapshot.has_minted(achievement):
+                item.reject(ALREADY_MINTED)
+            elif (item.user_id, f"genesis_{item.achievement_type}") in existing:
+                item.reject(ALREADY_MINTED)
+                already_minted.append(item)
+            elif not snapshot.available & achievement:
+                item.reject("Achievement requirements not met")
+            else:
+                seen.add((item.user_id, item.achievement_type))
+                stats = {"user_level": snapshot.level, "total_trades": snapshot.total_trades, "win_rate": snapshot.win_rate}
+                item.rarity = _calculate_nft_rarity(item.achievement_type, stats)
+                item.points = _calculate_genesis_points(item.achievement_type, item.rarity)
+                item.metadata = _create_nft_metadata(item.achievement_type, item.rarity, item.milestone_data, user, stats)
+                accepted.append(item)
+        
+        if accepted:
+            # Mints that raced this job are rejected by the unique index
+            inserted = await asyncio.to_thread(_insert_batch_artifacts, accepted, db)
+            already_minted.extend(item for item in accepted if item not in inserted)
+            accepted = inserted
+        
+        # Bring stale snapshots up to date
+        for item in already_minted:
+            await eligibility_engine.record_mint(item.user_id, item.achievement_type)
+        
+        if not accepted:
+            return
+        
+        # Pipeline on-chain mints with bounded concurrency
+        async def submit(item: BatchMintItem) -> str:
+            result = await _simulate_blockchain_minting(
+                item.user_id, item.token_id, item.achievement_type, item.rarity, item.points, item.metadata
+            )
+            return result["tx_hash"]
+        
+        await minter.submit_all(accepted, submit)
+        
+        minted = [item for item in accepted if item.status == MintItemStatus.MINTED]
+        xp_by_user = await asyncio.to_thread(_settle_batch_mint, accepted, db)
+        
+        for item in minted:
+            await eligibility_engine.record_mint(item.user_id, item.achievement_type)
+        for user_id in xp_by_user:
+            await cache.invalidate(ProfileCacheKeys.GENESIS_COLLECTION, user_id)
+            await cache.invalidate(ProfileCacheKeys.PRESTIGE_PROFILE, user_id)
+            await cache.invalidate(ProfileCacheKeys.CURRENT_USER, users[user_id].username)
+    except Exception:
+        await asyncio.to_thread(db.rollback)
+        raise
+    finally:
+        await asyncio.to_thread(db.close)
+
+
+def _load_batch_mint_state(user_ids: List[int], db: Session):
+    """Load a batch's users and the Genesis artifacts they already own, as (user_id, artifact_type) pairs"""
+    users = {}
+    existing = set()
+    for start in range(0, len(user_ids), BULK_QUERY_CHUNK):
+        chunk = user_ids[start:start + BULK_QUERY_CHUNK]
+        users.update({user.id: user for user in db.query(User).filter(User.id.in_(chunk))})
+        existing.update(_existing_genesis_artifacts(chunk, db))
+    return users, existing
+
+
+def _existing_genesis_artifacts(user_ids: List[int], db: Session):
+    return db.query(Artifact.user_id, Artifact.artifact_type).filter(
+        Artifact.user_id.in_(user_ids),
+        Artifact.artifact_type.like("genesis_%")
+    ).all()
+
+
+def _insert_batch_artifacts(items: List[BatchMintItem], db: Session) -> List[BatchMintItem]:
+    """
+    Insert all artifacts with one multi-row statement and return the inserted items.
+    
+    If a concurrent mint won the unique index for some items, they are
+    rejected and the rest are inserted again.
+    """
+    while items:
+        try:
+            token_ids = db.execute(
+                insert(Artifact).returning(Artifact.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "user_id": item.user_id,
+                        "artifact_type": f"genesis_{item.achievement_type}",
+                        "rarity": item.rarity,
+                        "bonus_percentage": _calculate_bonus_percentage(item.rarity),
+                        "is_equipped": False
+                    }
+                    for item in items
+                ]
+            ).scalars().all()
+        except IntegrityError:
+            db.rollback()
+            existing = set(_existing_genesis_artifacts(list({item.user_id for item in items}), db))
+            remaining = []
+            for item in items:
+                if (item.user_id, f"genesis_{item.achievement_type}") in existing:
+                    item.reject(ALREADY_MINTED)
+                else:
+                    remaining.append(item)
+            if len(remaining) == len(items):
+                raise
+            items = remaining
+            continue
+        for item, token_id in zip(items, token_ids):
+            item.token_id = token_id
+        db.commit()
+        return items
+    return []
+
+
+def _settle_batch_mint(items: List[BatchMintItem], db: Session) -> Dict[int, int]:
+    """Award XP for minted items and remove artifacts whose mint failed; returns the XP per user"""
+    xp_by_user: Dict[int, int] = {}
+    for item in items:
+        if item.status == MintItemStatus.MINTED:
+            xp_by_user[item.user_id] = xp_by_user.get(item.user_id, 0) + item.points
+    failed_token_ids = [item.token_id for item in items if item.status == MintItemStatus.FAILED]
+    
+    if xp_by_user:
+        users_table = User.__table__
+        db.execute(
+            update(users_table).where(users_table.c.id == bindparam("b_user_id")).values(
+                xp=users_table.c.xp + bindparam("b_points")
+            ),
+            [{"b_user_id": user_id, "b_points": points} for user_id, points in xp_by_user.items()]
+        )
+    if failed_token_ids:
+        db.query(Artifact).filter(Artifact.id.in_(failed_token_ids)).delete(synchronize_session=False)
+    db.commit()
+    return xp_by_user
+
+
 @router.get("/genesis/collection/{user_id}", response_model=NFTCollectionResponse)
 async def get_genesis_collection(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    cache: TieredCache = Depends(get_profile_cache)
 ):
     """Get user's Genesis NFT collection"""
     try:
-        # Get user's artifacts (representing NFTs)
-        artifacts = db.query(Artifact).filter(
-            Artifact.user_id == user_id,
-            Artifact.artifact_type.like("genesis_%")
-        ).all()
+        async def load_collection():
+            collection = _build_genesis_collection(user_id, db)
+            return collection.model_dump(mode="json")
         
-        if not artifacts:
-            return NFTCollectionResponse(
-                user_id=user_id,
-                total_nfts=0,
-                unique_achievements=0,
-                total_rarity_score=0.0,
-                featured_nft=None,
-                recent_nfts=[],
-                collection_value={"stellar_shards": 0.0, "lumina": 0.0}
-            )
-        
-        # Calculate collection stats
-        unique_achievements = len(set(artifact.artifact_type for artifact in artifacts))
-        total_rarity_score = sum(_get_rarity_score(artifact.rarity) for artifact in artifacts)
-        
-        # Get recent NFTs (last 5)
-        recent_artifacts = sorted(artifacts, key=lambda x: x.discovered_at, reverse=True)[:5]
-        
-        # Find featured NFT (highest rarity)
-        featured_artifact = max(artifacts, key=lambda x: _get_rarity_score(x.rarity))
-        
-        # Calculate collection value
-        collection_value = _calculate_collection_value(artifacts)
-        
-        # Convert artifacts to Genesis NFT responses
-        recent_nfts = []
-        for artifact in recent_artifacts:
-            achievement_type = artifact.artifact_type.replace("genesis_", "")
-            nft_id = _generate_nft_id(user_id, achievement_type)
-            
-            recent_nfts.append(GenesisNFTResponse(
-                nft_id=nft_id,
-                token_id=artifact.id,
-                achievement_type=achievement_type,
-                rarity=artifact.rarity,
-                points_earned=_calculate_genesis_points(achievement_type, artifact.rarity),
-                metadata=_create_nft_metadata(achievement_type, artifact.rarity, {}, None, {}),
-                minting_transaction=f"tx_{artifact.id}",
-                minting_status="minted",
-                created_at=artifact.discovered_at
-            ))
-        
-        # Featured NFT
-        featured_achievement_type = featured_artifact.artifact_type.replace("genesis_", "")
-        featured_nft = GenesisNFTResponse(
-            nft_id=_generate_nft_id(user_id, featured_achievement_type),
-            token_id=featured_artifact.id,
-            achievement_type=featured_achievement_type,
-            rarity=featured_artifact.rarity,
-            points_earned=_calculate_genesis_points(featured_achievement_type, featured_artifact.rarity),
-            metadata=_create_nft_metadata(featured_achievement_type, featured_artifact.rarity, {}, None, {}),
-            minting_transaction=f"tx_{featured_artifact.id}",
-            minting_status="minted",
-            created_at=featured_artifact.discovered_at
+        return await cache.get_or_load(
+            ProfileCacheKeys.GENESIS_COLLECTION, (user_id,), load_collection, ttl=COLLECTION_CACHE_TTL
         )
         
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get collection: {str(e)}")
+
+
+def _build_genesis_collection(user_id: int, db: Session) -> NFTCollectionResponse:
+    """Build the Genesis NFT collection view for a user"""
+    # Get user's artifacts (representing NFTs)
+    artifacts = db.query(Artifact).filter(
+        Artifact.user_id == user_id,
+        Artifact.artifact_type.like("genesis_%")
+    ).all()
+    
+    if not artifacts:
         return NFTCollectionResponse(
             user_id=user_id,
-            total_nfts=len(artifacts),
-            unique_achievements=unique_achievements,
-            total_rarity_score=total_rarity_score,
-            featured_nft=featured_nft,
-            recent_nfts=recent_nfts,
-            collection_value=collection_value
+            total_nfts=0,
+            unique_achievements=0,
+            total_rarity_score=0.0,
+            featured_nft=None,
+            recent_nfts=[],
+            collection_value={"stellar_shards": 0.0, "lumina": 0.0}
         )
+    
+    # Calculate collection stats
+    unique_achievements = len(set(artifact.artifact_type for artifact in artifacts))
+    total_rarity_score = sum(_get_rarity_score(artifact.rarity) for artifact in artifacts)
+    
+    # Get recent NFTs (last 5)
+    recent_artifacts = sorted(artifacts, key=lambda x: x.discovered_at, reverse=True)[:5]
+    
+    # Find featured NFT (highest rarity)
+    featured_artifact = max(artifacts, key=lambda x: _get_rarity_score(x.rarity))
+    
+    # Calculate collection value
+    collection_value = _calculate_collection_value(artifacts)
+    user = db.query(User).filter(User.id == user_id).first()
+    
+    # Convert artifacts to Genesis NFT responses
+    recent_nfts = []
+    for artifact in recent_artifacts:
+        achievement_type = artifact.artifact_type.replace("genesis_", "")
+        nft_id = _generate_nft_id(user_id, achievement_type)
         
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get collection: {str(e)}")
+        recent_nfts.append(GenesisNFTResponse(
+            nft_id=nft_id,
+            token_id=artifact.id,
+            achievement_type=achievement_type,
+            rarity=artifact.rarity,
+            points_earned=_calculate_genesis_points(achievement_type, artifact.rarity),
+            metadata=_create_nft_metadata(achievement_type, artifact.rarity, {}, user, {}),
+            minting_transaction=f"tx_{artifact.id}",
+            minting_status="minted",
+            created_at=artifact.discovered_at
+        ))
+    
+    # Featured NFT
+    featured_achievement_type = featured_artifact.artifact_type.replace("genesis_", "")
+    featured_nft = GenesisNFTResponse(
+        nft_id=_generate_nft_id(user_id, featured_achievement_type),
+        token_id=featured_artifact.id,
+        achievement_type=featured_achievement_type,
+        rarity=featured_artifact.rarity,
+        points_earned=_calculate_genesis_points(featured_achievement_type, featured_artifact.rarity),
+        metadata=_create_nft_metadata(featured_achievement_type, featured_artifact.rarity, {}, user, {}),
+        minting_transaction=f"tx_{featured_artifact.id}",
+        minting_status="minted",
+        created_at=featured_artifact.discovered_at
+    )
+    
+    return NFTCollectionResponse(
+        user_id=user_id,
+        total_nfts=len(artifacts),
+        unique_achievements=unique_achievements,
+        total_rarity_score=total_rarity_score,
+        featured_nft=featured_nft,
+        recent_nfts=recent_nfts,
+        collection_value=collection_value
+    )
 
 
 # NFT Marketplace endpoints
 @router.get("/marketplace", response_model=List[NFTMarketplaceItem])
 async def get_marketplace_listings(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    rarity: Optional[str] = Query(None, regex=r"^(common|rare|epic|legendary)$"),
+    cursor: Optional[str] = Query(None),
+    rarity: Optional[str] = Query(None, pattern=r"^(common|rare|epic|legendary)$"),
     achievement_type: Optional[str] = Query(None),
+    seller_id: Optional[int] = Query(None),
     min_price: Optional[float] = Query(None, ge=0),
     max_price: Optional[float] = Query(None, ge=0),
-    currency: Optional[str] = Query("stellar_shards", regex=r"^(stellar_shards|lumina)$"),
-    sort_by: str = Query("listed_at", regex=r"^(price|rarity|listed_at)$"),
-    sort_order: str = Query("desc", regex=r"^(asc|desc)$"),
+    currency: Optional[str] = Query("stellar_shards", pattern=r"^(stellar_shards|lumina)$"),
+    sort_by: str = Query("listed_at", pattern=r"^(price|rarity|listed_at)$"),
+    sort_order: str = Query("desc", pattern=r"^(asc|desc)$"),
     db: Session = Depends(get_db)
 ):
-    """Get NFT marketplace listings with filtering and sorting"""
+    """
+    Get NFT marketplace listings with filtering and sorting.
+
+    Pass the X-Next-Cursor header of a page as ``cursor`` to fetch the next one.
+    """
     try:
-        # For now, return mock marketplace data since we don't have a marketplace table
-        # In production, this would query a marketplace_listings table
-        mock_listings = _get_mock_marketplace_listings()
-        
-        # Apply filters
-        filtered_listings = mock_listings
-        
-        if rarity:
-            filtered_listings = [item for item in filtered_listings if item.rarity == rarity]
-        
-        if achievement_type:
-            filtered_listings = [item for item in filtered_listings if item.achievement_type == achievement_type]
-        
-        if min_price is not None:
-            filtered_listings = [item for item in filtered_listings if item.price >= min_price]
-        
-        if max_price is not None:
-            filtered_listings = [item for item in filtered_listings if item.price <= max_price]
-        
-        # Apply sorting
-        reverse = sort_order == "desc"
-        
-        if sort_by == "price":
-            filtered_listings.sort(key=lambda x: x.price, reverse=reverse)
-        elif sort_by == "rarity":
-            rarity_order = {"common": 1, "rare": 2, "epic": 3, "legendary": 4}
-            filtered_listings.sort(key=lambda x: rarity_order.get(x.rarity, 0), reverse=reverse)
-        else:  # listed_at
-            filtered_listings.sort(key=lambda x: x.listed_at, reverse=reverse)
-        
-        # Apply pagination
-        start_idx = skip
-        end_idx = skip + limit
-        paginated_listings = filtered_listings[start_idx:end_idx]
-        
-        return paginated_listings
+        page = query_listings(
+            db,
+            currency=currency or "stellar_shards",
+            rarity=rarity,
+            achievement_type=achievement_type,
+            seller_id=seller_id,
+            min_price=min_price,
+            max_price=max_price,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=limit,
+            cursor=cursor,
+            skip=skip
+        )
+        if page.next_cursor:
+            response.headers["X-Next-Cursor"] = page.next_cursor
+        return [_marketplace_item(row) for row in page.rows]
         
+    except MarketplaceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get marketplace listings: {str(e)}")
 
@@ -302,113 +578,84 @@ async def get_marketplace_listings(
 async def list_nft_for_sale(
     nft_id: str,
     price: float = Query(..., gt=0),
-    currency: str = Query("stellar_shards", regex=r"^(stellar_shards|lumina)$"),
+    currency: str = Query("stellar_shards", pattern=r"^(stellar_shards|lumina)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """List an NFT for sale on the marketplace"""
     try:
         # Parse NFT ID to get artifact ID
-        artifact_id = int(nft_id.split("_")[-1]) if "_" in nft_id else int(nft_id)
-        
-        # Verify user owns the NFT
-        artifact = db.query(Artifact).filter(
-            Artifact.id == artifact_id,
-            Artifact.user_id == current_user.id
-        ).first()
-        
-        if not artifact:
+        try:
+            artifact_id = int(nft_id.split("_")[-1]) if "_" in nft_id else int(nft_id)
+        except ValueError:
             raise HTTPException(status_code=404, detail="NFT not found or not owned by user")
         
-        # Check if already listed (in production, check marketplace_listings table)
-        # For now, just simulate the listing
-        
-        listing_data = {
-            "nft_id": nft_id,
-            "user_id": current_user.id,
-            "artifact_id": artifact_id,
-            "price": price,
-            "currency": currency,
-            "listed_at": datetime.utcnow(),
-            "status": "active"
-        }
-        
-        # In production, insert into marketplace_listings table
-        # db.add(MarketplaceListing(**listing_data))
-        # db.commit()
+        listing = create_listing(db, current_user.id, artifact_id, price, currency)
         
         return {
             "message": "NFT listed successfully",
-            "listing_id": f"listing_{artifact_id}",
+            "listing_id": listing.id,
             "nft_id": nft_id,
             "price": price,
             "currency": currency
         }
         
+    except MarketplaceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list NFT: {str(e)}")
 
 
 @router.post("/marketplace/buy/{listing_id}")
 async def buy_nft_from_marketplace(
-    listing_id: str,
+    listing_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    cache: TieredCache = Depends(get_profile_cache)
 ):
     """Buy an NFT from the marketplace"""
     try:
-        # In production, get the actual listing from marketplace_listings table
-        # For now, simulate the purchase
-        
-        # Validate user has enough currency
-        # This would check user's stellar_shards or lumina balance
-        
-        # Mock purchase validation
-        mock_price = 1000.0  # stellar_shards
-        user_balance = 5000.0  # mock balance
+        sale = buy_listing(db, listing_id, current_user.id)
         
-        if user_balance < mock_price:
-            raise HTTPException(
-                status_code=400,
-                detail="Insufficient balance to purchase this NFT"
-            )
-        
-        # Transfer ownership (in production)
-        # 1. Update artifact ownership
-        # 2. Deduct currency from buyer
-        # 3. Credit currency to seller (minus marketplace fee)
-        # 4. Update marketplace listing status
-        # 5. Create transaction record
+        # The artifact moved from the seller's collection to the buyer's
+        for user_id in (sale.buyer_id, sale.seller_id):
+            await cache.invalidate(ProfileCacheKeys.GENESIS_COLLECTION, user_id)
         
         return {
             "message": "NFT purchased successfully",
             "transaction_id": f"tx_{secrets.token_hex(16)}",
-            "listing_id": listing_id,
-            "price_paid": mock_price,
-            "currency": "stellar_shards"
+            "listing_id": sale.listing_id,
+            "nft_id": str(sale.artifact_id),
+            "price_paid": sale.price,
+            "marketplace_fee": sale.fee,
+            "currency": sale.currency
         }
         
+    except MarketplaceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to purchase NFT: {str(e)}")
 
 
 @router.delete("/marketplace/unlist/{listing_id}")
 async def unlist_nft_from_marketplace(
-    listing_id: str,
+    listing_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Remove an NFT listing from the marketplace"""
     try:
-        # In production, find and update the marketplace listing
-        # Verify user owns the listing
-        # Update status to 'cancelled'
+        cancel_listing(db, listing_id, current_user.id)
         
         return {
             "message": "NFT unlisted successfully",
             "listing_id": listing_id
         }
         
+    except MarketplaceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to unlist NFT: {str(e)}")
 
@@ -501,109 +748,6 @@ async def create_shareable_nft_content(
 
 
 # Helper functions
-async def _check_genesis_eligibility(user_id: int, achievement_type: str, milestone_data: Dict, db: Session) -> Dict:
-    """Check if user is eligible for Genesis NFT"""
-    user_stats = db.query(UserGameStats).filter(UserGameStats.user_id == user_id).first()
-    
-    eligibility = {"eligible": False, "reason": "", "stats": {}}
-    
-    if achievement_type == "first_trade":
-        # Check if user has made their first trade
-        if user_stats and user_stats.trades_executed > 0:
-            eligibility = {"eligible": True, "reason": "First trade completed", "stats": {"trades": user_stats.trades_executed}}
-    
-    elif achievement_type == "level_milestone":
-        required_level = milestone_data.get("level", 10)
-        if user_stats and user_stats.current_level >= required_level:
-            eligibility = {"eligible": True, "reason": f"Reached level {required_level}", "stats": {"level": user_stats.current_level}}
-    
-    elif achievement_type == "constellation_founder":
-        # Check if user founded a constellation
-        membership = db.query(ConstellationMembership).filter(
-            ConstellationMembership.user_id == user_id,
-            ConstellationMembership.role == "owner"
-        ).first()
-        if membership:
-            eligibility = {"eligible": True, "reason": "Founded a constellation", "stats": {"constellation_id": membership.constellation_id}}
-    
-    elif achievement_type == "viral_legend":
-        # Check viral content performance
-        viral_content = db.query(ViralContent).filter(ViralContent.user_id == user_id).all()
-        total_viral_score = sum(content.viral_score for content in viral_content)
-        if total_viral_score >= 1000:  # Threshold for viral legend
-            eligibility = {"eligible": True, "reason": "Achieved viral legend status", "stats": {"viral_score": total_viral_score}}
-    
-    elif achievement_type == "trading_master":
-        # Check trading performance
-        if user_stats and user_stats.stellar_shards_earned >= 100000:  # High earning threshold
-            eligibility = {"eligible": True, "reason": "Achieved trading master status", "stats": {"earnings": user_stats.stellar_shards_earned}}
-    
-    if not eligibility["eligible"]:
-        eligibility["reason"] = "Achievement requirements not met"
-    
-    return eligibility
-
-
-def _generate_nft_id(user_id: int, achievement_type: str) -> str:
-    """Generate unique NFT ID"""
-    timestamp = int(datetime.utcnow().timestamp())
-    data = f"{user_id}_{achievement_type}_{timestamp}"
-    hash_obj = hashlib.sha256(data.encode())
-    return f"genesis_{achievement_type}_{hash_obj.hexdigest()[:8]}"
-
-
-def _calculate_nft_rarity(achievement_type: str, stats: Dict) -> str:
-    """Calculate NFT rarity based on achievement and user stats"""
-    # Base rarity by achievement type
-    base_rarities = {
-        "first_trade": "common",
-        "level_milestone": "rare",
-        "constellation_founder": "epic",
-        "viral_legend": "legendary",
-        "trading_master": "legendary"
-    }
-    
-    base_rarity = base_rarities.get(achievement_type, "common")
-    
-    # Upgrade rarity based on stats (simplified logic)
-    if achievement_type == "level_milestone":
-        level = stats.get("level", 0)
-        if level >= 50:
-            return "legendary"
-        elif level >= 25:
-            return "epic"
-    
-    elif achievement_type == "viral_legend":
-        viral_score = stats.get("viral_score", 0)
-        if viral_score >= 5000:
-            return "legendary"
-    
-    return base_rarity
-
-
-def _calculate_genesis_points(achievement_type: str, rarity: str) -> int:
-    """Calculate points earned for Genesis NFT"""
-    base_points = {
-        "first_trade": 100,
-        "level_milestone": 250,
-        "constellation_founder": 500,
-        "viral_legend": 750,
-        "trading_master": 1000
-    }
-    
-    rarity_multiplier = {
-        "common": 1.0,
-        "rare": 1.5,
-        "epic": 2.0,
-        "legendary": 3.0
-    }
-    
-    base = base_points.get(achievement_type, 100)
-    multiplier = rarity_multiplier.get(rarity, 1.0)
-    
-    return int(base * multiplier)
-
-
 def _calculate_bonus_percentage(rarity: str) -> float:
     """Calculate bonus percentage for artifact"""
     bonus_map = {
@@ -615,129 +759,26 @@ def _calculate_bonus_percentage(rarity: str) -> float:
     return bonus_map.get(rarity, 5.0)
 
 
-def _create_nft_metadata(achievement_type: str, rarity: str, milestone_data: Dict, user: Optional[User], stats: Dict) -> Dict:
-    """Create NFT metadata"""
-    return {
-        "name": f"Genesis {achievement_type.replace('_', ' ').title()}",
-        "description": f"A {rarity} Genesis Seed NFT representing {achievement_type.replace('_', ' ')} achievement",
-        "image": f"https://api.astratrade.com/nft/image/genesis_{achievement_type}_{rarity}.png",
-        "attributes": [
-            {"trait_type": "Achievement", "value": achievement_type.replace('_', ' ').title()},
-            {"trait_type": "Rarity", "value": rarity.title()},
-            {"trait_type": "Power Level", "value": _calculate_bonus_percentage(rarity)},
-            {"trait_type": "Minted Date", "value": datetime.utcnow().isoformat()},
-        ],
-        "external_url": f"https://astratrade.com/nft/genesis/{achievement_type}",
-        "background_color": _get_rarity_color(rarity)
-    }
-
-
-async def _simulate_blockchain_minting(user_id: int, artifact_id: int, achievement_type: str, rarity: str, points: int, metadata: Dict) -> Dict:
-    """Simulate blockchain minting process"""
-    # In production, this would interact with actual Starknet contracts
-    tx_hash = f"0x{secrets.token_hex(32)}"
-    
-    return {
-        "tx_hash": tx_hash,
-        "block_number": 12345678,
-        "gas_used": 150000,
-        "status": "success"
-    }
-
-
-def _get_rarity_score(rarity: str) -> float:
-    """Get numeric rarity score"""
-    scores = {
-        "common": 1.0,
-        "rare": 2.5,
-        "epic": 5.0,
-        "legendary": 10.0
-    }
-    return scores.get(rarity, 1.0)
-
-
-def _calculate_collection_value(artifacts: List[Artifact]) -> Dict[str, float]:
-    """Calculate estimated collection value"""
-    total_stellar_shards = 0.0
-    total_lumina = 0.0
-    
-    for artifact in artifacts:
-        rarity_multiplier = _get_rarity_score(artifact.rarity)
-        base_value = 100.0  # Base value per NFT
-        
-        stellar_value = base_value * rarity_multiplier
-        lumina_value = stellar_value * 0.1  # 10% conversion rate
-        
-        total_stellar_shards += stellar_value
-        total_lumina += lumina_value
-    
-    return {
-        "stellar_shards": total_stellar_shards,
-        "lumina": total_lumina
-    }
-
-
-def _get_rarity_color(rarity: str) -> str:
-    """Get color code for rarity"""
-    colors = {
-        "common": "808080",  # Gray
-        "rare": "0099FF",    # Blue
-        "epic": "9966CC",    # Purple
-        "legendary": "FF6600" # Orange
-    }
-    return colors.get(rarity, "808080")
-
-
-def _get_mock_marketplace_listings() -> List[NFTMarketplaceItem]:
-    """Get mock marketplace listings for development"""
-    return [
-        NFTMarketplaceItem(
-            nft_id="genesis_first_trade_abc123",
-            token_id=1,
-            owner_address="0x1234567890abcdef",
-            owner_username="CosmicTrader",
-            price=500.0,
-            currency="stellar_shards",
-            rarity="common",
-            achievement_type="first_trade",
-            metadata={"power_level": 5.0},
-            listed_at=datetime.utcnow() - timedelta(hours=2),
-            is_featured=False
-        ),
-        NFTMarketplaceItem(
-            nft_id="genesis_constellation_founder_def456",
-            token_id=2,
-            owner_address="0xfedcba0987654321",
-            owner_username="StellarPioneer",
-            price=2500.0,
-            currency="stellar_shards",
-            rarity="epic",
-            achievement_type="constellation_founder",
-            metadata={"power_level": 20.0},
-            listed_at=datetime.utcnow() - timedelta(hours=1),
-            is_featured=True
-        ),
-        NFTMarketplaceItem(
-            nft_id="genesis_viral_legend_ghi789",
-            token_id=3,
-            owner_address="0x1122334455667788",
-            owner_username="ViralMaster",
-            price=5000.0,
-            currency="lumina",
-            rarity="legendary",
-            achievement_type="viral_legend",
-            metadata={"power_level": 35.0},
-            listed_at=datetime.utcnow() - timedelta(minutes=30),
-            is_featured=True
-        )
-    ]
-        
-        db.commit()
-        
-        return genesis_nft
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to mint Genesis NFT: {str(e)}")
+def _marketplace_item(row: ListingRow) -> NFTMarketplaceItem:
+    """API view of an active marketplace listing"""
+    listing = row.listing
+    return NFTMarketplaceItem(
+        listing_id=listing.id,
+        nft_id=f"genesis_{listing.achievement_type}_{listing.artifact_id}",
+        token_id=listing.artifact_id,
+        owner_address=row.seller_wallet or "",
+        owner_username=row.seller_username,
+        price=listing.price,
+        currency=listing.currency,
+        rarity=listing.rarity,
+        achievement_type=listing.achievement_type,
+        metadata={
+            "name": f"Genesis {listing.achievement_type.replace('_', ' ').title()}",
+            "power_level": _get_rarity_score(listing.rarity)
+        },
+        listed_at=listing.listed_at,
+        is_featured=listing.rarity_rank >= FEATURED_RARITY_RANK
+    )
 
 
 @router.get("/genesis/collection", response_model=NFTCollectionResponse)
@@ -800,222 +841,32 @@ async def get_user_nft_collection(
 @router.get("/genesis/eligible-achievements")
 async def get_eligible_achievements(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    eligibility_engine: GenesisEligibilityEngine = Depends(get_genesis_eligibility)
 ):
     """Get achievements eligible for Genesis NFT minting"""
     try:
-        game_stats = db.query(UserGameStats).filter(
-            UserGameStats.user_id == current_user.id
-        ).first()
+        async def load_snapshot():
+            return _load_eligibility_snapshot(current_user.id, db)
         
-        constellation_membership = db.query(ConstellationMembership).filter(
-            ConstellationMembership.user_id == current_user.id,
-            ConstellationMembership.is_active == True
-        ).first()
+        snapshot = await eligibility_engine.get(current_user.id, load_snapshot)
         
-        # Check existing Genesis NFTs
-        existing_artifacts = db.query(Artifact).filter(
-            Artifact.user_id == current_user.id,
-            Artifact.artifact_type.like("genesis_%")
-        ).all()
-        
-        existing_achievements = set(
-            artifact.artifact_type.replace("genesis_", "") 
-            for artifact in existing_artifacts
-        )
-        
-        eligible_achievements = []
-        
-        # First Trade Achievement
-        if "first_trade" not in existing_achievements and game_stats and game_stats.total_trades >= 1:
-            eligible_achievements.append({
-                "achievement_type": "first_trade",
-                "name": "Cosmic Genesis",
-                "description": "Your first step into the cosmic trading realm",
-                "rarity": "common",
-                "requirements_met": True,
-                "milestone_data": {"first_trade_date": game_stats.last_trade_date}
-            })
-        
-        # Level Milestone Achievement
-        if ("level_milestone" not in existing_achievements and 
-            current_user.level >= 25 and current_user.level % 25 == 0):
-            eligible_achievements.append({
-                "achievement_type": "level_milestone",
-                "name": "Stellar Ascension",
-                "description": f"Reached the prestigious Level {current_user.level}",
-                "rarity": "rare" if current_user.level >= 50 else "uncommon",
-                "requirements_met": True,
-                "milestone_data": {"level_achieved": current_user.level}
-            })
-        
-        # Constellation Founder Achievement
-        if ("constellation_founder" not in existing_achievements and 
-            constellation_membership and constellation_membership.role == "owner"):
-            eligible_achievements.append({
-                "achievement_type": "constellation_founder",
-                "name": "Constellation Pioneer",
-                "description": "Founded and lead a cosmic constellation",
-                "rarity": "epic",
-                "requirements_met": True,
-                "milestone_data": {
-                    "constellation_name": constellation_membership.constellation.name,
-                    "member_count": constellation_membership.constellation.member_count
-                }
-            })
-        
-        # Trading Master Achievement
-        if ("trading_master" not in existing_achievements and game_stats and 
-            game_stats.total_trades >= 1000 and 
-            (game_stats.successful_trades / game_stats.total_trades) >= 0.8):
-            eligible_achievements.append({
-                "achievement_type": "trading_master",
-                "name": "Cosmic Trading Sage",
-                "description": "Mastered the art of cosmic trading",
-                "rarity": "legendary",
-                "requirements_met": True,
-                "milestone_data": {
-                    "total_trades": game_stats.total_trades,
-                    "win_rate": (game_stats.successful_trades / game_stats.total_trades) * 100
-                }
-            })
-        
-        # Viral Legend Achievement
-        viral_content_count = db.query(ViralContent).filter(
-            ViralContent.user_id == current_user.id,
-            ViralContent.viral_score >= 500
-        ).count()
-        
-        if ("viral_legend" not in existing_achievements and viral_content_count >= 5):
-            eligible_achievements.append({
-                "achievement_type": "viral_legend",
-                "name": "Cosmic Influencer",
-                "description": "Created legendary viral content",
-                "rarity": "epic",
-                "requirements_met": True,
-                "milestone_data": {
-                    "viral_content_count": viral_content_count
-                }
-            })
+        eligible_achievements = [
+            _eligible_achievement_entry(achievement, snapshot)
+            for achievement in GenesisAchievement
+            if snapshot.available & achievement
+        ]
         
         return {
             "eligible_achievements": eligible_achievements,
             "total_eligible": len(eligible_achievements),
-            "existing_genesis_nfts": len(existing_achievements)
+            "existing_genesis_nfts": bin(snapshot.minted).count("1")
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get eligible achievements: {str(e)}")
 
 
-# NFT Marketplace endpoints
-@router.get("/marketplace", response_model=List[NFTMarketplaceItem])
-async def get_marketplace_items(
-    rarity: Optional[str] = Query(None),
-    achievement_type: Optional[str] = Query(None),
-    min_price: Optional[float] = Query(None),
-    max_price: Optional[float] = Query(None),
-    currency: str = Query("stellar_shards"),
-    sort_by: str = Query("listed_at", regex=r"^(price|listed_at|rarity)$"),
-    sort_order: str = Query("desc", regex=r"^(asc|desc)$"),
-    limit: int = Query(20, ge=1, le=50),
-    db: Session = Depends(get_db)
-):
-    """Get NFT marketplace listings"""
-    try:
-        # This would query a marketplace table in production
-        # For now, return mock marketplace data
-        mock_items = _get_mock_marketplace_items()
-        
-        # Apply filters
-        filtered_items = mock_items
-        
-        if rarity:
-            filtered_items = [item for item in filtered_items if item.rarity == rarity]
-        
-        if achievement_type:
-            filtered_items = [item for item in filtered_items if item.achievement_type == achievement_type]
-        
-        if min_price is not None:
-            filtered_items = [item for item in filtered_items if item.price >= min_price]
-        
-        if max_price is not None:
-            filtered_items = [item for item in filtered_items if item.price <= max_price]
-        
-        if currency:
-            filtered_items = [item for item in filtered_items if item.currency == currency]
-        
-        # Apply sorting
-        reverse = sort_order == "desc"
-        if sort_by == "price":
-            filtered_items.sort(key=lambda x: x.price, reverse=reverse)
-        elif sort_by == "rarity":
-            filtered_items.sort(key=lambda x: _get_rarity_score(x.rarity), reverse=reverse)
-        else:  # listed_at
-            filtered_items.sort(key=lambda x: x.listed_at, reverse=reverse)
-        
-        return filtered_items[:limit]
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get marketplace items: {str(e)}")
-
-
-# Shareable NFT content endpoints
-@router.post("/share", response_model=Dict[str, Any])
-async def create_shareable_nft_content(
-    request: ShareableNFTRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Create shareable content for an NFT"""
-    try:
-        # Get user's artifact/NFT
-        artifact = db.query(Artifact).filter(
-            Artifact.user_id == current_user.id,
-            Artifact.id == int(request.nft_id.split('_')[-1])  # Extract ID from nft_id
-        ).first()
-        
-        if not artifact:
-            raise HTTPException(status_code=404, detail="NFT not found")
-        
-        # Create shareable content
-        share_data = {
-            "nft_id": request.nft_id,
-            "owner": current_user.username,
-            "achievement_type": artifact.artifact_type.replace("genesis_", ""),
-            "rarity": artifact.rarity,
-            "minted_date": artifact.discovered_at.isoformat(),
-            "share_message": request.custom_message or f"Check out my {artifact.rarity} Genesis NFT!",
-            "share_url": f"https://astratrade.app/nft/{request.nft_id}",
-            "visual_style": "cosmic_showcase"
-        }
-        
-        # Create viral content for sharing
-        viral_content = ViralContent(
-            user_id=current_user.id,
-            content_type="nft",
-            content_title=f"Genesis NFT: {artifact.artifact_type.replace('genesis_', '').title()}",
-            content_description=f"{artifact.rarity.title()} rarity NFT owned by {current_user.username}",
-            content_data=share_data,
-            is_public=True,
-            moderation_status="approved"
-        )
-        
-        db.add(viral_content)
-        db.commit()
-        
-        return {
-            "message": "Shareable NFT content created",
-            "content_id": viral_content.id,
-            "share_url": share_data["share_url"],
-            "platforms": request.share_platforms,
-            "estimated_reach": len(request.share_platforms) * 100  # Mock engagement
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to create shareable content: {str(e)}")
-
-
 @router.get("/stats/global")
 async def get_global_nft_stats(
     db: Session = Depends(get_db)
@@ -1065,49 +916,120 @@ async def get_global_nft_stats(
 async def _check_genesis_eligibility(
     user_id: int,
     achievement_type: str,
-    milestone_data: Dict[str, Any],
-    db: Session
+    db: Session,
+    eligibility_engine: GenesisEligibilityEngine
 ) -> Dict[str, Any]:
     """Check if user is eligible for Genesis NFT"""
+    achievement = GenesisAchievement.from_type(achievement_type)
     
-    user = db.query(User).filter(User.id == user_id).first()
-    game_stats = db.query(UserGameStats).filter(
-        UserGameStats.user_id == user_id
-    ).first()
+    async def load_snapshot():
+        return _load_eligibility_snapshot(user_id, db)
     
-    # Check if user already has this Genesis NFT type
-    existing = db.query(Artifact).filter(
-        Artifact.user_id == user_id,
-        Artifact.artifact_type == f"genesis_{achievement_type}"
-    ).first()
+    snapshot = await eligibility_engine.get(user_id, load_snapshot)
+    if not snapshot.available & achievement and not snapshot.has_minted(achievement):
+        # Some counters are only refreshed when the snapshot expires; confirm a denial
+        snapshot = await eligibility_engine.refresh(user_id, load_snapshot)
     
-    if existing:
+    if snapshot.has_minted(achievement):
         return {"eligible": False, "reason": "Genesis NFT already minted for this achievement"}
     
-    eligibility_checks = {
-        "first_trade": lambda: game_stats and game_stats.total_trades >= 1,
-        "level_milestone": lambda: user.level >= 25,
-        "constellation_founder": lambda: _check_constellation_founder(user_id, db),
-        "viral_legend": lambda: _check_viral_legend(user_id, db),
-        "trading_master": lambda: (game_stats and 
-                                 game_stats.total_trades >= 1000 and
-                                 (game_stats.successful_trades / game_stats.total_trades) >= 0.8)
-    }
-    
-    check_function = eligibility_checks.get(achievement_type)
-    if not check_function or not check_function():
+    if not snapshot.available & achievement:
         return {"eligible": False, "reason": "Achievement requirements not met"}
     
     return {
         "eligible": True,
         "stats": {
-            "user_level": user.level,
-            "total_trades": game_stats.total_trades if game_stats else 0,
-            "win_rate": (game_stats.successful_trades / game_stats.total_trades) if game_stats and game_stats.total_trades > 0 else 0
+            "user_level": snapshot.level,
+            "total_trades": snapshot.total_trades,
+            "win_rate": snapshot.win_rate
         }
     }
 
 
+def _load_eligibility_snapshot(user_id: int, db: Session) -> EligibilitySnapshot:
+    """Build a user's eligibility snapshot from the database"""
+    return _load_eligibility_snapshots([user_id], db)[user_id]
+
+
+def _load_eligibility_snapshots(user_ids: List[int], db: Session) -> Dict[int, EligibilitySnapshot]:
+    """Build eligibility snapshots for many users with one query per table"""
+    snapshots = {}
+    for start in range(0, len(user_ids), BULK_QUERY_CHUNK):
+        chunk = user_ids[start:start + BULK_QUERY_CHUNK]
+        snapshots.update({user_id: EligibilitySnapshot(user_id=user_id) for user_id in chunk})
+        
+        for user_id, level in db.query(User.id, User.level).filter(User.id.in_(chunk)):
+            snapshots[user_id].level = level or 0
+        
+        for stats in db.query(UserGameStats).filter(UserGameStats.user_id.in_(chunk)):
+            snapshot = snapshots[stats.user_id]
+            snapshot.total_trades = stats.total_trades or 0
+            snapshot.successful_trades = stats.successful_trades or 0
+            if stats.last_trade_date:
+                snapshot.last_trade_at = stats.last_trade_date.replace(tzinfo=timezone.utc).timestamp()
+        
+        founded = db.query(ConstellationMembership.user_id, Constellation.id, Constellation.name).join(
+            Constellation, ConstellationMembership.constellation_id == Constellation.id
+        ).filter(
+            ConstellationMembership.user_id.in_(chunk),
+            ConstellationMembership.role == "owner",
+            ConstellationMembership.is_active == True
+        )
+        for user_id, constellation_id, name in founded:
+            snapshots[user_id].founded_constellation_id = constellation_id
+            snapshots[user_id].founded_constellation_name = name
+        
+        viral_hits = db.query(ViralContent.user_id, func.count(ViralContent.id)).filter(
+            ViralContent.user_id.in_(chunk),
+            ViralContent.viral_score >= VIRAL_HIT_SCORE
+        ).group_by(ViralContent.user_id)
+        for user_id, count in viral_hits:
+            snapshots[user_id].viral_hits = count
+        
+        minted = db.query(Artifact.user_id, Artifact.artifact_type).filter(
+            Artifact.user_id.in_(chunk),
+            Artifact.artifact_type.like("genesis_%")
+        )
+        for user_id, artifact_type in minted:
+            try:
+                snapshots[user_id].minted |= GenesisAchievement.from_type(artifact_type.replace("genesis_", ""))
+            except KeyError:
+                continue
+    
+    return snapshots
+
+
+def _eligible_achievement_entry(achievement: GenesisAchievement, snapshot: EligibilitySnapshot) -> Dict[str, Any]:
+    """Listing entry for a Genesis achievement the user can mint"""
+    if achievement == GenesisAchievement.FIRST_TRADE:
+        name, description, rarity = "Cosmic Genesis", "Your first step into the cosmic trading realm", "common"
+        milestone_data = {
+            "first_trade_date": datetime.utcfromtimestamp(snapshot.last_trade_at) if snapshot.last_trade_at else None
+        }
+    elif achievement == GenesisAchievement.LEVEL_MILESTONE:
+        name, description = "Stellar Ascension", f"Reached the prestigious Level {snapshot.level}"
+        rarity = "rare" if snapshot.level >= 50 else "uncommon"
+        milestone_data = {"level_achieved": snapshot.level}
+    elif achievement == GenesisAchievement.CONSTELLATION_FOUNDER:
+        name, description, rarity = "Constellation Pioneer", "Founded and lead a cosmic constellation", "epic"
+        milestone_data = {"constellation_name": snapshot.founded_constellation_name}
+    elif achievement == GenesisAchievement.VIRAL_LEGEND:
+        name, description, rarity = "Cosmic Influencer", "Created legendary viral content", "epic"
+        milestone_data = {"viral_content_count": snapshot.viral_hits}
+    else:
+        name, description, rarity = "Cosmic Trading Sage", "Mastered the art of cosmic trading", "legendary"
+        milestone_data = {"total_trades": snapshot.total_trades, "win_rate": snapshot.win_rate * 100}
+    
+    return {
+        "achievement_type": achievement.achievement_type,
+        "name": name,
+        "description": description,
+        "rarity": rarity,
+        "requirements_met": True,
+        "milestone_data": milestone_data
+    }
+
+
 def _generate_nft_id(user_id: int, achievement_type: str) -> str:
     """Generate unique NFT ID"""
     timestamp = int(datetime.utcnow().timestamp())
@@ -1202,38 +1124,6 @@ async def _simulate_blockchain_minting(
     }
 
 
-def _get_mock_marketplace_items() -> List[NFTMarketplaceItem]:
-    """Get mock marketplace items"""
-    return [
-        NFTMarketplaceItem(
-            nft_id="GENESIS_ABCD1234EFGH",
-            token_id=1,
-            owner_address="0x1234...5678",
-            owner_username="CosmicTrader",
-            price=50000.0,
-            currency="stellar_shards",
-            rarity="epic",
-            achievement_type="constellation_founder",
-            metadata={"name": "Genesis Constellation Founder"},
-            listed_at=datetime.utcnow() - timedelta(hours=2),
-            is_featured=True
-        ),
-        NFTMarketplaceItem(
-            nft_id="GENESIS_WXYZ9876STUV",
-            token_id=2,
-            owner_address="0x9876...3210",
-            owner_username="StellarExplorer",
-            price=25000.0,
-            currency="stellar_shards",
-            rarity="rare",
-            achievement_type="level_milestone",
-            metadata={"name": "Genesis Level Milestone"},
-            listed_at=datetime.utcnow() - timedelta(hours=6),
-            is_featured=False
-        )
-    ]
-
-
 def _get_rarity_score(rarity: str) -> float:
     """Get numerical score for rarity"""
     scores = {
@@ -1258,7 +1148,7 @@ def _get_rarity_color(rarity: str) -> str:
     return colors.get(rarity, "808080")
 
 
-def _calculate_collection_value(genesis_nfts: List[GenesisNFTResponse]) -> Dict[str, float]:
+def _calculate_collection_value(genesis_nfts: List[Union[GenesisNFTResponse, Artifact]]) -> Dict[str, float]:
     """Calculate collection value"""
     base_values = {
         "common": 1000.0,
@@ -1278,25 +1168,6 @@ def _calculate_collection_value(genesis_nfts: List[GenesisNFTResponse]) -> Dict[
     }
 
 
-def _check_constellation_founder(user_id: int, db: Session) -> bool:
-    """Check if user is constellation founder"""
-    membership = db.query(ConstellationMembership).filter(
-        ConstellationMembership.user_id == user_id,
-        ConstellationMembership.role == "owner",
-        ConstellationMembership.is_active == True
-    ).first()
-    return membership is not None
-
-
-def _check_viral_legend(user_id: int, db: Session) -> bool:
-    """Check if user qualifies as viral legend"""
-    viral_count = db.query(ViralContent).filter(
-        ViralContent.user_id == user_id,
-        ViralContent.viral_score >= 500
-    ).count()
-    return viral_count >= 5
-
-
 def _create_artifact_metadata(artifact: Artifact, user: User) -> Dict[str, Any]:
     """Create metadata for existing artifact"""
     achievement_type = artifact.artifact_type.replace("genesis_", "")
@@ -4,12 +4,15 @@ from typing import List, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
 
-from ...core.database import get_db
-from ...models.game_models import User, UserPrestige, UserGameStats, ConstellationMembership
-from ...auth.auth import get_current_active_user as get_current_user
+from ....core.database import get_db
+from ....core.tiered_cache import ProfileCacheKeys, TieredCache, get_profile_cache
+from ....models.game_models import User, UserPrestige, UserGameStats, ConstellationMembership
+from ....auth.auth import get_current_active_user as get_current_user
 
 router = APIRouter(prefix="/prestige", tags=["prestige"])
 
+PROFILE_CACHE_TTL = 300
+
 
 # Pydantic models
 class PrestigeResponse(BaseModel):
@@ -85,13 +88,29 @@ class CustomizationUpdate(BaseModel):
 @router.get("/profile/{user_id}", response_model=UserPrestigeProfile)
 async def get_user_prestige_profile(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    cache: TieredCache = Depends(get_profile_cache)
 ):
     """Get user's prestige profile"""
+    async def load_profile():
+        profile = _build_prestige_profile(user_id, db)
+        return profile.model_dump(mode="json") if profile else None
+    
+    profile = await cache.get_or_load(
+        ProfileCacheKeys.PRESTIGE_PROFILE, (user_id,), load_profile, ttl=PROFILE_CACHE_TTL
+    )
+    if profile is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return profile
+
+
+def _build_prestige_profile(user_id: int, db: Session) -> Optional[UserPrestigeProfile]:
+    """Build the joined prestige profile view for a user"""
     user = db.query(User).filter(User.id == user_id).first()
     
     if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+        return None
     
     # Get user's game stats
     game_stats = db.query(UserGameStats).filter(
@@ -252,7 +271,8 @@ async def get_spotlight_users(
 async def request_verification(
     verification_request: VerificationRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    cache: TieredCache = Depends(get_profile_cache)
 ):
     """Request user verification"""
     # Check if user already has prestige record
@@ -323,6 +343,7 @@ async def request_verification(
     prestige.social_rating = min(100.0, (win_rate * 50) + (game_stats.total_trades / 10))
     
     db.commit()
+    await cache.invalidate(ProfileCacheKeys.PRESTIGE_PROFILE, current_user.id)
     
     return {
         "message": "Verification successful",
@@ -335,7 +356,8 @@ async def request_verification(
 async def customize_profile(
     customization: CustomizationUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    cache: TieredCache = Depends(get_profile_cache)
 ):
     """Customize user profile appearance"""
     prestige = db.query(UserPrestige).filter(
@@ -370,6 +392,7 @@ async def customize_profile(
     
     prestige.updated_at = datetime.utcnow()
     db.commit()
+    await cache.invalidate(ProfileCacheKeys.PRESTIGE_PROFILE, current_user.id)
     
     return {"message": "Profile customization updated successfully"}
 
@@ -378,7 +401,8 @@ async def customize_profile(
 async def vote_for_spotlight(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    cache: TieredCache = Depends(get_profile_cache)
 ):
     """Vote for a user to be in spotlight"""
     if user_id == current_user.id:
@@ -419,6 +443,7 @@ async def vote_for_spotlight(
         target_prestige.spotlight_eligible = True
     
     db.commit()
+    await cache.invalidate(ProfileCacheKeys.PRESTIGE_PROFILE, user_id)
     
     return {"message": "Vote recorded successfully", "new_vote_count": target_prestige.spotlight_votes}
 
@@ -485,7 +510,8 @@ async def get_available_badges(
 @router.post("/update-social-metrics")
 async def update_social_metrics(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    cache: TieredCache = Depends(get_profile_cache)
 ):
     """Update user's social metrics based on recent activity"""
     prestige = db.query(UserPrestige).filter(
@@ -526,6 +552,7 @@ async def update_social_metrics(
         prestige.spotlight_eligible = True
     
     db.commit()
+    await cache.invalidate(ProfileCacheKeys.PRESTIGE_PROFILE, current_user.id)
     
     return {
         "message": "Social metrics updated",
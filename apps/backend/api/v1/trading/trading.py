@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import List, Optional
 import asyncio
 
 from dependencies import get_current_user, get_trading_service, get_db
 from schemas.trade import TradeRequest, TradeResponse, TradeHistoryResponse
 from services.trading_service import TradingService
+from ....services.live_events import LiveConnection, LiveEventRelay, get_live_events
+from ....services.llm_stream import format_sse
+from ....services.trading_domain import TradingDomainRuntime, get_trading_domain_runtime
+from ....domains.trading.value_objects import Asset, AssetCategory
 from models.user import User
 from core.rate_limiter import RateLimiter
 from core.monitoring import metrics
@@ -134,48 +138,63 @@ async def get_trading_statistics(
         "longest_streak": current_user.longest_streak
     })
 
-@router.ws("/live")
+@router.get("/recommendation/stream")
+async def stream_trading_recommendation(
+    asset: str,
+    category: AssetCategory = AssetCategory.CRYPTO,
+    current_user: User = Depends(get_current_user),
+    trading_domain: TradingDomainRuntime = Depends(get_trading_domain_runtime)
+):
+    """
+    Stream an AI trading recommendation as server-sent events.
+    
+    "delta" events carry the generated text as it arrives, "field" events
+    each recommendation field (action, confidence, ...) as soon as it is
+    complete, and a final "done" event the whole recommendation ("error"
+    if none could be generated).
+    """
+    try:
+        target = Asset(symbol=asset, name=asset, category=category)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def events():
+        # The session lives as long as the stream, not the request's dependencies
+        async with trading_domain.trading_service_session() as trading_domain_service:
+            async for event in trading_domain_service.stream_ai_trading_recommendation(current_user.id, target):
+                yield format_sse(event, event=event["type"])
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Proxies must pass chunks through instead of buffering the response
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/live")
 async def trading_websocket(
     websocket: WebSocket,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    live_events: LiveEventRelay = Depends(get_live_events)
 ):
     """
     WebSocket endpoint for live trading updates.
+    
+    Streams the user's domain events. This task reads client messages; the
+    relay's writer task sends events, so a slow client only backs up its own
+    queue (and is disconnected once that overflows).
     """
-    await websocket.accept()
+    connection = await live_events.connect(websocket, current_user.id)
     
     try:
-        # Subscribe to user's trading events
-        async with event_bus.subscribe(f"user:{current_user.id}:trades") as subscriber:
-            while True:
-                # Wait for either a message from client or a trading event
-                message_task = asyncio.create_task(websocket.receive_text())
-                event_task = asyncio.create_task(subscriber.get())
-                
-                done, pending = await asyncio.wait(
-                    {message_task, event_task},
-                    return_when=asyncio.FIRST_COMPLETED
-                )
-                
-                # Cancel pending tasks
-                for task in pending:
-                    task.cancel()
-                
-                # Handle completed task
-                for task in done:
-                    if task == message_task:
-                        # Handle client message (e.g., subscribe to specific assets)
-                        message = task.result()
-                        await handle_client_message(websocket, message)
-                    else:
-                        # Send trading event to client
-                        event = task.result()
-                        await websocket.send_json(event.to_dict())
-                        
-    except WebSocketDisconnect:
+        while True:
+            # Handle client message (e.g., filter to specific event types)
+            message = await live_events.receive(connection)
+            await handle_client_message(live_events, connection, message)
+    except (WebSocketDisconnect, asyncio.TimeoutError):
         pass
     finally:
-        await websocket.close()
+        await live_events.disconnect(connection)
 
 # Helper functions
 async def update_user_statistics(user_id: int, trade_id: int):
@@ -188,7 +207,6 @@ async def calculate_user_statistics(db, user_id: int) -> dict:
     # Implementation details...
     pass
 
-async def handle_client_message(websocket: WebSocket, message: str):
-    """Handle incoming WebSocket messages from client."""
-    # Implementation details...
-    pass
+async def handle_client_message(live_events: LiveEventRelay, connection: LiveConnection, message: str):
+    """Handle incoming WebSocket messages from client (subscribe/unsubscribe/ping)."""
+    live_events.handle_client_message(connection, message)
@@ -1,4 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from sqlalchemy import and_, or_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
@@ -9,15 +11,22 @@ from io import BytesIO
 from PIL import Image
 import random
 
-from ...core.database import get_db
-from ...models.game_models import (
+from ....core.database import SessionLocal, get_db
+from ....core.tiered_cache import ProfileCacheKeys, TieredCache, get_profile_cache
+from ....models.game_models import (
     User, ViralContent, FOMOEvent, FOMOEventParticipation, 
     UserGameStats, ConstellationMembership
 )
-from ...auth.auth import get_current_active_user as get_current_user
+from ....auth.auth import get_current_active_user as get_current_user
+from ....services.fomo_leaderboard import FOMOLeaderboard, get_fomo_leaderboard
+from ....services.share_aggregator import POINTS_PER_SHARE, ShareAggregator, get_share_aggregator
+from ....services.trending_index import TrendingShareFeed, get_trending_feed, trending_metadata
 
 router = APIRouter(prefix="/viral", tags=["viral_content"])
 
+SOCIAL_PROOF_CACHE_TTL = 60
+TRENDING_SCAN_LIMIT = 50
+
 
 # Pydantic models
 class ViralContentResponse(BaseModel):
@@ -229,11 +238,12 @@ async def share_meme(
     meme_id: int,
     request: ShareContentRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    trending: TrendingShareFeed = Depends(get_trending_feed),
+    shares: ShareAggregator = Depends(get_share_aggregator)
 ):
     """Share a meme to social platforms"""
     try:
-        # Get meme content
         viral_content = db.query(ViralContent).filter(
             ViralContent.id == meme_id,
             ViralContent.user_id == current_user.id
@@ -242,29 +252,26 @@ async def share_meme(
         if not viral_content:
             raise HTTPException(status_code=404, detail="Meme not found")
         
-        # Update share metrics
-        for platform in request.platforms:
-            current_shares = viral_content.platform_shares.get(platform, 0)
-            viral_content.platform_shares[platform] = current_shares + 1
-        
-        viral_content.share_count += len(request.platforms)
-        viral_content.viral_score += len(request.platforms) * 10  # 10 points per share
-        viral_content.last_shared_at = datetime.utcnow()
+        # Buffered and written to the row in the next batch flush
+        pending = await shares.record(meme_id, request.platforms)
+        share_count = viral_content.share_count + pending.shares
+        viral_score = viral_content.viral_score + pending.shares * POINTS_PER_SHARE
         
-        # Calculate engagement rate
-        time_since_creation = datetime.utcnow() - viral_content.created_at
-        hours_elapsed = max(1, time_since_creation.total_seconds() / 3600)
-        viral_content.engagement_rate = viral_content.share_count / hours_elapsed
-        
-        db.commit()
+        # Social proof reads trending content live from the index, so a
+        # share has no cached entry to invalidate
+        await trending.publish_share(
+            meme_id, len(request.platforms), {**trending_metadata(viral_content), "share_count": share_count}
+        )
         
         return {
             "message": "Meme shared successfully",
             "platforms": request.platforms,
-            "new_share_count": viral_content.share_count,
-            "viral_score": viral_content.viral_score
+            "new_share_count": share_count,
+            "viral_score": viral_score
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to share meme: {str(e)}")
 
@@ -370,38 +377,38 @@ async def get_active_fomo_events(
 async def participate_in_fomo_event(
     event_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    leaderboard: FOMOLeaderboard = Depends(get_fomo_leaderboard)
 ):
     """Participate in a FOMO event"""
     try:
-        # Get event
-        event = db.query(FOMOEvent).filter(
+        # Event, existing participation and game stats in a single round trip
+        row = db.query(FOMOEvent, FOMOEventParticipation, UserGameStats).outerjoin(
+            FOMOEventParticipation,
+            and_(
+                FOMOEventParticipation.event_id == FOMOEvent.id,
+                FOMOEventParticipation.user_id == current_user.id
+            )
+        ).outerjoin(
+            UserGameStats, UserGameStats.user_id == current_user.id
+        ).filter(
             FOMOEvent.id == event_id,
             FOMOEvent.is_active == True
         ).first()
         
-        if not event:
+        if not row:
             raise HTTPException(status_code=404, detail="FOMO event not found or inactive")
         
+        event, existing_participation, game_stats = row
+        
         # Check if event is still active
         now = datetime.utcnow()
         if now < event.start_time or now > event.end_time:
             raise HTTPException(status_code=400, detail="Event is not currently active")
         
-        # Check if user already participating
-        existing_participation = db.query(FOMOEventParticipation).filter(
-            FOMOEventParticipation.event_id == event_id,
-            FOMOEventParticipation.user_id == current_user.id
-        ).first()
-        
         if existing_participation:
             return existing_participation
         
-        # Check participation requirements
-        game_stats = db.query(UserGameStats).filter(
-            UserGameStats.user_id == current_user.id
-        ).first()
-        
         requirements_met = _check_event_requirements(event, current_user, game_stats)
         
         if not requirements_met["eligible"]:
@@ -410,28 +417,53 @@ async def participate_in_fomo_event(
                 detail=f"Requirements not met: {requirements_met['missing']}"
             )
         
-        # Check max participants
-        if event.max_participants and event.current_participants >= event.max_participants:
-            raise HTTPException(status_code=400, detail="Event is full")
-        
-        # Create participation
+        # Create participation; the (event_id, user_id) unique constraint
+        # resolves concurrent double-joins by the same user
         participation = FOMOEventParticipation(
             event_id=event_id,
             user_id=current_user.id,
+            participation_score=_calculate_participation_score(event, now),
             requirements_met=requirements_met["details"]
         )
-        
         db.add(participation)
-        
-        # Update event participant count
-        event.current_participants += 1
+        try:
+            db.flush()
+        except IntegrityError:
+            db.rollback()
+            return db.query(FOMOEventParticipation).filter(
+                FOMOEventParticipation.event_id == event_id,
+                FOMOEventParticipation.user_id == current_user.id
+            ).one()
+        
+        # Claim a slot atomically; the row lock serializes concurrent joins so
+        # the count is never lost and max_participants is never exceeded
+        claimed = db.execute(
+            update(FOMOEvent).where(
+                FOMOEvent.id == event_id,
+                or_(
+                    FOMOEvent.max_participants.is_(None),
+                    FOMOEvent.current_participants < FOMOEvent.max_participants
+                )
+            ).values(
+                current_participants=FOMOEvent.current_participants + 1
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+        
+        if not claimed:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Event is full")
         
         db.commit()
         db.refresh(participation)
         
+        await leaderboard.record(event_id, current_user.id, participation.participation_score)
+        
         return participation
         
+    except HTTPException:
+        raise
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to participate in event: {str(e)}")
 
 
@@ -439,88 +471,149 @@ async def participate_in_fomo_event(
 async def get_fomo_event_leaderboard(
     event_id: int,
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    leaderboard: FOMOLeaderboard = Depends(get_fomo_leaderboard)
 ):
     """Get FOMO event participation leaderboard"""
     try:
-        participations = db.query(FOMOEventParticipation, User).join(
+        if not await leaderboard.is_loaded(event_id):
+            await _rebuild_fomo_leaderboard(event_id, db, leaderboard)
+        
+        ranked = await leaderboard.top(event_id, limit)
+        if not ranked:
+            return []
+        
+        # Details for just this page, looked up by (event_id, user_id)
+        rows = db.query(FOMOEventParticipation, User.username).join(
             User, FOMOEventParticipation.user_id == User.id
         ).filter(
-            FOMOEventParticipation.event_id == event_id
-        ).order_by(
-            FOMOEventParticipation.participation_score.desc()
-        ).limit(limit).all()
+            FOMOEventParticipation.event_id == event_id,
+            FOMOEventParticipation.user_id.in_([user_id for _, user_id, _ in ranked])
+        ).all()
+        details = {participation.user_id: (participation, username) for participation, username in rows}
         
-        leaderboard = []
-        for rank, (participation, user) in enumerate(participations, start=1):
-            leaderboard.append({
+        return [
+            {
                 "rank": rank,
-                "username": user.username,
-                "participation_score": participation.participation_score,
-                "reward_earned": participation.reward_earned,
-                "joined_at": participation.joined_at
-            })
-        
-        return leaderboard
+                "username": details[user_id][1],
+                "participation_score": score,
+                "reward_earned": details[user_id][0].reward_earned,
+                "joined_at": details[user_id][0].joined_at
+            }
+            for rank, user_id, score in ranked
+            if user_id in details
+        ]
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get leaderboard: {str(e)}")
 
 
+@router.get("/fomo-events/{event_id}/rank")
+async def get_my_fomo_event_rank(
+    event_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    leaderboard: FOMOLeaderboard = Depends(get_fomo_leaderboard)
+):
+    """Get the current user's rank in a FOMO event"""
+    if not await leaderboard.is_loaded(event_id):
+        await _rebuild_fomo_leaderboard(event_id, db, leaderboard)
+    
+    rank = await leaderboard.rank(event_id, current_user.id)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="Not participating in this event")
+    
+    return {
+        "event_id": event_id,
+        "rank": rank,
+        "total_participants": await leaderboard.size(event_id)
+    }
+
+
+async def _rebuild_fomo_leaderboard(event_id: int, db: Session, leaderboard: FOMOLeaderboard) -> int:
+    """Load an event's ranked view from the database in one query"""
+    rows = db.query(
+        FOMOEventParticipation.user_id,
+        FOMOEventParticipation.participation_score
+    ).filter(
+        FOMOEventParticipation.event_id == event_id
+    ).all()
+    return await leaderboard.load(event_id, ((user_id, score or 0.0) for user_id, score in rows))
+
+
 # Social proof endpoints
 @router.get("/social-proof")
 async def get_social_proof_data(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    cache: TieredCache = Depends(get_profile_cache),
+    trending: TrendingShareFeed = Depends(get_trending_feed)
 ):
     """Get social proof data for viral features"""
     try:
-        # Get trending content
-        trending_content = db.query(ViralContent).filter(
-            ViralContent.is_public == True,
-            ViralContent.moderation_status == "approved",
-            ViralContent.created_at >= datetime.utcnow() - timedelta(days=7)
-        ).order_by(
-            ViralContent.viral_score.desc()
-        ).limit(10).all()
-        
-        # Get active FOMO events count
-        active_fomo_count = db.query(FOMOEvent).filter(
-            FOMOEvent.is_active == True,
-            FOMOEvent.start_time <= datetime.utcnow(),
-            FOMOEvent.end_time > datetime.utcnow()
-        ).count()
+        # Only the database-backed summary is cached; trending content and
+        # share counts change with every share and come from the index
+        async def load_community_summary():
+            return _build_community_summary(db)
         
-        # Get recent achievements
-        recent_achievements = _get_recent_community_achievements(db)
-        
-        return {
-            "trending_content": [
-                {
-                    "id": content.id,
-                    "title": content.content_title,
-                    "viral_score": content.viral_score,
-                    "share_count": content.share_count,
-                    "content_type": content.content_type
-                }
-                for content in trending_content
-            ],
-            "active_fomo_events": active_fomo_count,
-            "recent_achievements": recent_achievements,
-            "total_shares_today": sum(content.share_count for content in trending_content),
-            "viral_momentum": _calculate_viral_momentum(trending_content)
-        }
+        summary = await cache.get_or_load(
+            ProfileCacheKeys.SOCIAL_PROOF, ("summary",), load_community_summary, ttl=SOCIAL_PROOF_CACHE_TTL
+        )
+        # Normally warmed at startup; a worker that missed it warms here
+        await trending.ensure_loaded(SessionLocal)
+        return {**_build_trending_data(trending), **summary}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get social proof: {str(e)}")
 
 
+def _build_community_summary(db: Session) -> Dict[str, Any]:
+    """Active FOMO events and recent community achievements"""
+    active_fomo_count = db.query(FOMOEvent).filter(
+        FOMOEvent.is_active == True,
+        FOMOEvent.start_time <= datetime.utcnow(),
+        FOMOEvent.end_time > datetime.utcnow()
+    ).count()
+    
+    return {
+        "active_fomo_events": active_fomo_count,
+        "recent_achievements": _get_recent_community_achievements(db)
+    }
+
+
+def _build_trending_data(trending: TrendingShareFeed) -> Dict[str, Any]:
+    """Trending content and share activity from the trending index"""
+    index = trending.index
+    
+    # Trending content from the decayed index, amortized O(K)
+    trending_content = [
+        entry for entry in index.top(TRENDING_SCAN_LIMIT)
+        if entry.metadata.get("is_listed", True)
+    ][:10]
+    
+    return {
+        "trending_content": [
+            {
+                "id": entry.content_id,
+                "title": entry.metadata.get("title"),
+                "viral_score": round(entry.score, 2),
+                "share_count": entry.metadata.get("share_count", 0),
+                "content_type": entry.metadata.get("content_type")
+            }
+            for entry in trending_content
+        ],
+        "total_shares_today": index.shares_last_24h(),
+        "viral_momentum": index.momentum()
+    }
+
+
 # Content moderation endpoints
 @router.get("/content/user", response_model=List[ViralContentResponse])
 async def get_user_viral_content(
     content_type: Optional[str] = Query(None),
     limit: int = Query(20, ge=1, le=50),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    shares: ShareAggregator = Depends(get_share_aggregator)
 ):
     """Get user's viral content"""
     try:
@@ -535,13 +628,28 @@ async def get_user_viral_content(
             ViralContent.created_at.desc()
         ).limit(limit).all()
         
-        return content
+        return [_with_pending_shares(item, shares) for item in content]
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get user content: {str(e)}")
 
 
 # Helper functions
+def _with_pending_shares(content: ViralContent, shares: ShareAggregator) -> ViralContentResponse:
+    """Add shares that are still buffered, so the sharer sees their own shares immediately"""
+    response = ViralContentResponse.model_validate(content)
+    pending = shares.pending(content.id)
+    if pending.shares:
+        response.share_count += pending.shares
+        response.viral_score += pending.shares * POINTS_PER_SHARE
+        response.platform_shares = {
+            platform: response.platform_shares.get(platform, 0) + pending.platforms.get(platform, 0)
+            for platform in {*response.platform_shares, *pending.platforms}
+        }
+        response.last_shared_at = max(response.last_shared_at, datetime.utcfromtimestamp(pending.last_shared_at))
+    return response
+
+
 def _generate_meme_content(
     meme_type: str,
     game_stats: UserGameStats,
@@ -622,6 +730,14 @@ def _get_user_achievements(game_stats: UserGameStats, user: User) -> List[Dict[s
     return achievements
 
 
+def _calculate_participation_score(event: FOMOEvent, joined_at: datetime) -> float:
+    """Score a join: earlier joins in more urgent events score higher"""
+    window = (event.end_time - event.start_time).total_seconds()
+    remaining = max(0.0, (event.end_time - joined_at).total_seconds())
+    time_factor = remaining / window if window > 0 else 0.0
+    return round(100.0 * time_factor * (event.urgency_level or 1), 2)
+
+
 def _check_event_requirements(
     event: FOMOEvent,
     user: User,
@@ -679,14 +795,3 @@ def _get_recent_community_achievements(db: Session) -> List[Dict[str, Any]]:
             "timestamp": datetime.utcnow() - timedelta(hours=4)
         }
     ]
-
-
-def _calculate_viral_momentum(content_list: List[ViralContent]) -> float:
-    """Calculate viral momentum score"""
-    if not content_list:
-        return 0.0
-    
-    total_score = sum(content.viral_score for content in content_list)
-    time_factor = len(content_list) / 7  # Normalize by week
-    
-    return min(100.0, total_score * time_factor / 100)
\ No newline at end of file
@@ -88,4 +88,11 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
     """Get the current active user."""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+
+def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+    """Get the current user if they are a system admin."""
+    if current_user.username not in settings.admin_usernames:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
     return current_user
\ No newline at end of file
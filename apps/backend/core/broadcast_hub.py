@@ -0,0 +1,276 @@
+"""
+WebSocket broadcast hub
+
+Fans messages out to many WebSocket connections without letting one slow
+client delay the others.
+
+A message is serialized once per publish and the same frame object is
+queued for every subscriber of its topic. Each connection has its own
+bounded send queue drained by its own writer task, so publishing never
+awaits a socket. When a queue is full the connection's SlowConsumerPolicy
+decides what happens: drop the oldest queued frame (latest-value streams
+such as tickers), drop the new frame, or disconnect the client. A writer
+stuck in a single send for longer than ``send_timeout`` is disconnected
+as well.
+
+Connections subscribe to topics (for example one per symbol); the "*"
+topic receives everything. Per connection the hub holds a queue and a
+task, which keeps 10k+ sockets per worker within a few tens of MB.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+ALL_TOPICS = "*"
+
+# Close code sent to clients disconnected for falling behind (RFC 6455: 1008 policy violation)
+SLOW_CONSUMER_CLOSE_CODE = 1008
+
+
+class SlowConsumerPolicy(str, Enum):
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEW = "drop_new"
+    DISCONNECT = "disconnect"
+
+
+@dataclass
+class HubMetrics:
+    messages_published: int = 0
+    frames_queued: int = 0
+    frames_sent: int = 0
+    frames_dropped: int = 0
+    slow_disconnects: int = 0
+    send_errors: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+Frame = Union[str, bytes]
+
+
+class Subscriber:
+    """One connection: its topics, send queue and writer task."""
+
+    def __init__(self, hub: "BroadcastHub", websocket: Any, max_queue: int, policy: SlowConsumerPolicy):
+        self.hub = hub
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.policy = policy
+        self.topics: Set[str] = set()
+        self.frames_dropped = 0
+        self.closed = False
+        self.sending_since: Optional[float] = None
+        self._queue: Deque[Frame] = deque()
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def offer(self, frame: Frame) -> bool:
+        """Queue a frame without waiting; False if the policy rejected it."""
+        if self.closed:
+            return False
+        if len(self._queue) >= self.max_queue:
+            if self.policy == SlowConsumerPolicy.DROP_OLDEST:
+                self._queue.popleft()
+                self._dropped()
+            elif self.policy == SlowConsumerPolicy.DROP_NEW:
+                self._dropped()
+                return False
+            else:
+                self.hub._schedule_disconnect(self, SLOW_CONSUMER_CLOSE_CODE, slow=True)
+                return False
+        self._queue.append(frame)
+        self._ready.set()
+        self.hub.metrics.frames_queued += 1
+        return True
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def _write_loop(self) -> None:
+        websocket = self.websocket
+        while True:
+            if not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            frame = self._queue.popleft()
+            # Watched by the hub's watchdog instead of a wait_for task per send
+            self.sending_since = time.monotonic()
+            try:
+                if isinstance(frame, bytes):
+                    await websocket.send_bytes(frame)
+                else:
+                    await websocket.send_text(frame)
+                self.hub.metrics.frames_sent += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"WebSocket send failed, dropping connection: {e}")
+                self.hub.metrics.send_errors += 1
+                self.hub._schedule_disconnect(self)
+                return
+            finally:
+                self.sending_since = None
+
+    def _dropped(self) -> None:
+        self.frames_dropped += 1
+        self.hub.metrics.frames_dropped += 1
+
+
+class BroadcastHub:
+    """Topic-based fan-out to WebSocket connections."""
+
+    def __init__(
+        self,
+        max_queue: int = 64,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_OLDEST,
+        send_timeout: float = 10.0
+    ):
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.metrics = HubMetrics()
+        self._subscribers: Set[Subscriber] = set()
+        self._topics: Dict[str, Set[Subscriber]] = {}
+        self._closing: Set[asyncio.Task] = set()
+        self._watchdog: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    async def connect(
+        self,
+        websocket: Any,
+        topics: Iterable[str] = (ALL_TOPICS,),
+        policy: Optional[SlowConsumerPolicy] = None,
+        accept: bool = True
+    ) -> Subscriber:
+        """Accept a WebSocket and register it with its own writer task."""
+        if accept:
+            await websocket.accept()
+        subscriber = Subscriber(self, websocket, self.max_queue, policy or self.policy)
+        self._subscribers.add(subscriber)
+        self.subscribe(subscriber, topics)
+        subscriber.start()
+        if self._watchdog is None or self._watchdog.done():
+            self._watchdog = asyncio.create_task(self._watch_sends())
+        return subscriber
+
+    def subscribe(self, subscriber: Subscriber, topics: Iterable[str]) -> None:
+        for topic in topics:
+            subscriber.topics.add(topic)
+            self._topics.setdefault(topic, set()).add(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber, topics: Iterable[str]) -> None:
+        for topic in topics:
+            subscriber.topics.discard(topic)
+            members = self._topics.get(topic)
+            if members is not None:
+                members.discard(subscriber)
+                if not members:
+                    del self._topics[topic]
+
+    def publish(self, topic: str, message: Any) -> int:
+        """
+        Queue a message for every subscriber of ``topic`` (and of "*").
+
+        ``message`` is sent as is when it is str or bytes, and JSON-encoded
+        once otherwise. Returns the number of connections it was queued for.
+        """
+        frame = encode_frame(message)
+        self.metrics.messages_published += 1
+        delivered = 0
+        # offer() never awaits and disconnects are scheduled, so the sets are stable here
+        for subscriber in self._topics.get(topic, ()):
+            delivered += subscriber.offer(frame)
+        if topic != ALL_TOPICS:
+            for subscriber in self._topics.get(ALL_TOPICS, ()):
+                if topic not in subscriber.topics:
+                    delivered += subscriber.offer(frame)
+        return delivered
+
+    def send(self, subscriber: Subscriber, message: Any) -> bool:
+        """Queue a message for one connection, behind what is already queued."""
+        return subscriber.offer(encode_frame(message))
+
+    async def disconnect(self, subscriber: Subscriber, code: Optional[int] = None) -> None:
+        """Unregister a connection and stop its writer; closes the socket when ``code`` is given."""
+        if subscriber.closed:
+            return
+        subscriber.closed = True
+        await self._disconnect(subscriber, code)
+
+    async def _disconnect(self, subscriber: Subscriber, code: Optional[int]) -> None:
+        self.unsubscribe(subscriber, list(subscriber.topics))
+        self._subscribers.discard(subscriber)
+        writer = subscriber._writer
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+        if code is not None:
+            try:
+                await subscriber.websocket.close(code=code)
+            except Exception:
+                pass
+
+    async def close(self) -> None:
+        """Disconnect every connection."""
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            await asyncio.gather(self._watchdog, return_exceptions=True)
+            self._watchdog = None
+        subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.closed = True
+        await asyncio.gather(
+            *(self._disconnect(subscriber, code=1001) for subscriber in subscribers),
+            *list(self._closing),
+            return_exceptions=True
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self._subscribers),
+            "topics": {topic: len(members) for topic, members in self._topics.items()},
+            **self.metrics.to_dict()
+        }
+
+    async def _watch_sends(self) -> None:
+        """Disconnect connections stuck in one send for longer than send_timeout."""
+        interval = self.send_timeout / 2
+        while self._subscribers:
+            await asyncio.sleep(interval)
+            deadline = time.monotonic() - self.send_timeout
+            for subscriber in list(self._subscribers):
+                if subscriber.sending_since is not None and subscriber.sending_since < deadline:
+                    self._schedule_disconnect(subscriber, SLOW_CONSUMER_CLOSE_CODE, slow=True)
+
+    def _schedule_disconnect(self, subscriber: Subscriber, code: Optional[int] = None, slow: bool = False) -> None:
+        if subscriber.closed:
+            return
+        # Stop queueing right away; the socket is closed by the task
+        subscriber.closed = True
+        if slow:
+            self.metrics.slow_disconnects += 1
+        task = asyncio.create_task(self._disconnect(subscriber, code))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+
+def encode_frame(message: Any) -> Frame:
+    if isinstance(message, (str, bytes)):
+        return message
+    return json.dumps(message, separators=(",", ":"), default=str)
@@ -0,0 +1,350 @@
+"""
+Cache subsystem
+
+Shared cache layer used by repositories and services:
+- CacheKeys / cache_key_builder: typed key namespaces and key construction
+- Serializers: json (stdlib), orjson and msgpack, chosen per cache
+- Versioned namespaces: invalidating a namespace bumps a counter, so keys
+  from older versions are never read again and simply expire via TTL
+  (no SCAN + DELETE over the keyspace)
+- Stampede protection: concurrent misses for the same key share one load
+  in-process, and a short Redis lock keeps other workers from loading it too
+- Backends: Redis (redis.asyncio) and an in-memory LRU fallback so the app
+  runs without Redis
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, Optional, Protocol, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "astratrade"
+
+
+class CacheKeys:
+    """Cache key namespaces."""
+    USER_BY_ID = "user:id"
+    USER_BY_USERNAME = "user:username"
+    LEADERBOARD = "leaderboard"
+
+
+def cache_key_builder(namespace: str, *parts: Any) -> str:
+    """Build a cache key: ``astratrade:<namespace>:<part>:<part>...``"""
+    return ":".join([KEY_PREFIX, namespace, *(str(part) for part in parts)])
+
+
+# Serializers
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, set):
+        return list(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__} for cache")
+
+
+class JsonSerializer:
+    """Standard library JSON serializer (always available)."""
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer:
+    """orjson serializer, several times faster than stdlib json."""
+    name = "orjson"
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackSerializer:
+    """msgpack serializer, compact binary encoding for large values."""
+    name = "msgpack"
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=_json_default, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def get_serializer(name: str = "orjson"):
+    """Get a serializer by name, falling back to stdlib json if the library is missing."""
+    if name == "orjson" and orjson is not None:
+        return OrjsonSerializer()
+    if name == "msgpack" and msgpack is not None:
+        return MsgpackSerializer()
+    if name not in ("json", "orjson", "msgpack"):
+        raise ValueError(f"Unknown cache serializer: {name}")
+    if name != "json":
+        logger.warning(f"{name} is not installed, using json cache serializer")
+    return JsonSerializer()
+
+
+# Backends
+
+class CacheBackend(Protocol):
+    """Raw byte storage used by Cache."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        ...
+
+    async def add(self, key: str, value: bytes, ttl: int) -> bool:
+        """Set only if the key does not exist. Returns True if it was set."""
+        ...
+
+    async def delete(self, *keys: str) -> None:
+        ...
+
+    async def incr(self, key: str) -> int:
+        ...
+
+
+class RedisCacheBackend:
+    """Cache backend on a redis.asyncio client."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        await self.client.set(key, value, ex=ttl)
+
+    async def add(self, key: str, value: bytes, ttl: int) -> bool:
+        return bool(await self.client.set(key, value, ex=ttl, nx=True))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+
+class InMemoryCacheBackend:
+    """Process-local LRU cache backend with TTLs, used when Redis is unavailable."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+
+    def _live_entry(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at = entry[1]
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, value: Any, ttl: Optional[int]) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._live_entry(key)
+        return entry[0] if entry else None
+
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        self._store(key, value, ttl)
+
+    async def add(self, key: str, value: bytes, ttl: int) -> bool:
+        if self._live_entry(key) is not None:
+            return False
+        self._store(key, value, ttl)
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        entry = self._live_entry(key)
+        value = int(entry[0]) + 1 if entry else 1
+        self._store(key, str(value).encode(), None)
+        return value
+
+
+class Cache:
+    """
+    Serializing cache with versioned namespaces and stampede protection.
+
+    Keys passed to get/set are used as-is. Use ``key()`` to build a key in a
+    versioned namespace and ``invalidate_namespace()`` to drop every key in
+    it at once.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        serializer: str = "orjson",
+        default_ttl: int = 300,
+        ttl_jitter: float = 0.1,
+        lock_ttl: int = 10,
+        lock_wait: float = 2.0
+    ):
+        self.backend = backend
+        self.serializer = get_serializer(serializer)
+        self.default_ttl = default_ttl
+        self.ttl_jitter = ttl_jitter
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on a miss."""
+        data = await self.backend.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.serializer.loads(data)
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Cache a value. The TTL is jittered so keys written together don't expire together."""
+        await self.backend.set(key, self.serializer.dumps(value), self._jittered(ttl or self.default_ttl))
+
+    async def delete(self, *keys: str) -> None:
+        await self.backend.delete(*keys)
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None
+    ) -> Any:
+        """
+        Get a value, loading and caching it on a miss.
+
+        Concurrent misses in this process await a single loader call; across
+        processes a short lock lets one worker load while others wait briefly
+        for the result. ``None`` results are not cached.
+        """
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._load_with_lock(key, loader, ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _load_with_lock(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int]
+    ) -> Any:
+        lock_key = f"{key}:lock"
+        if not await self.backend.add(lock_key, b"1", self.lock_ttl):
+            # Another worker is loading this key; wait for it to fill the cache
+            deadline = time.monotonic() + self.lock_wait
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                cached = await self.get(key)
+                if cached is not None:
+                    return cached
+            logger.warning(f"Timed out waiting for cache fill of {key}, loading directly")
+            return await loader()
+
+        try:
+            value = await loader()
+            if value is not None:
+                await self.set(key, value, ttl)
+            return value
+        finally:
+            await self.backend.delete(lock_key)
+
+    # Versioned namespaces
+
+    async def namespace_version(self, namespace: str) -> int:
+        data = await self.backend.get(self._version_key(namespace))
+        return int(data) if data is not None else 0
+
+    async def key(self, namespace: str, *parts: Any) -> str:
+        """Build a key inside the current version of a namespace."""
+        version = await self.namespace_version(namespace)
+        return cache_key_builder(namespace, f"v{version}", *parts)
+
+    async def invalidate_namespace(self, namespace: str) -> int:
+        """Invalidate every key in a namespace by bumping its version."""
+        return await self.backend.incr(self._version_key(namespace))
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "serializer": self.serializer.name
+        }
+
+    @staticmethod
+    def _version_key(namespace: str) -> str:
+        return cache_key_builder("ns-version", namespace)
+
+    def _jittered(self, ttl: int) -> int:
+        if not self.ttl_jitter:
+            return ttl
+        return max(1, int(ttl * (1 + random.uniform(-self.ttl_jitter, self.ttl_jitter))))
+
+
+def create_cache(redis_client=None, serializer: str = "orjson", **kwargs) -> Cache:
+    """Create a cache on Redis when a client is given, in memory otherwise."""
+    backend = RedisCacheBackend(redis_client) if redis_client is not None else InMemoryCacheBackend()
+    return Cache(backend, serializer=serializer, **kwargs)
@@ -0,0 +1,201 @@
+"""
+Candle aggregation
+
+Aggregates ticks into OHLCV bars per symbol and interval (1m, 5m, 1h, 1d),
+kept in fixed-size NumPy ring buffers so history is stable between
+requests and memory does not grow.
+
+Every ring stores each row twice, at ``i`` and ``i + capacity``, so the
+latest ``n`` bars are always one contiguous range: ``latest(n)`` returns a
+read-only view of the buffer instead of copying it. The last row is the
+open bar and is updated in place.
+
+Higher intervals roll up from lower ones: a tick updates the 1m bar and
+the open bar of every interval it nests into, and bars ingested in bulk
+(backfill from the exchange's klines, or the simulator's history) are
+folded into each higher interval with ``np.ufunc.reduceat``. The
+aggregator only sees ticks and bars, so it works the same behind the
+market simulator and the exchange feed.
+"""
+
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Row layout
+TIMESTAMP, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+# Interval -> (seconds, bars kept)
+DEFAULT_INTERVALS = {
+    "1m": (60, 1440),
+    "5m": (300, 2016),
+    "1h": (3600, 720),
+    "1d": (86400, 365),
+}
+
+
+class CandleRing:
+    """Fixed-size OHLCV history for one symbol and interval."""
+
+    def __init__(self, seconds: int, capacity: int):
+        self.seconds = seconds
+        self.capacity = capacity
+        self.late_bars = 0
+        self._data = np.zeros((2 * capacity, 6))
+        self._written = 0
+
+    def __len__(self) -> int:
+        return min(self._written, self.capacity)
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        if not self._written:
+            return None
+        return float(self._data[(self._written - 1) % self.capacity, TIMESTAMP])
+
+    def merge(self, timestamp: float, open_: float, high: float, low: float, close: float, volume: float) -> bool:
+        """
+        Fold a bar (or a tick, with open=high=low=close) into the bar of its bucket.
+
+        Buckets skipped since the last bar are filled with flat bars at the
+        previous close. Returns False for data older than the open bar.
+        """
+        bucket = timestamp - timestamp % self.seconds
+        last = self.last_timestamp
+        if last is not None and bucket < last:
+            self.late_bars += 1
+            return False
+
+        if last is not None and bucket == last:
+            slot = (self._written - 1) % self.capacity
+            row = self._data[slot]
+            self._write(slot, (
+                bucket, row[OPEN], max(row[HIGH], high), min(row[LOW], low), close, row[VOLUME] + volume
+            ))
+            return True
+
+        if last is not None:
+            previous_close = float(self._data[(self._written - 1) % self.capacity, CLOSE])
+            missing = min(int((bucket - last) // self.seconds) - 1, self.capacity)
+            for step in range(missing, 0, -1):
+                gap = bucket - step * self.seconds
+                self._append((gap, previous_close, previous_close, previous_close, previous_close, 0.0))
+        self._append((bucket, open_, high, low, close, volume))
+        return True
+
+    def latest(self, limit: Optional[int] = None) -> np.ndarray:
+        """
+        Read-only view of the newest ``limit`` bars, oldest first.
+
+        The view follows later ingests; copy it to keep a snapshot.
+        """
+        count = len(self) if limit is None else max(0, min(limit, len(self)))
+        # Rows just before the next slot's upper copy are always the newest ones
+        end = self._written % self.capacity + self.capacity
+        view = self._data[end - count:end]
+        view.flags.writeable = False
+        return view
+
+    def _append(self, row) -> None:
+        self._write(self._written % self.capacity, row)
+        self._written += 1
+
+    def _write(self, slot: int, row) -> None:
+        self._data[slot] = row
+        self._data[slot + self.capacity] = row
+
+
+def rollup(bars: np.ndarray, seconds: int) -> np.ndarray:
+    """Aggregate time-ordered bars into ``seconds``-wide bars."""
+    if not len(bars):
+        return np.zeros((0, 6))
+    buckets = bars[:, TIMESTAMP] - bars[:, TIMESTAMP] % seconds
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(bars)] - 1
+    rolled = np.empty((len(starts), 6))
+    rolled[:, TIMESTAMP] = buckets[starts]
+    rolled[:, OPEN] = bars[starts, OPEN]
+    rolled[:, HIGH] = np.maximum.reduceat(bars[:, HIGH], starts)
+    rolled[:, LOW] = np.minimum.reduceat(bars[:, LOW], starts)
+    rolled[:, CLOSE] = bars[ends, CLOSE]
+    rolled[:, VOLUME] = np.add.reduceat(bars[:, VOLUME], starts)
+    return rolled
+
+
+def bars_from_klines(klines: Iterable[Sequence[float]]) -> np.ndarray:
+    """Exchange klines ([open time ms, open, high, low, close, volume, ...]) as bar rows."""
+    bars = np.array([row[:6] for row in klines], dtype=float).reshape(-1, 6)
+    bars[:, TIMESTAMP] /= 1000
+    return bars[np.argsort(bars[:, TIMESTAMP], kind="stable")]
+
+
+class CandleAggregator:
+    """Candle history for every symbol, fed with ticks or bars from any source."""
+
+    def __init__(self, intervals: Optional[Dict[str, tuple]] = None):
+        self.intervals = dict(sorted((intervals or DEFAULT_INTERVALS).items(), key=lambda item: item[1][0]))
+        self._rings: Dict[str, Dict[str, CandleRing]] = {}
+        self.ticks_ingested = 0
+
+    def symbols(self) -> List[str]:
+        return list(self._rings)
+
+    def ingest_tick(self, symbol: str, price: float, volume: float = 0.0, timestamp: Optional[float] = None) -> None:
+        """Apply a trade/price tick (timestamp in seconds, now by default) to every interval."""
+        timestamp = time.time() if timestamp is None else timestamp
+        for ring in self._series(symbol).values():
+            ring.merge(timestamp, price, price, price, price, volume)
+        self.ticks_ingested += 1
+
+    def ingest_ticks(self, symbol: str, timestamps: np.ndarray, prices: np.ndarray, volumes: Optional[np.ndarray] = None) -> None:
+        """Apply a batch of time-ordered ticks, e.g. one simulator step."""
+        timestamps = np.asarray(timestamps, dtype=float)
+        prices = np.asarray(prices, dtype=float)
+        volumes = np.zeros_like(prices) if volumes is None else np.asarray(volumes, dtype=float)
+        ticks = np.column_stack((timestamps, prices, prices, prices, prices, volumes))
+        self.ingest_bars(symbol, ticks, interval=None)
+        self.ticks_ingested += len(ticks)
+
+    def ingest_bars(self, symbol: str, bars: np.ndarray, interval: Optional[str] = "1m") -> None:
+        """
+        Merge time-ordered bar rows of ``interval`` into that interval and roll them up.
+
+        Intervals below ``interval`` are left alone; with ``interval=None``
+        the rows are ticks and every interval is fed.
+        """
+        if interval is not None and interval not in self.intervals:
+            raise ValueError(f"Unsupported interval: {interval}")
+        floor = 0 if interval is None else self.intervals[interval][0]
+        for ring in self._series(symbol).values():
+            if ring.seconds < floor:
+                continue
+            for row in rollup(bars, ring.seconds).tolist():
+                ring.merge(*row)
+
+    def candles(self, symbol: str, interval: str = "1m", limit: Optional[int] = None) -> np.ndarray:
+        """Newest bars as a read-only (n, 6) view; columns are COLUMNS, timestamps in seconds."""
+        if interval not in self.intervals:
+            raise ValueError(f"Unsupported interval: {interval}")
+        series = self._rings.get(symbol)
+        if series is None:
+            return np.zeros((0, 6))
+        return series[interval].latest(limit)
+
+    def _series(self, symbol: str) -> Dict[str, CandleRing]:
+        series = self._rings.get(symbol)
+        if series is None:
+            series = self._rings[symbol] = {
+                name: CandleRing(seconds, capacity) for name, (seconds, capacity) in self.intervals.items()
+            }
+        return series
+
+
+def candles_to_dicts(bars: np.ndarray) -> List[Dict[str, float]]:
+    """JSON rows for the API: millisecond timestamps, as the candle endpoints return them."""
+    return [
+        {"timestamp": int(row[TIMESTAMP]) * 1000, "open": row[OPEN], "high": row[HIGH],
+         "low": row[LOW], "close": row[CLOSE], "volume": row[VOLUME]}
+        for row in bars.tolist()
+    ]
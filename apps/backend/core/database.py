@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Index
 from sqlalchemy.orm import sessionmaker, relationship, declarative_base
 from datetime import datetime
 from .config import Settings
@@ -45,17 +45,25 @@ class User(Base):
 
 class Trade(Base):
     __tablename__ = "trades"
+    __table_args__ = (
+        # Available balances are summed per user over their open and closed trades
+        Index("idx_trades_user_status", "user_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    # Trade id of TradingDomainService trades (repositories/trade_repository.py)
+    trade_uid = Column(String(36), unique=True, index=True, nullable=True)
     user_id = Column(Integer, nullable=False)
     asset = Column(String, nullable=False)
+    asset_category = Column(String, nullable=True)
     direction = Column(String, nullable=False)  # 'long' or 'short'
     amount = Column(Float, nullable=False)
     entry_price = Column(Float, nullable=True)
     exit_price = Column(Float, nullable=True)
     profit_loss = Column(Float, default=0.0)
     profit_percentage = Column(Float, default=0.0)
-    status = Column(String, default="pending")  # pending, completed, cancelled
+    status = Column(String, default="pending")  # pending, active, completed, failed, cancelled
+    exchange_order_id = Column(String, nullable=True)
     xp_gained = Column(Integer, default=0)
     is_real_trade = Column(Boolean, default=False)
     stellar_shards_earned = Column(Float, default=0.0)
@@ -94,3 +102,17 @@ def get_db():
 # Create tables
 def create_tables():
     Base.metadata.create_all(bind=engine)
+
+
+_async_sessionmaker = None
+
+
+# Session factory for the async repositories (None unless configured)
+def get_async_sessionmaker():
+    global _async_sessionmaker
+    if _async_sessionmaker is None and settings.async_database_url:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_engine = create_async_engine(settings.async_database_url, echo=settings.DEBUG)
+        _async_sessionmaker = async_sessionmaker(async_engine, expire_on_commit=False)
+    return _async_sessionmaker
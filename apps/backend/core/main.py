@@ -7,6 +7,7 @@ from datetime import timedelta, datetime
 from sqlalchemy.orm import Session
 
 from .database import (
+    SessionLocal,
     get_db,
     create_tables,
     User as DBUser,
@@ -18,8 +19,21 @@ from ..auth.auth import (
     create_access_token,
     get_current_active_user,
     get_password_hash,
+    security,
+    verify_token,
 )
+from fastapi.security import HTTPAuthorizationCredentials
+from .tiered_cache import ProfileCacheKeys, TieredCache, get_profile_cache
+from .resilience import get_resilience_stats, register_metrics
 from ..services.trading_service import trading_service
+from ..services.constellation_search import get_constellation_search
+from ..services.live_events import get_live_events
+from ..services.genesis_batch_mint import get_batch_minter
+from ..services.groq_service import groq_service
+from ..services.genesis_eligibility import GenesisEligibilityEngine, get_genesis_eligibility
+from ..services.share_aggregator import get_share_aggregator
+from ..services.trending_index import get_trending_feed
+from ..services.trading_domain import get_trading_domain
 from .config import settings
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -34,18 +48,36 @@ from contextlib import asynccontextmanager
 from ..services.extended_exchange_client import ExtendedExchangeError
 
 # Import Phase 3 API routers
-from ..api.v1.constellations import router as constellations_router
-from ..api.v1.prestige import router as prestige_router
-from ..api.v1.viral_content import router as viral_content_router
-from ..api.v1.nft_integration import router as nft_router
+from ..api.v1.trading.constellations import router as constellations_router
+from ..api.v1.trading.prestige import router as prestige_router
+from ..api.v1.trading.viral_content import router as viral_content_router
+from ..api.v1.trading.nft_integration import router as nft_router
 
 # Import clan battle monitor
 from ..tasks.clan_battle_monitor import start_battle_monitor, stop_battle_monitor
 
+USER_CACHE_TTL = 300
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_tables()
+    # Listen for cache invalidations from other workers
+    await get_profile_cache().start()
+    # Apply shares broadcast by other workers and warm the trending index
+    await get_trending_feed().start(SessionLocal)
+    # Flush buffered share counters in the background
+    await get_share_aggregator().start()
+    # Build the constellation search index and follow updates from other workers
+    await get_constellation_search().start(SessionLocal)
+    # Deliver live user events published by any worker
+    await get_live_events().start()
+    # Schedule Groq calls and probe API health in the background
+    await groq_service.start()
+    # Relay the trading domain's events to users' live connections
+    await get_live_events().attach(get_trading_domain().event_bus)
+    # Start copy trading and deliver the Starknet outbox written with each trade
+    await get_trading_domain().start()
     # Start clan battle monitoring
     await start_battle_monitor()
     logger.log_structured(
@@ -56,6 +88,14 @@ async def lifespan(app: FastAPI):
     yield
     # Stop clan battle monitoring
     await stop_battle_monitor()
+    await get_batch_minter().stop()
+    await get_trading_domain().stop()
+    await groq_service.stop()
+    await get_live_events().stop()
+    await get_constellation_search().stop()
+    await get_share_aggregator().stop()
+    await get_trending_feed().stop()
+    await get_profile_cache().stop()
     logger.log_structured(
         level="INFO", 
         event="app_shutdown", 
@@ -254,9 +294,44 @@ async def login_user(req: UserLoginRequest, db: Session = Depends(get_db)):
 
 @app.get("/users/me", summary="Get current user", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: DBUser = Depends(get_current_active_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+    cache: TieredCache = Depends(get_profile_cache),
 ):
-    return UserResponse.model_validate(current_user)
+    username = verify_token(credentials.credentials)
+    if username is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    # Account status is read from the row on every request (one indexed
+    # column); only the profile fields are cached
+    account = db.query(DBUser.is_active).filter(DBUser.username == username).first()
+    if account is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not account.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    async def load_profile():
+        user = db.query(DBUser).filter(DBUser.username == username).first()
+        return UserResponse.model_validate(user).model_dump(mode="json", exclude={"is_active"}) if user else None
+
+    profile = await cache.get_or_load(
+        ProfileCacheKeys.CURRENT_USER, (username,), load_profile, ttl=USER_CACHE_TTL
+    )
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return {**profile, "is_active": True}
 
 
 @app.get("/users", summary="List all users", response_model=List[UserResponse])
@@ -356,10 +431,14 @@ async def add_xp(
     req: AddXPRequest,
     db: Session = Depends(get_db),
     current_user: DBUser = Depends(get_current_active_user),
+    cache: TieredCache = Depends(get_profile_cache),
+    eligibility: GenesisEligibilityEngine = Depends(get_genesis_eligibility),
 ):
     current_user.xp += req.amount
     current_user.level = 1 + current_user.xp // 100
     db.commit()
+    await _invalidate_user_profile(cache, current_user)
+    await eligibility.record_level(current_user.id, current_user.level)
 
     return {"status": "ok", "new_xp": current_user.xp, "new_level": current_user.level}
 
@@ -393,14 +472,37 @@ async def get_trades(
 
 
 Instrumentator().instrument(app).expose(app)
+# Circuit breaker state of the exchange and Groq clients
+register_metrics()
 
 
 @app.get("/health", summary="Health check endpoint")
 async def health_check():
-    return {"status": "ok", "timestamp": datetime.utcnow()}
+    dependencies = get_resilience_stats()
+    degraded = any(stats["open_circuits"] for stats in dependencies.values())
+    return {
+        "status": "degraded" if degraded else "ok",
+        "timestamp": datetime.utcnow(),
+        "dependencies": dependencies
+    }
+
+
+@app.get("/health/cache", summary="Profile cache hit rates and memory use")
+async def cache_stats(cache: TieredCache = Depends(get_profile_cache)):
+    return cache.get_stats()
+
+
+async def _invalidate_user_profile(cache: TieredCache, user: DBUser):
+    """Drop cached profile views after a user's XP changes."""
+    await cache.invalidate(ProfileCacheKeys.CURRENT_USER, user.username)
+    await cache.invalidate(ProfileCacheKeys.PRESTIGE_PROFILE, user.id)
+
 # Daily rewards system for mobile gamification
 @app.post('/rewards/daily', summary="Award daily rewards to active users")
-async def award_daily_rewards(db: Session = Depends(get_db)):
+async def award_daily_rewards(
+    db: Session = Depends(get_db),
+    cache: TieredCache = Depends(get_profile_cache),
+):
     """
     Award daily rewards to users based on their activity and streaks.
     Mobile-first implementation for gamified trading experience.
@@ -465,6 +567,11 @@ async def award_daily_rewards(db: Session = Depends(get_db)):
         # Commit all changes
         db.commit()
         
+        # Bulk XP change: drop the whole profile namespaces in one step
+        if rewards_awarded:
+            await cache.invalidate(ProfileCacheKeys.CURRENT_USER)
+            await cache.invalidate(ProfileCacheKeys.PRESTIGE_PROFILE)
+        
         return {
             "status": "success",
             "rewards_awarded": rewards_awarded,
@@ -483,7 +590,8 @@ async def award_daily_rewards(db: Session = Depends(get_db)):
 @app.post('/mobile/daily-check-in', summary="Mobile daily check-in for bonus XP")
 async def mobile_daily_checkin(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    cache: TieredCache = Depends(get_profile_cache)
 ):
     """
     Mobile-optimized daily check-in system for consistent engagement.
@@ -518,6 +626,7 @@ async def mobile_daily_checkin(
             user.last_checkin = today
             user.consecutive_checkins = consecutive_days
             db.commit()
+            await _invalidate_user_profile(cache, user)
         
         return {
             "status": "success",
@@ -0,0 +1,408 @@
+"""
+Resilience for external API clients
+
+Every endpoint of an external API (Extended Exchange, Groq) gets its own
+circuit breaker and latency history, so one degraded endpoint fails fast
+instead of holding every caller for the full HTTP timeout.
+
+- The breaker opens when, over the last ``window`` calls (once at least
+  ``min_calls`` were made), the failure rate reaches ``failure_rate`` or
+  the rate of calls slower than ``slow_call_seconds`` reaches
+  ``slow_call_rate``. While open, calls are rejected with
+  CircuitOpenError. After ``open_seconds`` it lets ``half_open_probes``
+  calls through: if they all succeed it closes, one failure reopens it.
+- Timeouts adapt to observed latency: ``timeout_multiplier`` times the
+  ``timeout_percentile`` of recent successful calls, within
+  [``min_timeout``, ``max_timeout``]. Until ``min_samples`` calls have
+  been seen, ``max_timeout`` applies.
+- Idempotent calls can be hedged: if the first attempt has not answered
+  by the ``hedge_percentile`` latency, a second one is sent and the first
+  answer wins. At most ``max_hedge_ratio`` of calls are hedged, so a slow
+  API does not receive double load.
+
+Which errors count as failures is up to the client (``is_failure``): a
+rejected order (HTTP 400) says nothing about the API's health.
+
+Layers register themselves by name; get_resilience_stats() feeds
+``/health`` and register_metrics() exports the breaker state to Prometheus.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+
+class CircuitOpenError(Exception):
+    """The endpoint's circuit is open; the call was not sent."""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(f"Circuit open for {endpoint}, retry in {retry_after:.1f}s")
+
+
+class CallTimeout(asyncio.TimeoutError):
+    """The call took longer than the endpoint's adaptive timeout."""
+
+
+_VARIABLE_SEGMENT = re.compile(r"^(v\d+|[a-z_\-]+)$")
+
+
+def endpoint_key(method: str, path: str) -> str:
+    """
+    Breaker key of a request: path segments that look like values (symbols,
+    ids) are replaced, so /v1/market/ticker/BTCUSD and .../ETHUSD share one.
+    """
+    segments = [
+        segment if _VARIABLE_SEGMENT.match(segment) else "{}"
+        for segment in path.split("?", 1)[0].strip("/").split("/")
+    ]
+    return f"{method.upper()} /{'/'.join(segments)}"
+
+
+def _percentile(samples, q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Failure-rate and slow-call-rate breaker over a sliding window of calls."""
+
+    def __init__(
+        self,
+        window: int = 50,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 5.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 3
+    ):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CircuitState.CLOSED
+        self.opened = 0
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    def allow(self) -> bool:
+        """Whether a call may be sent now; a True in half-open takes a probe slot."""
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self._probes_in_flight = self._probe_successes = 0
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes - self._probe_successes:
+                return False
+            self._probes_in_flight += 1
+        return True
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def release(self) -> None:
+        """Give back a probe slot of a call that ended without an outcome (cancelled)."""
+        if self.state == CircuitState.HALF_OPEN and self._probes_in_flight:
+            self._probes_in_flight -= 1
+
+    def record(self, latency: float, failed: bool) -> None:
+        slow = latency >= self.slow_call_seconds
+        if self.state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if failed or slow:
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self.state = CircuitState.CLOSED
+                self._outcomes.clear()
+            return
+        if self.state == CircuitState.OPEN:
+            return
+
+        self._outcomes.append((failed, slow))
+        if len(self._outcomes) < self.min_calls:
+            return
+        failures = sum(failed for failed, _ in self._outcomes) / len(self._outcomes)
+        slow_calls = sum(slow for _, slow in self._outcomes) / len(self._outcomes)
+        if failures >= self.failure_rate or slow_calls >= self.slow_call_rate:
+            self._open()
+
+    def rates(self) -> Tuple[float, float]:
+        if not self._outcomes:
+            return 0.0, 0.0
+        count = len(self._outcomes)
+        return (
+            sum(failed for failed, _ in self._outcomes) / count,
+            sum(slow for _, slow in self._outcomes) / count,
+        )
+
+    def _open(self) -> None:
+        self.state = CircuitState.OPEN
+        self.opened += 1
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+
+class _Endpoint:
+    def __init__(self, breaker: CircuitBreaker, latency_window: int):
+        self.breaker = breaker
+        self.latencies: Deque[float] = deque(maxlen=latency_window)
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+
+class ResilienceLayer:
+    """Per-endpoint circuit breakers, adaptive timeouts and hedging for one API."""
+
+    def __init__(
+        self,
+        name: str,
+        is_failure: Callable[[BaseException], bool] = lambda error: True,
+        min_timeout: float = 1.0,
+        max_timeout: float = 30.0,
+        timeout_percentile: float = 0.99,
+        timeout_multiplier: float = 3.0,
+        min_samples: int = 20,
+        latency_window: int = 200,
+        hedge_percentile: float = 0.95,
+        max_hedge_ratio: float = 0.1,
+        **breaker_options: Any
+    ):
+        self.name = name
+        self.is_failure = is_failure
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_percentile = timeout_percentile
+        self.timeout_multiplier = timeout_multiplier
+        self.min_samples = min_samples
+        self.latency_window = latency_window
+        self.hedge_percentile = hedge_percentile
+        self.max_hedge_ratio = max_hedge_ratio
+        self.breaker_options = breaker_options
+        self._endpoints: Dict[str, _Endpoint] = {}
+
+    def state(self, endpoint: str) -> CircuitState:
+        return self._endpoint(endpoint).breaker.state
+
+    def timeout(self, endpoint: str) -> float:
+        """Current timeout of an endpoint, from its latency percentile."""
+        latencies = self._endpoint(endpoint).latencies
+        if len(latencies) < self.min_samples:
+            return self.max_timeout
+        adaptive = _percentile(latencies, self.timeout_percentile) * self.timeout_multiplier
+        return min(self.max_timeout, max(self.min_timeout, adaptive))
+
+    async def call(
+        self,
+        endpoint: str,
+        send: Callable[[], Awaitable[T]],
+        idempotent: bool = False,
+        hedge: bool = False
+    ) -> T:
+        """
+        Send a request through the endpoint's breaker with its adaptive timeout.
+
+        Raises CircuitOpenError without calling ``send`` while the circuit is
+        open, and CallTimeout when the timeout passes. ``hedge`` applies to
+        idempotent calls only. Non-idempotent calls are never cancelled: a
+        cancelled write may still be applied (an order filled, then sent
+        again), so they run to the client's own timeout.
+        """
+        state = self._endpoint(endpoint)
+        if not idempotent:
+            async with self.guard(endpoint):
+                return await send()
+        timeout = self.timeout(endpoint)
+        if hedge and idempotent and len(state.latencies) >= self.min_samples:
+            return await self._hedged(endpoint, state, send, timeout)
+        async with self.guard(endpoint):
+            return await self._attempt(state, send, timeout)
+
+    @asynccontextmanager
+    async def guard(self, endpoint: str) -> AsyncIterator[None]:
+        """
+        Breaker accounting around a request the caller times itself, such
+        as a streamed response. Raises CircuitOpenError on entry when open.
+        """
+        state = self._endpoint(endpoint)
+        if not state.breaker.allow():
+            state.rejected += 1
+            raise CircuitOpenError(f"{self.name} {endpoint}", state.breaker.retry_after())
+        state.calls += 1
+        started = time.monotonic()
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit):
+            # Abandoned by the caller (or a streamed response closed early): no outcome
+            state.breaker.release()
+            raise
+        except BaseException as error:
+            failed = isinstance(error, asyncio.TimeoutError) or self.is_failure(error)
+            state.failures += failed
+            self._record(endpoint, state, time.monotonic() - started, failed)
+            raise
+        else:
+            latency = time.monotonic() - started
+            state.latencies.append(latency)
+            self._record(endpoint, state, latency, False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, state in self._endpoints.items():
+            failure_rate, slow_call_rate = state.breaker.rates()
+            p50, p95, p99 = (_percentile(state.latencies, q) for q in (0.5, 0.95, 0.99))
+            endpoints[endpoint] = {
+                "state": state.breaker.state.value,
+                "calls": state.calls,
+                "failures": state.failures,
+                "rejected": state.rejected,
+                "timeouts": state.timeouts,
+                "hedged": state.hedged,
+                "hedge_wins": state.hedge_wins,
+                "times_opened": state.breaker.opened,
+                "failure_rate": round(failure_rate, 3),
+                "slow_call_rate": round(slow_call_rate, 3),
+                "latency_ms": {
+                    name: round(value * 1000, 1) if value is not None else None
+                    for name, value in (("p50", p50), ("p95", p95), ("p99", p99))
+                },
+                "timeout_s": round(self.timeout(endpoint), 3),
+            }
+        return {
+            "open_circuits": [
+                endpoint for endpoint, state in self._endpoints.items() if state.breaker.state != CircuitState.CLOSED
+            ],
+            "endpoints": endpoints,
+        }
+
+    def _endpoint(self, endpoint: str) -> _Endpoint:
+        state = self._endpoints.get(endpoint)
+        if state is None:
+            state = self._endpoints[endpoint] = _Endpoint(CircuitBreaker(**self.breaker_options), self.latency_window)
+        return state
+
+    def _record(self, endpoint: str, state: _Endpoint, latency: float, failed: bool) -> None:
+        before = state.breaker.state
+        state.breaker.record(latency, failed)
+        if state.breaker.state != before:
+            log = logger.warning if state.breaker.state == CircuitState.OPEN else logger.info
+            log(f"{self.name} {endpoint} circuit {before.value} -> {state.breaker.state.value}")
+
+    async def _attempt(self, state: _Endpoint, send: Callable[[], Awaitable[T]], timeout: float) -> T:
+        try:
+            return await asyncio.wait_for(send(), timeout)
+        except asyncio.TimeoutError:
+            state.timeouts += 1
+            raise CallTimeout(f"{self.name} call timed out after {timeout:.2f}s")
+
+    async def _hedged(self, endpoint: str, state: _Endpoint, send: Callable[[], Awaitable[T]], timeout: float) -> T:
+        """First answer of the call and, if it is slow, a second copy of it."""
+        hedge_delay = _percentile(state.latencies, self.hedge_percentile)
+
+        async def attempt():
+            async with self.guard(endpoint):
+                return await self._attempt(state, send, timeout)
+
+        primary = asyncio.ensure_future(attempt())
+        attempts = {primary}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=hedge_delay)
+            # The budget is checked when hedging, so concurrent slow calls cannot all hedge
+            if not done and state.hedged < self.max_hedge_ratio * state.calls:
+                state.hedged += 1
+                attempts.add(asyncio.ensure_future(attempt()))
+            error: Optional[BaseException] = None
+            while attempts:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        state.hedge_wins += task is not primary
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in attempts:
+                task.cancel()
+
+
+_layers: Dict[str, ResilienceLayer] = {}
+
+
+def get_resilience_layer(name: str, **options: Any) -> ResilienceLayer:
+    """Shared layer of an API; options apply when it is first created."""
+    layer = _layers.get(name)
+    if layer is None:
+        layer = _layers[name] = ResilienceLayer(name, **options)
+    return layer
+
+
+def get_resilience_stats() -> Dict[str, Any]:
+    """Breaker state of every external API, for health checks."""
+    return {name: layer.get_stats() for name, layer in _layers.items()}
+
+
+def register_metrics(registry=None) -> None:
+    """Export breaker states and call counts of every layer to Prometheus."""
+    from prometheus_client import REGISTRY
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+    states = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+    class ResilienceCollector:
+        def collect(self):
+            labels = ["api", "endpoint"]
+            state = GaugeMetricFamily(
+                "external_api_circuit_state", "Circuit state (0 closed, 1 half-open, 2 open)", labels=labels
+            )
+            timeout = GaugeMetricFamily("external_api_timeout_seconds", "Adaptive request timeout", labels=labels)
+            counters = {
+                name: CounterMetricFamily(f"external_api_{name}", description, labels=labels)
+                for name, description in (
+                    ("calls", "Requests sent"),
+                    ("failures", "Requests that failed"),
+                    ("rejected", "Requests rejected by an open circuit"),
+                    ("timeouts", "Requests that hit the adaptive timeout"),
+                    ("hedged", "Requests hedged with a second attempt"),
+                )
+            }
+            for name, layer in _layers.items():
+                for endpoint, endpoint_state in layer._endpoints.items():
+                    values = [name, endpoint]
+                    state.add_metric(values, states[endpoint_state.breaker.state])
+                    timeout.add_metric(values, layer.timeout(endpoint))
+                    for counter, family in counters.items():
+                        family.add_metric(values, getattr(endpoint_state, counter))
+            yield state
+            yield timeout
+            yield from counters.values()
+
+    (registry or REGISTRY).register(ResilienceCollector())
@@ -0,0 +1,182 @@
+"""
+Delta-encoded ticker stream
+
+Market data protocol for WebSocket clients: a snapshot on connect, then
+sequence-numbered deltas carrying only the fields that changed.
+
+Messages (keys are short because they are sent every tick):
+
+    snapshot  {"t": "s", "fields": {"price": "p", ...},
+               "tickers": {"BTCUSD": {"q": 41, "price": 43250.0, ...}}}
+    delta     {"t": "d", "s": "BTCUSD", "q": 42, "d": {"p": 43251.5, "v": 120034.2}}
+
+``q`` is a per-symbol sequence number. A client applies a delta only when
+its ``q`` is one more than the last it saw for the symbol; on a gap (for
+example after the hub dropped frames for a slow connection) it sends
+{"type": "resync", "symbols": [...]} and receives a fresh snapshot.
+
+Frames are JSON text or, for clients connecting with ``encoding=msgpack``,
+msgpack binary. Each delta is encoded once per encoding in use and fanned
+out through a BroadcastHub per encoding, with one topic per symbol.
+"""
+
+import json
+import logging
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional
+
+import msgpack
+
+from .broadcast_hub import ALL_TOPICS, BroadcastHub, Frame, SlowConsumerPolicy, Subscriber
+
+logger = logging.getLogger(__name__)
+
+# Ticker field -> key used in deltas
+TICKER_FIELDS = {
+    "price": "p",
+    "change_24h": "c",
+    "change_percent_24h": "cp",
+    "volume_24h": "v",
+    "high_24h": "h",
+    "low_24h": "l",
+}
+
+
+class Encoding(str, Enum):
+    JSON = "json"
+    MSGPACK = "msgpack"
+
+
+def encode(message: Dict[str, Any], encoding: Encoding) -> Frame:
+    if encoding == Encoding.MSGPACK:
+        return msgpack.packb(message, use_bin_type=True)
+    return json.dumps(message, separators=(",", ":"))
+
+
+def decode(frame: Frame) -> Dict[str, Any]:
+    if isinstance(frame, bytes):
+        return msgpack.unpackb(frame, raw=False)
+    return json.loads(frame)
+
+
+def ticker_delta(previous: Optional[Dict[str, Any]], ticker: Dict[str, Any]) -> Dict[str, Any]:
+    """Short-keyed fields of ``ticker`` that differ from ``previous`` (all of them without one)."""
+    previous = previous or {}
+    return {
+        key: ticker[field]
+        for field, key in TICKER_FIELDS.items()
+        if field in ticker and ticker[field] != previous.get(field)
+    }
+
+
+def apply_delta(ticker: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Client side: the ticker after applying a delta's fields."""
+    fields = {key: field for field, key in TICKER_FIELDS.items()}
+    updated = dict(ticker)
+    for key, value in delta.items():
+        updated[fields[key]] = value
+    return updated
+
+
+class TickerDeltaStream:
+    """Latest ticker per symbol, published to clients as snapshots and deltas."""
+
+    def __init__(self, max_queue: int = 64, send_timeout: float = 10.0):
+        self.hubs = {
+            encoding: BroadcastHub(max_queue=max_queue, policy=SlowConsumerPolicy.DROP_OLDEST, send_timeout=send_timeout)
+            for encoding in Encoding
+        }
+        self._tickers: Dict[str, Dict[str, Any]] = {}
+        self._sequences: Dict[str, int] = {}
+        self.deltas_published = 0
+
+    def __len__(self) -> int:
+        return sum(len(hub) for hub in self.hubs.values())
+
+    def update(self, symbol: str, ticker: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Record a symbol's latest ticker and publish the delta; None if nothing changed."""
+        previous = self._tickers.get(symbol)
+        changed = ticker_delta(previous, ticker)
+        if not changed:
+            return None
+        self._tickers[symbol] = {**(previous or {}), **ticker}
+        sequence = self._sequences.get(symbol, 0) + 1
+        self._sequences[symbol] = sequence
+
+        message = {"t": "d", "s": symbol, "q": sequence, "d": changed}
+        for encoding, hub in self.hubs.items():
+            if len(hub):
+                hub.publish(symbol, encode(message, encoding))
+        self.deltas_published += 1
+        return message
+
+    def snapshot(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        symbols = self._tickers.keys() if symbols is None else symbols
+        return {
+            "t": "s",
+            "fields": TICKER_FIELDS,
+            "tickers": {
+                symbol: {"q": self._sequences[symbol], **self._tickers[symbol]}
+                for symbol in symbols if symbol in self._tickers
+            }
+        }
+
+    async def connect(
+        self,
+        websocket,
+        encoding: Encoding = Encoding.JSON,
+        symbols: Optional[List[str]] = None
+    ) -> Subscriber:
+        """Accept a client, subscribe it (to every symbol by default) and queue its snapshot."""
+        hub = self.hubs[encoding]
+        subscriber = await hub.connect(websocket, topics=symbols or [ALL_TOPICS])
+        hub.send(subscriber, encode(self.snapshot(symbols), encoding))
+        return subscriber
+
+    async def disconnect(self, subscriber: Subscriber) -> None:
+        await subscriber.hub.disconnect(subscriber)
+
+    def handle_client_message(self, subscriber: Subscriber, encoding: Encoding, message: str) -> None:
+        """Apply a subscribe/unsubscribe/resync request from the client."""
+        hub = self.hubs[encoding]
+        try:
+            request = json.loads(message)
+            action = request["type"]
+            symbols = [str(symbol).upper() for symbol in request.get("symbols") or []]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            hub.send(subscriber, encode({"t": "e", "message": "Invalid message"}, encoding))
+            return
+
+        if action == "resync":
+            subscribed = None if ALL_TOPICS in subscriber.topics else subscriber.topics
+            requested = symbols or subscribed
+            hub.send(subscriber, encode(self.snapshot(requested), encoding))
+        elif action == "subscribe":
+            if ALL_TOPICS in subscriber.topics:
+                hub.unsubscribe(subscriber, [ALL_TOPICS])
+            new_symbols = [
+                symbol for symbol in symbols
+                if symbol in self._tickers and symbol not in subscriber.topics
+            ]
+            hub.subscribe(subscriber, new_symbols)
+            # Deltas for the new symbols only make sense on top of their snapshot
+            hub.send(subscriber, encode(self.snapshot(new_symbols), encoding))
+        elif action == "unsubscribe":
+            if ALL_TOPICS in subscriber.topics:
+                hub.unsubscribe(subscriber, [ALL_TOPICS])
+                hub.subscribe(subscriber, [symbol for symbol in self._tickers if symbol not in symbols])
+            else:
+                hub.unsubscribe(subscriber, symbols)
+        else:
+            hub.send(subscriber, encode({"t": "e", "message": f"Unknown message type: {action}"}, encoding))
+
+    async def close(self) -> None:
+        for hub in self.hubs.values():
+            await hub.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "symbols": len(self._tickers),
+            "deltas_published": self.deltas_published,
+            **{encoding.value: hub.get_stats() for encoding, hub in self.hubs.items()}
+        }
@@ -0,0 +1,312 @@
+"""
+Two-tier cache
+
+L1 is a small per-worker TTL/LRU cache holding deserialized values, so hot
+profile reads cost a dict lookup. L2 is the shared Cache from core.cache
+(Redis in production). Misses fall through L1 -> L2 -> loader, with the L2
+stampede protection applied to the loader.
+
+Write paths call ``invalidate()``. The entry is dropped locally and from L2,
+and an invalidation message is published so every other worker drops its
+L1 copy as well. Redis pub/sub is used when a client is configured; without
+Redis, LocalInvalidationBroker fans messages out between caches in the
+same process.
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Protocol, Tuple
+from uuid import uuid4
+
+from .cache import Cache, cache_key_builder, create_cache
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "astratrade:cache:invalidate"
+
+
+class ProfileCacheKeys:
+    """Namespaces for the profile read models."""
+    PRESTIGE_PROFILE = "prestige:profile"
+    GENESIS_COLLECTION = "nft:genesis-collection"
+    SOCIAL_PROOF = "viral:social-proof"
+    CURRENT_USER = "user:me"
+
+
+class LocalCache:
+    """Per-worker TTL/LRU cache with hit, eviction and size accounting."""
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_used = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: str, value: Any, size: Optional[int] = None) -> None:
+        if key in self._entries:
+            self._remove(key)
+        size = size if size is not None else sys.getsizeof(value)
+        self._entries[key] = (value, time.monotonic() + self.ttl, size)
+        self.bytes_used += size
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        if key not in self._entries:
+            return False
+        self._remove(key)
+        return True
+
+    def delete_prefix(self, prefix: str) -> int:
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self.bytes_used -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "approx_bytes": self.bytes_used
+        }
+
+
+class InvalidationBroker(Protocol):
+    """Broadcasts invalidation messages between workers."""
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        ...
+
+    async def listen(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Deliver messages to ``callback`` until cancelled."""
+        ...
+
+
+class RedisInvalidationBroker:
+    """
+    Invalidation broadcast over Redis pub/sub.
+
+    ``listen`` resubscribes with exponential backoff when the connection
+    drops. Messages published while it is disconnected are lost, so
+    listeners must tolerate gaps (L1 entries still expire after their TTL).
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        channel: str = INVALIDATION_CHANNEL,
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 30.0
+    ):
+        self.redis = redis_client
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.reconnects = 0
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        await self.redis.publish(self.channel, json.dumps(message))
+
+    async def listen(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        delay = self.reconnect_delay
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                delay = self.reconnect_delay
+                async for raw in pubsub.listen():
+                    if raw.get("type") != "message":
+                        continue
+                    try:
+                        callback(json.loads(raw["data"]))
+                    except Exception as e:
+                        logger.error(f"Invalid cache invalidation message: {e}")
+                logger.warning(f"Subscription to {self.channel} ended, resubscribing in {delay:.1f}s")
+            except Exception as e:
+                logger.warning(f"Subscription to {self.channel} failed: {e}, resubscribing in {delay:.1f}s")
+            finally:
+                await self._close(pubsub)
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+            self.reconnects += 1
+
+    async def _close(self, pubsub) -> None:
+        try:
+            await pubsub.unsubscribe(self.channel)
+            await pubsub.close()
+        except Exception as e:
+            # The connection is usually already gone
+            logger.debug(f"Failed to close subscription to {self.channel}: {e}")
+
+
+class LocalInvalidationBroker:
+    """In-process broadcast for running without Redis (and for tests)."""
+
+    def __init__(self):
+        self._listeners: List[asyncio.Queue] = []
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        for queue in self._listeners:
+            queue.put_nowait(message)
+
+    async def listen(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._listeners.append(queue)
+        try:
+            while True:
+                callback(await queue.get())
+        finally:
+            self._listeners.remove(queue)
+
+
+class TieredCache:
+    """L1 (per worker) + L2 (shared) cache with pub/sub invalidation."""
+
+    def __init__(
+        self,
+        l2: Cache,
+        broker: Optional[InvalidationBroker] = None,
+        l1_max_entries: int = 1000,
+        l1_ttl: float = 30.0
+    ):
+        self.l1 = LocalCache(max_entries=l1_max_entries, ttl=l1_ttl)
+        self.l2 = l2
+        self.broker = broker or LocalInvalidationBroker()
+        self.worker_id = str(uuid4())
+        self.invalidations_sent = 0
+        self.invalidations_received = 0
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start listening for invalidations from other workers."""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self.broker.listen(self._on_invalidation))
+            # Let the listener subscribe before returning
+            await asyncio.sleep(0)
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        key_parts: Tuple[Any, ...],
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None
+    ) -> Any:
+        """Read through L1 and L2, calling ``loader`` on a miss in both."""
+        local_key = cache_key_builder(namespace, *key_parts)
+        value = self.l1.get(local_key)
+        if value is not None:
+            return value
+
+        l2_key = await self.l2.key(namespace, *key_parts)
+        value = await self.l2.get_or_set(l2_key, loader, ttl)
+        if value is not None:
+            self.l1.set(local_key, value, size=len(self.l2.serializer.dumps(value)))
+        return value
+
+    async def invalidate(self, namespace: str, *key_parts: Any) -> None:
+        """
+        Drop an entry (or a whole namespace when no key parts are given)
+        from every worker's L1 and from L2.
+        """
+        if key_parts:
+            local_key = cache_key_builder(namespace, *key_parts)
+            self.l1.delete(local_key)
+            await self.l2.delete(await self.l2.key(namespace, *key_parts))
+        else:
+            self.l1.delete_prefix(cache_key_builder(namespace) + ":")
+            await self.l2.invalidate_namespace(namespace)
+
+        self.invalidations_sent += 1
+        try:
+            await self.broker.publish({
+                "origin": self.worker_id,
+                "namespace": namespace,
+                "key_parts": [str(part) for part in key_parts]
+            })
+        except Exception as e:
+            # L1 entries elsewhere still expire after l1_ttl
+            logger.error(f"Failed to publish cache invalidation for {namespace}: {e}")
+
+    def _on_invalidation(self, message: Dict[str, Any]) -> None:
+        if message.get("origin") == self.worker_id:
+            return
+        self.invalidations_received += 1
+        namespace = message["namespace"]
+        key_parts = message.get("key_parts") or []
+        if key_parts:
+            self.l1.delete(cache_key_builder(namespace, *key_parts))
+        else:
+            self.l1.delete_prefix(cache_key_builder(namespace) + ":")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "l1": self.l1.get_stats(),
+            "l2": self.l2.get_stats(),
+            "invalidations_sent": self.invalidations_sent,
+            "invalidations_received": self.invalidations_received
+        }
+
+
+def create_tiered_cache(redis_client=None, **kwargs) -> TieredCache:
+    """Tiered cache on Redis (L2 + pub/sub) when a client is given, in-process otherwise."""
+    broker = RedisInvalidationBroker(redis_client) if redis_client is not None else LocalInvalidationBroker()
+    return TieredCache(create_cache(redis_client), broker=broker, **kwargs)
+
+
+_profile_cache: Optional[TieredCache] = None
+
+
+def get_profile_cache() -> TieredCache:
+    """Shared tiered cache for the profile read endpoints (FastAPI dependency)."""
+    global _profile_cache
+    if _profile_cache is None:
+        from .config import settings
+
+        redis_client = None
+        if settings.redis_url:
+            import redis.asyncio as redis
+            redis_client = redis.from_url(settings.redis_url)
+        _profile_cache = create_tiered_cache(redis_client)
+    return _profile_cache
@@ -85,6 +85,13 @@ class GamificationDomainService:
     - services/groq_service.py (achievement descriptions, 276 lines)
     
     Total consolidation: 3,314 lines → ~800 lines (76% reduction)
+    
+    Cross-domain reactions can go through an event bus: register_event_handlers()
+    subscribes the service to TradingRewardsCalculatedEvent to award trading
+    XP, and XP awards are published as "xp_awarded" events when an event bus
+    is configured. The API process does not run this service yet (there are
+    no repository implementations for it), so trading XP is not awarded
+    through the bus there.
     """
     
     def __init__(
@@ -93,13 +100,15 @@ class GamificationDomainService:
         constellation_repo: ConstellationRepository,
         achievement_repo: AchievementRepository,
         leaderboard_repo: LeaderboardRepository,
-        reward_repo: RewardRepository
+        reward_repo: RewardRepository,
+        event_bus=None
     ):
         self.user_progression_repo = user_progression_repo
         self.constellation_repo = constellation_repo
         self.achievement_repo = achievement_repo
         self.leaderboard_repo = leaderboard_repo
         self.reward_repo = reward_repo
+        self.event_bus = event_bus
     
     # ============================================================================
     # USER PROGRESSION & XP MANAGEMENT
@@ -129,6 +138,18 @@ class GamificationDomainService:
         if level_up:
             logger.info(f"User {user_id} leveled up to level {progression.current_level}")
         
+        await self.publish_event(DomainEvent(
+            event_type="xp_awarded",
+            entity_id=str(user_id),
+            data={
+                'user_id': user_id,
+                'xp': float(xp.total_xp),
+                'source': xp.source.value,
+                'level_up': level_up,
+                'current_level': progression.current_level
+            }
+        ))
+        
         return progression, level_up
     
     async def award_trading_xp(self, user_id: int, trade_volume: Decimal, profit_loss: Decimal) -> Tuple[UserProgression, bool]:
@@ -525,6 +546,32 @@ class GamificationDomainService:
     # DOMAIN EVENT PROCESSING
     # ============================================================================
     
+    async def register_event_handlers(self, event_bus=None) -> None:
+        """Subscribe this service to events published by other domains"""
+        if event_bus is not None:
+            self.event_bus = event_bus
+        if self.event_bus is None:
+            raise ValueError("No event bus configured")
+        
+        await self.event_bus.subscribe("trading_rewards_calculated", self.handle_trading_rewards_calculated)
+    
+    async def handle_trading_rewards_calculated(self, event) -> None:
+        """Award trading XP calculated by the Trading domain"""
+        if event.xp_gained <= 0:
+            return
+        
+        xp = ExperiencePoints(
+            amount=Decimal(str(event.xp_gained)),
+            source=XPSource.TRADING,
+            bonus_description=f"Trade {event.trade_id}"
+        )
+        await self.award_xp(event.user_id, xp)
+    
+    async def publish_event(self, event: DomainEvent) -> None:
+        """Publish a gamification event if an event bus is configured"""
+        if self.event_bus is not None:
+            await self.event_bus.emit(event)
+    
     def collect_events(self, *entities) -> List[DomainEvent]:
         """Collect all domain events from entities"""
         events = []
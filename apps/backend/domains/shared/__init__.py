@@ -6,6 +6,8 @@ Implements cross-cutting concerns for the domain layer.
 
 Components:
 - events: Domain event abstractions and event bus interface
+- event_bus: In-process async event bus implementation
+- event_store: Persistent SQLite event store with snapshots and retention
 - repositories: Repository pattern interfaces
 - exceptions: Domain-specific exceptions
 """
\ No newline at end of file
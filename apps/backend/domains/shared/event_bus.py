@@ -0,0 +1,235 @@
+"""
+In-Process Event Bus
+
+Concrete asyncio implementation of the EventBus interface defined in events.py.
+
+Each subscription owns a bounded queue and one or more worker tasks, so:
+- handlers for the same event run concurrently and never block each other
+- a slow handler only fills its own queue; what happens next is decided by
+  its OverflowPolicy (apply backpressure to the emitter or drop events)
+- per-handler delivery counts, failures, drops and latency are recorded
+
+Subscriptions are keyed by event type; the "*" type receives every event.
+Handlers may be coroutine functions, plain callables or EventHandler objects.
+Events are optionally appended to an event store before fan-out.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .events import DomainEvent
+
+logger = logging.getLogger(__name__)
+
+WILDCARD_EVENT_TYPE = "*"
+
+
+class OverflowPolicy(Enum):
+    """What emit() does when a subscriber's queue is full."""
+    BLOCK = "block"              # Wait for space (backpressure on the emitter)
+    DROP_NEWEST = "drop_newest"  # Discard the event being emitted
+    DROP_OLDEST = "drop_oldest"  # Discard the oldest queued event
+
+
+@dataclass
+class HandlerMetrics:
+    """Delivery and latency metrics for one subscription."""
+    delivered: int = 0
+    failed: int = 0
+    dropped: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    recent_latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def record(self, latency: float, success: bool) -> None:
+        if success:
+            self.delivered += 1
+        else:
+            self.failed += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.recent_latencies.append(latency)
+
+    @property
+    def average_latency(self) -> float:
+        handled = self.delivered + self.failed
+        return self.total_latency / handled if handled else 0.0
+
+    def percentile_latency(self, percentile: float) -> float:
+        """Latency percentile over the most recent deliveries."""
+        if not self.recent_latencies:
+            return 0.0
+        ordered = sorted(self.recent_latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "avg_latency_ms": self.average_latency * 1000,
+            "p95_latency_ms": self.percentile_latency(95) * 1000,
+            "max_latency_ms": self.max_latency * 1000
+        }
+
+
+class _Subscription:
+    """A handler bound to an event type with its own queue and workers."""
+
+    def __init__(
+        self,
+        event_type: str,
+        handler: Any,
+        max_queue_size: int,
+        overflow_policy: OverflowPolicy,
+        concurrency: int
+    ):
+        self.event_type = event_type
+        self.handler = handler
+        self.name = getattr(handler, "__qualname__", None) or type(handler).__name__
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.overflow_policy = overflow_policy
+        self.metrics = HandlerMetrics()
+        self.workers = [asyncio.create_task(self._run()) for _ in range(concurrency)]
+
+    def matches(self, handler: Any) -> bool:
+        return self.handler == handler
+
+    async def offer(self, event: DomainEvent) -> None:
+        """Enqueue an event according to the overflow policy."""
+        if self.overflow_policy == OverflowPolicy.BLOCK:
+            await self.queue.put(event)
+            return
+
+        if self.queue.full():
+            self.metrics.dropped += 1
+            if self.overflow_policy == OverflowPolicy.DROP_NEWEST:
+                return
+            self.queue.get_nowait()
+            self.queue.task_done()
+        self.queue.put_nowait(event)
+
+    async def _run(self) -> None:
+        while True:
+            event = await self.queue.get()
+            started = time.perf_counter()
+            success = True
+            try:
+                await self._invoke(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                success = False
+                logger.error(f"Event handler {self.name} failed for {self.event_type}: {e}")
+            finally:
+                self.metrics.record(time.perf_counter() - started, success)
+                self.queue.task_done()
+
+    async def _invoke(self, event: DomainEvent) -> None:
+        handle = getattr(self.handler, "handle", self.handler)
+        result = handle(event)
+        if inspect.isawaitable(result):
+            await result
+
+    async def stop(self) -> None:
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+
+
+class InMemoryEventBus:
+    """
+    Async in-process event bus with typed fan-out and backpressure.
+
+    Implements the EventBus protocol. Subscribing must happen inside a
+    running event loop because each subscription starts its worker tasks.
+    """
+
+    def __init__(
+        self,
+        default_max_queue_size: int = 1000,
+        default_overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        event_store: Optional[Any] = None
+    ):
+        self.default_max_queue_size = default_max_queue_size
+        self.default_overflow_policy = default_overflow_policy
+        self._event_store = event_store
+        self._subscriptions: Dict[str, List[_Subscription]] = {}
+        self.events_emitted = 0
+
+    async def emit(self, event: DomainEvent) -> None:
+        """Emit a domain event to all subscribers of its type."""
+        if self._event_store is not None:
+            self._event_store.append(event)
+        self.events_emitted += 1
+
+        subscriptions = (
+            self._subscriptions.get(event.event_type, []) +
+            self._subscriptions.get(WILDCARD_EVENT_TYPE, [])
+        )
+        for subscription in subscriptions:
+            await subscription.offer(event)
+
+    async def subscribe(
+        self,
+        event_type: str,
+        handler: Callable,
+        max_queue_size: Optional[int] = None,
+        overflow_policy: Optional[OverflowPolicy] = None,
+        concurrency: int = 1
+    ) -> None:
+        """Subscribe to a specific event type ("*" for all events).
+
+        ``concurrency`` > 1 runs several workers for the handler, trading
+        per-handler ordering for throughput.
+        """
+        if concurrency < 1:
+            raise ValueError("Concurrency must be at least 1")
+
+        subscription = _Subscription(
+            event_type=event_type,
+            handler=handler,
+            max_queue_size=max_queue_size or self.default_max_queue_size,
+            overflow_policy=overflow_policy or self.default_overflow_policy,
+            concurrency=concurrency
+        )
+        self._subscriptions.setdefault(event_type, []).append(subscription)
+
+    async def unsubscribe(self, event_type: str, handler: Callable) -> None:
+        """Unsubscribe from a specific event type, discarding queued events."""
+        subscriptions = self._subscriptions.get(event_type, [])
+        for subscription in [s for s in subscriptions if s.matches(handler)]:
+            subscriptions.remove(subscription)
+            await subscription.stop()
+
+    async def drain(self) -> None:
+        """Wait until every queued event has been handled."""
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in list(subscriptions):
+                await subscription.queue.join()
+
+    async def close(self) -> None:
+        """Drain pending events and stop all subscription workers."""
+        await self.drain()
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                await subscription.stop()
+        self._subscriptions.clear()
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-subscription metrics keyed by "event_type:handler"."""
+        return {
+            f"{subscription.event_type}:{subscription.name}": {
+                **subscription.metrics.to_dict(),
+                "queue_depth": subscription.queue.qsize()
+            }
+            for subscriptions in self._subscriptions.values()
+            for subscription in subscriptions
+        }
@@ -0,0 +1,298 @@
+"""
+Persistent Event Store
+
+SQLite-backed, append-only event store for replay and audit queries.
+
+Events are appended to a single table with a monotonically increasing
+sequence number and secondary indexes on (event_type, seq) and
+(aggregate_id, seq), so reads by type, by aggregate and by sequence range
+touch only the matching rows. Aggregate snapshots let replay start from the
+latest snapshot instead of the first event, and compact() enforces a
+retention window without dropping events a replay still needs.
+
+Events are stored as JSON together with their class path and rebuilt as the
+original dataclass on read. Only event types registered with the store are
+written or rebuilt: the class path is looked up in that allow-list rather
+than imported, so a tampered row cannot load arbitrary code. SQLiteEventStore
+has the same synchronous append/get_events/get_events_for_aggregate interface
+as the in-memory EventStore and can be passed to InMemoryEventBus as its
+event_store.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, fields, is_dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from .events import DomainEvent, aggregate_id_of
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id TEXT NOT NULL UNIQUE,
+    event_type TEXT NOT NULL,
+    aggregate_id TEXT,
+    occurred_at TEXT NOT NULL,
+    event_class TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_events_type_seq ON events (event_type, seq);
+CREATE INDEX IF NOT EXISTS ix_events_aggregate_seq ON events (aggregate_id, seq);
+CREATE INDEX IF NOT EXISTS ix_events_occurred_at ON events (occurred_at);
+CREATE TABLE IF NOT EXISTS snapshots (
+    aggregate_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class StoredEvent:
+    """An event read back from the store with its sequence number."""
+    seq: int
+    event: Any
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Aggregate state captured after applying events up to ``seq``."""
+    aggregate_id: str
+    seq: int
+    state: Dict[str, Any]
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__} in event payload")
+
+
+def _decode_object(obj: Dict[str, Any]) -> Any:
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    if "__decimal__" in obj:
+        return Decimal(obj["__decimal__"])
+    return obj
+
+
+def _utc_iso(value: datetime) -> str:
+    """Normalize to naive UTC ISO-8601 so stored timestamps sort correctly."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+def event_class_path(cls: type) -> str:
+    """Identifier an event class is stored under."""
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def serialize_event(event: Any) -> Tuple[str, str]:
+    """Serialize a dataclass event to (class path, JSON payload)."""
+    if not is_dataclass(event):
+        raise TypeError(f"Events must be dataclasses, got {type(event).__name__}")
+    payload = {f.name: getattr(event, f.name) for f in fields(event)}
+    return event_class_path(type(event)), json.dumps(payload, default=_encode_value)
+
+
+def deserialize_event(event_class: str, payload: str, event_types: Dict[str, type]) -> Any:
+    """Rebuild an event from its class path and JSON payload.
+
+    The class is resolved through ``event_types`` (class path -> class);
+    unregistered paths raise ValueError.
+    """
+    target = event_types.get(event_class)
+    if target is None:
+        raise ValueError(f"Unregistered event class: {event_class}")
+    data = json.loads(payload, object_hook=_decode_object)
+    init_fields = {f.name for f in fields(target) if f.init}
+    return target(**{k: v for k, v in data.items() if k in init_fields})
+
+
+class SQLiteEventStore:
+    """
+    Append-only event store on SQLite with type/aggregate indexes.
+
+    Use ":memory:" for tests; a file path gives a durable store (WAL mode).
+    Calls are synchronous and serialized by a lock, matching EventStore.
+    ``event_types`` are the dataclass events the store accepts; appending or
+    reading any other type raises ValueError.
+    """
+
+    def __init__(self, path: str = ":memory:", event_types: Iterable[type] = ()):
+        self.path = path
+        self._event_types: Dict[str, type] = {}
+        for event_type in event_types:
+            self.register(event_type)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def register(self, event_type: type) -> None:
+        """Allow ``event_type`` to be stored and rebuilt."""
+        if not is_dataclass(event_type):
+            raise TypeError(f"Events must be dataclasses, got {event_type.__name__}")
+        self._event_types[event_class_path(event_type)] = event_type
+
+    def append(self, event: DomainEvent) -> int:
+        """Append an event and return its sequence number."""
+        return self.append_many([event])[-1]
+
+    def append_many(self, events: Iterable[DomainEvent]) -> List[int]:
+        """Append several events in one transaction."""
+        rows = [self._to_row(event) for event in events]
+        seqs = []
+        with self._lock, self._conn:
+            for row in rows:
+                cursor = self._conn.execute(
+                    "INSERT INTO events (event_id, event_type, aggregate_id, occurred_at, event_class, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    row
+                )
+                seqs.append(cursor.lastrowid)
+        return seqs
+
+    def get_events(
+        self,
+        event_type: str = None,
+        after_seq: int = 0,
+        limit: Optional[int] = None
+    ) -> List[DomainEvent]:
+        """Get events, optionally filtered by type, in sequence order."""
+        return [stored.event for stored in self.read(event_type=event_type, after_seq=after_seq, limit=limit)]
+
+    def get_events_for_aggregate(self, aggregate_id: str, after_seq: int = 0) -> List[DomainEvent]:
+        """Get events for a specific aggregate in sequence order."""
+        return [stored.event for stored in self.read(aggregate_id=aggregate_id, after_seq=after_seq)]
+
+    def read(
+        self,
+        event_type: Optional[str] = None,
+        aggregate_id: Optional[str] = None,
+        after_seq: int = 0,
+        until_seq: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[StoredEvent]:
+        """Range read by sequence number with optional type/aggregate filters."""
+        clauses = ["seq > ?"]
+        params: List[Any] = [after_seq]
+        if until_seq is not None:
+            clauses.append("seq <= ?")
+            params.append(until_seq)
+        if event_type is not None:
+            clauses.append("event_type = ?")
+            params.append(event_type)
+        if aggregate_id is not None:
+            clauses.append("aggregate_id = ?")
+            params.append(str(aggregate_id))
+
+        query = f"SELECT seq, event_class, payload FROM events WHERE {' AND '.join(clauses)} ORDER BY seq"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            StoredEvent(seq=seq, event=deserialize_event(cls, payload, self._event_types))
+            for seq, cls, payload in rows
+        ]
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the most recently appended event (0 if empty)."""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(seq) FROM events").fetchone()
+        return row[0] or 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    # Snapshots
+
+    def save_snapshot(self, aggregate_id: str, seq: int, state: Dict[str, Any]) -> None:
+        """Store aggregate state as of ``seq``, replacing any older snapshot."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO snapshots (aggregate_id, seq, state, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(aggregate_id) DO UPDATE SET seq = excluded.seq, state = excluded.state, "
+                "created_at = excluded.created_at WHERE excluded.seq >= snapshots.seq",
+                (str(aggregate_id), seq, json.dumps(state, default=_encode_value), _utc_iso(datetime.now(timezone.utc)))
+            )
+
+    def get_snapshot(self, aggregate_id: str) -> Optional[Snapshot]:
+        """Get the latest snapshot for an aggregate."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT seq, state FROM snapshots WHERE aggregate_id = ?", (str(aggregate_id),)
+            ).fetchone()
+        if row is None:
+            return None
+        return Snapshot(aggregate_id=str(aggregate_id), seq=row[0], state=json.loads(row[1], object_hook=_decode_object))
+
+    def load_aggregate(self, aggregate_id: str) -> Tuple[Optional[Snapshot], List[StoredEvent]]:
+        """Latest snapshot plus the events recorded after it, ready for replay."""
+        snapshot = self.get_snapshot(aggregate_id)
+        after_seq = snapshot.seq if snapshot else 0
+        return snapshot, self.read(aggregate_id=aggregate_id, after_seq=after_seq)
+
+    # Retention
+
+    def compact(self, older_than: datetime) -> int:
+        """
+        Delete events that occurred before ``older_than``.
+
+        Events without an aggregate are removed once outside the window.
+        Aggregate events are only removed when a snapshot covers them, so
+        load_aggregate() can still rebuild current state. Returns the number
+        of deleted events.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM events WHERE occurred_at < ? AND ("
+                "aggregate_id IS NULL OR seq <= "
+                "(SELECT s.seq FROM snapshots s WHERE s.aggregate_id = events.aggregate_id))",
+                (_utc_iso(older_than),)
+            )
+            deleted = cursor.rowcount
+        logger.info(f"Compacted event store: removed {deleted} events before {older_than.isoformat()}")
+        return deleted
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _to_row(self, event: DomainEvent) -> Tuple[Any, ...]:
+        event_class, payload = serialize_event(event)
+        if event_class not in self._event_types:
+            raise ValueError(f"Unregistered event class: {event_class}")
+        occurred_at = getattr(event, 'occurred_at', None) or datetime.now(timezone.utc)
+        return (
+            getattr(event, 'event_id', None) or str(uuid4()),
+            event.event_type,
+            aggregate_id_of(event),
+            _utc_iso(occurred_at),
+            event_class,
+            payload
+        )
@@ -9,9 +9,10 @@ while providing the foundation for domain event handling in Phase 1.
 """
 
 from abc import ABC, abstractmethod
+from collections import deque
 from datetime import datetime, timezone
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Protocol
+from typing import Any, Deque, Dict, List, Optional, Protocol
 from uuid import uuid4
 
 
@@ -63,29 +64,78 @@ class EventHandler(Protocol):
         ...
 
 
+def aggregate_id_of(event: Any) -> Optional[str]:
+    """Resolve the aggregate an event belongs to (aggregate_id or entity_id)."""
+    aggregate_id = getattr(event, 'aggregate_id', None)
+    if aggregate_id is None:
+        aggregate_id = getattr(event, 'entity_id', None)
+    return str(aggregate_id) if aggregate_id is not None else None
+
+
 @dataclass
 class EventStore:
     """
     Simple in-memory event store for Phase 1.
     
-    This will be replaced with a proper event store implementation
-    in Phase 2 for event sourcing and audit trails.
+    Events are numbered with a monotonically increasing sequence and indexed
+    by event type and aggregate, so filtered reads cost O(matching events).
+    When max_events is set the oldest events are evicted once the bound is
+    reached. Use SQLiteEventStore (event_store.py) for durable storage.
     """
-    _events: List[DomainEvent] = field(default_factory=list)
+    max_events: Optional[int] = None
+    _events: Dict[int, DomainEvent] = field(default_factory=dict, repr=False)
+    _by_type: Dict[str, Deque[int]] = field(default_factory=dict, repr=False)
+    _by_aggregate: Dict[str, Deque[int]] = field(default_factory=dict, repr=False)
+    _next_seq: int = field(default=1, repr=False)
     
-    def append(self, event: DomainEvent) -> None:
-        """Append an event to the store."""
-        self._events.append(event)
+    def append(self, event: DomainEvent) -> int:
+        """Append an event to the store and return its sequence number."""
+        seq = self._next_seq
+        self._next_seq += 1
+        self._events[seq] = event
+        self._by_type.setdefault(event.event_type, deque()).append(seq)
+        aggregate_id = aggregate_id_of(event)
+        if aggregate_id is not None:
+            self._by_aggregate.setdefault(aggregate_id, deque()).append(seq)
+        
+        if self.max_events is not None:
+            while len(self._events) > self.max_events:
+                self._evict_oldest()
+        return seq
     
-    def get_events(self, event_type: str = None) -> List[DomainEvent]:
-        """Get events, optionally filtered by type."""
+    def get_events(self, event_type: str = None, after_seq: int = 0) -> List[DomainEvent]:
+        """Get events, optionally filtered by type and/or after a sequence number."""
         if event_type:
-            return [e for e in self._events if e.event_type == event_type]
-        return self._events.copy()
+            seqs = self._by_type.get(event_type, ())
+        else:
+            seqs = self._events.keys()
+        return [self._events[seq] for seq in seqs if seq > after_seq]
+    
+    def get_events_for_aggregate(self, aggregate_id: str, after_seq: int = 0) -> List[DomainEvent]:
+        """Get events for a specific aggregate (aggregate_id or entity_id)."""
+        seqs = self._by_aggregate.get(str(aggregate_id), ())
+        return [self._events[seq] for seq in seqs if seq > after_seq]
+    
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the most recently appended event (0 if empty)."""
+        return self._next_seq - 1
+    
+    def __len__(self) -> int:
+        return len(self._events)
+    
+    def _evict_oldest(self) -> None:
+        seq = next(iter(self._events))
+        event = self._events.pop(seq)
+        # The evicted event is always the head of its index deques
+        self._pop_index(self._by_type, event.event_type)
+        aggregate_id = aggregate_id_of(event)
+        if aggregate_id is not None:
+            self._pop_index(self._by_aggregate, aggregate_id)
     
-    def get_events_for_aggregate(self, aggregate_id: str) -> List[DomainEvent]:
-        """Get events for a specific aggregate (if event has aggregate_id)."""
-        return [
-            e for e in self._events 
-            if hasattr(e, 'aggregate_id') and e.aggregate_id == aggregate_id
-        ]
\ No newline at end of file
+    @staticmethod
+    def _pop_index(index: Dict[str, Deque[int]], key: str) -> None:
+        seqs = index[key]
+        seqs.popleft()
+        if not seqs:
+            del index[key]
@@ -0,0 +1,9 @@
+"""
+Shared Domain Tests
+
+Test Structure:
+- test_event_bus.py: In-process event bus fan-out, overflow policies,
+  handler metrics and cross-domain wiring
+- test_event_store.py: Indexed in-memory and SQLite event stores,
+  snapshots and compaction
+"""
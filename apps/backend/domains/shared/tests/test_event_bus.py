@@ -0,0 +1,167 @@
+import asyncio
+import unittest
+from dataclasses import dataclass
+from decimal import Decimal
+
+from ..events import DomainEvent, EventStore
+from ..event_bus import InMemoryEventBus, OverflowPolicy
+from ...gamification.services import GamificationDomainService
+from ...gamification.tests.test_services import (
+    MockUserProgressionRepository, MockConstellationRepository, MockAchievementRepository,
+    MockLeaderboardRepository, MockRewardRepository
+)
+from ...trading.services import TradingRewardsCalculatedEvent
+
+
+@dataclass
+class SampleEvent(DomainEvent):
+    """Event used for bus tests"""
+    value: int = 0
+
+    @property
+    def event_type(self) -> str:
+        return "sample"
+
+
+class TestInMemoryEventBus(unittest.IsolatedAsyncioTestCase):
+    """Test typed fan-out, backpressure and metrics"""
+
+    async def asyncSetUp(self):
+        self.bus = InMemoryEventBus(default_max_queue_size=2)
+
+    async def asyncTearDown(self):
+        await self.bus.close()
+
+    async def test_fan_out_to_type_and_wildcard_subscribers(self):
+        sample_values, all_events, other = [], [], []
+        await self.bus.subscribe("sample", lambda e: sample_values.append(e.value))
+        await self.bus.subscribe("*", all_events.append)
+        await self.bus.subscribe("other", other.append)
+
+        await self.bus.emit(SampleEvent(value=1))
+        await self.bus.drain()
+
+        self.assertEqual(sample_values, [1])
+        self.assertEqual(len(all_events), 1)
+        self.assertEqual(other, [])
+
+    async def test_slow_handler_does_not_delay_fast_handler(self):
+        release = asyncio.Event()
+        fast = []
+
+        async def slow_handler(event):
+            await release.wait()
+
+        await self.bus.subscribe("sample", slow_handler, overflow_policy=OverflowPolicy.DROP_NEWEST)
+        await self.bus.subscribe("sample", fast.append)
+
+        await self.bus.emit(SampleEvent(value=1))
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(len(fast), 1)
+        release.set()
+
+    async def test_drop_policies_when_queue_is_full(self):
+        release = asyncio.Event()
+        newest_seen, oldest_seen = [], []
+
+        async def blocked_newest(event):
+            await release.wait()
+            newest_seen.append(event.value)
+
+        async def blocked_oldest(event):
+            await release.wait()
+            oldest_seen.append(event.value)
+
+        await self.bus.subscribe("sample", blocked_newest, overflow_policy=OverflowPolicy.DROP_NEWEST)
+        await self.bus.subscribe("sample", blocked_oldest, overflow_policy=OverflowPolicy.DROP_OLDEST)
+
+        # First event is taken by each worker, next two fill the queues
+        for value in range(5):
+            await self.bus.emit(SampleEvent(value=value))
+            await asyncio.sleep(0)
+        release.set()
+        await self.bus.drain()
+
+        self.assertEqual(newest_seen, [0, 1, 2])
+        self.assertEqual(oldest_seen, [0, 3, 4])
+        metrics = self.bus.get_metrics()
+        self.assertEqual(sum(m["dropped"] for m in metrics.values()), 4)
+
+    async def test_block_policy_applies_backpressure(self):
+        release = asyncio.Event()
+
+        async def blocked(event):
+            await release.wait()
+
+        await self.bus.subscribe("sample", blocked, overflow_policy=OverflowPolicy.BLOCK)
+        for value in range(3):
+            await self.bus.emit(SampleEvent(value=value))
+            await asyncio.sleep(0)
+
+        emit = asyncio.create_task(self.bus.emit(SampleEvent(value=3)))
+        await asyncio.sleep(0.01)
+        self.assertFalse(emit.done())
+
+        release.set()
+        await asyncio.wait_for(emit, timeout=1)
+
+    async def test_handler_failures_are_counted(self):
+        async def failing(event):
+            raise RuntimeError("boom")
+
+        await self.bus.subscribe("sample", failing)
+        await self.bus.emit(SampleEvent(value=1))
+        await self.bus.drain()
+
+        metrics = next(iter(self.bus.get_metrics().values()))
+        self.assertEqual(metrics["failed"], 1)
+        self.assertEqual(metrics["delivered"], 0)
+
+    async def test_unsubscribe_stops_delivery(self):
+        received = []
+        await self.bus.subscribe("sample", received.append)
+        await self.bus.unsubscribe("sample", received.append)
+
+        await self.bus.emit(SampleEvent(value=1))
+        await self.bus.drain()
+
+        self.assertEqual(received, [])
+
+    async def test_events_are_appended_to_event_store(self):
+        store = EventStore()
+        bus = InMemoryEventBus(event_store=store)
+
+        await bus.emit(SampleEvent(value=1))
+
+        self.assertEqual(len(store.get_events("sample")), 1)
+
+
+class TestCrossDomainWiring(unittest.IsolatedAsyncioTestCase):
+    """Test that trading rewards reach gamification through the bus"""
+
+    async def test_trading_rewards_award_xp_via_event_bus(self):
+        bus = InMemoryEventBus()
+        awarded = []
+        service = GamificationDomainService(
+            MockUserProgressionRepository(),
+            MockConstellationRepository(),
+            MockAchievementRepository(),
+            MockLeaderboardRepository(),
+            MockRewardRepository(),
+            event_bus=bus
+        )
+        await service.register_event_handlers()
+        await bus.subscribe("xp_awarded", awarded.append)
+
+        await bus.emit(TradingRewardsCalculatedEvent(user_id=7, trade_id="t1", xp_gained=25))
+        await bus.drain()
+
+        progression = await service.get_user_progression(7)
+        self.assertEqual(progression.total_xp, Decimal('25'))
+        self.assertEqual(awarded[0].data['user_id'], 7)
+        await bus.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from ..events import DomainEvent, EventStore
+from ..event_store import SQLiteEventStore
+from ...gamification.events import DomainEvent as GamificationEvent
+
+
+@dataclass
+class AccountEvent(DomainEvent):
+    """Event carrying an aggregate ID for store tests"""
+    aggregate_id: str = ""
+    amount: Decimal = Decimal('0')
+
+    @property
+    def event_type(self) -> str:
+        return "account_credited"
+
+
+@dataclass
+class AuditEvent(DomainEvent):
+    """Event without an aggregate"""
+    message: str = ""
+
+    @property
+    def event_type(self) -> str:
+        return "audit"
+
+
+class TestEventStore(unittest.TestCase):
+    """Test indexes and retention of the in-memory event store"""
+
+    def test_reads_by_type_and_aggregate(self):
+        store = EventStore()
+        store.append(AccountEvent(aggregate_id="a1", amount=Decimal('5')))
+        store.append(AuditEvent(message="hello"))
+        store.append(GamificationEvent(event_type="xp_awarded", entity_id="a1", data={}))
+
+        self.assertEqual(len(store.get_events("account_credited")), 1)
+        self.assertEqual(len(store.get_events()), 3)
+        self.assertEqual(len(store.get_events_for_aggregate("a1")), 2)
+        self.assertEqual([e.event_type for e in store.get_events(after_seq=2)], ["xp_awarded"])
+
+    def test_max_events_evicts_oldest_and_updates_indexes(self):
+        store = EventStore(max_events=2)
+        for i in range(3):
+            store.append(AccountEvent(aggregate_id=f"a{i}"))
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.last_seq, 3)
+        self.assertEqual(store.get_events_for_aggregate("a0"), [])
+        self.assertEqual([e.aggregate_id for e in store.get_events("account_credited")], ["a1", "a2"])
+
+
+class TestSQLiteEventStore(unittest.TestCase):
+    """Test persistence, range reads, snapshots and compaction"""
+
+    def setUp(self):
+        self.store = SQLiteEventStore(event_types=(AccountEvent, AuditEvent, GamificationEvent))
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_events_round_trip_as_original_types(self):
+        occurred_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.store.append(AccountEvent(aggregate_id="a1", amount=Decimal('1.50'), occurred_at=occurred_at))
+        self.store.append(GamificationEvent(event_type="xp_awarded", entity_id="7", data={"amount": 10}))
+
+        account_event = self.store.get_events("account_credited")[0]
+        self.assertIsInstance(account_event, AccountEvent)
+        self.assertEqual(account_event.amount, Decimal('1.50'))
+        self.assertEqual(account_event.occurred_at, occurred_at)
+        self.assertEqual(self.store.get_events_for_aggregate("7")[0].data, {"amount": 10})
+
+    def test_range_reads_by_sequence(self):
+        seqs = self.store.append_many(AccountEvent(aggregate_id="a1") for _ in range(5))
+
+        self.assertEqual(seqs, [1, 2, 3, 4, 5])
+        self.assertEqual([s.seq for s in self.store.read(after_seq=1, until_seq=3)], [2, 3])
+        self.assertEqual(len(self.store.get_events(after_seq=3, limit=1)), 1)
+        self.assertEqual(self.store.last_seq, 5)
+
+    def test_load_aggregate_replays_from_snapshot(self):
+        for _ in range(3):
+            self.store.append(AccountEvent(aggregate_id="a1", amount=Decimal('1')))
+        self.store.save_snapshot("a1", seq=2, state={"balance": Decimal('2')})
+        self.store.save_snapshot("a1", seq=1, state={"balance": Decimal('1')})  # Older, ignored
+
+        snapshot, events = self.store.load_aggregate("a1")
+
+        self.assertEqual(snapshot.seq, 2)
+        self.assertEqual(snapshot.state, {"balance": Decimal('2')})
+        self.assertEqual([e.seq for e in events], [3])
+
+    def test_compaction_keeps_events_needed_for_replay(self):
+        old = datetime.now(timezone.utc) - timedelta(days=30)
+        self.store.append(AuditEvent(message="old", occurred_at=old))
+        self.store.append(AccountEvent(aggregate_id="a1", occurred_at=old))
+        self.store.append(AccountEvent(aggregate_id="a2", occurred_at=old))
+        self.store.append(AuditEvent(message="new"))
+        self.store.save_snapshot("a1", seq=2, state={})
+
+        deleted = self.store.compact(older_than=datetime.now(timezone.utc) - timedelta(days=7))
+
+        self.assertEqual(deleted, 2)
+        remaining = self.store.get_events()
+        self.assertEqual([getattr(e, 'aggregate_id', None) for e in remaining], ["a2", None])
+
+    def test_only_registered_event_types_are_stored_and_rebuilt(self):
+        with self.assertRaises(ValueError):
+            SQLiteEventStore().append(AuditEvent(message="unregistered"))
+
+        self.store.append(AuditEvent(message="tampered"))
+        with self.store._conn:
+            self.store._conn.execute("UPDATE events SET event_class = 'os:system'")
+        with self.assertRaises(ValueError):
+            self.store.get_events()
+
+    def test_file_store_persists_across_connections(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.db")
+            store = SQLiteEventStore(path, event_types=(AuditEvent,))
+            store.append(AuditEvent(message="durable"))
+            store.close()
+
+            reopened = SQLiteEventStore(path, event_types=(AuditEvent,))
+            self.assertEqual(reopened.get_events("audit")[0].message, "durable")
+            reopened.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,470 @@
+"""
+Copy Trading Fan-Out
+
+Mirrors a leader's trades into the accounts of the users following them.
+
+Followers are stored per leader (CopyFollowRepository), each with the
+percentage of their available balance allocated to copying that leader.
+When a TradeExecutedEvent arrives for a leader, CopyTradingEngine loads the
+leader's followers and their balances in one call each, then sizes every
+follower order in a single numpy pass:
+
+    amount = follower balance * allocation % * (leader amount / leader balance)
+
+capped by the follower's own per-trade cap and by the risk limits
+(CopyRiskLimits). Orders below the minimum size or over a follower's daily
+copy limit are rejected in the same pass. The remaining orders are
+submitted by a fixed number of workers, so a fan-out to thousands of
+followers runs with bounded parallelism instead of one trade at a time.
+
+Copied trades are not copied again: the engine remembers the trade ids its
+orders produced and ignores their events, which also keeps follow cycles
+(A follows B, B follows A) from looping.
+
+That memory, the leader trades already fanned out and the followers' daily
+copy counts live in CopyTradingState. Given a Redis client it keys them in
+Redis (with TTLs), so they are shared by every API process and survive
+restarts; without one they are kept in process memory.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from decimal import Decimal, ROUND_DOWN
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+from ..shared.events import EventBus
+from .value_objects import Asset, Money, RiskParameters, TradeDirection
+
+logger = logging.getLogger(__name__)
+
+TRADE_EXECUTED = "trade_executed"
+CENT = Decimal("0.01")
+
+
+@dataclass(frozen=True)
+class CopyFollow:
+    """A follower copying a leader with part of their balance."""
+    follower_id: int
+    leader_id: int
+    allocation_pct: Decimal  # % of the follower's available balance
+    max_trade_amount: Optional[Decimal] = None
+    constellation_id: Optional[int] = None
+
+    def __post_init__(self):
+        if self.follower_id == self.leader_id:
+            raise ValueError("Cannot follow yourself")
+        if not Decimal("0") < Decimal(self.allocation_pct) <= Decimal("100"):
+            raise ValueError("allocation_pct must be between 0 and 100")
+
+
+@dataclass(frozen=True)
+class CopyRiskLimits:
+    """Risk checks applied to every follower order."""
+    max_position_pct: Decimal = Decimal("20")  # of the follower's available balance
+    min_order_amount: Decimal = Decimal("1")
+    max_daily_copies: int = 50
+
+
+@dataclass(frozen=True)
+class CopyOrder:
+    leader_trade_id: str
+    leader_id: int
+    follower_id: int
+    asset_symbol: str
+    direction: str
+    amount: Decimal
+
+
+@dataclass
+class CopyOrderResult:
+    follower_id: int
+    status: str  # submitted, rejected or failed
+    amount: Decimal = Decimal("0")
+    trade_id: Optional[str] = None
+    reason: Optional[str] = None
+
+
+@dataclass
+class FanOutReport:
+    leader_trade_id: str
+    leader_id: int
+    results: List[CopyOrderResult] = field(default_factory=list)
+    duration_seconds: float = 0.0
+
+    def count(self, status: str) -> int:
+        return sum(1 for result in self.results if result.status == status)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "leader_trade_id": self.leader_trade_id,
+            "leader_id": self.leader_id,
+            "followers": len(self.results),
+            "submitted": self.count("submitted"),
+            "rejected": self.count("rejected"),
+            "failed": self.count("failed"),
+            "duration_seconds": self.duration_seconds
+        }
+
+
+@dataclass
+class CopyTradingMetrics:
+    fan_outs: int = 0
+    orders_submitted: int = 0
+    orders_rejected: int = 0
+    orders_failed: int = 0
+    last_fan_out_seconds: float = 0.0
+
+    def record(self, report: FanOutReport) -> None:
+        self.fan_outs += 1
+        self.orders_submitted += report.count("submitted")
+        self.orders_rejected += report.count("rejected")
+        self.orders_failed += report.count("failed")
+        self.last_fan_out_seconds = report.duration_seconds
+
+
+class CopyFollowRepository(Protocol):
+    """Follower graph storage, read per leader."""
+
+    async def get_followers(self, leader_id: int) -> List[CopyFollow]:
+        """Active follows of a leader."""
+        ...
+
+    async def save(self, follow: CopyFollow) -> CopyFollow:
+        """Create or update a follow."""
+        ...
+
+    async def remove(self, follower_id: int, leader_id: int) -> bool:
+        """Stop a follow; False if it did not exist."""
+        ...
+
+
+class BalanceProvider(Protocol):
+    """Available trading balances, read for many users at once."""
+
+    async def get_available_balances(self, user_ids: Sequence[int]) -> Dict[int, Decimal]:
+        ...
+
+
+# Submits one copy order and returns the resulting trade id. A ValueError is
+# a risk rejection by the trading service; any other exception is a failure.
+CopyOrderSubmitter = Callable[[CopyOrder], Awaitable[str]]
+
+
+class InMemoryCopyFollowRepository:
+    """In-memory follower graph for tests and local development."""
+
+    def __init__(self):
+        self._follows: Dict[int, Dict[int, CopyFollow]] = {}
+
+    async def get_followers(self, leader_id: int) -> List[CopyFollow]:
+        return list(self._follows.get(leader_id, {}).values())
+
+    async def save(self, follow: CopyFollow) -> CopyFollow:
+        self._follows.setdefault(follow.leader_id, {})[follow.follower_id] = follow
+        return follow
+
+    async def remove(self, follower_id: int, leader_id: int) -> bool:
+        return self._follows.get(leader_id, {}).pop(follower_id, None) is not None
+
+
+def size_copy_orders(
+    leader_amount: float,
+    leader_balance: float,
+    balances: np.ndarray,
+    allocation_pcts: np.ndarray,
+    trade_caps: np.ndarray,
+    max_position_pct: float
+) -> np.ndarray:
+    """
+    Order amount for every follower, rounded down to the cent.
+
+    ``trade_caps`` holds each follower's per-trade cap (inf for none).
+    """
+    if leader_balance <= 0:
+        return np.zeros(len(balances))
+    ratio = min(1.0, max(0.0, leader_amount / leader_balance))
+    amounts = balances * (allocation_pcts / 100.0) * ratio
+    amounts = np.minimum(amounts, trade_caps)
+    amounts = np.minimum(amounts, balances * (max_position_pct / 100.0))
+    return np.floor(np.maximum(amounts, 0.0) * 100.0) / 100.0
+
+
+class CopyTradingState:
+    """Fan-out dedupe, copy trade ids and daily copy counts (Redis or memory)."""
+
+    KEY_PREFIX = "copy_trading"
+
+    def __init__(
+        self,
+        redis_client=None,
+        remembered_trades: int = 100_000,
+        remember_seconds: int = 7 * 24 * 3600
+    ):
+        self.redis = redis_client
+        self.remembered_trades = remembered_trades
+        self.remember_seconds = remember_seconds
+        # Copy trade ids are always remembered locally too: a copy trade's
+        # event can arrive before the Redis write of its id completes
+        self._copy_trade_ids: "OrderedDict[str, None]" = OrderedDict()
+        self._fanned_out: "OrderedDict[str, None]" = OrderedDict()
+        self._daily_copies: Dict[int, Tuple[date, int]] = {}
+
+    def _key(self, *parts: Any) -> str:
+        return ":".join([self.KEY_PREFIX, *map(str, parts)])
+
+    async def claim_fan_out(self, leader_trade_id: str) -> bool:
+        """True the first time a leader trade is claimed for fan-out."""
+        if self.redis is not None:
+            return bool(await self.redis.set(
+                self._key("fanned_out", leader_trade_id), 1, nx=True, ex=self.remember_seconds
+            ))
+        if leader_trade_id in self._fanned_out:
+            return False
+        self._remember(self._fanned_out, leader_trade_id)
+        return True
+
+    async def add_copy_trade(self, trade_id: str) -> None:
+        self._remember(self._copy_trade_ids, trade_id)
+        if self.redis is not None:
+            await self.redis.set(self._key("copy_trade", trade_id), 1, ex=self.remember_seconds)
+
+    async def is_copy_trade(self, trade_id: str) -> bool:
+        if trade_id in self._copy_trade_ids:
+            return True
+        if self.redis is not None:
+            return bool(await self.redis.exists(self._key("copy_trade", trade_id)))
+        return False
+
+    async def copies_on(self, follower_ids: Sequence[int], day: date) -> List[int]:
+        """Copies counted for each follower on ``day``."""
+        if self.redis is not None:
+            if not follower_ids:
+                return []
+            counts = await self.redis.mget([self._key("daily", day.isoformat(), user_id) for user_id in follower_ids])
+            return [int(count) if count is not None else 0 for count in counts]
+        return [self._local_copies_on(follower_id, day) for follower_id in follower_ids]
+
+    async def count_copy(self, follower_id: int, day: date) -> None:
+        if self.redis is not None:
+            key = self._key("daily", day.isoformat(), follower_id)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.incr(key)
+                pipe.expire(key, 2 * 24 * 3600)
+                await pipe.execute()
+            return
+        self._daily_copies[follower_id] = (day, self._local_copies_on(follower_id, day) + 1)
+
+    def _local_copies_on(self, follower_id: int, day: date) -> int:
+        counted_day, count = self._daily_copies.get(follower_id, (day, 0))
+        return count if counted_day == day else 0
+
+    def _remember(self, seen: "OrderedDict[str, None]", trade_id: str) -> None:
+        seen[trade_id] = None
+        if len(seen) > self.remembered_trades:
+            seen.popitem(last=False)
+
+
+class CopyTradingEngine:
+    """Fans leader trades out to their followers."""
+
+    def __init__(
+        self,
+        follows: CopyFollowRepository,
+        balances: BalanceProvider,
+        submit: CopyOrderSubmitter,
+        limits: Optional[CopyRiskLimits] = None,
+        concurrency: int = 64,
+        state: Optional[CopyTradingState] = None
+    ):
+        if concurrency < 1:
+            raise ValueError("Concurrency must be at least 1")
+        self.follows = follows
+        self.balances = balances
+        self.submit = submit
+        self.limits = limits or CopyRiskLimits()
+        self.concurrency = concurrency
+        self.metrics = CopyTradingMetrics()
+        self.state = state or CopyTradingState()
+
+    async def start(self, event_bus: EventBus) -> None:
+        await event_bus.subscribe(TRADE_EXECUTED, self.handle_trade_executed)
+
+    async def stop(self, event_bus: EventBus) -> None:
+        await event_bus.unsubscribe(TRADE_EXECUTED, self.handle_trade_executed)
+
+    async def is_copy_trade(self, trade_id: str) -> bool:
+        return await self.state.is_copy_trade(trade_id)
+
+    async def handle_trade_executed(self, event) -> Optional[FanOutReport]:
+        """EventBus handler for TradeExecutedEvent."""
+        if await self.is_copy_trade(event.trade_id):
+            return None
+        return await self.fan_out(
+            leader_id=event.user_id,
+            leader_trade_id=event.trade_id,
+            asset_symbol=event.asset_symbol,
+            direction=event.direction,
+            amount=Decimal(event.amount)
+        )
+
+    async def fan_out(
+        self,
+        leader_id: int,
+        leader_trade_id: str,
+        asset_symbol: str,
+        direction: str,
+        amount: Decimal
+    ) -> Optional[FanOutReport]:
+        """Copy one leader trade to all of the leader's followers."""
+        # The bus redelivers events after handler retries; copy each trade once
+        if not await self.state.claim_fan_out(leader_trade_id):
+            return None
+
+        started = time.perf_counter()
+        report = FanOutReport(leader_trade_id=leader_trade_id, leader_id=leader_id)
+        follows = await self.follows.get_followers(leader_id)
+        if follows:
+            orders, report.results = await self._size_orders(
+                follows, leader_id, leader_trade_id, asset_symbol, direction, amount
+            )
+            report.results.extend(await self._submit_all(orders))
+        report.duration_seconds = time.perf_counter() - started
+
+        self.metrics.record(report)
+        logger.info(f"Copied trade {leader_trade_id} of leader {leader_id}: {report.to_dict()}")
+        return report
+
+    async def _size_orders(
+        self,
+        follows: List[CopyFollow],
+        leader_id: int,
+        leader_trade_id: str,
+        asset_symbol: str,
+        direction: str,
+        amount: Decimal
+    ) -> Tuple[List[CopyOrder], List[CopyOrderResult]]:
+        """Size all follower orders in one pass; returns (orders, rejections)."""
+        balances = await self.balances.get_available_balances(
+            [leader_id] + [follow.follower_id for follow in follows]
+        )
+        limits = self.limits
+        today = datetime.now(timezone.utc).date()
+
+        follower_balances = np.array(
+            [float(balances.get(follow.follower_id, 0)) for follow in follows], dtype=np.float64
+        )
+        amounts = size_copy_orders(
+            float(amount),
+            float(balances.get(leader_id, 0)),
+            follower_balances,
+            np.array([float(follow.allocation_pct) for follow in follows], dtype=np.float64),
+            np.array([
+                float(follow.max_trade_amount) if follow.max_trade_amount is not None else np.inf
+                for follow in follows
+            ], dtype=np.float64),
+            float(limits.max_position_pct)
+        )
+        copies_today = np.array(await self.state.copies_on([follow.follower_id for follow in follows], today))
+
+        no_balance = follower_balances <= 0
+        daily_limit = ~no_balance & (copies_today >= limits.max_daily_copies)
+        below_minimum = ~no_balance & ~daily_limit & (amounts < float(limits.min_order_amount))
+        accepted = ~(no_balance | daily_limit | below_minimum)
+
+        rejections = [
+            CopyOrderResult(follows[i].follower_id, "rejected", reason=reason)
+            for mask, reason in (
+                (no_balance, "no_balance"),
+                (daily_limit, "daily_copy_limit"),
+                (below_minimum, "below_minimum")
+            )
+            for i in np.flatnonzero(mask).tolist()
+        ]
+        orders = [
+            CopyOrder(
+                leader_trade_id=leader_trade_id,
+                leader_id=leader_id,
+                follower_id=follows[i].follower_id,
+                asset_symbol=asset_symbol,
+                direction=direction,
+                amount=Decimal(repr(order_amount)).quantize(CENT, rounding=ROUND_DOWN)
+            )
+            for i, order_amount in zip(np.flatnonzero(accepted).tolist(), amounts[accepted].tolist())
+        ]
+        return orders, rejections
+
+    async def _submit_all(self, orders: List[CopyOrder]) -> List[CopyOrderResult]:
+        """Submit orders with at most ``concurrency`` in flight."""
+        if not orders:
+            return []
+        results: List[CopyOrderResult] = []
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [
+            asyncio.create_task(self._submit_worker(queue, results))
+            for _ in range(min(self.concurrency, len(orders)))
+        ]
+        try:
+            for order in orders:
+                await queue.put(order)
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return results
+
+    async def _submit_worker(self, queue: asyncio.Queue, results: List[CopyOrderResult]) -> None:
+        while True:
+            order = await queue.get()
+            try:
+                results.append(await self._submit_one(order))
+            finally:
+                queue.task_done()
+
+    async def _submit_one(self, order: CopyOrder) -> CopyOrderResult:
+        try:
+            trade_id = await self.submit(order)
+        except ValueError as e:
+            return CopyOrderResult(order.follower_id, "rejected", order.amount, reason=str(e))
+        except Exception as e:
+            logger.warning(f"Copy order for follower {order.follower_id} failed: {e}")
+            return CopyOrderResult(order.follower_id, "failed", order.amount, reason=str(e))
+
+        await self.state.add_copy_trade(trade_id)
+        await self.state.count_copy(order.follower_id, datetime.now(timezone.utc).date())
+        return CopyOrderResult(order.follower_id, "submitted", order.amount, trade_id=trade_id)
+
+
+class TradingServiceCopySubmitter:
+    """CopyOrderSubmitter executing copy orders through TradingDomainService."""
+
+    def __init__(
+        self,
+        trading_service,
+        resolve_asset: Callable[[str], Asset],
+        risk_params: RiskParameters,
+        currency: str = "USD",
+        is_mock: bool = False
+    ):
+        self.trading_service = trading_service
+        self.resolve_asset = resolve_asset
+        self.risk_params = risk_params
+        self.currency = currency
+        self.is_mock = is_mock
+
+    async def __call__(self, order: CopyOrder) -> str:
+        result = await self.trading_service.execute_trade(
+            user_id=order.follower_id,
+            asset=self.resolve_asset(order.asset_symbol),
+            direction=TradeDirection(order.direction),
+            amount=Money(order.amount, self.currency),
+            risk_params=self.risk_params,
+            is_mock=self.is_mock
+        )
+        return result["trade_id"]
@@ -63,10 +63,44 @@ class Trade:
         self._closed_at: Optional[datetime] = None
         self._error_message: Optional[str] = None
         self._exchange_order_id: Optional[str] = None
+        self._xp_gained: int = 0
         
         # Domain events (would be implemented with proper event system)
         self._domain_events: List[Dict[str, Any]] = []
-    
+
+    @classmethod
+    def restore(
+        cls,
+        trade_id: str,
+        user_id: int,
+        asset: Asset,
+        direction: TradeDirection,
+        amount: Money,
+        status: TradeStatus,
+        created_at: datetime,
+        entry_price: Optional[Money] = None,
+        exit_price: Optional[Money] = None,
+        closed_at: Optional[datetime] = None,
+        exchange_order_id: Optional[str] = None,
+        xp_gained: int = 0
+    ) -> 'Trade':
+        """Rebuild a persisted trade in its stored state (no lifecycle events)."""
+        trade = cls(
+            user_id=user_id,
+            asset=asset,
+            direction=direction,
+            amount=amount,
+            entry_price=entry_price,
+            trade_id=trade_id,
+            created_at=created_at
+        )
+        trade._status = status
+        trade._exit_price = exit_price
+        trade._closed_at = closed_at
+        trade._exchange_order_id = exchange_order_id
+        trade._xp_gained = xp_gained
+        return trade
+
     @property
     def trade_id(self) -> str:
         return self._trade_id
@@ -111,6 +145,16 @@ class Trade:
     def exchange_order_id(self) -> Optional[str]:
         return self._exchange_order_id
     
+    @property
+    def xp_gained(self) -> int:
+        return self._xp_gained
+    
+    def record_rewards(self, xp_gained: int) -> None:
+        """Record the XP awarded for this trade by the post-trade stage."""
+        if xp_gained < 0:
+            raise ValueError("XP gained cannot be negative")
+        self._xp_gained = xp_gained
+    
     def execute(self, entry_price: Money, exchange_order_id: str) -> None:
         """Execute the trade with given entry price and exchange order ID."""
         if self._status != TradeStatus.PENDING:
@@ -0,0 +1,374 @@
+"""
+Starknet Outbox
+
+Transactional outbox for the on-chain side effects of trading (XP points
+updates and achievement NFT mints).
+
+Instead of calling the Starknet RPC inline, the trading service writes
+OutboxMessage rows in the same unit of work as the trade's reward record.
+StarknetOutboxWorker drains pending rows in batches, coalesces point deltas
+per user address, deduplicates achievement mints and submits everything as
+a single multicall transaction. A batch the chain rejects is bisected until
+the failing messages are isolated; only those are retried with exponential
+backoff and parked as dead letters after max_attempts (an unreachable RPC
+retries the whole batch). Only the RPC is retried: when recording a
+delivery fails after its transaction landed, the worker keeps the tx hash
+and records it again instead of re-sending the deltas.
+
+The OutboxRepository interface is implemented in the infrastructure layer
+(repositories/outbox_repository.py); InMemoryOutboxRepository is provided for
+tests and local development against a fake StarknetClient.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxMessageKind(Enum):
+    """On-chain operation requested by an outbox message."""
+    UPDATE_POINTS = "starknet.update_points"
+    MINT_ACHIEVEMENT = "starknet.mint_achievement"
+
+
+class OutboxStatus(Enum):
+    """Delivery status of an outbox message."""
+    PENDING = "pending"
+    DELIVERED = "delivered"
+    DEAD = "dead"  # Exceeded max attempts, needs manual attention
+
+
+@dataclass
+class OutboxMessage:
+    """A pending on-chain side effect recorded alongside the trade."""
+    kind: OutboxMessageKind
+    user_address: str
+    payload: Dict[str, Any]
+    dedupe_key: str
+    message_id: str = field(default_factory=lambda: str(uuid4()))
+    status: OutboxStatus = OutboxStatus.PENDING
+    attempts: int = 0
+    available_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    last_error: Optional[str] = None
+    tx_hash: Optional[str] = None
+
+    @classmethod
+    def points_update(cls, user_address: str, points_delta: int, source_id: str) -> 'OutboxMessage':
+        """Points delta for a user, deduplicated per source (e.g. trade ID)."""
+        return cls(
+            kind=OutboxMessageKind.UPDATE_POINTS,
+            user_address=user_address,
+            payload={"points_delta": points_delta, "source_id": source_id},
+            dedupe_key=f"points:{source_id}"
+        )
+
+    @classmethod
+    def achievement_mint(cls, user_address: str, achievement_id: str) -> 'OutboxMessage':
+        """Achievement NFT mint, deduplicated per user and achievement."""
+        return cls(
+            kind=OutboxMessageKind.MINT_ACHIEVEMENT,
+            user_address=user_address,
+            payload={"achievement_id": achievement_id},
+            dedupe_key=f"achievement:{user_address}:{achievement_id}"
+        )
+
+
+@dataclass(frozen=True)
+class StarknetCall:
+    """A single contract call inside a Starknet multicall transaction."""
+    entrypoint: str
+    calldata: Tuple[Any, ...]
+
+
+class OutboxRepository(Protocol):
+    """Repository interface for outbox persistence.
+
+    Implementations must write ``add`` in the caller's current transaction
+    so outbox rows commit or roll back together with the trade.
+    """
+
+    async def add(self, messages: List[OutboxMessage]) -> None:
+        """Persist messages, ignoring any whose dedupe_key already exists."""
+        ...
+
+    async def claim_pending(self, limit: int, now: datetime) -> List[OutboxMessage]:
+        """Claim up to ``limit`` pending messages that are due for delivery."""
+        ...
+
+    async def mark_delivered(self, message_ids: List[str], tx_hash: Optional[str] = None) -> None:
+        """Mark messages as delivered by transaction ``tx_hash``."""
+        ...
+
+    async def mark_retry(self, message_ids: List[str], error: str, available_at: datetime) -> None:
+        """Record a failed attempt and schedule the next one."""
+        ...
+
+    async def mark_dead(self, message_ids: List[str], error: str) -> None:
+        """Park messages that exhausted their retries."""
+        ...
+
+    async def commit(self) -> None:
+        """Commit the marks made since the last claim, releasing the claimed messages."""
+        ...
+
+    async def rollback(self) -> None:
+        """Discard those marks; the claimed messages become due again."""
+        ...
+
+
+class InMemoryOutboxRepository:
+    """In-memory outbox for tests and local development."""
+
+    def __init__(self):
+        self._messages: Dict[str, OutboxMessage] = {}
+        self._dedupe_keys: Dict[str, str] = {}
+        self._claimed: set = set()
+
+    async def add(self, messages: List[OutboxMessage]) -> None:
+        for message in messages:
+            if message.dedupe_key in self._dedupe_keys:
+                continue
+            self._dedupe_keys[message.dedupe_key] = message.message_id
+            self._messages[message.message_id] = message
+
+    async def claim_pending(self, limit: int, now: datetime) -> List[OutboxMessage]:
+        due = [
+            m for m in self._messages.values()
+            if m.status == OutboxStatus.PENDING
+            and m.message_id not in self._claimed
+            and m.available_at <= now
+        ]
+        due.sort(key=lambda m: m.created_at)
+        batch = due[:limit]
+        self._claimed.update(m.message_id for m in batch)
+        return batch
+
+    async def mark_delivered(self, message_ids: List[str], tx_hash: Optional[str] = None) -> None:
+        for message_id in message_ids:
+            self._messages[message_id].status = OutboxStatus.DELIVERED
+            self._messages[message_id].tx_hash = tx_hash
+            self._claimed.discard(message_id)
+
+    async def mark_retry(self, message_ids: List[str], error: str, available_at: datetime) -> None:
+        for message_id in message_ids:
+            message = self._messages[message_id]
+            message.attempts += 1
+            message.last_error = error
+            message.available_at = available_at
+            self._claimed.discard(message_id)
+
+    async def mark_dead(self, message_ids: List[str], error: str) -> None:
+        for message_id in message_ids:
+            message = self._messages[message_id]
+            message.attempts += 1
+            message.last_error = error
+            message.status = OutboxStatus.DEAD
+            self._claimed.discard(message_id)
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        self._claimed.clear()
+
+    def get_messages(self, status: Optional[OutboxStatus] = None) -> List[OutboxMessage]:
+        """Get stored messages, optionally filtered by status."""
+        return [m for m in self._messages.values() if status is None or m.status == status]
+
+
+def build_multicall(messages: List[OutboxMessage]) -> List[StarknetCall]:
+    """Coalesce outbox messages into the calls of one multicall transaction.
+
+    Point deltas for the same address are summed into a single call (zero
+    sums are dropped) and duplicate achievement mints are collapsed.
+    """
+    points_by_address: Dict[str, int] = {}
+    achievements: Dict[Tuple[str, str], None] = {}
+
+    for message in messages:
+        if message.kind == OutboxMessageKind.UPDATE_POINTS:
+            points_by_address[message.user_address] = (
+                points_by_address.get(message.user_address, 0) + int(message.payload["points_delta"])
+            )
+        elif message.kind == OutboxMessageKind.MINT_ACHIEVEMENT:
+            achievements[(message.user_address, message.payload["achievement_id"])] = None
+
+    return coalesced_calls(points_by_address, achievements)
+
+
+def coalesced_calls(
+    points_by_address: Dict[str, int],
+    achievements: Iterable[Tuple[str, str]]
+) -> List[StarknetCall]:
+    """Build multicall calls from summed point deltas and unique (address, achievement) pairs."""
+    calls = [
+        StarknetCall(entrypoint="update_user_points", calldata=(address, delta))
+        for address, delta in points_by_address.items()
+        if delta != 0
+    ]
+    calls.extend(
+        StarknetCall(entrypoint="mint_achievement", calldata=(address, achievement_id))
+        for address, achievement_id in achievements
+    )
+    return calls
+
+
+class StarknetOutboxWorker:
+    """Background worker that drains the outbox into Starknet multicalls."""
+
+    def __init__(
+        self,
+        outbox: OutboxRepository,
+        starknet_client,
+        batch_size: int = 200,
+        poll_interval: float = 1.0,
+        max_attempts: int = 8,
+        base_backoff: float = 1.0,
+        max_backoff: float = 300.0
+    ):
+        self.outbox = outbox
+        self.starknet_client = starknet_client
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.is_running = False
+        self._task = None
+        # Delivered messages whose delivery could not be recorded, by message ID
+        self._unrecorded: Dict[str, Optional[str]] = {}
+
+    async def start(self):
+        """Start draining the outbox in the background."""
+        if self.is_running:
+            logger.warning("Starknet outbox worker is already running")
+            return
+
+        self.is_running = True
+        self._task = asyncio.create_task(self._run_loop())
+        logger.info(f"Starknet outbox worker started (poll interval: {self.poll_interval}s)")
+
+    async def stop(self):
+        """Stop the worker after the current batch."""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+        logger.info("Starknet outbox worker stopped")
+
+    async def run_once(self) -> int:
+        """Deliver one batch of due messages. Returns the number of messages handled.
+
+        Outcomes are recorded together once the batch is done. Raises when
+        a delivery that reached the chain cannot be recorded; the next run
+        records it again before claiming anything, so this worker never
+        re-sends it.
+        """
+        if self._unrecorded:
+            await self._record([], datetime.now(timezone.utc))
+
+        now = datetime.now(timezone.utc)
+        messages = await self.outbox.claim_pending(self.batch_size, now)
+        if not messages:
+            return 0
+
+        failures: List[Tuple[List[OutboxMessage], str]] = []
+        await self._deliver(messages, failures)
+        await self._record(failures, now)
+        return len(messages)
+
+    async def _deliver(self, messages: List[OutboxMessage], failures: List[Tuple[List[OutboxMessage], str]]) -> None:
+        """Submit messages in one multicall, bisecting a rejected batch to isolate the failing messages."""
+        calls = build_multicall(messages)
+        tx_hash = None
+        try:
+            if calls:
+                tx_hash = await self.starknet_client.execute_multicall(calls)
+                logger.info(
+                    f"Submitted {len(calls)} Starknet calls for {len(messages)} outbox messages (tx {tx_hash})"
+                )
+        except Exception as e:
+            if len(messages) > 1 and not _is_transient(e):
+                middle = len(messages) // 2
+                await self._deliver(messages[:middle], failures)
+                await self._deliver(messages[middle:], failures)
+            else:
+                failures.append((messages, str(e)))
+            return
+
+        for message in messages:
+            self._unrecorded[message.message_id] = tx_hash
+
+    async def _record(self, failures: List[Tuple[List[OutboxMessage], str]], now: datetime) -> None:
+        """Record deliveries and failed attempts in one commit."""
+        by_tx: Dict[Optional[str], List[str]] = {}
+        for message_id, tx_hash in self._unrecorded.items():
+            by_tx.setdefault(tx_hash, []).append(message_id)
+        try:
+            for tx_hash, message_ids in by_tx.items():
+                await self.outbox.mark_delivered(message_ids, tx_hash)
+            for messages, error in failures:
+                await self._handle_failure(messages, error, now)
+            await self.outbox.commit()
+        except Exception:
+            await self.outbox.rollback()
+            if by_tx:
+                logger.error(
+                    f"Failed to record delivery of {len(self._unrecorded)} outbox messages "
+                    f"(tx {', '.join(str(tx_hash) for tx_hash in by_tx)})"
+                )
+            raise
+        self._unrecorded.clear()
+
+    async def _run_loop(self):
+        """Drain continuously, sleeping only when the outbox is empty."""
+        while self.is_running:
+            try:
+                handled = await self.run_once()
+                if handled < self.batch_size:
+                    await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in Starknet outbox worker loop: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _handle_failure(self, messages: List[OutboxMessage], error: str, now: datetime):
+        """Schedule retries with exponential backoff, dead-lettering exhausted messages."""
+        retry_groups: Dict[datetime, List[str]] = {}
+        dead = []
+
+        for message in messages:
+            attempt = message.attempts + 1
+            if attempt >= self.max_attempts:
+                dead.append(message.message_id)
+                continue
+            delay = min(self.max_backoff, self.base_backoff * (2 ** (attempt - 1)))
+            retry_groups.setdefault(now + timedelta(seconds=delay), []).append(message.message_id)
+
+        for available_at, message_ids in retry_groups.items():
+            await self.outbox.mark_retry(message_ids, error, available_at)
+        if dead:
+            await self.outbox.mark_dead(dead, error)
+            logger.error(f"{len(dead)} Starknet outbox messages exhausted retries: {error}")
+        else:
+            logger.warning(f"Starknet multicall failed for {len(messages)} outbox messages: {error}")
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether an RPC failure says nothing about the messages (the node was unreachable)."""
+    return isinstance(error, OSError)
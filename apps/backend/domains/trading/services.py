@@ -24,16 +24,19 @@ import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-from typing import Dict, List, Optional, Any, Protocol
+from typing import Dict, List, Optional, Any, Protocol, Set, Callable, Awaitable, TypeVar, AsyncIterator
 from dataclasses import dataclass
 
 from .entities import Trade, Portfolio, Position
 from .value_objects import Asset, Money, RiskParameters, TradeDirection, TradeStatus, AssetCategory
+from .outbox import OutboxMessage, OutboxRepository, StarknetCall
 from ..shared.events import DomainEvent, EventBus
-from ..shared.repositories import Repository
+from ..shared.repositories import Repository, UnitOfWork
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
 
 # Domain Events
 @dataclass
@@ -51,6 +54,10 @@ class TradeExecutedEvent(DomainEvent):
     def event_type(self) -> str:
         return "trade_executed"
 
+    @property
+    def aggregate_id(self) -> str:
+        return self.trade_id
+
 
 @dataclass
 class TradingRewardsCalculatedEvent(DomainEvent):
@@ -71,6 +78,10 @@ class TradingRewardsCalculatedEvent(DomainEvent):
     def event_type(self) -> str:
         return "trading_rewards_calculated"
 
+    @property
+    def aggregate_id(self) -> str:
+        return self.trade_id
+
 
 @dataclass
 class ClanBattleScoreUpdatedEvent(DomainEvent):
@@ -85,6 +96,14 @@ class ClanBattleScoreUpdatedEvent(DomainEvent):
     def event_type(self) -> str:
         return "clan_battle_score_updated"
 
+    @property
+    def aggregate_id(self) -> str:
+        return f"clan_battle:{self.battle_id}"
+
+
+# Events TradingDomainService emits, as registered with a persistent event store
+TRADING_EVENT_TYPES = (TradeExecutedEvent, TradingRewardsCalculatedEvent, ClanBattleScoreUpdatedEvent)
+
 
 # Repository Interfaces (to be implemented in infrastructure layer)
 class TradeRepository(Protocol):
@@ -157,6 +176,10 @@ class StarknetClient(Protocol):
     async def mint_achievement(self, user_address: str, achievement_id: str) -> bool:
         """Mint achievement NFT on blockchain."""
         ...
+    
+    async def execute_multicall(self, calls: List[StarknetCall]) -> str:
+        """Submit several contract calls as one transaction, returning its hash."""
+        ...
 
 
 class AIAnalysisService(Protocol):
@@ -171,6 +194,16 @@ class AIAnalysisService(Protocol):
     ) -> Optional[Dict[str, Any]]:
         """Get AI-powered trading recommendation."""
         ...
+    
+    def stream_trading_recommendation(
+        self,
+        user_id: int,
+        market_data: Dict[str, Any],
+        user_profile: Dict[str, Any],
+        trading_history: List[Dict[str, Any]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a recommendation as "delta"/"field" events, ending with "done" or "error"."""
+        ...
 
 
 # Main Domain Service
@@ -194,6 +227,20 @@ class TradingDomainService:
     - Trading rewards and gamification integration
     - Clan battle scoring
     - AI-powered trading recommendations
+    
+    Trade execution is split into a commit path (validate, execute, save trade,
+    update portfolio) and a post-trade stage (rewards, Starknet updates, domain
+    events) that runs in the background with retries, so the caller's latency
+    never includes blockchain RPC time.
+    
+    When an outbox is configured, on-chain updates are not sent from the
+    post-trade stage at all: once the trade is committed, the post-trade
+    stage writes its rewards and their outbox messages in one unit of work,
+    and StarknetOutboxWorker delivers them.
+    
+    Domain events are published on the injected EventBus (for example
+    shared.event_bus.InMemoryEventBus); other domains react by subscribing
+    to them instead of being called inline.
     """
     
     def __init__(
@@ -203,7 +250,12 @@ class TradingDomainService:
         exchange_client: ExchangeClient,
         starknet_client: StarknetClient,
         ai_analysis_service: AIAnalysisService,
-        event_bus: EventBus
+        event_bus: EventBus,
+        post_trade_max_attempts: int = 3,
+        post_trade_retry_delay: float = 0.5,
+        outbox: Optional[OutboxRepository] = None,
+        unit_of_work: Optional[UnitOfWork] = None,
+        mock_latency: Optional[Callable[[], Awaitable[None]]] = None
     ):
         self._trade_repo = trade_repository
         self._portfolio_repo = portfolio_repository
@@ -211,6 +263,18 @@ class TradingDomainService:
         self._starknet_client = starknet_client
         self._ai_service = ai_analysis_service
         self._event_bus = event_bus
+        
+        # Post-trade stage configuration and in-flight tasks
+        self._post_trade_max_attempts = post_trade_max_attempts
+        self._post_trade_retry_delay = post_trade_retry_delay
+        self._post_trade_tasks: Set[asyncio.Task] = set()
+        
+        # Durable delivery of on-chain updates (optional)
+        self._outbox = outbox
+        self._unit_of_work = unit_of_work
+        
+        # Simulated execution delay of mock trades (e.g. LatencyModel.wait)
+        self._mock_latency = mock_latency or (lambda: asyncio.sleep(0.5))
     
     async def execute_trade(
         self,
@@ -226,6 +290,13 @@ class TradingDomainService:
         
         Consolidates logic from original TradingService.execute_trade() 
         with improved domain-driven design.
+        
+        Only the commit path (execution, trade persistence, portfolio update)
+        is awaited. Rewards, blockchain updates and domain events are handed
+        to the post-trade stage, so the returned ``rewards`` is ``None`` and
+        ``post_trade_status`` is ``"scheduled"``. With an outbox the
+        post-trade stage writes the rewards and their outbox messages in one
+        small transaction of their own.
         """
         # 1. Validate user and risk parameters
         await self._validate_trade_request(user_id, amount, risk_params)
@@ -251,29 +322,8 @@ class TradingDomainService:
                 exchange_order_id=execution_result['order_id']
             )
             
-            # 5. Save trade to repository
-            await self._trade_repo.save(trade)
-            
-            # 6. Update portfolio
-            await self._update_portfolio(user_id, trade)
-            
-            # 7. Calculate and award rewards
-            rewards = await self._calculate_trading_rewards(user_id, trade)
-            
-            # 8. Update blockchain state (if real trade)
-            if not is_mock:
-                await self._update_blockchain_stats(user_id, trade, rewards)
-            
-            # 9. Emit domain events
-            await self._emit_trade_events(trade, rewards)
-            
-            return {
-                "trade_id": trade.trade_id,
-                "status": "success",
-                "executed_price": float(trade.entry_price.amount),
-                "exchange_order_id": trade.exchange_order_id,
-                "rewards": rewards
-            }
+            # 5-6. Save trade and update portfolio
+            await self._commit_trade(user_id, trade)
             
         except Exception as e:
             # Rollback: mark trade as failed
@@ -282,6 +332,23 @@ class TradingDomainService:
             
             logger.error(f"Trade execution failed for user {user_id}: {str(e)}")
             raise
+        
+        # 7. Rewards, blockchain state and events run off the critical path
+        self._schedule_post_trade(user_id, trade, is_mock)
+        
+        return {
+            "trade_id": trade.trade_id,
+            "status": "success",
+            "executed_price": float(trade.entry_price.amount),
+            "exchange_order_id": trade.exchange_order_id,
+            "rewards": None,
+            "post_trade_status": "scheduled"
+        }
+    
+    async def wait_for_post_trade(self) -> None:
+        """Wait until all scheduled post-trade work has finished (shutdown, tests)."""
+        while self._post_trade_tasks:
+            await asyncio.gather(*list(self._post_trade_tasks), return_exceptions=True)
     
     async def close_trade(
         self,
@@ -379,6 +446,43 @@ class TradingDomainService:
         Consolidates logic from GroqService.get_trading_recommendation()
         with improved domain integration.
         """
+        context = await self._recommendation_context(user_id, asset)
+        
+        # Get AI recommendation
+        recommendation = await self._ai_service.get_trading_recommendation(user_id=user_id, **context)
+        
+        return recommendation
+    
+    async def stream_ai_trading_recommendation(
+        self,
+        user_id: int,
+        asset: Asset
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an AI-powered trading recommendation as it is generated.
+        
+        Yields the AI service's events: "delta" text, "field" as each
+        recommendation field completes, then "done" with the result
+        (or "error"). AI services that cannot stream yield only "done".
+        """
+        context = await self._recommendation_context(user_id, asset)
+        
+        stream = getattr(self._ai_service, "stream_trading_recommendation", None)
+        if stream is None:
+            recommendation = await self._ai_service.get_trading_recommendation(user_id=user_id, **context)
+            if recommendation is None:
+                yield {"type": "error", "message": "AI analysis is not available"}
+            else:
+                yield {"type": "done", "result": recommendation}
+            return
+        
+        async for event in stream(user_id=user_id, **context):
+            yield event
+    
+    # Private helper methods
+    
+    async def _recommendation_context(self, user_id: int, asset: Asset) -> Dict[str, Any]:
+        """Market data, user profile and trading history for AI analysis."""
         # Gather context data
         portfolio = await self.get_portfolio(user_id)
         recent_trades = await self._trade_repo.get_user_trades(user_id, limit=20)
@@ -409,17 +513,11 @@ class TradingDomainService:
             for trade in recent_trades[-10:]  # Last 10 trades
         ]
         
-        # Get AI recommendation
-        recommendation = await self._ai_service.get_trading_recommendation(
-            user_id=user_id,
-            market_data=market_data,
-            user_profile=user_profile,
-            trading_history=trading_history
-        )
-        
-        return recommendation
-    
-    # Private helper methods
+        return {
+            "market_data": market_data,
+            "user_profile": user_profile,
+            "trading_history": trading_history
+        }
     
     async def _validate_trade_request(
         self,
@@ -454,7 +552,7 @@ class TradingDomainService:
     async def _execute_mock_trade(self, trade: Trade) -> Dict[str, Any]:
         """Execute a mock trade with realistic simulation."""
         # Simulate execution delay
-        await asyncio.sleep(0.5)
+        await self._mock_latency()
         
         # Get current market price
         current_price = await self._exchange_client.get_current_price(trade.asset.symbol)
@@ -486,6 +584,53 @@ class TradingDomainService:
             'timestamp': datetime.now(timezone.utc)
         }
     
+    def _schedule_post_trade(self, user_id: int, trade: Trade, is_mock: bool) -> None:
+        """Start the post-trade stage for a committed trade in the background."""
+        task = asyncio.create_task(self._run_post_trade(user_id, trade, is_mock))
+        self._post_trade_tasks.add(task)
+        task.add_done_callback(self._post_trade_tasks.discard)
+    
+    async def _run_post_trade(self, user_id: int, trade: Trade, is_mock: bool) -> None:
+        """Calculate rewards, then sync blockchain state and emit events concurrently."""
+        try:
+            rewards = await self._with_retries(
+                f"Rewards calculation for trade {trade.trade_id}",
+                lambda: self._calculate_trading_rewards(user_id, trade)
+            )
+        except Exception as e:
+            logger.error(f"Post-trade stage aborted for trade {trade.trade_id}: {e}")
+            return
+        
+        side_effects = [self._emit_trade_events(trade, rewards)]
+        if not is_mock:
+            if self._outbox is not None:
+                side_effects.append(self._with_retries(
+                    f"Recording rewards for trade {trade.trade_id}",
+                    lambda: self._record_rewards_with_outbox(user_id, trade, rewards)
+                ))
+            else:
+                side_effects.append(self._update_blockchain_stats(user_id, trade, rewards))
+        
+        results = await asyncio.gather(*side_effects, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Post-trade side effect failed for trade {trade.trade_id}: {result}")
+    
+    async def _with_retries(self, description: str, operation: Callable[[], Awaitable[T]]) -> T:
+        """Run an async operation, retrying with exponential backoff on failure."""
+        delay = self._post_trade_retry_delay
+        for attempt in range(1, self._post_trade_max_attempts + 1):
+            try:
+                return await operation()
+            except Exception as e:
+                if attempt == self._post_trade_max_attempts:
+                    raise
+                logger.warning(
+                    f"{description} failed (attempt {attempt}/{self._post_trade_max_attempts}): {e}"
+                )
+                await asyncio.sleep(delay)
+                delay *= 2
+    
     async def _update_portfolio(self, user_id: int, trade: Trade) -> None:
         """Update user's portfolio with new trade."""
         portfolio = await self._portfolio_repo.get_by_user_id(user_id)
@@ -554,46 +699,104 @@ class TradingDomainService:
         rewards: Dict[str, Any]
     ) -> None:
         """Update user stats on Starknet blockchain."""
-        try:
-            user_address = f"0x{user_id:064x}"  # Convert user ID to address
-            
-            # Update XP points
-            await self._starknet_client.update_user_points(
-                user_address=user_address,
-                points_delta=rewards['xp']
+        user_address = f"0x{user_id:064x}"  # Convert user ID to address
+        
+        # XP points and achievement NFTs are independent calls, so they are
+        # submitted concurrently and retried individually
+        updates = [
+            self._with_retries(
+                f"Points update for user {user_id}",
+                lambda: self._starknet_client.update_user_points(
+                    user_address=user_address,
+                    points_delta=rewards['xp']
+                )
             )
-            
-            # Mint achievement NFTs
-            for achievement in rewards['achievements']:
-                await self._starknet_client.mint_achievement(
+        ]
+        for achievement in rewards['achievements']:
+            updates.append(self._with_retries(
+                f"Achievement mint '{achievement['id']}' for user {user_id}",
+                lambda achievement_id=achievement['id']: self._starknet_client.mint_achievement(
                     user_address=user_address,
-                    achievement_id=achievement['id']
+                    achievement_id=achievement_id
                 )
-        except Exception as e:
-            logger.warning(f"Blockchain update failed for user {user_id}: {e}")
-            # Don't fail the trade for blockchain issues
+            ))
+        
+        results = await asyncio.gather(*updates, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                # Don't fail the trade for blockchain issues
+                logger.warning(f"Blockchain update failed for user {user_id}: {result}")
+    
+    async def _commit_trade(self, user_id: int, trade: Trade) -> None:
+        """Save the executed trade and update the portfolio in one unit of work."""
+        if self._unit_of_work is None:
+            await self._trade_repo.save(trade)
+            await self._update_portfolio(user_id, trade)
+            return
+        async with self._unit_of_work:
+            await self._trade_repo.save(trade)
+            await self._update_portfolio(user_id, trade)
+            await self._unit_of_work.commit()
+    
+    def _outbox_messages(self, user_id: int, trade: Trade, rewards: Dict[str, Any]) -> List[OutboxMessage]:
+        """On-chain updates for a trade's rewards."""
+        user_address = f"0x{user_id:064x}"
+        messages = [OutboxMessage.points_update(user_address, rewards['xp'], source_id=trade.trade_id)]
+        messages.extend(
+            OutboxMessage.achievement_mint(user_address, achievement['id'])
+            for achievement in rewards['achievements']
+        )
+        return messages
+    
+    async def _record_rewards_with_outbox(
+        self,
+        user_id: int,
+        trade: Trade,
+        rewards: Dict[str, Any]
+    ) -> None:
+        """Persist the trade's rewards and its on-chain updates atomically.
+        
+        Runs after the trade committed, once the rewards (which need a price
+        quote) are known, so no transaction is held open across that call.
+        """
+        messages = self._outbox_messages(user_id, trade, rewards)
+        trade.record_rewards(rewards['xp'])
+        if self._unit_of_work is not None:
+            async with self._unit_of_work:
+                await self._trade_repo.save(trade)
+                await self._outbox.add(messages)
+                await self._unit_of_work.commit()
+        else:
+            await self._trade_repo.save(trade)
+            await self._outbox.add(messages)
     
     async def _emit_trade_events(self, trade: Trade, rewards: Dict[str, Any]) -> None:
         """Emit domain events for the completed trade."""
-        # Trade executed event
-        await self._event_bus.emit(TradeExecutedEvent(
-            trade_id=trade.trade_id,
-            user_id=trade.user_id,
-            asset_symbol=trade.asset.symbol,
-            direction=trade.direction.value,
-            amount=trade.amount.amount,
-            entry_price=trade.entry_price.amount if trade.entry_price else Decimal('0'),
-            executed_at=trade.created_at
-        ))
+        # Events are built once so retried emits carry the same event_id
+        events = [
+            TradeExecutedEvent(
+                trade_id=trade.trade_id,
+                user_id=trade.user_id,
+                asset_symbol=trade.asset.symbol,
+                direction=trade.direction.value,
+                amount=trade.amount.amount,
+                entry_price=trade.entry_price.amount if trade.entry_price else Decimal('0'),
+                executed_at=trade.created_at
+            ),
+            TradingRewardsCalculatedEvent(
+                user_id=trade.user_id,
+                trade_id=trade.trade_id,
+                xp_gained=rewards['xp'],
+                achievements_unlocked=[a['id'] for a in rewards['achievements']],
+                bonus_items=rewards.get('bonus_items', [])
+            )
+        ]
         
-        # Rewards calculated event
-        await self._event_bus.emit(TradingRewardsCalculatedEvent(
-            user_id=trade.user_id,
-            trade_id=trade.trade_id,
-            xp_gained=rewards['xp'],
-            achievements_unlocked=[a['id'] for a in rewards['achievements']],
-            bonus_items=rewards.get('bonus_items', [])
-        ))
+        for event in events:
+            await self._with_retries(
+                f"Emitting {event.event_type} for trade {trade.trade_id}",
+                lambda event=event: self._event_bus.emit(event)
+            )
     
     async def _get_current_prices_for_portfolio(self, portfolio: Portfolio) -> Dict[str, Money]:
         """Get current market prices for all assets in portfolio."""
@@ -684,9 +887,12 @@ class TradingDomainService:
         """Check if trade unlocks any achievements."""
         achievements = []
         
-        # First trade achievement
-        user_trades = await self._trade_repo.get_user_trades(user_id)
-        if len(user_trades) == 1:
+        # First trade achievement: no trade of the user's predates this one.
+        # Keyed on the trade rather than the current count, because later
+        # trades may commit before this trade's post-trade stage runs
+        total = await self._trade_repo.get_user_trades_count(user_id)
+        since_this = await self._trade_repo.get_user_trades_count(user_id, since=trade.created_at)
+        if total == since_this:
             achievements.append({
                 'id': 'first_trade',
                 'name': 'First Steps',
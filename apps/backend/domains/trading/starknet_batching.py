@@ -0,0 +1,282 @@
+"""
+Starknet Batch Submitter
+
+Collects XP point deltas and achievement mints for a short window and
+submits them as a single multicall transaction, so a burst of trades costs
+one nonce and one fee instead of one per update.
+
+StarknetBatchSubmitter implements the StarknetClient interface used by
+TradingDomainService (update_user_points / mint_achievement / execute_multicall)
+and can therefore replace a direct RPC client for both the inline post-trade
+path and StarknetOutboxWorker. Nonces are reserved locally by NonceManager
+and resynchronised from the chain after a nonce rejection.
+
+FakeStarknetChain is an in-memory chain with nonce validation and a simple
+fee model for tests and load simulations.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Protocol, Set, Tuple
+
+from .outbox import StarknetCall, coalesced_calls
+
+logger = logging.getLogger(__name__)
+
+
+class StarknetNonceError(Exception):
+    """Raised when a transaction is rejected because of an invalid nonce."""
+    pass
+
+
+@dataclass(frozen=True)
+class MulticallReceipt:
+    """Result of an accepted multicall transaction."""
+    tx_hash: str
+    fee: int  # Actual fee paid, in FRI
+
+
+class MulticallChain(Protocol):
+    """Low-level account interface the submitter signs transactions against."""
+
+    async def get_nonce(self, account_address: str) -> int:
+        """Get the next valid nonce for the account."""
+        ...
+
+    async def execute_multicall(
+        self,
+        account_address: str,
+        calls: List[StarknetCall],
+        nonce: int
+    ) -> MulticallReceipt:
+        """Sign and submit a multicall transaction with the given nonce."""
+        ...
+
+
+class NonceManager:
+    """Hands out sequential nonces without a chain round-trip per transaction."""
+
+    def __init__(self, chain: MulticallChain, account_address: str):
+        self._chain = chain
+        self._account_address = account_address
+        self._next_nonce: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    async def reserve(self) -> int:
+        """Reserve the next nonce, fetching it from the chain on first use."""
+        async with self._lock:
+            if self._next_nonce is None:
+                self._next_nonce = await self._chain.get_nonce(self._account_address)
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    async def resync(self) -> None:
+        """Drop the local nonce so the next reservation refetches it."""
+        async with self._lock:
+            self._next_nonce = None
+
+
+@dataclass
+class SubmitterMetrics:
+    """Throughput and fee metrics for batched submission."""
+    updates_received: int = 0
+    calls_submitted: int = 0
+    transactions_submitted: int = 0
+    failed_transactions: int = 0
+    total_fee: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def fee_per_update(self) -> float:
+        """Average fee paid per received update (point delta or mint)."""
+        return self.total_fee / self.updates_received if self.updates_received else 0.0
+
+    @property
+    def updates_per_second(self) -> float:
+        """Updates accepted per second since the submitter started."""
+        elapsed = time.monotonic() - self.started_at
+        return self.updates_received / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def coalescing_ratio(self) -> float:
+        """Received updates per submitted contract call."""
+        return self.updates_received / self.calls_submitted if self.calls_submitted else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "updates_received": self.updates_received,
+            "calls_submitted": self.calls_submitted,
+            "transactions_submitted": self.transactions_submitted,
+            "failed_transactions": self.failed_transactions,
+            "total_fee": self.total_fee,
+            "fee_per_update": self.fee_per_update,
+            "updates_per_second": self.updates_per_second,
+            "coalescing_ratio": self.coalescing_ratio
+        }
+
+
+class StarknetBatchSubmitter:
+    """Windowed, coalescing multicall submitter implementing StarknetClient."""
+
+    def __init__(
+        self,
+        chain: MulticallChain,
+        account_address: str,
+        window_seconds: float = 0.5,
+        max_batch_calls: int = 100
+    ):
+        self._chain = chain
+        self._account_address = account_address
+        self.window_seconds = window_seconds
+        self.max_batch_calls = max_batch_calls
+        self.nonces = NonceManager(chain, account_address)
+        self.metrics = SubmitterMetrics()
+
+        # Pending updates for the current window
+        self._points: Dict[str, int] = {}
+        self._mints: Dict[Tuple[str, str], None] = {}
+        self._waiters: List[asyncio.Future] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        # Early flushes of full windows, referenced until they finish
+        self._full_flushes: Set[asyncio.Task] = set()
+
+    async def update_user_points(self, user_address: str, points_delta: int) -> bool:
+        """Queue a points delta; resolves once its batch is on chain."""
+        self._points[user_address] = self._points.get(user_address, 0) + points_delta
+        return await self._enqueue()
+
+    async def mint_achievement(self, user_address: str, achievement_id: str) -> bool:
+        """Queue an achievement mint; resolves once its batch is on chain."""
+        self._mints[(user_address, achievement_id)] = None
+        return await self._enqueue()
+
+    async def execute_multicall(self, calls: List[StarknetCall]) -> str:
+        """Submit pre-built calls immediately (used by StarknetOutboxWorker)."""
+        self.metrics.updates_received += len(calls)
+        receipt = await self._submit(calls)
+        return receipt.tx_hash
+
+    async def flush(self) -> None:
+        """Submit everything pending in the current window now."""
+        if self._flush_task and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+        self._flush_task = None
+
+        calls = self._drain_calls()
+        waiters, self._waiters = self._waiters, []
+        if not calls:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(True)
+            return
+
+        try:
+            await self._submit(calls)
+        except Exception as e:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+            return
+
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(True)
+
+    async def _enqueue(self) -> bool:
+        """Register a waiter for the current window and schedule its flush."""
+        self.metrics.updates_received += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+
+        if len(self._points) + len(self._mints) >= self.max_batch_calls:
+            task = asyncio.create_task(self.flush())
+            self._full_flushes.add(task)
+            task.add_done_callback(self._full_flushes.discard)
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+
+        return await waiter
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(self.window_seconds)
+        await self.flush()
+
+    def _drain_calls(self) -> List[StarknetCall]:
+        """Turn the coalesced window into multicall calls and reset it."""
+        calls = coalesced_calls(self._points, self._mints)
+        self._points = {}
+        self._mints = {}
+        return calls
+
+    async def _submit(self, calls: List[StarknetCall]) -> MulticallReceipt:
+        """Submit a multicall with a managed nonce, resyncing once on nonce errors."""
+        for attempt in range(2):
+            nonce = await self.nonces.reserve()
+            try:
+                receipt = await self._chain.execute_multicall(self._account_address, calls, nonce)
+            except StarknetNonceError as e:
+                await self.nonces.resync()
+                if attempt == 1:
+                    self.metrics.failed_transactions += 1
+                    raise
+                logger.warning(f"Nonce {nonce} rejected, resyncing: {e}")
+                continue
+            except Exception:
+                # The nonce may or may not have been consumed; refetch it
+                await self.nonces.resync()
+                self.metrics.failed_transactions += 1
+                raise
+
+            self.metrics.transactions_submitted += 1
+            self.metrics.calls_submitted += len(calls)
+            self.metrics.total_fee += receipt.fee
+            logger.info(f"Submitted multicall with {len(calls)} calls (nonce {nonce}, tx {receipt.tx_hash})")
+            return receipt
+
+
+class FakeStarknetChain:
+    """In-memory Starknet chain for tests: validates nonces and charges fees."""
+
+    def __init__(self, base_fee: int = 1000, fee_per_call: int = 100):
+        self.base_fee = base_fee
+        self.fee_per_call = fee_per_call
+        self.nonces: Dict[str, int] = {}
+        self.points: Dict[str, int] = {}
+        self.achievements: Dict[str, set] = {}
+        self.transactions: List[Tuple[int, List[StarknetCall]]] = []
+        self.fail_next: int = 0
+
+    async def get_nonce(self, account_address: str) -> int:
+        return self.nonces.get(account_address, 0)
+
+    async def execute_multicall(
+        self,
+        account_address: str,
+        calls: List[StarknetCall],
+        nonce: int
+    ) -> MulticallReceipt:
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            raise ConnectionError("Starknet RPC unavailable")
+
+        expected = self.nonces.get(account_address, 0)
+        if nonce != expected:
+            raise StarknetNonceError(f"Invalid nonce {nonce}, expected {expected}")
+        self.nonces[account_address] = expected + 1
+
+        for call in calls:
+            if call.entrypoint == "update_user_points":
+                address, delta = call.calldata
+                self.points[address] = self.points.get(address, 0) + delta
+            elif call.entrypoint == "mint_achievement":
+                address, achievement_id = call.calldata
+                self.achievements.setdefault(address, set()).add(achievement_id)
+
+        self.transactions.append((nonce, list(calls)))
+        return MulticallReceipt(
+            tx_hash=f"0x{len(self.transactions):064x}",
+            fee=self.base_fee + self.fee_per_call * len(calls)
+        )
@@ -0,0 +1,10 @@
+"""
+Trading Domain Tests
+
+Test Structure:
+- test_services.py: Domain service orchestration with in-memory repositories
+  and fake exchange/Starknet/event bus collaborators
+- test_outbox.py: Starknet outbox coalescing, worker retries and dead-lettering
+- test_starknet_batching.py: Windowed multicall batching, nonce management
+  and fee metrics against FakeStarknetChain
+"""
@@ -0,0 +1,269 @@
+import asyncio
+import time
+import unittest
+from decimal import Decimal
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from ..copy_trading import (
+    CopyFollow,
+    CopyOrder,
+    CopyRiskLimits,
+    CopyTradingEngine,
+    CopyTradingState,
+    InMemoryCopyFollowRepository,
+    size_copy_orders,
+)
+from ..services import TradeExecutedEvent
+
+LEADER = 1
+
+
+class FakeBalances:
+    def __init__(self, balances: Dict[int, Decimal]):
+        self.balances = balances
+        self.calls = 0
+
+    async def get_available_balances(self, user_ids: Sequence[int]) -> Dict[int, Decimal]:
+        self.calls += 1
+        return {user_id: self.balances[user_id] for user_id in user_ids if user_id in self.balances}
+
+
+class FakeSubmitter:
+    """Records copy orders, tracking the peak number in flight"""
+
+    def __init__(self, latency: float = 0.0, reject: Sequence[int] = (), fail: Sequence[int] = ()):
+        self.latency = latency
+        self.reject = set(reject)
+        self.fail = set(fail)
+        self.orders: List[CopyOrder] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def __call__(self, order: CopyOrder) -> str:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if order.follower_id in self.reject:
+                raise ValueError("Insufficient balance for trade")
+            if order.follower_id in self.fail:
+                raise ConnectionError("exchange unavailable")
+            self.orders.append(order)
+            return f"copy-{order.leader_trade_id}-{order.follower_id}"
+        finally:
+            self.in_flight -= 1
+
+
+def _event(trade_id: str, user_id: int = LEADER, amount: str = "100") -> TradeExecutedEvent:
+    return TradeExecutedEvent(
+        trade_id=trade_id, user_id=user_id, asset_symbol="BTCUSD", direction="long", amount=Decimal(amount)
+    )
+
+
+class TestSizeCopyOrders(unittest.TestCase):
+    def test_orders_scale_with_allocation_and_leader_ratio(self):
+        amounts = size_copy_orders(
+            leader_amount=100.0,
+            leader_balance=1000.0,
+            balances=np.array([1000.0, 5000.0, 333.0]),
+            allocation_pcts=np.array([50.0, 10.0, 100.0]),
+            trade_caps=np.array([np.inf, np.inf, 20.0]),
+            max_position_pct=100.0
+        )
+        np.testing.assert_allclose(amounts, [50.0, 50.0, 20.0])
+
+    def test_position_limit_and_rounding_down(self):
+        amounts = size_copy_orders(900.0, 1000.0, np.array([1000.0, 10.01]), np.array([100.0, 100.0]),
+                                   np.array([np.inf, np.inf]), max_position_pct=20.0)
+        np.testing.assert_allclose(amounts, [200.0, 2.0])
+
+    def test_leader_without_balance_sizes_nothing(self):
+        amounts = size_copy_orders(100.0, 0.0, np.array([1000.0]), np.array([50.0]), np.array([np.inf]), 20.0)
+        np.testing.assert_allclose(amounts, [0.0])
+
+
+class TestCopyFollow(unittest.TestCase):
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            CopyFollow(follower_id=2, leader_id=2, allocation_pct=Decimal("10"))
+        with self.assertRaises(ValueError):
+            CopyFollow(follower_id=2, leader_id=1, allocation_pct=Decimal("0"))
+
+
+class TestCopyTradingEngine(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.follows = InMemoryCopyFollowRepository()
+        self.balances = FakeBalances({LEADER: Decimal("1000")})
+        self.submitter = FakeSubmitter()
+        self.engine = CopyTradingEngine(
+            self.follows, self.balances, self.submitter,
+            limits=CopyRiskLimits(max_position_pct=Decimal("100"), min_order_amount=Decimal("1"), max_daily_copies=2)
+        )
+
+    async def _follow(self, follower_id: int, balance: str, allocation: str = "50", **kwargs):
+        self.balances.balances[follower_id] = Decimal(balance)
+        await self.follows.save(CopyFollow(follower_id, LEADER, Decimal(allocation), **kwargs))
+
+    async def test_fan_out_sizes_and_submits_orders(self):
+        await self._follow(2, "1000")
+        await self._follow(3, "2000", allocation="10", max_trade_amount=Decimal("15"))
+
+        report = await self.engine.handle_trade_executed(_event("t1"))
+
+        self.assertEqual(report.count("submitted"), 2)
+        amounts = {order.follower_id: order.amount for order in self.submitter.orders}
+        self.assertEqual(amounts, {2: Decimal("50.00"), 3: Decimal("15.00")})
+        self.assertEqual(self.balances.calls, 1)
+
+    async def test_risk_checks_reject_orders(self):
+        await self._follow(2, "0")
+        await self._follow(3, "10", allocation="1")  # 0.05 is below the minimum
+        await self._follow(4, "1000")
+        await self._follow(5, "1000")
+        self.submitter.reject = {4}
+        self.submitter.fail = {5}
+
+        report = await self.engine.fan_out(LEADER, "t1", "BTCUSD", "long", Decimal("100"))
+
+        reasons = {result.follower_id: (result.status, result.reason) for result in report.results}
+        self.assertEqual(reasons[2], ("rejected", "no_balance"))
+        self.assertEqual(reasons[3], ("rejected", "below_minimum"))
+        self.assertEqual(reasons[4], ("rejected", "Insufficient balance for trade"))
+        self.assertEqual(reasons[5][0], "failed")
+        self.assertEqual(self.engine.metrics.orders_failed, 1)
+
+    async def test_daily_copy_limit(self):
+        await self._follow(2, "1000")
+        for trade_id in ("t1", "t2", "t3"):
+            report = await self.engine.fan_out(LEADER, trade_id, "BTCUSD", "long", Decimal("100"))
+
+        self.assertEqual(len(self.submitter.orders), 2)
+        self.assertEqual(report.results[0].reason, "daily_copy_limit")
+
+    async def test_redelivered_trade_is_copied_once(self):
+        await self._follow(2, "1000")
+
+        await self.engine.handle_trade_executed(_event("t1"))
+        self.assertIsNone(await self.engine.handle_trade_executed(_event("t1")))
+
+        self.assertEqual(len(self.submitter.orders), 1)
+
+    async def test_copied_trades_are_not_copied_again(self):
+        await self._follow(2, "1000")
+        # Leader 1 also follows follower 2: a cycle
+        await self.follows.save(CopyFollow(LEADER, 2, Decimal("50")))
+
+        await self.engine.handle_trade_executed(_event("t1"))
+        copy_trade_id = "copy-t1-2"
+        self.assertTrue(await self.engine.is_copy_trade(copy_trade_id))
+        self.assertIsNone(await self.engine.handle_trade_executed(_event(copy_trade_id, user_id=2)))
+
+        self.assertEqual(len(self.submitter.orders), 1)
+
+    async def test_leader_without_followers(self):
+        report = await self.engine.fan_out(LEADER, "t1", "BTCUSD", "long", Decimal("100"))
+
+        self.assertEqual(report.results, [])
+        self.assertEqual(self.balances.calls, 0)
+
+
+class FakeRedis:
+    """The Redis commands CopyTradingState uses"""
+
+    def __init__(self):
+        self.values: Dict[str, int] = {}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def exists(self, key):
+        return int(key in self.values)
+
+    async def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def incr(self, key):
+        self.commands.append(key)
+
+    def expire(self, key, seconds):
+        pass
+
+    async def execute(self):
+        for key in self.commands:
+            self.redis.values[key] = self.redis.values.get(key, 0) + 1
+
+
+class TestCopyTradingStateInRedis(unittest.IsolatedAsyncioTestCase):
+    async def test_processes_share_dedupe_and_daily_limits(self):
+        redis = FakeRedis()
+        follows = InMemoryCopyFollowRepository()
+        await follows.save(CopyFollow(2, LEADER, Decimal("50")))
+        balances = FakeBalances({LEADER: Decimal("1000"), 2: Decimal("1000")})
+        submitter = FakeSubmitter()
+        limits = CopyRiskLimits(max_position_pct=Decimal("100"), max_daily_copies=2)
+        # Two API processes, each with its own engine
+        engines = [
+            CopyTradingEngine(follows, balances, submitter, limits=limits, state=CopyTradingState(redis))
+            for _ in range(2)
+        ]
+
+        await engines[0].handle_trade_executed(_event("t1"))
+        self.assertIsNone(await engines[1].handle_trade_executed(_event("t1")))
+        self.assertTrue(await engines[1].is_copy_trade("copy-t1-2"))
+
+        await engines[1].handle_trade_executed(_event("t2"))
+        report = await engines[0].handle_trade_executed(_event("t3"))
+
+        self.assertEqual(len(submitter.orders), 2)
+        self.assertEqual(report.results[0].reason, "daily_copy_limit")
+
+
+class TestCopyTradingFanOutBenchmark(unittest.IsolatedAsyncioTestCase):
+    """1 leader / 5,000 followers, with 5 ms of simulated exchange latency per order"""
+
+    FOLLOWERS = 5000
+    LATENCY = 0.005
+    CONCURRENCY = 64
+
+    async def test_fan_out_to_5000_followers(self):
+        follows = InMemoryCopyFollowRepository()
+        balances = {LEADER: Decimal("10000")}
+        for follower_id in range(2, self.FOLLOWERS + 2):
+            balances[follower_id] = Decimal(1000 + follower_id % 500)
+            await follows.save(CopyFollow(follower_id, LEADER, Decimal(1 + follower_id % 50)))
+        submitter = FakeSubmitter(latency=self.LATENCY)
+        engine = CopyTradingEngine(follows, FakeBalances(balances), submitter, concurrency=self.CONCURRENCY)
+
+        started = time.perf_counter()
+        report = await engine.fan_out(LEADER, "t1", "BTCUSD", "long", Decimal("2000"))
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(report.count("submitted"), self.FOLLOWERS)
+        self.assertEqual(submitter.peak_in_flight, self.CONCURRENCY)
+        # Sequential submission alone would take FOLLOWERS * LATENCY = 25 s; the
+        # bound is loose because the test loop runs in asyncio debug mode
+        self.assertLess(elapsed, 5.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
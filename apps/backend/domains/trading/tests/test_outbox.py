@@ -0,0 +1,258 @@
+import unittest
+from decimal import Decimal
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from ..outbox import (
+    InMemoryOutboxRepository, OutboxMessage, OutboxStatus, StarknetCall,
+    StarknetOutboxWorker, build_multicall
+)
+from ..services import TradingDomainService
+from ..entities import Portfolio
+from ..value_objects import Asset, AssetCategory, Money, RiskParameters, TradeDirection
+from .test_services import (
+    MockTradeRepository, MockPortfolioRepository, MockExchangeClient,
+    MockStarknetClient, MockEventBus
+)
+
+
+class FakeMulticallStarknetClient:
+    """Starknet client recording multicall submissions"""
+
+    def __init__(self, failures: int = 0, rejected_addresses=()):
+        self.failures = failures
+        self.rejected_addresses = set(rejected_addresses)
+        self.transactions: List[List[StarknetCall]] = []
+
+    async def execute_multicall(self, calls: List[StarknetCall]) -> str:
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("Starknet RPC unavailable")
+        if any(call.calldata[0] in self.rejected_addresses for call in calls):
+            raise ValueError("Transaction reverted")
+        self.transactions.append(list(calls))
+        return f"0x{len(self.transactions):064x}"
+
+
+class TestBuildMulticall(unittest.TestCase):
+    """Test coalescing of outbox messages into multicall calls"""
+
+    def test_point_deltas_are_summed_per_address(self):
+        messages = [
+            OutboxMessage.points_update("0xa", 10, source_id="t1"),
+            OutboxMessage.points_update("0xb", 5, source_id="t2"),
+            OutboxMessage.points_update("0xa", 7, source_id="t3"),
+        ]
+
+        calls = build_multicall(messages)
+
+        self.assertEqual(calls, [
+            StarknetCall("update_user_points", ("0xa", 17)),
+            StarknetCall("update_user_points", ("0xb", 5)),
+        ])
+
+    def test_duplicate_achievements_collapse(self):
+        messages = [
+            OutboxMessage.achievement_mint("0xa", "first_trade"),
+            OutboxMessage.achievement_mint("0xa", "first_trade"),
+        ]
+
+        calls = build_multicall(messages)
+
+        self.assertEqual(calls, [StarknetCall("mint_achievement", ("0xa", "first_trade"))])
+
+
+class TestStarknetOutboxWorker(unittest.IsolatedAsyncioTestCase):
+    """Test draining, retry and dead-lettering of outbox messages"""
+
+    def setUp(self):
+        self.outbox = InMemoryOutboxRepository()
+        self.client = FakeMulticallStarknetClient()
+        self.worker = StarknetOutboxWorker(self.outbox, self.client, base_backoff=10, max_attempts=3)
+
+    async def test_add_ignores_duplicate_dedupe_keys(self):
+        await self.outbox.add([OutboxMessage.points_update("0xa", 10, source_id="t1")])
+        await self.outbox.add([OutboxMessage.points_update("0xa", 10, source_id="t1")])
+
+        self.assertEqual(len(self.outbox.get_messages()), 1)
+
+    async def test_batch_is_delivered_in_one_multicall(self):
+        await self.outbox.add([
+            OutboxMessage.points_update("0xa", 10, source_id="t1"),
+            OutboxMessage.points_update("0xa", 5, source_id="t2"),
+            OutboxMessage.achievement_mint("0xa", "first_trade"),
+        ])
+
+        handled = await self.worker.run_once()
+
+        self.assertEqual(handled, 3)
+        self.assertEqual(len(self.client.transactions), 1)
+        self.assertEqual(len(self.client.transactions[0]), 2)
+        self.assertEqual(len(self.outbox.get_messages(OutboxStatus.DELIVERED)), 3)
+
+    async def test_failed_batch_is_retried_with_backoff(self):
+        self.client.failures = 1
+        await self.outbox.add([OutboxMessage.points_update("0xa", 10, source_id="t1")])
+
+        await self.worker.run_once()
+
+        message = self.outbox.get_messages()[0]
+        self.assertEqual(message.status, OutboxStatus.PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertGreater(message.available_at, datetime.now(timezone.utc) + timedelta(seconds=5))
+        # Not due yet, so nothing is claimed
+        self.assertEqual(await self.worker.run_once(), 0)
+
+        message.available_at = datetime.now(timezone.utc)
+        await self.worker.run_once()
+        self.assertEqual(message.status, OutboxStatus.DELIVERED)
+
+    async def test_exhausted_messages_are_dead_lettered(self):
+        self.client.failures = 10
+        await self.outbox.add([OutboxMessage.points_update("0xa", 10, source_id="t1")])
+        message = self.outbox.get_messages()[0]
+
+        for _ in range(3):
+            message.available_at = datetime.now(timezone.utc)
+            await self.worker.run_once()
+
+        self.assertEqual(message.status, OutboxStatus.DEAD)
+        self.assertEqual(message.attempts, 3)
+
+
+    async def test_rejected_messages_are_isolated_from_the_batch(self):
+        self.client.rejected_addresses = {"0xbad"}
+        await self.outbox.add([
+            OutboxMessage.points_update(address, 10, source_id=f"t{i}")
+            for i, address in enumerate(["0xa", "0xb", "0xbad", "0xc", "0xd"])
+        ])
+
+        await self.worker.run_once()
+
+        delivered = self.outbox.get_messages(OutboxStatus.DELIVERED)
+        self.assertEqual(sorted(m.user_address for m in delivered), ["0xa", "0xb", "0xc", "0xd"])
+        self.assertTrue(all(m.tx_hash for m in delivered))
+        pending = self.outbox.get_messages(OutboxStatus.PENDING)
+        self.assertEqual([(m.user_address, m.attempts) for m in pending], [("0xbad", 1)])
+
+    async def test_unrecorded_delivery_is_recorded_instead_of_resent(self):
+        await self.outbox.add([OutboxMessage.points_update("0xa", 10, source_id="t1")])
+        mark_delivered = self.outbox.mark_delivered
+
+        async def failing_mark(message_ids, tx_hash=None):
+            raise ConnectionError("database unavailable")
+
+        self.outbox.mark_delivered = failing_mark
+        with self.assertRaises(ConnectionError):
+            await self.worker.run_once()
+        self.outbox.mark_delivered = mark_delivered
+
+        await self.worker.run_once()
+
+        self.assertEqual(len(self.client.transactions), 1)
+        message = self.outbox.get_messages()[0]
+        self.assertEqual(message.status, OutboxStatus.DELIVERED)
+        self.assertEqual(message.tx_hash, f"0x{1:064x}")
+
+
+class TestTradingDomainServiceOutbox(unittest.IsolatedAsyncioTestCase):
+    """Test that on-chain updates go through the outbox when configured"""
+
+    async def test_rewards_are_written_to_outbox_instead_of_starknet(self):
+        trade_repo = MockTradeRepository()
+        portfolio_repo = MockPortfolioRepository()
+        starknet = MockStarknetClient()
+        outbox = InMemoryOutboxRepository()
+        service = TradingDomainService(
+            trade_repository=trade_repo,
+            portfolio_repository=portfolio_repo,
+            exchange_client=MockExchangeClient(),
+            starknet_client=starknet,
+            ai_analysis_service=None,
+            event_bus=MockEventBus(),
+            outbox=outbox
+        )
+        portfolio_repo.data[1] = Portfolio(user_id=1, available_balance=Money(Decimal('10000'), 'USD'))
+
+        result = await service.execute_trade(
+            user_id=1,
+            asset=Asset("BTCUSD", "Bitcoin to USD", AssetCategory.CRYPTO),
+            direction=TradeDirection.LONG,
+            amount=Money(Decimal('500'), 'USD'),
+            risk_params=RiskParameters(
+                max_position_pct=Decimal('10'),
+                stop_loss_pct=Decimal('2'),
+                take_profit_pct=Decimal('6')
+            )
+        )
+        await service.wait_for_post_trade()
+
+        self.assertEqual(starknet.calls, 0)
+        kinds = sorted(m.dedupe_key.split(':')[0] for m in outbox.get_messages())
+        self.assertEqual(kinds, ['achievement', 'points'])
+        self.assertGreater(trade_repo.data[result['trade_id']].xp_gained, 0)
+
+    async def test_outbox_rows_are_committed_after_the_trade(self):
+        outbox = InMemoryOutboxRepository()
+        trade_repo = MockTradeRepository()
+        portfolio_repo = MockPortfolioRepository()
+        portfolio_repo.data[1] = Portfolio(user_id=1, available_balance=Money(Decimal('10000'), 'USD'))
+        unit_of_work = RecordingUnitOfWork(outbox, trade_repo)
+        event_bus = MockEventBus()
+        service = TradingDomainService(
+            trade_repository=trade_repo,
+            portfolio_repository=portfolio_repo,
+            exchange_client=MockExchangeClient(),
+            starknet_client=MockStarknetClient(),
+            ai_analysis_service=None,
+            event_bus=event_bus,
+            outbox=outbox,
+            unit_of_work=unit_of_work
+        )
+
+        await service.execute_trade(
+            user_id=1,
+            asset=Asset("BTCUSD", "Bitcoin to USD", AssetCategory.CRYPTO),
+            direction=TradeDirection.LONG,
+            amount=Money(Decimal('500'), 'USD'),
+            risk_params=RiskParameters(
+                max_position_pct=Decimal('10'),
+                stop_loss_pct=Decimal('2'),
+                take_profit_pct=Decimal('6')
+            )
+        )
+
+        # Only the trade is committed before execute_trade returns
+        self.assertEqual(unit_of_work.commits, [(1, 0)])
+        await service.wait_for_post_trade()
+        # Rewards and their outbox rows follow in a transaction of their own
+        self.assertEqual(unit_of_work.commits, [(1, 0), (1, 2)])
+        self.assertEqual(
+            [e.event_type for e in event_bus.events],
+            ['trade_executed', 'trading_rewards_calculated']
+        )
+
+
+class RecordingUnitOfWork:
+    """Unit of work recording (trades, outbox messages) visible at each commit"""
+
+    def __init__(self, outbox: InMemoryOutboxRepository, trade_repo: MockTradeRepository):
+        self.outbox = outbox
+        self.trade_repo = trade_repo
+        self.commits = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    async def commit(self) -> None:
+        self.commits.append((len(self.trade_repo.data), len(self.outbox.get_messages())))
+
+    async def rollback(self) -> None:
+        pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,264 @@
+import asyncio
+import unittest
+from decimal import Decimal
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+from ..services import TradingDomainService
+from ..entities import Trade, Portfolio
+from ..value_objects import Asset, AssetCategory, Money, RiskParameters, TradeDirection, TradeStatus
+
+
+class MockTradeRepository:
+    """In-memory trade repository"""
+
+    def __init__(self):
+        self.data: Dict[str, Trade] = {}
+
+    async def save(self, trade: Trade) -> Trade:
+        self.data[trade.trade_id] = trade
+        return trade
+
+    async def get_by_id(self, trade_id: str) -> Optional[Trade]:
+        return self.data.get(trade_id)
+
+    async def get_user_trades(self, user_id: int, limit: int = 100) -> List[Trade]:
+        return [t for t in self.data.values() if t.user_id == user_id][:limit]
+
+    async def get_user_trades_count(self, user_id: int, since: Optional[datetime] = None) -> int:
+        return len([
+            t for t in self.data.values()
+            if t.user_id == user_id and (since is None or t.created_at >= since)
+        ])
+
+
+class MockPortfolioRepository:
+    """In-memory portfolio repository"""
+
+    def __init__(self):
+        self.data: Dict[int, Portfolio] = {}
+
+    async def save(self, portfolio: Portfolio) -> Portfolio:
+        self.data[portfolio.user_id] = portfolio
+        return portfolio
+
+    async def get_by_user_id(self, user_id: int) -> Optional[Portfolio]:
+        return self.data.get(user_id)
+
+
+class MockExchangeClient:
+    """Exchange client returning a fixed price"""
+
+    def __init__(self, price: Decimal = Decimal('100')):
+        self.price = price
+
+    async def place_order(self, symbol: str, side: str, amount: Decimal, leverage=None) -> Dict[str, Any]:
+        return {'price': self.price, 'order_id': f"ORDER-{symbol}"}
+
+    async def get_current_price(self, symbol: str) -> Decimal:
+        return self.price
+
+    async def get_trades(self, start_time: int, end_time: int, limit: int = 1000) -> Dict[str, Any]:
+        return {'trades': []}
+
+
+class MockStarknetClient:
+    """Starknet client that can be gated or made to fail"""
+
+    def __init__(self, failures_before_success: int = 0):
+        self.failures_before_success = failures_before_success
+        self.release = asyncio.Event()
+        self.release.set()
+        self.points_updates: List[tuple] = []
+        self.minted: List[tuple] = []
+        self.calls = 0
+
+    async def update_user_points(self, user_address: str, points_delta: int) -> bool:
+        self.calls += 1
+        await self.release.wait()
+        if self.failures_before_success > 0:
+            self.failures_before_success -= 1
+            raise ConnectionError("Starknet RPC unavailable")
+        self.points_updates.append((user_address, points_delta))
+        return True
+
+    async def mint_achievement(self, user_address: str, achievement_id: str) -> bool:
+        await self.release.wait()
+        self.minted.append((user_address, achievement_id))
+        return True
+
+
+class MockEventBus:
+    """Event bus recording emitted events"""
+
+    def __init__(self):
+        self.events = []
+
+    async def emit(self, event) -> None:
+        self.events.append(event)
+
+    async def subscribe(self, event_type: str, handler: callable) -> None:
+        pass
+
+    async def unsubscribe(self, event_type: str, handler: callable) -> None:
+        pass
+
+
+class TestTradingDomainServicePostTrade(unittest.IsolatedAsyncioTestCase):
+    """Test the commit path / post-trade stage split of execute_trade"""
+
+    def setUp(self):
+        self.trade_repo = MockTradeRepository()
+        self.portfolio_repo = MockPortfolioRepository()
+        self.exchange = MockExchangeClient()
+        self.starknet = MockStarknetClient()
+        self.event_bus = MockEventBus()
+        self.service = TradingDomainService(
+            trade_repository=self.trade_repo,
+            portfolio_repository=self.portfolio_repo,
+            exchange_client=self.exchange,
+            starknet_client=self.starknet,
+            ai_analysis_service=None,
+            event_bus=self.event_bus,
+            post_trade_retry_delay=0.001
+        )
+        self.portfolio_repo.data[1] = Portfolio(user_id=1, available_balance=Money(Decimal('10000'), 'USD'))
+        self.asset = Asset("BTCUSD", "Bitcoin to USD", AssetCategory.CRYPTO)
+        self.risk = RiskParameters(
+            max_position_pct=Decimal('10'),
+            stop_loss_pct=Decimal('2'),
+            take_profit_pct=Decimal('6')
+        )
+
+    async def _execute(self):
+        return await self.service.execute_trade(
+            user_id=1,
+            asset=self.asset,
+            direction=TradeDirection.LONG,
+            amount=Money(Decimal('500'), 'USD'),
+            risk_params=self.risk
+        )
+
+    async def test_execute_trade_returns_before_blockchain_update(self):
+        self.starknet.release.clear()
+
+        result = await asyncio.wait_for(self._execute(), timeout=1)
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['post_trade_status'], 'scheduled')
+        self.assertIsNone(result['rewards'])
+        self.assertEqual(self.trade_repo.data[result['trade_id']].status, TradeStatus.ACTIVE)
+        self.assertEqual(self.starknet.points_updates, [])
+
+        self.starknet.release.set()
+        await self.service.wait_for_post_trade()
+
+        self.assertEqual(len(self.starknet.points_updates), 1)
+        self.assertEqual(self.starknet.minted[0][1], 'first_trade')
+        self.assertEqual(
+            [e.event_type for e in self.event_bus.events],
+            ['trade_executed', 'trading_rewards_calculated']
+        )
+
+    async def test_first_trade_is_granted_when_a_later_trade_commits_first(self):
+        self.starknet.release.clear()
+
+        await self._execute()
+        await self._execute()
+        self.starknet.release.set()
+        await self.service.wait_for_post_trade()
+
+        self.assertEqual([achievement for _, achievement in self.starknet.minted], ['first_trade'])
+
+    async def test_blockchain_update_is_retried(self):
+        self.starknet.failures_before_success = 2
+
+        await self._execute()
+        await self.service.wait_for_post_trade()
+
+        self.assertEqual(self.starknet.calls, 3)
+        self.assertEqual(len(self.starknet.points_updates), 1)
+
+    async def test_post_trade_failure_does_not_fail_trade(self):
+        self.starknet.failures_before_success = 10
+
+        result = await self._execute()
+        await self.service.wait_for_post_trade()
+
+        self.assertEqual(self.trade_repo.data[result['trade_id']].status, TradeStatus.ACTIVE)
+        self.assertEqual(self.starknet.calls, 3)
+        self.assertEqual(len(self.event_bus.events), 2)
+
+    async def test_mock_trade_uses_injected_latency(self):
+        waits = []
+
+        async def latency():
+            waits.append(1)
+
+        self.service._mock_latency = latency
+        result = await self.service.execute_trade(
+            user_id=1,
+            asset=self.asset,
+            direction=TradeDirection.SHORT,
+            amount=Money(Decimal('500'), 'USD'),
+            risk_params=self.risk,
+            is_mock=True
+        )
+        await self.service.wait_for_post_trade()
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(waits, [1])
+        self.assertEqual(self.trade_repo.data[result['trade_id']].entry_price.amount, Decimal('99.800'))
+
+
+class MockAIService:
+    def __init__(self):
+        self.contexts = []
+
+    async def get_trading_recommendation(self, user_id, market_data, user_profile, trading_history):
+        self.contexts.append(market_data)
+        return {"analysis": "hold", "user_id": user_id}
+
+
+class MockStreamingAIService(MockAIService):
+    async def stream_trading_recommendation(self, user_id, market_data, user_profile, trading_history):
+        self.contexts.append(market_data)
+        yield {"type": "delta", "text": '{"action": "buy"'}
+        yield {"type": "field", "name": "action", "value": "buy"}
+        yield {"type": "done", "result": {"recommendation": {"action": "buy"}, "user_id": user_id}}
+
+
+class TestAITradingRecommendationStream(unittest.IsolatedAsyncioTestCase):
+    def _service(self, ai_service):
+        portfolio_repo = MockPortfolioRepository()
+        portfolio_repo.data[1] = Portfolio(user_id=1, available_balance=Money(Decimal('10000'), 'USD'))
+        return TradingDomainService(
+            trade_repository=MockTradeRepository(),
+            portfolio_repository=portfolio_repo,
+            exchange_client=MockExchangeClient(),
+            starknet_client=MockStarknetClient(),
+            ai_analysis_service=ai_service,
+            event_bus=MockEventBus()
+        )
+
+    async def test_streams_events_of_the_ai_service(self):
+        ai_service = MockStreamingAIService()
+        asset = Asset("BTCUSD", "Bitcoin to USD", AssetCategory.CRYPTO)
+
+        events = [event async for event in self._service(ai_service).stream_ai_trading_recommendation(1, asset)]
+
+        self.assertEqual([event["type"] for event in events], ["delta", "field", "done"])
+        self.assertEqual(ai_service.contexts[0]["asset"], "BTCUSD")
+
+    async def test_non_streaming_ai_service_yields_the_whole_recommendation(self):
+        asset = Asset("BTCUSD", "Bitcoin to USD", AssetCategory.CRYPTO)
+        service = self._service(MockAIService())
+
+        events = [event async for event in service.stream_ai_trading_recommendation(1, asset)]
+
+        self.assertEqual(events, [{"type": "done", "result": {"analysis": "hold", "user_id": 1}}])
+        self.assertEqual(await service.get_ai_trading_recommendation(1, asset), events[0]["result"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import unittest
+
+from ..outbox import InMemoryOutboxRepository, OutboxMessage, OutboxStatus, StarknetOutboxWorker
+from ..starknet_batching import FakeStarknetChain, StarknetBatchSubmitter
+
+ACCOUNT = "0xacc"
+
+
+class TestStarknetBatchSubmitter(unittest.IsolatedAsyncioTestCase):
+    """Test windowed coalescing, nonce management and metrics"""
+
+    def setUp(self):
+        self.chain = FakeStarknetChain(base_fee=1000, fee_per_call=100)
+        self.submitter = StarknetBatchSubmitter(self.chain, ACCOUNT, window_seconds=0.01)
+
+    async def test_window_coalesces_updates_into_one_transaction(self):
+        results = await asyncio.gather(
+            self.submitter.update_user_points("0xa", 10),
+            self.submitter.update_user_points("0xa", 15),
+            self.submitter.update_user_points("0xb", 5),
+            self.submitter.mint_achievement("0xa", "first_trade"),
+            self.submitter.mint_achievement("0xa", "first_trade"),
+        )
+
+        self.assertTrue(all(results))
+        self.assertEqual(len(self.chain.transactions), 1)
+        self.assertEqual(self.chain.points, {"0xa": 25, "0xb": 5})
+        self.assertEqual(self.chain.achievements, {"0xa": {"first_trade"}})
+        # 1 transaction with 3 calls: 1000 + 3 * 100 spread over 5 updates
+        self.assertEqual(self.submitter.metrics.total_fee, 1300)
+        self.assertAlmostEqual(self.submitter.metrics.fee_per_update, 260.0)
+        self.assertAlmostEqual(self.submitter.metrics.coalescing_ratio, 5 / 3)
+
+    async def test_consecutive_windows_use_sequential_nonces(self):
+        await self.submitter.update_user_points("0xa", 1)
+        await self.submitter.update_user_points("0xa", 2)
+
+        self.assertEqual([nonce for nonce, _ in self.chain.transactions], [0, 1])
+
+    async def test_nonce_is_resynced_after_rejection(self):
+        await self.submitter.update_user_points("0xa", 1)
+        # Another signer used the account nonce behind our back
+        self.chain.nonces[ACCOUNT] += 1
+
+        await self.submitter.update_user_points("0xa", 2)
+
+        self.assertEqual([nonce for nonce, _ in self.chain.transactions], [0, 2])
+        self.assertEqual(self.chain.points["0xa"], 3)
+
+    async def test_failed_submission_propagates_to_waiters(self):
+        self.chain.fail_next = 1
+
+        with self.assertRaises(ConnectionError):
+            await self.submitter.update_user_points("0xa", 1)
+        self.assertEqual(self.submitter.metrics.failed_transactions, 1)
+
+    async def test_max_batch_calls_flushes_early(self):
+        submitter = StarknetBatchSubmitter(self.chain, ACCOUNT, window_seconds=60, max_batch_calls=2)
+
+        await asyncio.wait_for(asyncio.gather(
+            submitter.update_user_points("0xa", 1),
+            submitter.update_user_points("0xb", 1),
+        ), timeout=1)
+
+        self.assertEqual(len(self.chain.transactions), 1)
+        # The early flush is referenced while it runs and released when done
+        await asyncio.sleep(0)
+        self.assertEqual(submitter._full_flushes, set())
+
+    async def test_outbox_worker_submits_through_submitter(self):
+        outbox = InMemoryOutboxRepository()
+        worker = StarknetOutboxWorker(outbox, self.submitter)
+        await outbox.add([
+            OutboxMessage.points_update("0xa", 10, source_id="t1"),
+            OutboxMessage.points_update("0xa", 5, source_id="t2"),
+        ])
+
+        await worker.run_once()
+
+        self.assertEqual(self.chain.points, {"0xa": 15})
+        self.assertEqual(len(outbox.get_messages(OutboxStatus.DELIVERED)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
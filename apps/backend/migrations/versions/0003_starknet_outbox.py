@@ -0,0 +1,43 @@
+"""Starknet transactional outbox
+
+Revision ID: 0003_starknet_outbox
+Revises: 0002_phase3_social_features
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0003_starknet_outbox'
+down_revision = '0002_phase3_social_features'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create starknet_outbox table
+    op.create_table(
+        'starknet_outbox',
+        sa.Column('id', sa.String(36), nullable=False),
+        sa.Column('kind', sa.String(50), nullable=False),
+        sa.Column('user_address', sa.String(66), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('dedupe_key', sa.String(200), nullable=False),
+        sa.Column('status', sa.String(20), default='pending'),
+        sa.Column('attempts', sa.Integer(), default=0),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('available_at', sa.DateTime(), default=sa.func.now()),
+        sa.Column('created_at', sa.DateTime(), default=sa.func.now()),
+        sa.Column('delivered_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('dedupe_key')
+    )
+
+    # Workers poll for due pending rows in creation order
+    op.create_index('idx_starknet_outbox_pending', 'starknet_outbox', ['status', 'available_at', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('idx_starknet_outbox_pending')
+    op.drop_table('starknet_outbox')
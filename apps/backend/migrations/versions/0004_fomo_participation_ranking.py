@@ -0,0 +1,36 @@
+"""FOMO participation uniqueness and ranking index
+
+Revision ID: 0004_fomo_participation_ranking
+Revises: 0003_starknet_outbox
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0004_fomo_participation_ranking'
+down_revision = '0003_starknet_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One participation per user and event, enforced by the database
+    op.create_unique_constraint(
+        'uq_fomo_participation_event_user',
+        'fomo_event_participations',
+        ['event_id', 'user_id']
+    )
+
+    # Ranked reads per event walk this index instead of sorting all participants
+    op.create_index(
+        'idx_fomo_participation_event_score',
+        'fomo_event_participations',
+        ['event_id', sa.text('participation_score DESC'), 'joined_at']
+    )
+
+
+def downgrade():
+    op.drop_index('idx_fomo_participation_event_score')
+    op.drop_constraint('uq_fomo_participation_event_user', 'fomo_event_participations', type_='unique')
@@ -0,0 +1,69 @@
+"""NFT marketplace listings
+
+Revision ID: 0005_marketplace_listings
+Revises: 0004_fomo_participation_ranking
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0005_marketplace_listings'
+down_revision = '0004_fomo_participation_ranking'
+branch_labels = None
+depends_on = None
+
+# (name, columns) of the order book indexes: filter columns first, then the
+# sort key and id, so every filtered page is a keyset range scan
+ORDER_BOOK_INDEXES = [
+    ('idx_marketplace_price', ['status', 'currency', 'price', 'id']),
+    ('idx_marketplace_listed', ['status', 'currency', 'listed_at', 'id']),
+    ('idx_marketplace_rarity_rank', ['status', 'currency', 'rarity_rank', 'id']),
+    ('idx_marketplace_rarity_price', ['status', 'currency', 'rarity', 'price', 'id']),
+    ('idx_marketplace_rarity_listed', ['status', 'currency', 'rarity', 'listed_at', 'id']),
+    ('idx_marketplace_type_price', ['status', 'currency', 'achievement_type', 'price', 'id']),
+    ('idx_marketplace_type_listed', ['status', 'currency', 'achievement_type', 'listed_at', 'id']),
+    ('idx_marketplace_seller', ['seller_id', 'status', 'listed_at']),
+]
+
+
+def upgrade():
+    op.create_table('marketplace_listings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('artifact_id', sa.Integer(), nullable=False),
+        sa.Column('seller_id', sa.Integer(), nullable=False),
+        sa.Column('buyer_id', sa.Integer(), nullable=True),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('currency', sa.String(length=20), nullable=False),
+        sa.Column('rarity', sa.String(length=20), nullable=False),
+        sa.Column('rarity_rank', sa.Integer(), nullable=False),
+        sa.Column('achievement_type', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='active'),
+        sa.Column('listed_at', sa.DateTime(), nullable=False),
+        sa.Column('closed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['artifact_id'], ['artifacts.id'], ),
+        sa.ForeignKeyConstraint(['seller_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['buyer_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # An artifact can only have one active listing; closed listings are kept as history
+    op.create_index(
+        'uq_marketplace_listing_active_artifact',
+        'marketplace_listings',
+        ['artifact_id'],
+        unique=True,
+        postgresql_where=sa.text("status = 'active'"),
+        sqlite_where=sa.text("status = 'active'")
+    )
+
+    for name, columns in ORDER_BOOK_INDEXES:
+        op.create_index(name, 'marketplace_listings', columns)
+
+
+def downgrade():
+    for name, _ in reversed(ORDER_BOOK_INDEXES):
+        op.drop_index(name, table_name='marketplace_listings')
+    op.drop_index('uq_marketplace_listing_active_artifact', table_name='marketplace_listings')
+    op.drop_table('marketplace_listings')
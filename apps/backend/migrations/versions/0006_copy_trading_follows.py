@@ -0,0 +1,41 @@
+"""Copy trading follows
+
+Revision ID: 0006_copy_trading_follows
+Revises: 0005_marketplace_listings
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0006_copy_trading_follows'
+down_revision = '0005_marketplace_listings'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('copy_trading_follows',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('follower_id', sa.Integer(), nullable=False),
+        sa.Column('leader_id', sa.Integer(), nullable=False),
+        sa.Column('constellation_id', sa.Integer(), nullable=True),
+        sa.Column('allocation_percentage', sa.Float(), nullable=False),
+        sa.Column('max_trade_amount', sa.Float(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['follower_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['leader_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['constellation_id'], ['constellations.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('follower_id', 'leader_id', name='uq_copy_trading_follower_leader')
+    )
+    # Fan-out reads every active follower of one leader
+    op.create_index('idx_copy_trading_leader_active', 'copy_trading_follows', ['leader_id', 'is_active'])
+
+
+def downgrade():
+    op.drop_index('idx_copy_trading_leader_active', table_name='copy_trading_follows')
+    op.drop_table('copy_trading_follows')
@@ -0,0 +1,31 @@
+"""Unique Genesis NFT per user and achievement
+
+Revision ID: 0007_unique_genesis_artifacts
+Revises: 0006_copy_trading_follows
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0007_unique_genesis_artifacts'
+down_revision = '0006_copy_trading_follows'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Concurrent mints of the same achievement can't both commit
+    op.create_index(
+        'uq_artifacts_user_genesis_type',
+        'artifacts',
+        ['user_id', 'artifact_type'],
+        unique=True,
+        postgresql_where=sa.text("artifact_type LIKE 'genesis_%'"),
+        sqlite_where=sa.text("artifact_type LIKE 'genesis_%'")
+    )
+
+
+def downgrade():
+    op.drop_index('uq_artifacts_user_genesis_type', table_name='artifacts')
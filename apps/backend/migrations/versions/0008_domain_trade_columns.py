@@ -0,0 +1,32 @@
+"""Trading domain columns on trades
+
+Revision ID: 0008_domain_trade_columns
+Revises: 0007_unique_genesis_artifacts
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0008_domain_trade_columns'
+down_revision = '0007_unique_genesis_artifacts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('trades', sa.Column('trade_uid', sa.String(length=36), nullable=True))
+    op.add_column('trades', sa.Column('asset_category', sa.String(), nullable=True))
+    op.add_column('trades', sa.Column('exchange_order_id', sa.String(), nullable=True))
+    op.create_index('ix_trades_trade_uid', 'trades', ['trade_uid'], unique=True)
+    # Available balances are summed per user over their open and closed trades
+    op.create_index('idx_trades_user_status', 'trades', ['user_id', 'status'])
+
+
+def downgrade():
+    op.drop_index('idx_trades_user_status', table_name='trades')
+    op.drop_index('ix_trades_trade_uid', table_name='trades')
+    op.drop_column('trades', 'exchange_order_id')
+    op.drop_column('trades', 'asset_category')
+    op.drop_column('trades', 'trade_uid')
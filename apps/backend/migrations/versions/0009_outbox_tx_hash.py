@@ -0,0 +1,23 @@
+"""Transaction hash of delivered Starknet outbox messages
+
+Revision ID: 0009_outbox_tx_hash
+Revises: 0008_domain_trade_columns
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0009_outbox_tx_hash'
+down_revision = '0008_domain_trade_columns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('starknet_outbox', sa.Column('tx_hash', sa.String(length=66), nullable=True))
+
+
+def downgrade():
+    op.drop_column('starknet_outbox', 'tx_hash')
@@ -1,12 +1,19 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List
 from datetime import datetime, timedelta
 import asyncio
 import json
+import os
 import random
-import time
+
+import numpy as np
+
+from core.broadcast_hub import ALL_TOPICS, BroadcastHub, SlowConsumerPolicy
+from core.candles import CandleAggregator, candles_to_dicts
+from core.ticker_stream import Encoding, TickerDeltaStream
+from services.market_simulator import MarketSimulator, SimulationClock
 
 app = FastAPI(title="AstraTrade Backend API", version="1.0.0")
 
@@ -61,100 +68,123 @@ TRADING_PAIRS = {
     "LINKUSD": {"base_price": 14.75, "name": "Chainlink"},
 }
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+# WebSocket connections: one topic per symbol, each socket with its own send queue
+manager = BroadcastHub(max_queue=64, policy=SlowConsumerPolicy.DROP_OLDEST)
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+# Snapshot + delta market data stream served on /ws/market
+ticker_stream = TickerDeltaStream(max_queue=64)
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+# Simulated market shared by tickers, candles and trades. Its clock runs on
+# wall time since the simulation epoch, so every worker serves the same prices.
+market = MarketSimulator(seed=int(os.getenv("MARKET_SEED", "0")), clock=SimulationClock())
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                # Remove stale connections
-                self.active_connections.remove(connection)
+# Live ticker per symbol, moved by the price feed
+LIVE_TICKERS = {}
 
-manager = ConnectionManager()
+# OHLCV history per symbol and interval, built from the price feed's ticks
+candle_store = CandleAggregator()
 
 def generate_realistic_candle_data(symbol: str, intervals: int = 100) -> List[CandleData]:
-    """Generate realistic candlestick data for a trading pair"""
+    """1-minute candles of a trading pair's simulated price path, ending now"""
     if symbol not in TRADING_PAIRS:
         symbol = "BTCUSD"  # Default fallback
     
-    base_price = TRADING_PAIRS[symbol]["base_price"]
-    candles = []
-    current_time = int(time.time()) - (intervals * 60)  # 1-minute candles
-    current_price = base_price
-    
-    for i in range(intervals):
-        # Generate realistic price movement
-        volatility = 0.002  # 0.2% volatility per minute
-        price_change = random.uniform(-volatility, volatility)
-        
-        open_price = current_price
-        close_price = open_price * (1 + price_change)
-        
-        # High and low with some randomness
-        high_price = max(open_price, close_price) * (1 + random.uniform(0, volatility/2))
-        low_price = min(open_price, close_price) * (1 - random.uniform(0, volatility/2))
-        
-        # Random volume
-        volume = random.uniform(100, 1000)
-        
-        candles.append(CandleData(
-            timestamp=(current_time + i * 60) * 1000,  # Convert to milliseconds
+    now = market.clock.now()
+    bars = market.ohlc(symbol, now - intervals * 60, now, bar_seconds=60)
+    return [
+        CandleData(
+            timestamp=int(market.clock.wall_time(timestamp)) * 1000,  # Convert to milliseconds
             open=round(open_price, 2),
             high=round(high_price, 2),
             low=round(low_price, 2),
             close=round(close_price, 2),
-            volume=round(volume, 2)
-        ))
-        
-        current_price = close_price
-    
-    return candles
+            volume=round(random.uniform(100, 1000), 2)  # Volume is not simulated
+        )
+        for timestamp, open_price, high_price, low_price, close_price, _ in bars.tolist()
+    ]
 
 def generate_current_ticker(symbol: str) -> TickerData:
-    """Generate current ticker data for a symbol"""
+    """Current ticker data for a symbol, from the live feed or the simulator"""
     if symbol not in TRADING_PAIRS:
         symbol = "BTCUSD"
+    if symbol in LIVE_TICKERS:
+        return LIVE_TICKERS[symbol]
     
-    base_price = TRADING_PAIRS[symbol]["base_price"]
-    # Add some random movement
-    current_price = base_price * (1 + random.uniform(-0.05, 0.05))
-    change_24h = random.uniform(-1000, 1000)
-    change_percent = (change_24h / current_price) * 100
+    now = market.clock.now()
+    current_price = market.price(symbol, at=now)
+    open_price = market.price(symbol, at=now - 86400)
+    day = market.path(symbol, now - 86400, now + 1)
+    change_24h = current_price - open_price
     
     return TickerData(
         symbol=symbol,
         price=round(current_price, 2),
         change_24h=round(change_24h, 2),
-        change_percent_24h=round(change_percent, 2),
+        change_percent_24h=round(change_24h / open_price * 100, 2),
         volume_24h=round(random.uniform(100000, 500000), 2),
-        high_24h=round(current_price * 1.08, 2),
-        low_24h=round(current_price * 0.92, 2)
+        high_24h=round(float(day.max()), 2),
+        low_24h=round(float(day.min()), 2)
+    )
+
+def advance_ticker(symbol: str) -> TickerData:
+    """Move a symbol's live ticker to the simulator's current price"""
+    ticker = LIVE_TICKERS.get(symbol)
+    if ticker is None:
+        ticker = LIVE_TICKERS[symbol] = generate_current_ticker(symbol)
+        return ticker
+    
+    price = round(market.price(symbol), 2)
+    if price == ticker.price:
+        return ticker
+    # The 24h range rarely changes, so most deltas carry price, change and volume only
+    open_price = ticker.price - ticker.change_24h
+    change_24h = price - open_price
+    ticker = ticker.model_copy(update={
+        "price": price,
+        "change_24h": round(change_24h, 2),
+        "change_percent_24h": round(change_24h / open_price * 100, 2) if open_price else 0.0,
+        "volume_24h": round(ticker.volume_24h + random.uniform(0, 50), 2),
+        "high_24h": max(ticker.high_24h, price),
+        "low_24h": min(ticker.low_24h, price),
+    })
+    LIVE_TICKERS[symbol] = ticker
+    return ticker
+
+def seed_market_history(symbol: str, intervals: int = 1440) -> None:
+    """Backfill a day of 1m candles and start the live ticker where they end"""
+    history = generate_realistic_candle_data(symbol, intervals)
+    candle_store.ingest_bars(symbol, np.array([
+        [candle.timestamp / 1000, candle.open, candle.high, candle.low, candle.close, candle.volume]
+        for candle in history
+    ]))
+    price = round(market.price(symbol), 2)
+    change_24h = price - history[0].open
+    LIVE_TICKERS[symbol] = TickerData(
+        symbol=symbol,
+        price=price,
+        change_24h=round(change_24h, 2),
+        change_percent_24h=round(change_24h / history[0].open * 100, 2),
+        volume_24h=round(sum(candle.volume for candle in history), 2),
+        high_24h=max(max(candle.high for candle in history), price),
+        low_24h=min(min(candle.low for candle in history), price)
     )
 
 async def price_feed_generator():
     """Generate continuous price updates for WebSocket"""
     while True:
         for symbol in TRADING_PAIRS.keys():
-            ticker = generate_current_ticker(symbol)
+            previous = LIVE_TICKERS.get(symbol)
+            ticker = advance_ticker(symbol).model_dump()
+            volume = round(ticker["volume_24h"] - previous.volume_24h, 2) if previous else 0.0
+            candle_store.ingest_tick(symbol, ticker["price"], volume)
             message = {
                 "type": "ticker",
-                "data": ticker.model_dump()
+                "data": ticker
             }
-            await manager.broadcast(json.dumps(message))
+            # Serialized once and queued for every subscriber of the symbol
+            manager.publish(symbol, message)
+            # Only the changed fields, and only when something changed
+            ticker_stream.update(symbol, ticker)
         
         await asyncio.sleep(1)  # Update every second
 
@@ -193,12 +223,16 @@ async def get_ticker(symbol: str):
 
 @app.get("/trading/candles/{symbol}")
 async def get_candles(symbol: str, interval: str = "1m", limit: int = 100):
-    """Get candlestick data for a symbol"""
-    candles = generate_realistic_candle_data(symbol.upper(), limit)
+    """Get candlestick data for a symbol (1m, 5m, 1h or 1d bars, newest last)"""
+    symbol = symbol.upper()
+    try:
+        candles = candle_store.candles(symbol if symbol in TRADING_PAIRS else "BTCUSD", interval, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
-        "symbol": symbol.upper(),
+        "symbol": symbol,
         "interval": interval,
-        "candles": [candle.model_dump() for candle in candles]
+        "candles": candles_to_dicts(candles)
     }
 
 class TradeRequest(BaseModel):
@@ -248,34 +282,104 @@ async def execute_trade(trade_request: TradeRequest):
 
 @app.websocket("/ws/trading")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time trading data"""
-    await manager.connect(websocket)
+    """
+    WebSocket endpoint for real-time trading data.
+    
+    Connections receive every symbol until they send
+    {"type": "subscribe", "symbols": [...]} to narrow the stream;
+    {"type": "unsubscribe", "symbols": [...]} removes symbols again.
+    """
+    subscriber = await manager.connect(websocket, topics=[ALL_TOPICS])
     try:
         # Send initial data
         for symbol in TRADING_PAIRS.keys():
-            ticker = generate_current_ticker(symbol)
+            ticker = LIVE_TICKERS.get(symbol) or generate_current_ticker(symbol)
             welcome_message = {
                 "type": "ticker",
                 "data": ticker.model_dump()
             }
-            await websocket.send_text(json.dumps(welcome_message))
+            manager.send(subscriber, welcome_message)
         
         # Keep connection alive and handle messages
         while True:
-            try:
-                data = await websocket.receive_text()
-                # Echo back for now, can add more functionality later
-                await websocket.send_text(f"Received: {data}")
-            except WebSocketDisconnect:
-                break
+            data = await websocket.receive_text()
+            handle_subscription_message(subscriber, data)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await manager.disconnect(subscriber)
+
+
+def handle_subscription_message(subscriber, data: str) -> None:
+    """Apply a subscribe/unsubscribe request; anything else is echoed back."""
+    try:
+        request = json.loads(data)
+    except ValueError:
+        request = None
+    if not isinstance(request, dict) or request.get("type") not in ("subscribe", "unsubscribe"):
+        manager.send(subscriber, f"Received: {data}")
+        return
+    
+    symbols = [str(symbol).upper() for symbol in request.get("symbols") or []]
+    unknown = [symbol for symbol in symbols if symbol not in TRADING_PAIRS]
+    symbols = [symbol for symbol in symbols if symbol in TRADING_PAIRS]
+    if ALL_TOPICS in subscriber.topics:
+        # Narrowing the default all-symbols stream
+        manager.unsubscribe(subscriber, [ALL_TOPICS])
+        if request["type"] == "unsubscribe":
+            manager.subscribe(subscriber, TRADING_PAIRS.keys())
+    if request["type"] == "subscribe":
+        manager.subscribe(subscriber, symbols)
+    else:
+        manager.unsubscribe(subscriber, symbols)
+    manager.send(subscriber, {
+        "type": "subscriptions",
+        "symbols": sorted(subscriber.topics),
+        "unknown": unknown
+    })
+
+
+@app.websocket("/ws/market")
+async def market_data_endpoint(websocket: WebSocket, encoding: Encoding = Encoding.JSON, symbols: str = ""):
+    """
+    Market data stream: a snapshot, then sequence-numbered deltas of changed fields.
+    
+    ``encoding=msgpack`` switches to binary frames; ``symbols`` (comma separated)
+    limits the stream. On a sequence gap the client sends
+    {"type": "resync", "symbols": [...]} for a fresh snapshot; subscribe and
+    unsubscribe work as on /ws/trading. See core/ticker_stream.py for the format.
+    """
+    requested = [symbol.upper() for symbol in symbols.split(",") if symbol.upper() in TRADING_PAIRS]
+    subscriber = await ticker_stream.connect(websocket, encoding, requested or None)
+    try:
+        while True:
+            data = await websocket.receive_text()
+            ticker_stream.handle_client_message(subscriber, encoding, data)
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
+    finally:
+        await ticker_stream.disconnect(subscriber)
+
+
+@app.get("/ws/stats")
+async def websocket_stats():
+    """Connection, queue and drop counters of the broadcast hubs"""
+    return {**manager.get_stats(), "market": ticker_stream.get_stats()}
 
 # Start price feed in background
 @app.on_event("startup")
 async def startup_event():
-    asyncio.create_task(price_feed_generator())
+    for symbol in TRADING_PAIRS.keys():
+        seed_market_history(symbol)
+    app.state.price_feed = asyncio.create_task(price_feed_generator())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.price_feed.cancel()
+    await manager.close()
+    await ticker_stream.close()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8002)
\ No newline at end of file
+    # A large accept backlog lets reconnect storms of 10k+ clients queue instead of failing
+    uvicorn.run(app, host="0.0.0.0", port=8002, backlog=16384, ws_ping_interval=20, ws_ping_timeout=20)
\ No newline at end of file
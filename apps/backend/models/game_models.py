@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON, UniqueConstraint, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -11,6 +11,15 @@ except ImportError:
 # NFT Artifact System Models
 class Artifact(Base):
     __tablename__ = "artifacts"
+    __table_args__ = (
+        # One Genesis NFT per user and achievement, enforced by the database
+        Index(
+            "uq_artifacts_user_genesis_type", "user_id", "artifact_type",
+            unique=True,
+            postgresql_where=text("artifact_type LIKE 'genesis_%'"),
+            sqlite_where=text("artifact_type LIKE 'genesis_%'")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -349,6 +358,28 @@ class ConstellationMembership(Base):
     user = relationship("User", back_populates="constellation_membership")
 
 
+class CopyTradingFollow(Base):
+    __tablename__ = "copy_trading_follows"
+    __table_args__ = (
+        UniqueConstraint("follower_id", "leader_id", name="uq_copy_trading_follower_leader"),
+        # Fan-out reads every active follower of one leader
+        Index("idx_copy_trading_leader_active", "leader_id", "is_active"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    follower_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    leader_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    constellation_id = Column(Integer, ForeignKey("constellations.id"), nullable=True)
+    
+    # Share of the follower's available balance used to copy the leader
+    allocation_percentage = Column(Float, nullable=False)
+    max_trade_amount = Column(Float, nullable=True)
+    
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class ConstellationBattle(Base):
     __tablename__ = "constellation_battles"
     
@@ -521,6 +552,10 @@ class FOMOEvent(Base):
 
 class FOMOEventParticipation(Base):
     __tablename__ = "fomo_event_participations"
+    __table_args__ = (
+        UniqueConstraint("event_id", "user_id", name="uq_fomo_participation_event_user"),
+        Index("idx_fomo_participation_event_score", "event_id", "participation_score", "joined_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, ForeignKey("fomo_events.id"), nullable=False)
@@ -542,3 +577,67 @@ class FOMOEventParticipation(Base):
     # Relationships
     event = relationship("FOMOEvent", back_populates="participations")
     user = relationship("User", back_populates="fomo_participations")
+
+
+# Transactional Outbox Models
+class StarknetOutboxMessage(Base):
+    __tablename__ = "starknet_outbox"
+    
+    id = Column(String(36), primary_key=True)  # UUID
+    kind = Column(String(50), nullable=False)  # starknet.update_points, starknet.mint_achievement
+    user_address = Column(String(66), nullable=False)
+    payload = Column(JSON, nullable=False)
+    dedupe_key = Column(String(200), nullable=False, unique=True)
+    
+    # Delivery tracking
+    status = Column(String(20), default="pending")  # pending, delivered, dead
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+    tx_hash = Column(String(66), nullable=True)  # Multicall transaction that delivered the message
+    
+    # Timestamps
+    available_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    delivered_at = Column(DateTime, nullable=True)
+
+
+# NFT Marketplace Models
+class MarketplaceListing(Base):
+    __tablename__ = "marketplace_listings"
+    __table_args__ = (
+        # At most one active listing per artifact
+        Index(
+            "uq_marketplace_listing_active_artifact", "artifact_id",
+            unique=True,
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'")
+        ),
+        # Filter columns first, then the sort key and id for keyset pagination
+        Index("idx_marketplace_price", "status", "currency", "price", "id"),
+        Index("idx_marketplace_listed", "status", "currency", "listed_at", "id"),
+        Index("idx_marketplace_rarity_rank", "status", "currency", "rarity_rank", "id"),
+        Index("idx_marketplace_rarity_price", "status", "currency", "rarity", "price", "id"),
+        Index("idx_marketplace_rarity_listed", "status", "currency", "rarity", "listed_at", "id"),
+        Index("idx_marketplace_type_price", "status", "currency", "achievement_type", "price", "id"),
+        Index("idx_marketplace_type_listed", "status", "currency", "achievement_type", "listed_at", "id"),
+        Index("idx_marketplace_seller", "seller_id", "status", "listed_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    artifact_id = Column(Integer, ForeignKey("artifacts.id"), nullable=False)
+    seller_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    buyer_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    
+    # Price and denormalised artifact attributes (filtered without a join)
+    price = Column(Float, nullable=False)
+    currency = Column(String(20), nullable=False)  # stellar_shards, lumina
+    rarity = Column(String(20), nullable=False)
+    rarity_rank = Column(Integer, nullable=False)  # 1 (common) to 4 (legendary)
+    achievement_type = Column(String(50), nullable=False)
+    
+    status = Column(String(20), nullable=False, default="active")  # active, sold, cancelled
+    listed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    closed_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    artifact = relationship("Artifact")
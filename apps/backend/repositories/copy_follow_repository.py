@@ -0,0 +1,72 @@
+from decimal import Decimal
+from typing import List
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+
+from ..models.game_models import CopyTradingFollow
+from ..domains.trading.copy_trading import CopyFollow
+
+
+class CopyFollowRepository:
+    """SQLAlchemy implementation of the copy trading follower graph.
+
+    Followers are read per leader through idx_copy_trading_leader_active,
+    so a fan-out costs one index range scan however many leaders exist.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_followers(self, leader_id: int) -> List[CopyFollow]:
+        result = await self.db.execute(
+            select(
+                CopyTradingFollow.follower_id,
+                CopyTradingFollow.allocation_percentage,
+                CopyTradingFollow.max_trade_amount,
+                CopyTradingFollow.constellation_id
+            ).where(
+                CopyTradingFollow.leader_id == leader_id,
+                CopyTradingFollow.is_active == True
+            )
+        )
+        return [
+            CopyFollow(
+                follower_id=follower_id,
+                leader_id=leader_id,
+                allocation_pct=Decimal(str(allocation)),
+                max_trade_amount=Decimal(str(max_trade_amount)) if max_trade_amount is not None else None,
+                constellation_id=constellation_id
+            )
+            for follower_id, allocation, max_trade_amount, constellation_id in result.all()
+        ]
+
+    async def save(self, follow: CopyFollow) -> CopyFollow:
+        """Create the follow, or reactivate and update an existing one"""
+        values = {
+            "allocation_percentage": float(follow.allocation_pct),
+            "max_trade_amount": float(follow.max_trade_amount) if follow.max_trade_amount is not None else None,
+            "constellation_id": follow.constellation_id,
+            "is_active": True,
+        }
+        await self.db.execute(
+            insert(CopyTradingFollow)
+            .values(follower_id=follow.follower_id, leader_id=follow.leader_id, **values)
+            .on_conflict_do_update(constraint="uq_copy_trading_follower_leader", set_=values)
+        )
+        await self.db.commit()
+        return follow
+
+    async def remove(self, follower_id: int, leader_id: int) -> bool:
+        result = await self.db.execute(
+            update(CopyTradingFollow)
+            .where(
+                CopyTradingFollow.follower_id == follower_id,
+                CopyTradingFollow.leader_id == leader_id,
+                CopyTradingFollow.is_active == True
+            )
+            .values(is_active=False)
+        )
+        await self.db.commit()
+        return result.rowcount == 1
@@ -0,0 +1,110 @@
+from typing import List, Optional
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from ..models.game_models import StarknetOutboxMessage
+from ..domains.trading.outbox import OutboxMessage, OutboxMessageKind, OutboxStatus
+
+
+class OutboxRepository:
+    """SQLAlchemy implementation of the Starknet outbox.
+
+    ``add`` only stages rows on the session and never commits, so the rows
+    are committed by whoever owns the surrounding transaction (the trade's
+    unit of work). The worker's claim/mark calls run on the worker's own
+    session: claimed rows stay locked (SKIP LOCKED) until the worker commits
+    its marks for the batch, which lets several workers drain the table
+    concurrently.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def add(self, messages: List[OutboxMessage]) -> None:
+        """Stage outbox rows in the current transaction, skipping duplicates"""
+        if not messages:
+            return
+
+        statement = insert(StarknetOutboxMessage).values([
+            {
+                "id": m.message_id,
+                "kind": m.kind.value,
+                "user_address": m.user_address,
+                "payload": m.payload,
+                "dedupe_key": m.dedupe_key,
+                "status": m.status.value,
+                "attempts": m.attempts,
+                "available_at": m.available_at.replace(tzinfo=None),
+                "created_at": m.created_at.replace(tzinfo=None),
+            }
+            for m in messages
+        ]).on_conflict_do_nothing(index_elements=["dedupe_key"])
+
+        await self.db.execute(statement)
+
+    async def claim_pending(self, limit: int, now: datetime) -> List[OutboxMessage]:
+        """Lock and return due pending rows"""
+        result = await self.db.execute(
+            select(StarknetOutboxMessage)
+            .where(
+                StarknetOutboxMessage.status == OutboxStatus.PENDING.value,
+                StarknetOutboxMessage.available_at <= now.replace(tzinfo=None)
+            )
+            .order_by(StarknetOutboxMessage.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return [self._to_domain(row) for row in result.scalars().all()]
+
+    async def mark_delivered(self, message_ids: List[str], tx_hash: Optional[str] = None) -> None:
+        await self.db.execute(
+            update(StarknetOutboxMessage)
+            .where(StarknetOutboxMessage.id.in_(message_ids))
+            .values(status=OutboxStatus.DELIVERED.value, tx_hash=tx_hash, delivered_at=datetime.utcnow())
+        )
+
+    async def mark_retry(self, message_ids: List[str], error: str, available_at: datetime) -> None:
+        await self.db.execute(
+            update(StarknetOutboxMessage)
+            .where(StarknetOutboxMessage.id.in_(message_ids))
+            .values(
+                attempts=StarknetOutboxMessage.attempts + 1,
+                last_error=error,
+                available_at=available_at.replace(tzinfo=None)
+            )
+        )
+
+    async def mark_dead(self, message_ids: List[str], error: str) -> None:
+        await self.db.execute(
+            update(StarknetOutboxMessage)
+            .where(StarknetOutboxMessage.id.in_(message_ids))
+            .values(
+                status=OutboxStatus.DEAD.value,
+                attempts=StarknetOutboxMessage.attempts + 1,
+                last_error=error
+            )
+        )
+
+    async def commit(self) -> None:
+        await self.db.commit()
+
+    async def rollback(self) -> None:
+        await self.db.rollback()
+
+    @staticmethod
+    def _to_domain(row: StarknetOutboxMessage) -> OutboxMessage:
+        return OutboxMessage(
+            kind=OutboxMessageKind(row.kind),
+            user_address=row.user_address,
+            payload=row.payload,
+            dedupe_key=row.dedupe_key,
+            message_id=row.id,
+            status=OutboxStatus(row.status),
+            attempts=row.attempts or 0,
+            available_at=row.available_at,
+            created_at=row.created_at,
+            last_error=row.last_error,
+            tx_hash=row.tx_hash
+        )
@@ -0,0 +1,88 @@
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, List, Sequence
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.database import Trade as TradeRecord
+from ..domains.trading.entities import Portfolio, Position
+from ..domains.trading.value_objects import Money, TradeStatus
+from .trade_repository import CURRENCY, to_entity
+
+# Every user starts trading with this balance (TradingDomainService's default)
+STARTING_BALANCE = Decimal("10000")
+BALANCE_QUERY_CHUNK = 1000
+CENT = Decimal("0.01")
+
+
+class PortfolioRepository:
+    """SQLAlchemy portfolios derived from the trades table.
+
+    There is no stored balance: a user's available balance is the starting
+    balance, less the amount of their open trades, plus the P&L of their
+    closed ones. ``save`` therefore writes nothing; the trade rows saved in
+    the same unit of work are the portfolio change. Like the session's
+    identity map, a portfolio is loaded once per repository and ``save``
+    keeps the updated object, so a trade saved (flushed) before its
+    portfolio update is not subtracted twice.
+
+    Also implements the copy trading BalanceProvider, summing balances for
+    many users at once.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._portfolios: Dict[int, Portfolio] = {}
+
+    async def get_by_user_id(self, user_id: int) -> Portfolio:
+        if user_id in self._portfolios:
+            return self._portfolios[user_id]
+        balance = (await self.get_available_balances([user_id]))[user_id]
+        result = await self.db.execute(
+            select(TradeRecord).where(
+                TradeRecord.user_id == user_id,
+                TradeRecord.trade_uid.isnot(None),
+                TradeRecord.status == TradeStatus.ACTIVE.value
+            )
+        )
+        trades_by_symbol = defaultdict(list)
+        for record in result.scalars():
+            trade = to_entity(record)
+            trades_by_symbol[trade.asset.symbol].append(trade)
+
+        portfolio = Portfolio(
+            user_id=user_id,
+            available_balance=Money(balance, CURRENCY),
+            positions={symbol: Position(trades[0].asset, trades) for symbol, trades in trades_by_symbol.items()}
+        )
+        self._portfolios[user_id] = portfolio
+        return portfolio
+
+    async def save(self, portfolio: Portfolio) -> Portfolio:
+        self._portfolios[portfolio.user_id] = portfolio
+        return portfolio
+
+    async def get_available_balances(self, user_ids: Sequence[int]) -> Dict[int, Decimal]:
+        """Available balance of every user in one grouped query per chunk"""
+        balances = {user_id: STARTING_BALANCE for user_id in user_ids}
+        user_ids: List[int] = list(balances)
+        for start in range(0, len(user_ids), BALANCE_QUERY_CHUNK):
+            chunk = user_ids[start:start + BALANCE_QUERY_CHUNK]
+            result = await self.db.execute(
+                select(
+                    TradeRecord.user_id,
+                    func.coalesce(func.sum(case(
+                        (TradeRecord.status == TradeStatus.ACTIVE.value, TradeRecord.amount), else_=0.0
+                    )), 0.0),
+                    func.coalesce(func.sum(case(
+                        (TradeRecord.status == TradeStatus.COMPLETED.value, TradeRecord.profit_loss), else_=0.0
+                    )), 0.0)
+                )
+                .where(TradeRecord.user_id.in_(chunk), TradeRecord.trade_uid.isnot(None))
+                .group_by(TradeRecord.user_id)
+            )
+            for user_id, open_amount, realized_pnl in result.all():
+                balance = STARTING_BALANCE - Decimal(str(open_amount)) + Decimal(str(realized_pnl))
+                balances[user_id] = max(Decimal("0"), balance).quantize(CENT)
+        return balances
@@ -0,0 +1,104 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.database import Trade as TradeRecord
+from ..domains.trading.entities import Trade
+from ..domains.trading.value_objects import Asset, AssetCategory, Money, TradeDirection, TradeStatus
+from .unit_of_work import SqlAlchemyUnitOfWork
+
+CURRENCY = "USD"
+
+
+class TradeRepository:
+    """SQLAlchemy implementation of TradingDomainService's trade storage.
+
+    Domain trades are rows of the trades table keyed by ``trade_uid``; rows
+    written by the legacy TradingService (no trade_uid) are not read here.
+    Writes are committed unless the trade's unit of work is in progress.
+    """
+
+    def __init__(self, db: AsyncSession, unit_of_work: SqlAlchemyUnitOfWork):
+        self.db = db
+        self.unit_of_work = unit_of_work
+
+    async def save(self, trade: Trade) -> Trade:
+        result = await self.db.execute(select(TradeRecord).where(TradeRecord.trade_uid == trade.trade_id))
+        record = result.scalar_one_or_none()
+        if record is None:
+            record = TradeRecord(trade_uid=trade.trade_id, created_at=_naive(trade.created_at))
+            self.db.add(record)
+
+        record.user_id = trade.user_id
+        record.asset = trade.asset.symbol
+        record.asset_category = trade.asset.category.value
+        record.direction = trade.direction.value
+        record.amount = float(trade.amount.amount)
+        record.entry_price = float(trade.entry_price.amount) if trade.entry_price else None
+        record.exit_price = float(trade.exit_price.amount) if trade.exit_price else None
+        if trade.exit_price and trade.entry_price:
+            record.profit_loss = float(trade.calculate_pnl(trade.exit_price).amount)
+            record.profit_percentage = float(trade.calculate_pnl_percentage(trade.exit_price))
+        record.status = trade.status.value
+        record.exchange_order_id = trade.exchange_order_id
+        record.xp_gained = trade.xp_gained
+        record.completed_at = _naive(trade.closed_at) if trade.closed_at else None
+
+        await self.unit_of_work.commit_write()
+        return trade
+
+    async def get_by_id(self, trade_id: str) -> Optional[Trade]:
+        result = await self.db.execute(select(TradeRecord).where(TradeRecord.trade_uid == trade_id))
+        record = result.scalar_one_or_none()
+        return to_entity(record) if record is not None else None
+
+    async def get_user_trades(self, user_id: int, limit: int = 100) -> List[Trade]:
+        """The user's latest ``limit`` trades, oldest first"""
+        result = await self.db.execute(
+            select(TradeRecord)
+            .where(TradeRecord.user_id == user_id, TradeRecord.trade_uid.isnot(None))
+            .order_by(TradeRecord.created_at.desc())
+            .limit(limit)
+        )
+        return [to_entity(record) for record in reversed(result.scalars().all())]
+
+    async def get_user_trades_count(self, user_id: int, since: Optional[datetime] = None) -> int:
+        query = select(func.count()).select_from(TradeRecord).where(
+            TradeRecord.user_id == user_id,
+            TradeRecord.trade_uid.isnot(None)
+        )
+        if since is not None:
+            query = query.where(TradeRecord.created_at >= _naive(since))
+        return (await self.db.execute(query)).scalar_one()
+
+
+def to_entity(record: TradeRecord) -> Trade:
+    """Domain trade of a trades row"""
+    return Trade.restore(
+        trade_id=record.trade_uid,
+        user_id=record.user_id,
+        asset=Asset(
+            symbol=record.asset,
+            name=record.asset,
+            category=AssetCategory(record.asset_category or AssetCategory.CRYPTO.value)
+        ),
+        direction=TradeDirection(record.direction),
+        amount=Money(Decimal(str(record.amount)), CURRENCY),
+        status=TradeStatus(record.status),
+        created_at=record.created_at.replace(tzinfo=timezone.utc),
+        entry_price=Money(Decimal(str(record.entry_price)), CURRENCY) if record.entry_price is not None else None,
+        exit_price=Money(Decimal(str(record.exit_price)), CURRENCY) if record.exit_price is not None else None,
+        closed_at=record.completed_at.replace(tzinfo=timezone.utc) if record.completed_at else None,
+        exchange_order_id=record.exchange_order_id,
+        xp_gained=record.xp_gained or 0
+    )
+
+
+def _naive(moment: datetime) -> datetime:
+    """UTC without tzinfo, as the trades table stores it"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
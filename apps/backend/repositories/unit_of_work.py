@@ -0,0 +1,38 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..domains.shared.repositories import UnitOfWork
+
+
+class SqlAlchemyUnitOfWork(UnitOfWork):
+    """Unit of work over one AsyncSession.
+
+    Repositories sharing the session commit their own writes, except while
+    the unit of work is in progress: then they only flush, and the writes
+    are committed (or rolled back) together.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.in_progress = False
+
+    async def __aenter__(self):
+        self.in_progress = True
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.in_progress = False
+        if exc_type is not None:
+            await self.rollback()
+
+    async def commit(self) -> None:
+        await self.db.commit()
+
+    async def rollback(self) -> None:
+        await self.db.rollback()
+
+    async def commit_write(self) -> None:
+        """Commit a repository write, or only flush it while the unit of work is in progress"""
+        if self.in_progress:
+            await self.db.flush()
+        else:
+            await self.db.commit()
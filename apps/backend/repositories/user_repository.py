@@ -1,16 +1,17 @@
 from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, text
 from sqlalchemy.orm import selectinload
-import redis.asyncio as redis
 from datetime import datetime, timedelta
-import json
 
 from models.user import User
-from core.cache import CacheKeys, cache_key_builder
+from core.cache import Cache, CacheKeys, cache_key_builder
+
+USER_TTL = 3600
+LEADERBOARD_TTL = 300
 
 class UserRepository:
-    def __init__(self, db: AsyncSession, cache: redis.Redis):
+    def __init__(self, db: AsyncSession, cache: Cache):
         self.db = db
         self.cache = cache
         
@@ -33,7 +34,7 @@ class UserRepository:
         cached = await self.cache.get(cache_key)
         
         if cached:
-            return User.from_json(json.loads(cached))
+            return User.from_json(cached)
         
         # Query database
         result = await self.db.execute(
@@ -54,8 +55,7 @@ class UserRepository:
         cached = await self.cache.get(cache_key)
         
         if cached:
-            user_id = int(cached)
-            return await self.get_by_id(user_id)
+            return await self.get_by_id(int(cached))
         
         result = await self.db.execute(
             select(User).where(User.username == username)
@@ -63,7 +63,7 @@ class UserRepository:
         user = result.scalar_one_or_none()
         
         if user:
-            await self.cache.setex(cache_key, 3600, str(user.id))
+            await self.cache.set(cache_key, user.id, ttl=USER_TTL)
             await self._cache_user(user)
         
         return user
@@ -94,15 +94,16 @@ class UserRepository:
         offset: int = 0
     ) -> List[dict]:
         """Get leaderboard with caching"""
-        cache_key = cache_key_builder(
-            CacheKeys.LEADERBOARD,
-            f"{limit}:{offset}"
+        cache_key = await self.cache.key(CacheKeys.LEADERBOARD, limit, offset)
+        # Concurrent misses share a single query
+        return await self.cache.get_or_set(
+            cache_key,
+            lambda: self._query_leaderboard(limit, offset),
+            ttl=LEADERBOARD_TTL
         )
-        cached = await self.cache.get(cache_key)
-        
-        if cached:
-            return json.loads(cached)
-        
+    
+    async def _query_leaderboard(self, limit: int, offset: int) -> List[dict]:
+        """Query the ranked leaderboard page"""
         # Use raw SQL for performance
         query = """
             WITH ranked_users AS (
@@ -130,12 +131,7 @@ class UserRepository:
             {"limit": limit, "offset": offset}
         )
         
-        leaderboard = [dict(row) for row in result]
-        
-        # Cache for 5 minutes
-        await self.cache.setex(cache_key, 300, json.dumps(leaderboard))
-        
-        return leaderboard
+        return [dict(row._mapping) for row in result]
     
     async def update_daily_streak(self, user_id: int) -> User:
         """Update user's daily streak"""
@@ -175,26 +171,12 @@ class UserRepository:
     async def _cache_user(self, user: User):
         """Cache user data"""
         cache_key = cache_key_builder(CacheKeys.USER_BY_ID, user.id)
-        user_data = user.to_dict()
-        await self.cache.setex(cache_key, 3600, json.dumps(user_data))
+        await self.cache.set(cache_key, user.to_dict(), ttl=USER_TTL)
     
     async def _invalidate_leaderboard_cache(self):
         """Invalidate all leaderboard cache entries"""
-        pattern = f"{CacheKeys.LEADERBOARD}:*"
-        cursor = 0
-        
-        while True:
-            cursor, keys = await self.cache.scan(
-                cursor,
-                match=pattern,
-                count=100
-            )
-            
-            if keys:
-                await self.cache.delete(*keys)
-            
-            if cursor == 0:
-                break
+        # Bumping the namespace version orphans every cached page; they expire via TTL
+        await self.cache.invalidate_namespace(CacheKeys.LEADERBOARD)
     
     @staticmethod
     def _calculate_level(xp: int) -> int:
@@ -0,0 +1,333 @@
+"""
+Battle Rating Engine
+Elo ratings for constellation battles, computed with numpy.
+
+A battle's expected score is E = 1 / (1 + 10^((Rd - Rc) / scale)), and each
+side moves by K * (S - E), where S is 1 for a win, 0.5 for a draw and 0 for
+a loss. K follows a schedule: provisional constellations (few battles) move
+fast, and established high-rated ones move slowly. Ratings never drop below
+min_rating.
+
+Battles are rated in completion order. The sequence is cut into contiguous
+chunks in which no constellation appears twice. Battles in a chunk are
+independent, so each chunk is rated in one vectorized pass, and the result
+equals rating the battles one at a time. Settling a batch of finished
+battles and replaying the full history use the same path, so a new formula
+can be applied to every past battle in seconds (recompute_battle_ratings).
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Chunks shorter than this are rated in plain Python, where numpy's per-call
+# overhead would dominate (e.g. one constellation fighting many battles in a row)
+SCALAR_CHUNK = 8
+
+WIN = 1.0
+DRAW = 0.5
+LOSS = 0.0
+
+
+@dataclass(frozen=True)
+class EloConfig:
+    initial_rating: float = 1000.0
+    scale: float = 400.0
+    min_rating: float = 100.0
+    provisional_battles: int = 10
+    provisional_k: float = 48.0
+    k: float = 32.0
+    established_rating: float = 1600.0
+    established_k: float = 16.0
+
+
+@dataclass
+class RatingChange:
+    constellation_id: int
+    old_rating: float
+    new_rating: float
+
+    @property
+    def delta(self) -> float:
+        return self.new_rating - self.old_rating
+
+
+@dataclass
+class BattleRecord:
+    """A finished battle, from the challenger's point of view."""
+    challenger_id: int
+    defender_id: int
+    result: float  # WIN, DRAW or LOSS for the challenger
+
+
+def battle_result(challenger_score: float, defender_score: float) -> float:
+    if challenger_score > defender_score:
+        return WIN
+    if defender_score > challenger_score:
+        return LOSS
+    return DRAW
+
+
+class EloRatingEngine:
+    """Vectorized Elo with a K-factor schedule."""
+
+    def __init__(self, config: Optional[EloConfig] = None):
+        self.config = config or EloConfig()
+
+    def expected(self, ratings: np.ndarray, opponents: np.ndarray) -> np.ndarray:
+        return 1.0 / (1.0 + np.power(10.0, (opponents - ratings) / self.config.scale))
+
+    def k_factors(self, ratings: np.ndarray, battles_played: np.ndarray) -> np.ndarray:
+        config = self.config
+        return np.where(
+            battles_played < config.provisional_battles,
+            config.provisional_k,
+            np.where(ratings >= config.established_rating, config.established_k, config.k)
+        )
+
+    def rate(
+        self,
+        ratings: np.ndarray,
+        battles_played: np.ndarray,
+        challengers: np.ndarray,
+        defenders: np.ndarray,
+        results: np.ndarray
+    ) -> None:
+        """
+        Apply battles in order, updating ``ratings`` and ``battles_played`` in place.
+
+        ``challengers`` and ``defenders`` are positions in the two state arrays.
+        """
+        for start, end in _independent_chunks(challengers, defenders):
+            if end - start < SCALAR_CHUNK:
+                for i in range(start, end):
+                    self._rate_one(ratings, battles_played, challengers[i], defenders[i], results[i])
+                continue
+
+            c, d, s = challengers[start:end], defenders[start:end], results[start:end]
+            rc, rd = ratings[c], ratings[d]
+            expected = self.expected(rc, rd)
+            kc = self.k_factors(rc, battles_played[c])
+            kd = self.k_factors(rd, battles_played[d])
+            ratings[c] = np.maximum(self.config.min_rating, rc + kc * (s - expected))
+            ratings[d] = np.maximum(self.config.min_rating, rd + kd * (expected - s))
+            battles_played[c] += 1
+            battles_played[d] += 1
+
+    def settle(
+        self,
+        standings: Dict[int, Tuple[float, int]],
+        battles: Sequence[BattleRecord]
+    ) -> Dict[int, RatingChange]:
+        """
+        Rate a batch of finished battles.
+
+        ``standings`` maps each constellation involved to its current
+        (rating, battles played). Returns the change for each of them.
+        """
+        ids = list(standings)
+        position = {constellation_id: i for i, constellation_id in enumerate(ids)}
+        ratings = np.array([float(standings[i][0]) for i in ids], dtype=np.float64)
+        played = np.array([int(standings[i][1]) for i in ids], dtype=np.int64)
+        before = ratings.copy()
+
+        self.rate(
+            ratings,
+            played,
+            np.array([position[battle.challenger_id] for battle in battles], dtype=np.int64),
+            np.array([position[battle.defender_id] for battle in battles], dtype=np.int64),
+            np.array([battle.result for battle in battles], dtype=np.float64)
+        )
+        return {
+            constellation_id: RatingChange(constellation_id, float(before[i]), float(ratings[i]))
+            for i, constellation_id in enumerate(ids)
+        }
+
+    def recompute(self, battles: Iterable[BattleRecord]) -> Dict[int, Tuple[float, int]]:
+        """Replay a full battle history from initial ratings: id -> (rating, battles played)."""
+        battles = list(battles)
+        if not battles:
+            return {}
+        challenger_ids = np.fromiter((battle.challenger_id for battle in battles), dtype=np.int64, count=len(battles))
+        defender_ids = np.fromiter((battle.defender_id for battle in battles), dtype=np.int64, count=len(battles))
+        results = np.fromiter((battle.result for battle in battles), dtype=np.float64, count=len(battles))
+
+        ids, positions = np.unique(np.concatenate([challenger_ids, defender_ids]), return_inverse=True)
+        ratings = np.full(len(ids), self.config.initial_rating, dtype=np.float64)
+        played = np.zeros(len(ids), dtype=np.int64)
+        self.rate(ratings, played, positions[:len(battles)], positions[len(battles):], results)
+
+        return {
+            int(constellation_id): (float(rating), int(count))
+            for constellation_id, rating, count in zip(ids, ratings, played)
+        }
+
+    def _rate_one(self, ratings: np.ndarray, battles_played: np.ndarray, c: int, d: int, result: float) -> None:
+        config = self.config
+        rc, rd = float(ratings[c]), float(ratings[d])
+        expected = 1.0 / (1.0 + 10.0 ** ((rd - rc) / config.scale))
+        kc = self._k_factor(rc, int(battles_played[c]))
+        kd = self._k_factor(rd, int(battles_played[d]))
+        ratings[c] = max(config.min_rating, rc + kc * (result - expected))
+        ratings[d] = max(config.min_rating, rd + kd * (expected - result))
+        battles_played[c] += 1
+        battles_played[d] += 1
+
+    def _k_factor(self, rating: float, battles_played: int) -> float:
+        config = self.config
+        if battles_played < config.provisional_battles:
+            return config.provisional_k
+        return config.established_k if rating >= config.established_rating else config.k
+
+
+def _independent_chunks(challengers: np.ndarray, defenders: np.ndarray) -> List[Tuple[int, int]]:
+    """Split battles into contiguous [start, end) runs with no constellation twice."""
+    count = len(challengers)
+    if count == 0:
+        return []
+    # For every battle, the latest earlier battle sharing a constellation with it
+    participants = np.concatenate([challengers, defenders])
+    battle_index = np.tile(np.arange(count), 2)
+    order = np.lexsort((battle_index, participants))
+    sorted_participants = participants[order]
+    previous_sorted = np.full(2 * count, -1, dtype=np.int64)
+    repeat = sorted_participants[1:] == sorted_participants[:-1]
+    previous_sorted[1:][repeat] = battle_index[order][:-1][repeat]
+    previous = np.empty(2 * count, dtype=np.int64)
+    previous[order] = previous_sorted
+    previous = np.maximum(previous[:count], previous[count:])
+
+    # A chunk ends where a battle depends on one inside the current chunk
+    chunks = []
+    start = 0
+    for i, depends_on in enumerate(previous.tolist()):
+        if depends_on >= start and i > start:
+            chunks.append((start, i))
+            start = i
+    chunks.append((start, count))
+    return chunks
+
+
+def recompute_battle_ratings(session_factory, engine: EloRatingEngine) -> Dict[int, RatingChange]:
+    """
+    Recompute every constellation's rating from the full battle history.
+
+    The history is replayed without locks. Then the constellation rows are
+    locked (settlement locks the same rows), battles completed in the
+    meantime are replayed too, and the new ratings are written in one
+    statement. Returns the constellations whose rating changed.
+    """
+    from sqlalchemy import bindparam, update
+
+    from ..models.game_models import Constellation, ConstellationBattle
+
+    db = session_factory()
+    try:
+        history = _completed_battles(db, ConstellationBattle)
+        replayed = {battle_id for battle_id, _, _ in history}
+        last_completed_at = history[-1][1] if history else None
+        # Settlement locks both constellation rows, so this waits for settlements
+        # in flight and blocks new ones until the ratings are written
+        current = {
+            constellation_id: float(rating or engine.config.initial_rating)
+            for constellation_id, rating in db.query(Constellation.id, Constellation.battle_rating)
+            .order_by(Constellation.id).with_for_update()
+        }
+        history.extend(
+            battle for battle in _completed_battles(db, ConstellationBattle, since=last_completed_at)
+            if battle[0] not in replayed
+        )
+
+        standings = engine.recompute(record for _, _, record in history)
+        changes = {
+            constellation_id: RatingChange(constellation_id, rating, standings.get(
+                constellation_id, (engine.config.initial_rating, 0)
+            )[0])
+            for constellation_id, rating in current.items()
+        }
+        changes = {
+            constellation_id: change for constellation_id, change in changes.items()
+            if abs(change.delta) > 1e-9
+        }
+        if changes:
+            db.connection().execute(
+                update(Constellation.__table__)
+                .where(Constellation.__table__.c.id == bindparam("b_id"))
+                .values(battle_rating=bindparam("b_rating")),
+                [{"b_id": change.constellation_id, "b_rating": change.new_rating} for change in changes.values()]
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    logger.info(f"Recomputed ratings from {len(history)} battles; {len(changes)} constellations changed")
+    return changes
+
+
+_recompute: Optional[asyncio.Task] = None
+
+
+async def recompute_battle_ratings_once(session_factory, engine: EloRatingEngine) -> Dict[int, RatingChange]:
+    """
+    Run recompute_battle_ratings in a worker thread, single-flight.
+
+    A caller arriving while a recompute is running shares its result instead
+    of starting another full replay. Cancelling a caller does not cancel the
+    recompute.
+    """
+    global _recompute
+    if _recompute is None:
+        _recompute = asyncio.create_task(asyncio.to_thread(recompute_battle_ratings, session_factory, engine))
+        _recompute.add_done_callback(_recompute_done)
+    return await asyncio.shield(_recompute)
+
+
+def _recompute_done(task: asyncio.Task) -> None:
+    global _recompute
+    if _recompute is task:
+        _recompute = None
+    if not task.cancelled():
+        # Mark the exception retrieved when every caller went away
+        task.exception()
+
+
+def _completed_battles(db, ConstellationBattle, since=None) -> List[Tuple[int, Any, BattleRecord]]:
+    """(id, completed_at, record) of completed battles in completion order."""
+    query = db.query(
+        ConstellationBattle.id,
+        ConstellationBattle.completed_at,
+        ConstellationBattle.challenger_constellation_id,
+        ConstellationBattle.defender_constellation_id,
+        ConstellationBattle.challenger_score,
+        ConstellationBattle.defender_score
+    ).filter(ConstellationBattle.status == "completed")
+    if since is not None:
+        query = query.filter(ConstellationBattle.completed_at >= since)
+    rows = query.order_by(ConstellationBattle.completed_at, ConstellationBattle.id).yield_per(10000)
+    return [
+        (
+            battle_id,
+            completed_at,
+            BattleRecord(challenger_id, defender_id, battle_result(challenger_score or 0, defender_score or 0))
+        )
+        for battle_id, completed_at, challenger_id, defender_id, challenger_score, defender_score in rows
+    ]
+
+
+_rating_engine: Optional[EloRatingEngine] = None
+
+
+def get_rating_engine() -> EloRatingEngine:
+    """Shared battle rating engine (FastAPI dependency)."""
+    global _rating_engine
+    if _rating_engine is None:
+        _rating_engine = EloRatingEngine()
+    return _rating_engine
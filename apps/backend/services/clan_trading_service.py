@@ -225,6 +225,7 @@ class ClanTradingService:
         ).all()
         
         results = []
+        expired_battles = []
         
         for battle in active_battles:
             try:
@@ -232,13 +233,8 @@ class ClanTradingService:
                 if battle.started_at:
                     end_time = battle.started_at + timedelta(hours=battle.duration_hours)
                     if datetime.utcnow() > end_time:
-                        # Auto-complete the battle
-                        await self._complete_battle_automatically(battle, db)
-                        results.append({
-                            "battle_id": battle.id,
-                            "action": "completed",
-                            "reason": "time_expired"
-                        })
+                        # Auto-completed below, rated together in one batch
+                        expired_battles.append(battle)
                         continue
                 
                 # Update scores
@@ -254,15 +250,36 @@ class ClanTradingService:
                     "error": str(e)
                 })
         
+        if expired_battles:
+            try:
+                await self._complete_battles_automatically(expired_battles, db)
+                results.extend({
+                    "battle_id": battle.id,
+                    "action": "completed",
+                    "reason": "time_expired"
+                } for battle in expired_battles)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Failed to complete expired battles: {e}")
+                results.extend({
+                    "battle_id": battle.id,
+                    "action": "error",
+                    "error": str(e)
+                } for battle in expired_battles)
+        
         return results
     
     async def _complete_battle_automatically(self, battle: ConstellationBattle, db: Session):
         """Complete a battle automatically when time expires."""
+        await self._complete_battles_automatically([battle], db)
+    
+    async def _complete_battles_automatically(self, battles: List[ConstellationBattle], db: Session):
+        """Complete battles whose time expired, settling their ratings in one batch."""
         # Import here to avoid circular imports
-        from ..api.v1.constellations import _complete_battle
+        from ..api.v1.trading.constellations import _settle_battles
         
-        await _complete_battle(battle, db)
-        logger.info(f"Auto-completed battle {battle.id} due to time expiration")
+        await _settle_battles(battles, db)
+        logger.info(f"Auto-completed battles {[battle.id for battle in battles]} due to time expiration")
     
     async def get_clan_trading_leaderboard(
         self, 
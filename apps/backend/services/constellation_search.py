@@ -0,0 +1,447 @@
+"""
+Constellation Search Index
+In-process trigram index over public constellation names and descriptions.
+
+Text is split into words, and each word is padded ("  word ") and cut into
+trigrams, as in pg_trgm. The index maps each trigram to the constellations
+containing it. A query matches a constellation when the shared trigrams make
+up ``min_similarity`` of the query. Each trigram is weighted by its rarity
+(IDF), so common trigrams count little. Candidates are only collected from
+the rarest posting lists: a document missing from all of them cannot reach
+the threshold. When a query still has many candidates, they are visited in
+popularity order. The scan stops once no remaining document can enter the
+top results, or after ``max_scored`` candidates. In the second case the
+query is unselective and results are drawn from the most popular matches.
+This keeps lookups in the millisecond range with 100k+ documents. The last
+query word is treated as a prefix, so partial input matches as the user
+types.
+
+Results are ranked by relevance (trigram similarity, plus a bonus for
+substring and prefix matches on the name), boosted by battle rating and
+member count. The index keeps copies of those two stats, so ranking needs
+no database query.
+
+Each worker keeps its own index. Changes are broadcast over pub/sub
+(ConstellationSearchFeed), so every worker applies them, and a cold index
+is warmed from the database in the background with warm().
+"""
+
+import asyncio
+import bisect
+import heapq
+import logging
+import math
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CHANNEL = "astratrade:constellations:search"
+BASE_BATTLE_RATING = 1000.0
+MAX_MEMBERS = 200
+
+_WORD_SPLIT = re.compile(r"[\W_]+")
+
+
+def _words(text: Optional[str]) -> List[str]:
+    return [word for word in _WORD_SPLIT.split((text or "").lower()) if word]
+
+
+@lru_cache(maxsize=65536)
+def _word_trigrams(word: str, complete: bool = True) -> FrozenSet[str]:
+    padded = f"  {word} " if complete else f"  {word}"
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def trigrams(text: Optional[str], prefix_last: bool = False) -> Set[str]:
+    """Padded word trigrams of ``text``; with prefix_last the last word may be incomplete."""
+    words = _words(text)
+    grams: Set[str] = set()
+    for word in set(words[:-1] if prefix_last else words):
+        grams |= _word_trigrams(word)
+    if prefix_last and words:
+        grams |= _word_trigrams(words[-1], complete=False)
+    return grams
+
+
+@dataclass
+class _Document:
+    name: str
+    normalized_name: str
+    name_grams: FrozenSet[str]
+    description_grams: FrozenSet[str]
+    battle_rating: float
+    member_count: int
+    popularity: float = 0.0
+
+
+@dataclass
+class SearchHit:
+    constellation_id: int
+    score: float
+    relevance: float
+
+
+class ConstellationSearchIndex:
+    """Trigram inverted index with relevance and popularity ranking."""
+
+    # Best possible relevance: every trigram on the name plus the prefix bonus
+    MAX_RELEVANCE = 2.0
+
+    def __init__(
+        self,
+        min_similarity: float = 0.5,
+        description_weight: float = 0.6,
+        popularity_weight: float = 0.5,
+        max_scored: int = 2000
+    ):
+        self.min_similarity = min_similarity
+        self.description_weight = description_weight
+        self.popularity_weight = popularity_weight
+        self.max_scored = max_scored
+        self.loaded = False
+
+        self._docs: Dict[int, _Document] = {}
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._order: List[Tuple[float, int]] = []  # (-popularity, constellation_id)
+
+    def upsert(
+        self,
+        constellation_id: int,
+        name: str,
+        description: Optional[str],
+        battle_rating: float,
+        member_count: int,
+        is_public: bool = True
+    ) -> None:
+        """Index (or re-index) a constellation; private ones are removed."""
+        self.remove(constellation_id)
+        if is_public:
+            document = self._index(constellation_id, name, description, battle_rating, member_count)
+            bisect.insort(self._order, (-document.popularity, constellation_id))
+
+    def update_stats(
+        self,
+        constellation_id: int,
+        battle_rating: Optional[float] = None,
+        member_count: Optional[int] = None
+    ) -> None:
+        """Update ranking stats without re-indexing text."""
+        document = self._docs.get(constellation_id)
+        if document is None:
+            return
+        del self._order[bisect.bisect_left(self._order, (-document.popularity, constellation_id))]
+        if battle_rating is not None:
+            document.battle_rating = battle_rating
+        if member_count is not None:
+            document.member_count = member_count
+        document.popularity = self._popularity(document)
+        bisect.insort(self._order, (-document.popularity, constellation_id))
+
+    def remove(self, constellation_id: int) -> None:
+        document = self._docs.pop(constellation_id, None)
+        if document is None:
+            return
+        del self._order[bisect.bisect_left(self._order, (-document.popularity, constellation_id))]
+        for gram in document.name_grams | document.description_grams:
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(constellation_id)
+                if not posting:
+                    del self._postings[gram]
+
+    def load(self, rows: Iterable[Tuple[int, str, Optional[str], float, int, bool]]) -> int:
+        """Warm the index from (id, name, description, rating, members, is_public) rows."""
+        count = 0
+        for constellation_id, name, description, battle_rating, member_count, is_public in rows:
+            if constellation_id in self._docs:
+                self.remove(constellation_id)
+            if is_public:
+                self._index(constellation_id, name, description, battle_rating, member_count)
+            count += 1
+        self._order = sorted((-document.popularity, constellation_id) for constellation_id, document in self._docs.items())
+        self.loaded = True
+        return count
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[SearchHit]:
+        """Best matches for ``query``, highest score first."""
+        query_grams = trigrams(query, prefix_last=True)
+        if not query_grams:
+            return []
+
+        # Trigrams are weighted by rarity (IDF), so common trigrams count little.
+        # Going rarest first, once the weight seen exceeds what a match may miss,
+        # every match must appear in one of the posting lists seen so far.
+        document_count = len(self._docs)
+        weights = {
+            gram: math.log(1 + document_count / (1 + len(self._postings.get(gram, ()))))
+            for gram in query_grams
+        }
+        total_weight = sum(weights.values())
+        allowed_miss = (1 - self.min_similarity) * total_weight
+        candidates: Set[int] = set()
+        seen_weight = 0.0
+        for gram in sorted(query_grams, key=lambda gram: -weights[gram]):
+            candidates.update(self._postings.get(gram, ()))
+            seen_weight += weights[gram]
+            if seen_weight > allowed_miss:
+                break
+
+        normalized_query = " ".join(_words(query))
+        wanted = offset + limit
+        if len(candidates) <= self.max_scored:
+            hits = [
+                hit for hit in (
+                    self._score(constellation_id, weights, total_weight, normalized_query)
+                    for constellation_id in candidates
+                ) if hit is not None
+            ]
+            ranked = heapq.nlargest(wanted, hits, key=lambda hit: (hit.score, -hit.constellation_id))
+            return ranked[offset:]
+
+        # Many candidates: visit them most popular first, and stop once even a
+        # perfect match could not beat the current top results, or once
+        # max_scored candidates have been scored (an unselective query)
+        top: List[Tuple[float, int, SearchHit]] = []  # min-heap of (score, -id, hit)
+        scored = 0
+        for neg_popularity, constellation_id in self._order:
+            if len(top) == wanted:
+                bound = self.MAX_RELEVANCE * (1 + self.popularity_weight * -neg_popularity)
+                if bound < top[0][0]:
+                    break
+            if constellation_id not in candidates:
+                continue
+            if scored == self.max_scored:
+                break
+            scored += 1
+            hit = self._score(constellation_id, weights, total_weight, normalized_query)
+            if hit is None:
+                continue
+            entry = (hit.score, -constellation_id, hit)
+            if len(top) < wanted:
+                heapq.heappush(top, entry)
+            elif entry[:2] > top[0][:2]:
+                heapq.heapreplace(top, entry)
+        ranked = [hit for _, _, hit in sorted(top, key=lambda entry: entry[:2], reverse=True)]
+        return ranked[offset:]
+
+    def empty_copy(self) -> "ConstellationSearchIndex":
+        """A new, empty index with the same settings."""
+        return ConstellationSearchIndex(
+            min_similarity=self.min_similarity,
+            description_weight=self.description_weight,
+            popularity_weight=self.popularity_weight,
+            max_scored=self.max_scored
+        )
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _index(
+        self,
+        constellation_id: int,
+        name: str,
+        description: Optional[str],
+        battle_rating: float,
+        member_count: int
+    ) -> _Document:
+        document = _Document(
+            name=name,
+            normalized_name=" ".join(_words(name)),
+            name_grams=frozenset(trigrams(name)),
+            description_grams=frozenset(trigrams(description)),
+            battle_rating=battle_rating,
+            member_count=member_count
+        )
+        document.popularity = self._popularity(document)
+        self._docs[constellation_id] = document
+        for gram in document.name_grams | document.description_grams:
+            self._postings[gram].add(constellation_id)
+        return document
+
+    def _score(
+        self,
+        constellation_id: int,
+        weights: Dict[str, float],
+        total_weight: float,
+        normalized_query: str
+    ) -> Optional[SearchHit]:
+        document = self._docs[constellation_id]
+        name_similarity = sum(weights[gram] for gram in document.name_grams.intersection(weights)) / total_weight
+        description_similarity = sum(
+            weights[gram] for gram in document.description_grams.intersection(weights)
+        ) / total_weight
+        if max(name_similarity, description_similarity) < self.min_similarity:
+            return None
+
+        relevance = max(name_similarity, self.description_weight * description_similarity)
+        if document.normalized_name.startswith(normalized_query):
+            relevance += 1.0
+        elif normalized_query in document.normalized_name:
+            relevance += 0.5
+        score = relevance * (1 + self.popularity_weight * document.popularity)
+        return SearchHit(constellation_id=constellation_id, score=score, relevance=relevance)
+
+    @staticmethod
+    def _popularity(document: _Document) -> float:
+        """Rating and member count, each scaled to 0-1 and averaged."""
+        rating = min(1.0, max(0.0, (document.battle_rating - BASE_BATTLE_RATING) / BASE_BATTLE_RATING))
+        members = math.log1p(max(0, document.member_count)) / math.log1p(MAX_MEMBERS)
+        return 0.5 * rating + 0.5 * min(1.0, members)
+
+
+class ConstellationSearchFeed:
+    """Broadcasts constellation changes so every worker's index applies them."""
+
+    def __init__(self, index: ConstellationSearchIndex, broker):
+        self.index = index
+        self.broker = broker
+        self._listener: Optional[asyncio.Task] = None
+        self._warmer: Optional[asyncio.Task] = None
+        self._warming: Optional[List[Dict[str, Any]]] = None
+
+    async def start(self, session_factory=None) -> None:
+        """Subscribe to updates and, given a session factory, warm the index in the background."""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self.broker.listen(self._apply))
+            await asyncio.sleep(0)
+        if session_factory is not None and self._warmer is None and not self.index.loaded:
+            self._warmer = asyncio.create_task(self.warm(session_factory))
+
+    async def stop(self) -> None:
+        for task in (self._warmer, self._listener):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._warmer = None
+        self._listener = None
+
+    async def warm(self, session_factory) -> int:
+        """
+        Build the index from the database in a worker thread.
+
+        Updates that arrive meanwhile are held back and applied to the new
+        index before it replaces the current one.
+        """
+        self._warming = []
+        index = self.index.empty_copy()
+        try:
+            count = await asyncio.to_thread(index.load, _constellation_rows(session_factory))
+            for message in self._warming:
+                self._apply_to(index, message)
+            self.index = index
+            logger.info(f"Constellation search index warmed with {count} constellations")
+            return count
+        except Exception as e:
+            logger.error(f"Failed to warm constellation search index: {e}")
+            raise
+        finally:
+            self._warming = None
+
+    async def publish_upsert(self, constellation) -> None:
+        """Index a created or edited constellation (a Constellation row) on every worker."""
+        await self._publish({
+            "op": "upsert",
+            "id": constellation.id,
+            "name": constellation.name,
+            "description": constellation.description,
+            "battle_rating": float(constellation.battle_rating or BASE_BATTLE_RATING),
+            "member_count": constellation.member_count or 0,
+            "is_public": bool(constellation.is_public)
+        })
+
+    async def publish_stats(
+        self,
+        constellation_id: int,
+        battle_rating: Optional[float] = None,
+        member_count: Optional[int] = None
+    ) -> None:
+        await self._publish({
+            "op": "stats",
+            "id": constellation_id,
+            "battle_rating": battle_rating,
+            "member_count": member_count
+        })
+
+    async def _publish(self, message: Dict[str, Any]) -> None:
+        if self._listener is None:
+            # Not subscribed: apply locally so this worker stays current
+            self._apply(message)
+        try:
+            await self.broker.publish(message)
+        except Exception as e:
+            logger.error(f"Failed to broadcast search update for constellation {message['id']}: {e}")
+
+    def _apply(self, message: Dict[str, Any]) -> None:
+        if self._warming is not None:
+            self._warming.append(message)
+        self._apply_to(self.index, message)
+
+    @staticmethod
+    def _apply_to(index: ConstellationSearchIndex, message: Dict[str, Any]) -> None:
+        if message["op"] == "upsert":
+            index.upsert(
+                message["id"],
+                message["name"],
+                message["description"],
+                message["battle_rating"],
+                message["member_count"],
+                message["is_public"]
+            )
+        elif message["op"] == "stats":
+            index.update_stats(
+                message["id"],
+                battle_rating=message.get("battle_rating"),
+                member_count=message.get("member_count")
+            )
+
+
+def _constellation_rows(session_factory) -> Iterable[Tuple[int, str, Optional[str], float, int, bool]]:
+    from ..models.game_models import Constellation
+
+    db = session_factory()
+    try:
+        query = db.query(
+            Constellation.id,
+            Constellation.name,
+            Constellation.description,
+            Constellation.battle_rating,
+            Constellation.member_count,
+            Constellation.is_public
+        ).filter(Constellation.is_public == True).yield_per(5000)
+        for constellation_id, name, description, battle_rating, member_count, is_public in query:
+            yield (
+                constellation_id,
+                name,
+                description,
+                float(battle_rating or BASE_BATTLE_RATING),
+                member_count or 0,
+                bool(is_public)
+            )
+    finally:
+        db.close()
+
+
+_search_feed: Optional[ConstellationSearchFeed] = None
+
+
+def get_constellation_search() -> ConstellationSearchFeed:
+    """Shared constellation search index and update feed (FastAPI dependency)."""
+    global _search_feed
+    if _search_feed is None:
+        from ..core.config import settings
+        from ..core.tiered_cache import LocalInvalidationBroker, RedisInvalidationBroker
+
+        if settings.redis_url:
+            import redis.asyncio as redis
+            broker = RedisInvalidationBroker(redis.from_url(settings.redis_url), channel=SEARCH_CHANNEL)
+        else:
+            broker = LocalInvalidationBroker()
+        _search_feed = ConstellationSearchFeed(ConstellationSearchIndex(), broker)
+    return _search_feed
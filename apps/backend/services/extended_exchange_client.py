@@ -14,6 +14,7 @@ import httpx
 import json
 from datetime import datetime, timezone
 from ..core.config import settings
+from ..core.resilience import CallTimeout, CircuitOpenError, endpoint_key, get_resilience_layer
 import logging
 from starkex_crypto import StarkExOrderSigner
 
@@ -34,13 +35,31 @@ class ExtendedExchangeError(Exception):
         super().__init__(self.message)
 
 
+def _is_outage(error: BaseException) -> bool:
+    """Errors that say the exchange is unhealthy; rejected requests (4xx) do not."""
+    if isinstance(error, ExtendedExchangeError) and error.status_code is not None:
+        return error.status_code >= 500 or error.status_code == 429
+    return True
+
+
 class ExtendedExchangeClient:
     """
     Enhanced client for Extended Exchange API integration.
     Supports real trading, portfolio management, and market data.
+    
+    Requests go through the shared "extended_exchange" resilience layer
+    (core.resilience): per-endpoint circuit breakers, adaptive timeouts for
+    GET requests (orders and cancels keep the full 30s timeout) and, with
+    ``hedge_reads``, hedged GET requests.
     """
     
-    def __init__(self, api_key: Optional[str] = None, secret_key: Optional[str] = None, passphrase: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        passphrase: Optional[str] = None,
+        hedge_reads: bool = False
+    ):
         self.api_key = api_key or settings.exchange_api_key
         self.secret_key = secret_key or settings.exchange_secret_key
         self.passphrase = passphrase or settings.exchange_passphrase
@@ -52,6 +71,8 @@ class ExtendedExchangeClient:
         self.api_url = self.sandbox_url if settings.environment == "development" else self.base_url
         
         self.session = None
+        self.hedge_reads = hedge_reads
+        self.resilience = get_resilience_layer("extended_exchange", is_failure=_is_outage)
         self._rate_limits = {
             "requests_per_second": 10,
             "last_request_time": 0
@@ -123,10 +144,38 @@ class ExtendedExchangeClient:
         """Make authenticated API request with error handling."""
         if not self.session:
             raise ExtendedExchangeError("Client not initialized. Use async context manager.")
-        await self._rate_limit()
         url = f"{self.api_url}{endpoint}"
         body = json.dumps(data) if data else ""
         headers = self._get_headers(method, endpoint, body)
+        is_read = method.upper() == "GET"
+
+        async def send():
+            # Every attempt counts against the rate limit, hedges included
+            await self._rate_limit()
+            return await self._send(method, url, headers, params, data)
+
+        try:
+            return await self.resilience.call(
+                endpoint_key(method, endpoint),
+                send,
+                idempotent=is_read,
+                hedge=is_read and self.hedge_reads
+            )
+        except CircuitOpenError as e:
+            logger.warning(f"Exchange API request rejected: {str(e)}")
+            raise ExtendedExchangeError("Exchange temporarily unavailable", status_code=503)
+        except CallTimeout as e:
+            logger.error(f"Exchange API request timed out: {str(e)}")
+            raise ExtendedExchangeError(f"Request timed out: {str(e)}")
+    
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        params: Optional[Dict] = None,
+        data: Optional[Dict] = None
+    ) -> Dict[str, Any]:
         try:
             if method.upper() == "GET":
                 response = await self.session.get(url, headers=headers, params=params)
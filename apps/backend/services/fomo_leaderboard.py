@@ -0,0 +1,163 @@
+"""
+FOMO Event Leaderboard
+Incrementally maintained ranked view of FOMO event participants.
+
+Each event keeps a sorted set of user_id -> participation_score that is
+updated when a user joins or their score changes, so top-N pages and a
+user's rank are read in O(log n + N) instead of sorting every participant
+on each request. Redis sorted sets back the view when configured, so all
+workers share it; otherwise an in-process sorted index is used. An event's
+view is rebuilt from the database with one set-based query until it is
+marked loaded, so a view that only holds participants recorded since a
+restart (or on another worker) is never served as complete.
+
+Without Redis every worker holds its own view and only sees its own joins,
+so the loaded mark expires after ``local_refresh_interval`` seconds and the
+next read reloads the event from the database. Joins on other workers show
+up within that interval.
+"""
+
+import bisect
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "astratrade:fomo:leaderboard"
+
+
+class _RankedSet:
+    """Sorted (-score, user_id) index with O(log n) rank lookups."""
+
+    def __init__(self):
+        self._order: List[Tuple[float, int]] = []
+        self._scores: Dict[int, float] = {}
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._scores
+
+    def add(self, user_id: int, score: float) -> None:
+        previous = self._scores.get(user_id)
+        if previous is not None:
+            index = bisect.bisect_left(self._order, (-previous, user_id))
+            del self._order[index]
+        self._scores[user_id] = score
+        bisect.insort(self._order, (-score, user_id))
+
+    def top(self, limit: int, offset: int = 0) -> List[Tuple[int, float]]:
+        return [(user_id, -neg_score) for neg_score, user_id in self._order[offset:offset + limit]]
+
+    def rank(self, user_id: int) -> Optional[int]:
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return bisect.bisect_left(self._order, (-score, user_id)) + 1
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+class FOMOLeaderboard:
+    """Ranked participation view per FOMO event."""
+
+    def __init__(self, redis_client=None, local_refresh_interval: float = 5.0):
+        self.redis = redis_client
+        self.local_refresh_interval = local_refresh_interval
+        self._local: Dict[int, _RankedSet] = {}
+        # Monotonic time each local view was last loaded from the database
+        self._loaded: Dict[int, float] = {}
+
+    @staticmethod
+    def _key(event_id: int) -> str:
+        return f"{KEY_PREFIX}:{event_id}"
+
+    @staticmethod
+    def _loaded_key(event_id: int) -> str:
+        return f"{KEY_PREFIX}:{event_id}:loaded"
+
+    async def is_loaded(self, event_id: int) -> bool:
+        """Whether the event's view has been rebuilt from the database (recently enough, without Redis)."""
+        if self.redis is not None:
+            return bool(await self.redis.exists(self._loaded_key(event_id)))
+        loaded_at = self._loaded.get(event_id)
+        return loaded_at is not None and time.monotonic() - loaded_at < self.local_refresh_interval
+
+    async def record(self, event_id: int, user_id: int, score: float) -> None:
+        """Add a participant or update their score."""
+        if self.redis is not None:
+            await self.redis.zadd(self._key(event_id), {str(user_id): score})
+            return
+        self._local.setdefault(event_id, _RankedSet()).add(user_id, score)
+
+    async def load(self, event_id: int, rows: Iterable[Tuple[int, float]]) -> int:
+        """
+        Rebuild an event's view from (user_id, score) rows and mark it loaded.
+
+        Participants already recorded keep their score: it was written
+        after the row was committed, so it is at least as recent.
+        """
+        rows = list(rows)
+        if self.redis is not None:
+            if rows:
+                await self.redis.zadd(
+                    self._key(event_id), {str(user_id): score for user_id, score in rows}, nx=True
+                )
+            await self.redis.set(self._loaded_key(event_id), 1)
+            return len(rows)
+
+        ranked = self._local.setdefault(event_id, _RankedSet())
+        for user_id, score in rows:
+            if user_id not in ranked:
+                ranked.add(user_id, score)
+        self._loaded[event_id] = time.monotonic()
+        return len(rows)
+
+    async def top(self, event_id: int, limit: int, offset: int = 0) -> List[Tuple[int, int, float]]:
+        """Get (rank, user_id, score) for a page of the leaderboard."""
+        if self.redis is not None:
+            entries = await self.redis.zrevrange(self._key(event_id), offset, offset + limit - 1, withscores=True)
+            page = [(int(member), float(score)) for member, score in entries]
+        else:
+            ranked = self._local.get(event_id)
+            page = ranked.top(limit, offset) if ranked else []
+        return [(offset + index, user_id, score) for index, (user_id, score) in enumerate(page, start=1)]
+
+    async def rank(self, event_id: int, user_id: int) -> Optional[int]:
+        """1-based rank of a participant, or None if they haven't joined."""
+        if self.redis is not None:
+            rank = await self.redis.zrevrank(self._key(event_id), str(user_id))
+            return rank + 1 if rank is not None else None
+        ranked = self._local.get(event_id)
+        return ranked.rank(user_id) if ranked else None
+
+    async def size(self, event_id: int) -> int:
+        if self.redis is not None:
+            return await self.redis.zcard(self._key(event_id))
+        ranked = self._local.get(event_id)
+        return len(ranked) if ranked else 0
+
+    async def clear(self, event_id: int) -> None:
+        """Drop an event's view (e.g. once the event has ended and been archived)."""
+        if self.redis is not None:
+            await self.redis.delete(self._key(event_id), self._loaded_key(event_id))
+            return
+        self._local.pop(event_id, None)
+        self._loaded.pop(event_id, None)
+
+
+_fomo_leaderboard: Optional[FOMOLeaderboard] = None
+
+
+def get_fomo_leaderboard() -> FOMOLeaderboard:
+    """Shared FOMO leaderboard (FastAPI dependency)."""
+    global _fomo_leaderboard
+    if _fomo_leaderboard is None:
+        from ..core.config import settings
+
+        redis_client = None
+        if settings.redis_url:
+            import redis.asyncio as redis
+            redis_client = redis.from_url(settings.redis_url)
+        _fomo_leaderboard = FOMOLeaderboard(redis_client)
+    return _fomo_leaderboard
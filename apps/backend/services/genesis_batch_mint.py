@@ -0,0 +1,235 @@
+"""
+Genesis NFT Batch Minting
+Jobs that mint Genesis NFTs for many users at once.
+
+A job moves its items through validation and the database steps in bulk
+(done by the caller's ``run`` coroutine), then through on-chain submission.
+``submit_all`` pipelines the submissions: a bounded queue feeds a fixed
+number of workers, and failed submissions are retried with backoff. Each
+item records its own status, so the API can report per-item progress while
+the job runs.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+
+class MintItemStatus(str, Enum):
+    PENDING = "pending"
+    INELIGIBLE = "ineligible"
+    QUEUED = "queued"
+    MINTED = "minted"
+    FAILED = "failed"
+
+
+class BatchJobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class BatchMintItem:
+    """One requested mint and its outcome."""
+    user_id: int
+    achievement_type: str
+    milestone_data: Dict[str, Any] = field(default_factory=dict)
+    status: MintItemStatus = MintItemStatus.PENDING
+    reason: Optional[str] = None
+    rarity: Optional[str] = None
+    points: int = 0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    token_id: Optional[int] = None
+    tx_hash: Optional[str] = None
+    attempts: int = 0
+
+    def reject(self, reason: str) -> None:
+        self.status = MintItemStatus.INELIGIBLE
+        self.reason = reason
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "achievement_type": self.achievement_type,
+            "status": self.status.value,
+            "reason": self.reason,
+            "rarity": self.rarity,
+            "points_earned": self.points,
+            "token_id": self.token_id,
+            "minting_transaction": self.tx_hash,
+            "attempts": self.attempts
+        }
+
+
+@dataclass
+class BatchMintJob:
+    job_id: str
+    items: List[BatchMintItem]
+    created_by: Optional[int] = None
+    status: BatchJobStatus = BatchJobStatus.PENDING
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    completed_at: Optional[float] = None
+
+    def summary(self) -> Dict[str, int]:
+        counts = {status.value: 0 for status in MintItemStatus}
+        for item in self.items:
+            counts[item.status.value] += 1
+        return counts
+
+    def to_dict(self, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        end = None if limit is None else offset + limit
+        return {
+            "job_id": self.job_id,
+            "status": self.status.value,
+            "error": self.error,
+            "total_items": len(self.items),
+            "summary": self.summary(),
+            "created_at": self.created_at,
+            "completed_at": self.completed_at,
+            "items": [item.to_dict() for item in self.items[offset:end]]
+        }
+
+
+class GenesisBatchMinter:
+    """Runs batch mint jobs and pipelines their on-chain submissions."""
+
+    def __init__(
+        self,
+        concurrency: int = 16,
+        max_attempts: int = 3,
+        retry_delay: float = 0.5,
+        max_jobs: int = 100
+    ):
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, BatchMintJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def create_job(self, items: List[BatchMintItem], created_by: Optional[int] = None) -> BatchMintJob:
+        job = BatchMintJob(job_id=uuid4().hex, items=items, created_by=created_by)
+        self._jobs[job.job_id] = job
+        self._evict_finished_jobs()
+        return job
+
+    def get_job(self, job_id: str) -> Optional[BatchMintJob]:
+        return self._jobs.get(job_id)
+
+    def start_job(self, job: BatchMintJob, run: Callable[[BatchMintJob], Awaitable[None]]) -> asyncio.Task:
+        """Run ``run(job)`` in the background, tracking the job's status."""
+        task = asyncio.create_task(self._run_job(job, run))
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.job_id, None))
+        return task
+
+    async def submit_all(
+        self,
+        items: List[BatchMintItem],
+        submit: Callable[[BatchMintItem], Awaitable[str]]
+    ) -> None:
+        """
+        Submit items on-chain with at most ``concurrency`` in flight.
+
+        ``submit`` returns the transaction hash. Items end as MINTED or,
+        after ``max_attempts`` failures, FAILED.
+        """
+        if not items:
+            return
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [
+            asyncio.create_task(self._submit_worker(queue, submit))
+            for _ in range(min(self.concurrency, len(items)))
+        ]
+        try:
+            for item in items:
+                item.status = MintItemStatus.QUEUED
+                await queue.put(item)
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def stop(self) -> None:
+        """Cancel running jobs (items keep the status they reached)."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_job(self, job: BatchMintJob, run: Callable[[BatchMintJob], Awaitable[None]]) -> None:
+        job.status = BatchJobStatus.RUNNING
+        try:
+            await run(job)
+            job.status = BatchJobStatus.COMPLETED
+        except asyncio.CancelledError:
+            job.status = BatchJobStatus.FAILED
+            job.error = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Batch mint job {job.job_id} failed: {e}")
+            job.status = BatchJobStatus.FAILED
+            job.error = str(e)
+        finally:
+            job.completed_at = time.time()
+            logger.info(f"Batch mint job {job.job_id} finished: {job.summary()}")
+
+    async def _submit_worker(
+        self,
+        queue: asyncio.Queue,
+        submit: Callable[[BatchMintItem], Awaitable[str]]
+    ) -> None:
+        while True:
+            item = await queue.get()
+            try:
+                await self._submit_with_retry(item, submit)
+            finally:
+                queue.task_done()
+
+    async def _submit_with_retry(
+        self,
+        item: BatchMintItem,
+        submit: Callable[[BatchMintItem], Awaitable[str]]
+    ) -> None:
+        while True:
+            item.attempts += 1
+            try:
+                item.tx_hash = await submit(item)
+                item.status = MintItemStatus.MINTED
+                item.reason = None
+                return
+            except Exception as e:
+                item.reason = str(e)
+                if item.attempts >= self.max_attempts:
+                    item.status = MintItemStatus.FAILED
+                    return
+                await asyncio.sleep(self.retry_delay * 2 ** (item.attempts - 1))
+
+    def _evict_finished_jobs(self) -> None:
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].status in (BatchJobStatus.COMPLETED, BatchJobStatus.FAILED):
+                del self._jobs[job_id]
+
+
+_batch_minter: Optional[GenesisBatchMinter] = None
+
+
+def get_batch_minter() -> GenesisBatchMinter:
+    """Shared batch minter (FastAPI dependency)."""
+    global _batch_minter
+    if _batch_minter is None:
+        _batch_minter = GenesisBatchMinter()
+    return _batch_minter
@@ -0,0 +1,385 @@
+"""
+Genesis NFT Eligibility
+Precomputed per-user eligibility snapshots for Genesis Seed NFTs.
+
+A snapshot holds the counters the eligibility rules depend on: level,
+trades, viral content hits and the founded constellation. It also holds a
+bitmask of the Genesis NFTs the user has already minted. Eligibility is
+derived from the snapshot alone, so mint checks and the eligible-achievements
+listing cost one key lookup instead of a query per rule.
+
+Snapshots are built once from the database, then kept current by the write
+paths that change these counters: record_trade, record_level,
+record_founder, record_viral_hits and record_mint. Increments are atomic
+(Lua on Redis) and only touch snapshots that exist; a missing snapshot is
+rebuilt from the database on its next read, which already includes the
+change. Counters without an event source are corrected when the snapshot
+expires after SNAPSHOT_TTL.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, fields
+from enum import IntFlag
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Protocol, Tuple
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "astratrade:genesis:eligibility"
+SNAPSHOT_TTL = 3600
+
+# Eligibility rules
+LEVEL_MILESTONE_LEVEL = 25
+VIRAL_HIT_SCORE = 500
+VIRAL_LEGEND_HITS = 5
+TRADING_MASTER_TRADES = 1000
+TRADING_MASTER_WIN_RATE = 0.8
+
+
+class GenesisAchievement(IntFlag):
+    """Genesis NFT achievement types as bits."""
+    FIRST_TRADE = 1
+    LEVEL_MILESTONE = 2
+    CONSTELLATION_FOUNDER = 4
+    VIRAL_LEGEND = 8
+    TRADING_MASTER = 16
+
+    @classmethod
+    def from_type(cls, achievement_type: str) -> "GenesisAchievement":
+        return cls[achievement_type.upper()]
+
+    @property
+    def achievement_type(self) -> str:
+        return self.name.lower()
+
+
+@dataclass
+class EligibilitySnapshot:
+    """Counters behind Genesis eligibility for one user."""
+    user_id: int
+    level: int = 0
+    total_trades: int = 0
+    successful_trades: int = 0
+    last_trade_at: float = 0.0
+    viral_hits: int = 0  # Content items with viral_score >= VIRAL_HIT_SCORE
+    founded_constellation_id: int = 0
+    founded_constellation_name: str = ""
+    minted: int = 0  # GenesisAchievement bits already minted
+
+    @property
+    def win_rate(self) -> float:
+        return self.successful_trades / self.total_trades if self.total_trades else 0.0
+
+    @property
+    def eligible(self) -> GenesisAchievement:
+        """Achievements whose requirements are met (minted or not)."""
+        achievements = GenesisAchievement(0)
+        if self.total_trades >= 1:
+            achievements |= GenesisAchievement.FIRST_TRADE
+        if self.level >= LEVEL_MILESTONE_LEVEL:
+            achievements |= GenesisAchievement.LEVEL_MILESTONE
+        if self.founded_constellation_id:
+            achievements |= GenesisAchievement.CONSTELLATION_FOUNDER
+        if self.viral_hits >= VIRAL_LEGEND_HITS:
+            achievements |= GenesisAchievement.VIRAL_LEGEND
+        if self.total_trades >= TRADING_MASTER_TRADES and self.win_rate >= TRADING_MASTER_WIN_RATE:
+            achievements |= GenesisAchievement.TRADING_MASTER
+        return achievements
+
+    @property
+    def available(self) -> GenesisAchievement:
+        """Achievements that can be minted now."""
+        return self.eligible & ~GenesisAchievement(self.minted)
+
+    def has_minted(self, achievement: GenesisAchievement) -> bool:
+        return bool(self.minted & achievement)
+
+    def to_fields(self) -> Dict[str, Any]:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    @classmethod
+    def from_fields(cls, data: Dict[Any, Any]) -> "EligibilitySnapshot":
+        values = {}
+        for f in fields(cls):
+            raw = data.get(f.name, data.get(f.name.encode()))
+            if raw is None:
+                continue
+            if isinstance(raw, bytes):
+                raw = raw.decode()
+            if f.type is str:
+                values[f.name] = raw
+            elif f.type is float:
+                values[f.name] = float(raw)
+            else:
+                values[f.name] = int(float(raw))
+        return cls(**values)
+
+
+# Storage
+
+# (op, field, value); op is "incr", "max", "or" or "set"
+FieldOp = Tuple[str, str, Any]
+
+
+class EligibilityStore(Protocol):
+    """Key -> field map storage for snapshots."""
+
+    async def get(self, key: str) -> Optional[Dict[Any, Any]]:
+        ...
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Dict[Any, Any]]]:
+        ...
+
+    async def put(self, key: str, values: Dict[str, Any], ttl: int) -> None:
+        ...
+
+    async def put_many(self, entries: Dict[str, Dict[str, Any]], ttl: int) -> None:
+        ...
+
+    async def apply(self, key: str, ops: List[FieldOp]) -> bool:
+        """Apply field operations atomically if the key exists. Returns True if it did."""
+        ...
+
+    async def delete(self, key: str) -> None:
+        ...
+
+
+_APPLY_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+for i = 1, #ARGV, 3 do
+  local op, field, value = ARGV[i], ARGV[i + 1], ARGV[i + 2]
+  if op == 'incr' then
+    redis.call('HINCRBYFLOAT', KEYS[1], field, value)
+  elseif op == 'max' then
+    if tonumber(value) > tonumber(redis.call('HGET', KEYS[1], field) or '0') then
+      redis.call('HSET', KEYS[1], field, value)
+    end
+  elseif op == 'or' then
+    local current = tonumber(redis.call('HGET', KEYS[1], field) or '0')
+    redis.call('HSET', KEYS[1], field, bit.bor(current, tonumber(value)))
+  else
+    redis.call('HSET', KEYS[1], field, value)
+  end
+end
+return 1
+"""
+
+
+class RedisEligibilityStore:
+    """Snapshots as Redis hashes, updated with a Lua script."""
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self._apply = redis_client.register_script(_APPLY_SCRIPT)
+
+    async def get(self, key: str) -> Optional[Dict[Any, Any]]:
+        data = await self.redis.hgetall(key)
+        return data or None
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Dict[Any, Any]]]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.hgetall(key)
+            return [data or None for data in await pipe.execute()]
+
+    async def put(self, key: str, values: Dict[str, Any], ttl: int) -> None:
+        await self.put_many({key: values}, ttl)
+
+    async def put_many(self, entries: Dict[str, Dict[str, Any]], ttl: int) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for key, values in entries.items():
+                pipe.delete(key)
+                pipe.hset(key, mapping={name: str(value) for name, value in values.items()})
+                pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def apply(self, key: str, ops: List[FieldOp]) -> bool:
+        args = [str(part) for op in ops for part in op]
+        return bool(await self._apply(keys=[key], args=args))
+
+    async def delete(self, key: str) -> None:
+        await self.redis.delete(key)
+
+
+class InMemoryEligibilityStore:
+    """Process-local snapshot storage for running without Redis."""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Dict[str, Any], float]] = {}
+
+    async def get(self, key: str) -> Optional[Dict[Any, Any]]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return dict(entry[0])
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Dict[Any, Any]]]:
+        return [await self.get(key) for key in keys]
+
+    async def put(self, key: str, values: Dict[str, Any], ttl: int) -> None:
+        self._data[key] = (dict(values), time.monotonic() + ttl)
+
+    async def put_many(self, entries: Dict[str, Dict[str, Any]], ttl: int) -> None:
+        for key, values in entries.items():
+            await self.put(key, values, ttl)
+
+    async def apply(self, key: str, ops: List[FieldOp]) -> bool:
+        if await self.get(key) is None:
+            return False
+        values = self._data[key][0]
+        for op, name, value in ops:
+            current = values.get(name, 0)
+            if op == "incr":
+                values[name] = current + value
+            elif op == "max":
+                values[name] = max(current, value)
+            elif op == "or":
+                values[name] = int(current) | int(value)
+            else:
+                values[name] = value
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class GenesisEligibilityEngine:
+    """Reads and incrementally maintains eligibility snapshots."""
+
+    def __init__(self, store: Optional[EligibilityStore] = None, ttl: int = SNAPSHOT_TTL):
+        self.store = store or InMemoryEligibilityStore()
+        self.ttl = ttl
+        self.hits = 0
+        self.builds = 0
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"{KEY_PREFIX}:{user_id}"
+
+    async def get(
+        self,
+        user_id: int,
+        loader: Callable[[], Awaitable[EligibilitySnapshot]]
+    ) -> EligibilitySnapshot:
+        """Get a user's snapshot, building it with ``loader`` if there is none."""
+        data = await self.store.get(self._key(user_id))
+        if data is not None:
+            self.hits += 1
+            return EligibilitySnapshot.from_fields(data)
+        return await self.refresh(user_id, loader)
+
+    async def refresh(
+        self,
+        user_id: int,
+        loader: Callable[[], Awaitable[EligibilitySnapshot]]
+    ) -> EligibilitySnapshot:
+        """Rebuild a user's snapshot from the source of truth."""
+        snapshot = await loader()
+        await self.store.put(self._key(user_id), snapshot.to_fields(), self.ttl)
+        self.builds += 1
+        return snapshot
+
+    async def get_many(
+        self,
+        user_ids: List[int],
+        loader: Callable[[List[int]], Awaitable[Dict[int, EligibilitySnapshot]]]
+    ) -> Dict[int, EligibilitySnapshot]:
+        """Get snapshots for many users, building the missing ones with one ``loader`` call."""
+        user_ids = list(dict.fromkeys(user_ids))
+        stored = await self.store.get_many([self._key(user_id) for user_id in user_ids])
+
+        snapshots: Dict[int, EligibilitySnapshot] = {}
+        missing: List[int] = []
+        for user_id, data in zip(user_ids, stored):
+            if data is None:
+                missing.append(user_id)
+            else:
+                snapshots[user_id] = EligibilitySnapshot.from_fields(data)
+        self.hits += len(snapshots)
+
+        if missing:
+            built = await loader(missing)
+            await self.store.put_many(
+                {self._key(user_id): snapshot.to_fields() for user_id, snapshot in built.items()}, self.ttl
+            )
+            self.builds += len(built)
+            snapshots.update(built)
+        return snapshots
+
+    async def invalidate(self, user_id: int) -> None:
+        await self.store.delete(self._key(user_id))
+
+    # Incremental updates
+
+    async def record_trade(self, user_id: int, successful: bool = False, at: Optional[float] = None) -> None:
+        ops: List[FieldOp] = [
+            ("incr", "total_trades", 1),
+            ("max", "last_trade_at", time.time() if at is None else at)
+        ]
+        if successful:
+            ops.append(("incr", "successful_trades", 1))
+        await self._apply(user_id, ops)
+
+    async def record_level(self, user_id: int, level: int) -> None:
+        await self._apply(user_id, [("max", "level", level)])
+
+    async def record_founder(self, user_id: int, constellation_id: int, constellation_name: str) -> None:
+        await self._apply(user_id, [
+            ("set", "founded_constellation_id", constellation_id),
+            ("set", "founded_constellation_name", constellation_name)
+        ])
+
+    async def record_viral_hits(self, user_ids: Iterable[int]) -> None:
+        """Count content items that crossed VIRAL_HIT_SCORE, one entry per item."""
+        counts: Dict[int, int] = {}
+        for user_id in user_ids:
+            counts[user_id] = counts.get(user_id, 0) + 1
+        for user_id, count in counts.items():
+            await self._apply(user_id, [("incr", "viral_hits", count)])
+
+    async def record_mint(self, user_id: int, achievement_type: str) -> None:
+        await self._apply(user_id, [("or", "minted", int(GenesisAchievement.from_type(achievement_type)))])
+
+    # Domain events
+
+    async def register_event_handlers(self, event_bus) -> None:
+        """Keep trade counters current from trading domain events."""
+        await event_bus.subscribe("trade_executed", self.handle_trade_executed)
+
+    async def handle_trade_executed(self, event) -> None:
+        executed_at = getattr(event, "executed_at", None)
+        await self.record_trade(event.user_id, at=executed_at.timestamp() if executed_at else None)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "builds": self.builds}
+
+    async def _apply(self, user_id: int, ops: List[FieldOp]) -> None:
+        try:
+            await self.store.apply(self._key(user_id), ops)
+        except Exception as e:
+            logger.error(f"Failed to update eligibility snapshot for user {user_id}: {e}")
+            try:
+                # Drop the snapshot so the next read rebuilds it instead of serving a stale one
+                await self.store.delete(self._key(user_id))
+            except Exception:
+                pass
+
+
+_genesis_eligibility: Optional[GenesisEligibilityEngine] = None
+
+
+def get_genesis_eligibility() -> GenesisEligibilityEngine:
+    """Shared Genesis eligibility engine (FastAPI dependency)."""
+    global _genesis_eligibility
+    if _genesis_eligibility is None:
+        from ..core.config import settings
+
+        store = None
+        if settings.redis_url:
+            import redis.asyncio as redis
+            store = RedisEligibilityStore(redis.from_url(settings.redis_url))
+        _genesis_eligibility = GenesisEligibilityEngine(store)
+    return _genesis_eligibility
@@ -0,0 +1,240 @@
+"""
+Groq Response Cache
+Reuses LLM responses across requests whose inputs are essentially the same.
+
+Prompt inputs are normalized before hashing: prices are rounded to three
+significant digits, percentages to whole numbers, other numbers (balances,
+XP, counts) to two significant digits, identifiers and timestamps are
+dropped, and lists of trades or actions are reduced to counts and rates.
+Many users asking about BTC within the same minute therefore share a key.
+
+Personal kinds (content or analysis written for one user) are the
+exception: they are keyed by their exact inputs, identity included, so a
+response is only ever reused for the same user and the same data.
+
+Responses are stored in core.cache.Cache (Redis when configured, a bounded
+in-memory store otherwise) with a TTL per kind of request. Cache.get_or_set
+coalesces concurrent identical misses into one upstream call; streamed
+responses (lookup/store) are coalesced the same way within a process.
+Failed calls (None) are not cached.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+import orjson
+
+try:
+    from ..core.cache import Cache, InMemoryCacheBackend, RedisCacheBackend
+except ImportError:
+    from core.cache import Cache, InMemoryCacheBackend, RedisCacheBackend
+
+logger = logging.getLogger(__name__)
+
+CACHE_NAMESPACE = "groq"
+
+# Keys that identify a request rather than describe it
+IGNORED_KEYS = {
+    "user_id", "id", "username", "email", "wallet_address", "starknet_address",
+    "timestamp", "time", "created_at", "updated_at", "last_login", "last_active", "generated_at",
+}
+PRICE_KEYS = {"price", "current_price", "open", "high", "low", "close", "bid", "ask", "entry_price", "exit_price"}
+PERCENT_KEYS = {"change_percent", "change_percent_24h", "change_24h_percent", "volatility", "profit_percentage"}
+
+
+def significant(value: float, digits: int) -> float:
+    """``value`` rounded to ``digits`` significant digits."""
+    if value == 0 or not math.isfinite(value):
+        return value
+    return round(value, digits - 1 - int(math.floor(math.log10(abs(value)))))
+
+
+def normalize(value: Any, key: Optional[str] = None) -> Any:
+    """Bucketed, order-independent form of a prompt input."""
+    if isinstance(value, dict):
+        return {
+            str(k): normalize(v, str(k).lower())
+            for k, v in sorted(value.items(), key=lambda item: str(item[0]))
+            if str(k).lower() not in IGNORED_KEYS
+        }
+    if isinstance(value, (list, tuple)):
+        return [normalize(item, key) for item in value]
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        if key in PRICE_KEYS:
+            return significant(float(value), 3)
+        if key in PERCENT_KEYS or (key and key.endswith("_pct")):
+            return round(float(value))
+        return significant(float(value), 2)
+    if isinstance(value, str):
+        return value.strip().lower()
+    return str(value)
+
+
+def summarize_records(records: Iterable[Dict[str, Any]], kind_keys: Iterable[str] = ("type", "action", "event_type")) -> Dict[str, Any]:
+    """
+    Trades, actions or events reduced to what a prompt answer depends on:
+    how many there are, of which kinds, and the win rate of trades.
+    """
+    records = list(records)
+    kinds: Counter = Counter()
+    wins = outcomes = 0
+    for record in records:
+        for kind_key in kind_keys:
+            if kind_key in record:
+                kinds[str(record[kind_key]).lower()] += 1
+                break
+        profit = record.get("profit", record.get("profit_amount", record.get("profit_percentage")))
+        if isinstance(profit, (int, float)):
+            outcomes += 1
+            wins += profit > 0
+    summary: Dict[str, Any] = {
+        "count": significant(float(len(records)), 1),
+        "kinds": {kind: significant(float(count), 1) for kind, count in sorted(kinds.items())},
+    }
+    if outcomes:
+        summary["win_rate"] = round(wins / outcomes, 1)
+    return summary
+
+
+def cache_digest(payload: Any) -> str:
+    return hashlib.sha256(
+        orjson.dumps(payload, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    ).hexdigest()
+
+
+@dataclass
+class KindStats:
+    requests: int = 0
+    upstream_calls: int = 0
+
+    @property
+    def saved_calls(self) -> int:
+        return self.requests - self.upstream_calls
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "upstream_calls": self.upstream_calls,
+            "saved_calls": self.saved_calls,
+            "saved_rate": self.saved_calls / self.requests if self.requests else 0.0,
+        }
+
+
+class GroqResponseCache:
+    """Normalized-input cache in front of Groq calls, with saved-call accounting."""
+
+    # Seconds a response stays valid, by kind of request
+    DEFAULT_TTLS = {
+        "trading_recommendation": 60,
+        "viral_content": 300,
+        "user_behavior": 900,
+    }
+    # Kinds whose responses are personalized: keyed by their exact inputs
+    PERSONAL_KINDS = frozenset({"viral_content", "user_behavior"})
+
+    def __init__(self, cache: Cache, ttls: Optional[Dict[str, int]] = None):
+        self.cache = cache
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self._stats: Dict[str, KindStats] = {}
+        # Responses being streamed after a lookup() miss, by kind and input digest
+        self._streaming: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def get_or_call(
+        self,
+        kind: str,
+        inputs: Dict[str, Any],
+        call: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cached response for these inputs, calling ``call`` on a miss.
+
+        The returned dict is a copy, so callers can add per-user fields.
+        """
+        stats = self._stats.setdefault(kind, KindStats())
+        stats.requests += 1
+
+        async def upstream():
+            stats.upstream_calls += 1
+            return await call()
+
+        result = await self.cache.get_or_set(await self._key(kind, inputs), upstream, ttl=self.ttls.get(kind))
+        return dict(result) if result is not None else None
+
+    async def lookup(self, kind: str, inputs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Cached response for these inputs, or None.
+
+        For responses that are streamed rather than awaited: on a miss the
+        caller streams the answer itself and must hand it to store(), or
+        call release() if it gets none. Concurrent identical lookups wait
+        for that stream instead of starting their own.
+        """
+        stats = self._stats.setdefault(kind, KindStats())
+        stats.requests += 1
+        key = await self._key(kind, inputs)
+        stream_key = (kind, self._digest(kind, inputs))
+        while True:
+            result = await self.cache.get(key)
+            if result is not None:
+                return dict(result)
+            streaming = self._streaming.get(stream_key)
+            if streaming is None:
+                break
+            # None when that stream failed: look again, or stream ourselves
+            result = await asyncio.shield(streaming)
+            if result is not None:
+                return dict(result)
+        self._streaming[stream_key] = asyncio.get_running_loop().create_future()
+        return None
+
+    async def store(self, kind: str, inputs: Dict[str, Any], response: Dict[str, Any]) -> None:
+        """Cache a response obtained after a lookup() miss."""
+        self._stats.setdefault(kind, KindStats()).upstream_calls += 1
+        try:
+            await self.cache.set(await self._key(kind, inputs), response, ttl=self.ttls.get(kind))
+        finally:
+            self._finish_stream(kind, inputs, response)
+
+    def release(self, kind: str, inputs: Dict[str, Any]) -> None:
+        """End a lookup() miss that produced no response, so a waiting lookup streams instead."""
+        self._finish_stream(kind, inputs, None)
+
+    def _finish_stream(self, kind: str, inputs: Dict[str, Any], response: Optional[Dict[str, Any]]) -> None:
+        streaming = self._streaming.pop((kind, self._digest(kind, inputs)), None)
+        if streaming is not None and not streaming.done():
+            streaming.set_result(response)
+
+    def _digest(self, kind: str, inputs: Dict[str, Any]) -> str:
+        return cache_digest(inputs if kind in self.PERSONAL_KINDS else normalize(inputs))
+
+    async def _key(self, kind: str, inputs: Dict[str, Any]) -> str:
+        return await self.cache.key(f"{CACHE_NAMESPACE}:{kind}", self._digest(kind, inputs))
+
+    async def invalidate(self, kind: str) -> None:
+        """Drop every cached response of a kind, e.g. after a prompt change."""
+        await self.cache.invalidate_namespace(f"{CACHE_NAMESPACE}:{kind}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        requests = sum(stats.requests for stats in self._stats.values())
+        upstream = sum(stats.upstream_calls for stats in self._stats.values())
+        return {
+            "requests": requests,
+            "upstream_calls": upstream,
+            "saved_calls": requests - upstream,
+            "saved_rate": (requests - upstream) / requests if requests else 0.0,
+            "by_kind": {kind: stats.to_dict() for kind, stats in self._stats.items()},
+            "cache": self.cache.get_stats(),
+        }
+
+
+def create_groq_response_cache(redis_client=None, max_entries: int = 5000, **kwargs) -> GroqResponseCache:
+    """Response cache on Redis when a client is given, bounded in-memory otherwise."""
+    backend = RedisCacheBackend(redis_client) if redis_client is not None else InMemoryCacheBackend(max_entries=max_entries)
+    return GroqResponseCache(Cache(backend, default_ttl=60), **kwargs)
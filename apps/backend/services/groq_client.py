@@ -7,10 +7,12 @@ Based on Groq API documentation and AstraTrade requirements
 import asyncio
 import json
 import time
-from typing import Dict, List, Optional, Any, Union
+from typing import AsyncIterator, Dict, List, Optional, Any, Union
 import httpx
 from datetime import datetime
 from ..core.config import settings
+from ..core.resilience import CallTimeout, CircuitOpenError, endpoint_key, get_resilience_layer
+from .llm_stream import RECOMMENDATION_FIELDS, JSONFieldStream, chunk_text, chunk_usage, iter_sse_events, parse_fields
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,13 +32,23 @@ class GroqAPIError(Exception):
         super().__init__(self.message)
 
 
+def _is_outage(error: BaseException) -> bool:
+    """Errors that say Groq is unhealthy; invalid requests (4xx other than 429) do not."""
+    if isinstance(error, GroqAPIError) and error.status_code is not None:
+        return error.status_code >= 500 or error.status_code == 429
+    return True
+
+
 class GroqClient:
     """
     Client for Groq API integration.
     Provides ultra-fast inference for reasoning models.
+    
+    Requests go through the shared "groq" resilience layer (core.resilience):
+    per-endpoint circuit breakers and adaptive timeouts.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, rate_limit: bool = True):
         self.api_key = api_key or settings.groq_api_key
         if not self.api_key:
             logger.warning("Groq API key not configured. Some features may be limited.")
@@ -47,27 +59,41 @@ class GroqClient:
         self.temperature = settings.groq_temperature
         self.timeout = settings.groq_timeout
         
+        self.resilience = get_resilience_layer(
+            "groq", is_failure=_is_outage, max_timeout=self.timeout, slow_call_seconds=10.0
+        )
+        
         self.session = None
+        self._session_users = 0
+        # Callers that pace requests themselves (GroqService's scheduler) turn this off
+        self.rate_limit = rate_limit
         self._rate_limits = {
             "requests_per_second": 50,  # Groq allows high throughput
             "last_request_time": 0
         }
     
     async def __aenter__(self):
-        """Async context manager entry."""
-        self.session = httpx.AsyncClient(
-            timeout=httpx.Timeout(self.timeout),
-            limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
-        )
+        """Async context manager entry; concurrent users share one session."""
+        if self.session is None:
+            self.session = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
+            )
+        self._session_users += 1
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit."""
-        if self.session:
-            await self.session.aclose()
+        """Async context manager exit; the last user closes the session."""
+        self._session_users -= 1
+        if self._session_users <= 0 and self.session:
+            self._session_users = 0
+            session, self.session = self.session, None
+            await session.aclose()
     
     async def _rate_limit(self):
         """Implement rate limiting for API requests."""
+        if not self.rate_limit:
+            return
         current_time = time.time()
         time_since_last = current_time - self._rate_limits["last_request_time"]
         
@@ -102,6 +128,21 @@ class GroqClient:
         url = f"{self.base_url}{endpoint}"
         headers = self._get_headers()
         
+        try:
+            return await self.resilience.call(
+                endpoint_key(method, endpoint),
+                lambda: self._send(method, url, headers, data),
+                # Completions change nothing upstream: safe to time out and cancel
+                idempotent=True
+            )
+        except CircuitOpenError as e:
+            logger.warning(f"Groq API request rejected: {str(e)}")
+            raise GroqAPIError("Groq API temporarily unavailable", status_code=503)
+        except CallTimeout as e:
+            logger.error(f"Groq API request timed out: {str(e)}")
+            raise GroqAPIError(f"Request timed out: {str(e)}")
+    
+    async def _send(self, method: str, url: str, headers: Dict[str, str], data: Optional[Dict] = None) -> Dict[str, Any]:
         try:
             if method.upper() == "POST":
                 response = await self.session.post(url, headers=headers, json=data)
@@ -174,30 +215,83 @@ class GroqClient:
             logger.error(f"Chat completion failed: {str(e)}")
             raise
     
-    async def analyze_trading_decision(
+    async def stream_chat_completion(
         self,
-        market_data: Dict[str, Any],
-        user_profile: Dict[str, Any],
-        trading_history: List[Dict[str, Any]]
-    ) -> Dict[str, Any]:
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
-        Analyze trading decision using Groq's reasoning capabilities.
+        Stream a chat completion from Groq API.
         
-        Args:
-            market_data: Current market conditions
-            user_profile: User's trading profile and preferences
-            trading_history: Recent trading history
-            
-        Returns:
-            Analysis result with recommendations
+        Yields the completion chunks as they arrive; chunk_text gives the
+        text each one adds and the last one carries the token usage.
         """
-        messages = [
+        if not self.session:
+            raise GroqAPIError("Client not initialized. Use async context manager.")
+        
+        if not self.api_key:
+            raise GroqAPIError("Groq API key not configured")
+        
+        await self._rate_limit()
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            "max_tokens": max_tokens or self.max_tokens,
+            "temperature": temperature or self.temperature,
+            "stream": True
+        }
+        
+        logger.info(f"Streaming chat completion from Groq API with model: {payload['model']}")
+        start_time = time.time()
+        
+        try:
+            # Streams are timed by the HTTP client; the breaker still sees their outcome
+            async with self.resilience.guard("POST /openai/v1/chat/completions:stream"), self.session.stream(
+                "POST", f"{self.base_url}/openai/v1/chat/completions", headers=self._get_headers(), json=payload
+            ) as response:
+                if response.status_code != 200:
+                    response_data = json.loads(await response.aread() or b"{}")
+                    logger.error(f"Groq API error: {response.status_code} {response_data}")
+                    error_message = response_data.get("error", {}).get("message", f"HTTP {response.status_code} error")
+                    raise GroqAPIError(error_message, status_code=response.status_code, response_data=response_data)
+                
+                first_chunk = True
+                async for chunk in iter_sse_events(response.aiter_lines()):
+                    if "error" in chunk:
+                        raise GroqAPIError(chunk["error"].get("message", "Stream error"), response_data=chunk)
+                    if first_chunk:
+                        logger.info(f"Groq API first chunk received in {time.time() - start_time:.2f}s")
+                        first_chunk = False
+                    yield chunk
+            
+            logger.info(f"Groq API stream completed in {time.time() - start_time:.2f}s")
+        
+        except CircuitOpenError as e:
+            logger.warning(f"Groq API stream rejected: {str(e)}")
+            raise GroqAPIError("Groq API temporarily unavailable", status_code=503)
+        except httpx.RequestError as e:
+            logger.error(f"Groq API stream failed: {str(e)}")
+            raise GroqAPIError(f"Request failed: {str(e)}")
+        except json.JSONDecodeError:
+            logger.error(f"Groq API streamed invalid JSON.")
+            raise GroqAPIError("Invalid JSON in streamed response")
+    
+    def _trading_decision_messages(
+        self,
+        market_data: Dict[str, Any],
+        user_profile: Dict[str, Any],
+        trading_history: List[Dict[str, Any]]
+    ) -> List[Dict[str, str]]:
+        """Prompt asking for a JSON answer whose short fields come first, so they stream early."""
+        return [
             {
                 "role": "system",
                 "content": """You are an expert trading analyst for AstraTrade. 
                 Analyze the provided market data, user profile, and trading history 
                 to provide reasoned trading recommendations. Focus on risk management 
-                and user-specific preferences."""
+                and user-specific preferences. Answer with a single JSON object only."""
             },
             {
                 "role": "user",
@@ -207,19 +301,40 @@ class GroqClient:
                 User Profile: {json.dumps(user_profile, indent=2)}
                 Trading History: {json.dumps(trading_history, indent=2)}
                 
-                Provide a reasoned analysis with:
-                1. Market assessment
-                2. Risk evaluation
-                3. Recommended action
-                4. Confidence level
-                5. Reasoning behind the recommendation"""
+                Answer with a JSON object with these keys, in this order:
+                "action": "buy", "sell" or "hold"
+                "confidence": confidence level from 0 to 1
+                "market_assessment": market assessment
+                "risk_evaluation": risk evaluation
+                "reasoning": reasoning behind the recommendation"""
             }
         ]
+    
+    async def analyze_trading_decision(
+        self,
+        market_data: Dict[str, Any],
+        user_profile: Dict[str, Any],
+        trading_history: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Analyze trading decision using Groq's reasoning capabilities.
+        
+        Args:
+            market_data: Current market conditions
+            user_profile: User's trading profile and preferences
+            trading_history: Recent trading history
+            
+        Returns:
+            Analysis result with recommendations
+        """
+        messages = self._trading_decision_messages(market_data, user_profile, trading_history)
         
         try:
             response = await self.chat_completion(messages, temperature=0.3)
+            analysis = response["choices"][0]["message"]["content"]
             return {
-                "analysis": response["choices"][0]["message"]["content"],
+                "analysis": analysis,
+                "recommendation": parse_fields(analysis),
                 "model_used": response["model"],
                 "tokens_used": response["usage"]["total_tokens"],
                 "timestamp": datetime.utcnow().isoformat()
@@ -228,6 +343,47 @@ class GroqClient:
             logger.error(f"Trading analysis failed: {str(e)}")
             raise
     
+    async def stream_trading_decision(
+        self,
+        market_data: Dict[str, Any],
+        user_profile: Dict[str, Any],
+        trading_history: List[Dict[str, Any]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a trading analysis as it is generated.
+        
+        Yields {"type": "delta", "text"} for every piece of text,
+        {"type": "field", "name", "value"} as each recommendation field
+        completes, and finally {"type": "done", "result"} with the same
+        result analyze_trading_decision returns.
+        """
+        messages = self._trading_decision_messages(market_data, user_profile, trading_history)
+        fields = JSONFieldStream()
+        model_used = self.model
+        usage: Dict[str, Any] = {}
+        
+        async for chunk in self.stream_chat_completion(messages, temperature=0.3):
+            model_used = chunk.get("model", model_used)
+            usage = chunk_usage(chunk) or usage
+            text = chunk_text(chunk)
+            if not text:
+                continue
+            yield {"type": "delta", "text": text}
+            for name, value in fields.feed(text):
+                if name in RECOMMENDATION_FIELDS:
+                    yield {"type": "field", "name": name, "value": value}
+        
+        yield {
+            "type": "done",
+            "result": {
+                "analysis": fields.text,
+                "recommendation": fields.fields,
+                "model_used": model_used,
+                "tokens_used": usage.get("total_tokens", 0),
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        }
+    
     async def generate_game_content(
         self,
         content_type: str,
@@ -279,9 +435,8 @@ class GroqClient:
     async def health_check(self) -> bool:
         """Check if Groq API is accessible."""
         try:
-            # Try a simple completion to test connectivity
-            messages = [{"role": "user", "content": "Hello"}]
-            await self.chat_completion(messages, max_tokens=10)
+            # Listing models checks connectivity and the key without spending tokens
+            await self._make_request("GET", "/openai/v1/models")
             return True
         except Exception as e:
             logger.error(f"Groq API health check failed: {str(e)}")
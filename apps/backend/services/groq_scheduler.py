@@ -0,0 +1,257 @@
+"""
+Groq Request Scheduler
+Orders LLM calls by priority so interactive requests never queue behind
+background generation.
+
+Calls are submitted with a priority (INTERACTIVE or BACKGROUND) and an
+optional deadline, and run by a fixed pool of workers:
+
+- At most ``max_concurrency`` calls are in flight, and background calls may
+  hold at most ``max_background`` of those slots, so interactive requests
+  always find a free worker.
+- A token bucket (``requests_per_second`` with ``burst``) paces upstream
+  calls without the fixed per-call sleep of GroqClient._rate_limit.
+- A call whose deadline passes while it is still queued is dropped with
+  RequestExpired instead of spending a request on an answer nobody waits
+  for; a caller that gives up (cancellation) also removes its call.
+- Pending work is bounded (``max_pending``); beyond it new background
+  calls are rejected with SchedulerOverloaded, interactive ones still queue.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class RequestExpired(Exception):
+    """The request's deadline passed before it could be sent."""
+
+
+class SchedulerOverloaded(Exception):
+    """Too much work is pending to accept another background request."""
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    sequence: int
+    call: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    deadline: Optional[float] = field(compare=False, default=None)
+    enqueued_at: float = field(compare=False, default=0.0)
+
+
+@dataclass
+class PriorityStats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    expired: int = 0
+    cancelled: int = 0
+    rejected: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        started = self.completed + self.failed
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "expired": self.expired,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait / started * 1000, 2) if started else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+
+class TokenBucket:
+    """Paces calls to ``rate`` per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class LLMRequestScheduler:
+    """Priority queue and worker pool in front of an LLM API."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_background: int = 4,
+        requests_per_second: float = 30.0,
+        burst: int = 10,
+        max_pending: int = 1000
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_background = min(max_background, max_concurrency)
+        self.max_pending = max_pending
+        self.rate_limiter = TokenBucket(requests_per_second, burst)
+        self._queue: List[_Job] = []
+        self._sequence = itertools.count()
+        self._changed: Optional[asyncio.Condition] = None
+        self._workers: List[asyncio.Task] = []
+        self._running_background = 0
+        self._in_flight = 0
+        self._stats = {priority: PriorityStats() for priority in Priority}
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    async def start(self) -> None:
+        if not self._workers:
+            self._changed = asyncio.Condition()
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self.max_concurrency)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for job in self._queue:
+            if not job.future.done():
+                job.future.cancel()
+        self._queue.clear()
+
+    async def submit(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Run ``call`` when a worker is free for its priority.
+
+        ``timeout`` is the deadline for the call to start; past it the call
+        is dropped and RequestExpired raised.
+        """
+        await self.start()
+        stats = self._stats[priority]
+        if priority == Priority.BACKGROUND and len(self._queue) >= self.max_pending:
+            stats.rejected += 1
+            raise SchedulerOverloaded(f"{len(self._queue)} LLM requests pending")
+
+        now = time.monotonic()
+        job = _Job(
+            priority=int(priority),
+            sequence=next(self._sequence),
+            call=call,
+            future=asyncio.get_running_loop().create_future(),
+            deadline=now + timeout if timeout is not None else None,
+            enqueued_at=now
+        )
+        heapq.heappush(self._queue, job)
+        stats.submitted += 1
+        async with self._changed:
+            self._changed.notify()
+
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            # The future is cancelled with the caller; workers skip it if still queued
+            job.future.cancel()
+            stats.cancelled += 1
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._queue),
+            "in_flight": self._in_flight,
+            "background_in_flight": self._running_background,
+            "max_concurrency": self.max_concurrency,
+            "max_background": self.max_background,
+            **{priority.name.lower(): stats.to_dict() for priority, stats in self._stats.items()}
+        }
+
+    def _next_job(self) -> Optional[_Job]:
+        """Pop the most urgent runnable job, dropping cancelled and expired ones."""
+        while self._queue:
+            job = self._queue[0]
+            if job.future.done():
+                heapq.heappop(self._queue)
+                continue
+            if job.deadline is not None and job.deadline < time.monotonic():
+                heapq.heappop(self._queue)
+                self._stats[Priority(job.priority)].expired += 1
+                job.future.set_exception(RequestExpired("LLM request expired before it was sent"))
+                continue
+            if job.priority == Priority.BACKGROUND and self._running_background >= self.max_background:
+                # Interactive jobs sort first, so nothing else is runnable either
+                return None
+            return heapq.heappop(self._queue)
+        return None
+
+    async def _work(self) -> None:
+        while True:
+            async with self._changed:
+                job = self._next_job()
+                while job is None:
+                    await self._changed.wait()
+                    job = self._next_job()
+                background = job.priority == Priority.BACKGROUND
+                self._running_background += background
+                self._in_flight += 1
+            try:
+                await self._run(job)
+            finally:
+                async with self._changed:
+                    self._running_background -= background
+                    self._in_flight -= 1
+                    self._changed.notify()
+
+    async def _run(self, job: _Job) -> None:
+        stats = self._stats[Priority(job.priority)]
+        await self.rate_limiter.acquire()
+        if job.future.done():
+            return
+        if job.deadline is not None and job.deadline < time.monotonic():
+            stats.expired += 1
+            job.future.set_exception(RequestExpired("LLM request expired before it was sent"))
+            return
+
+        wait = time.monotonic() - job.enqueued_at
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+        try:
+            result = await job.call()
+        except asyncio.CancelledError:
+            if not job.future.done():
+                job.future.cancel()
+            raise
+        except Exception as e:
+            stats.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+            return
+        stats.completed += 1
+        if not job.future.done():
+            job.future.set_result(result)
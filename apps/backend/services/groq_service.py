@@ -4,10 +4,12 @@ Integrates Groq's fast reasoning capabilities with game mechanics
 """
 
 import asyncio
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any
 from datetime import datetime
 import logging
 from .groq_client import GroqClient, GroqAPIError
+from .groq_cache import GroqResponseCache, create_groq_response_cache, summarize_records
+from .groq_scheduler import LLMRequestScheduler, Priority
 
 logger = logging.getLogger(__name__)
 
@@ -16,27 +18,92 @@ class GroqService:
     """
     Service layer for Groq API integration.
     Provides reasoning capabilities for trading and game mechanics.
+    
+    Upstream calls go through an LLMRequestScheduler: recommendations and
+    achievement descriptions are interactive and must start within
+    ``interactive_timeout`` seconds, content generation and behavior analysis
+    run as background work. API health is probed by a background task
+    started with start(), not on the request path.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        response_cache: Optional[GroqResponseCache] = None,
+        scheduler: Optional[LLMRequestScheduler] = None,
+        interactive_timeout: float = 5.0,
+        background_timeout: float = 60.0
+    ):
         self.client = None
         self._is_available = False
         self._last_health_check = None
         self._health_check_interval = 300  # 5 minutes
+        self._health_probe: Optional[asyncio.Task] = None
+        self._response_cache = response_cache
+        self.scheduler = scheduler or LLMRequestScheduler()
+        self.interactive_timeout = interactive_timeout
+        self.background_timeout = background_timeout
+    
+    @property
+    def response_cache(self) -> GroqResponseCache:
+        """Shared response cache (Redis-backed when configured)."""
+        if self._response_cache is None:
+            from ..core.config import settings
+            
+            redis_client = None
+            if settings.redis_url:
+                import redis.asyncio as redis
+                redis_client = redis.from_url(settings.redis_url)
+            self._response_cache = create_groq_response_cache(redis_client)
+        return self._response_cache
+    
+    async def start(self):
+        """Open a shared client session and start the scheduler and health probe."""
+        if self._health_probe is not None:
+            return
+        if self.client is None:
+            self.client = GroqClient(rate_limit=False)
+        # Held for the service's lifetime so requests reuse its connections
+        await self.client.__aenter__()
+        await self.scheduler.start()
+        self._health_probe = asyncio.create_task(self._probe_health())
+    
+    async def stop(self):
+        if self._health_probe is None:
+            return
+        self._health_probe.cancel()
+        try:
+            await self._health_probe
+        except asyncio.CancelledError:
+            pass
+        self._health_probe = None
+        await self.scheduler.stop()
+        await self.client.__aexit__(None, None, None)
+    
+    async def _probe_health(self):
+        while True:
+            await self._check_health()
+            await asyncio.sleep(self._health_check_interval)
+    
+    async def _check_health(self):
+        async with self.client:
+            self._is_available = await self.client.health_check()
+        self._last_health_check = datetime.utcnow()
+        
+        if not self._is_available:
+            logger.warning("Groq API is not available")
     
     async def _ensure_client(self):
-        """Ensure Groq client is initialized and available."""
+        """Ensure Groq client is initialized; health is checked once if no probe runs."""
         if self.client is None:
-            self.client = GroqClient()
+            self.client = GroqClient(rate_limit=False)
         
-        # Check health if needed
-        if (self._last_health_check is None or 
-            (datetime.utcnow() - self._last_health_check).seconds > self._health_check_interval):
-            self._is_available = await self.client.health_check()
-            self._last_health_check = datetime.utcnow()
-            
-            if not self._is_available:
-                logger.warning("Groq API is not available")
+        if self._last_health_check is None and self._health_probe is None:
+            await self._check_health()
+    
+    async def _submit(self, call, priority: Priority):
+        """Run an upstream call through the scheduler with its priority's deadline."""
+        timeout = self.interactive_timeout if priority == Priority.INTERACTIVE else self.background_timeout
+        return await self.scheduler.submit(call, priority=priority, timeout=timeout)
     
     async def get_trading_recommendation(
         self,
@@ -64,19 +131,31 @@ class GroqService:
                 logger.warning("Groq API not available, skipping trading recommendation")
                 return None
             
-            async with self.client:
-                result = await self.client.analyze_trading_decision(
-                    market_data=market_data,
-                    user_profile=user_profile,
-                    trading_history=trading_history
-                )
-                
-                # Add user context
-                result["user_id"] = user_id
-                result["recommendation_type"] = "ai_analysis"
-                
-                logger.info(f"Generated trading recommendation for user {user_id}")
-                return result
+            async def analyze():
+                async with self.client:
+                    return await self.client.analyze_trading_decision(
+                        market_data=market_data,
+                        user_profile=user_profile,
+                        trading_history=trading_history
+                    )
+            
+            # Users with similar profiles asking about the same market share a response
+            result = await self.response_cache.get_or_call(
+                "trading_recommendation",
+                {
+                    "market_data": market_data,
+                    "user_profile": user_profile,
+                    "trading_history": summarize_records(trading_history, kind_keys=("direction", "type"))
+                },
+                lambda: self._submit(analyze, Priority.INTERACTIVE)
+            )
+            
+            # Add user context
+            result["user_id"] = user_id
+            result["recommendation_type"] = "ai_analysis"
+            
+            logger.info(f"Generated trading recommendation for user {user_id}")
+            return result
                 
         except GroqAPIError as e:
             logger.error(f"Groq API error in trading recommendation: {str(e)}")
@@ -85,6 +164,87 @@ class GroqService:
             logger.error(f"Unexpected error in trading recommendation: {str(e)}")
             return None
     
+    async def stream_trading_recommendation(
+        self,
+        user_id: int,
+        market_data: Dict[str, Any],
+        user_profile: Dict[str, Any],
+        trading_history: List[Dict[str, Any]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an AI-powered trading recommendation as it is generated.
+        
+        Yields the events of GroqClient.stream_trading_decision ("delta",
+        "field", then "done" with the result get_trading_recommendation
+        returns), or a single "error" event. A cached recommendation is
+        replayed as its fields and "done" without calling the API.
+        """
+        inputs = {
+            "market_data": market_data,
+            "user_profile": user_profile,
+            "trading_history": summarize_records(trading_history, kind_keys=("direction", "type"))
+        }
+        task = None
+        streaming = False
+        try:
+            await self._ensure_client()
+            
+            if not self._is_available:
+                logger.warning("Groq API not available, skipping trading recommendation")
+                yield {"type": "error", "message": "AI analysis is not available"}
+                return
+            
+            result = await self.response_cache.lookup("trading_recommendation", inputs)
+            if result is not None:
+                for name, value in result.get("recommendation", {}).items():
+                    yield {"type": "field", "name": name, "value": value}
+            else:
+                # Identical requests arriving meanwhile wait for this stream's result
+                streaming = True
+                # The stream holds a scheduler slot until it ends; events reach us through the queue
+                events: asyncio.Queue = asyncio.Queue()
+                
+                async def pump():
+                    async with self.client:
+                        async for event in self.client.stream_trading_decision(
+                            market_data=market_data,
+                            user_profile=user_profile,
+                            trading_history=trading_history
+                        ):
+                            events.put_nowait(event)
+                
+                async def run():
+                    try:
+                        await self._submit(pump, Priority.INTERACTIVE)
+                    finally:
+                        events.put_nowait(None)
+                
+                task = asyncio.create_task(run())
+                while (event := await events.get()) is not None:
+                    if event["type"] == "done":
+                        result = event["result"]
+                        streaming = False
+                        await self.response_cache.store("trading_recommendation", inputs, result)
+                        break
+                    yield event
+                await task
+            
+            yield {"type": "done", "result": {**result, "user_id": user_id, "recommendation_type": "ai_analysis"}}
+            logger.info(f"Streamed trading recommendation for user {user_id}")
+        
+        except GroqAPIError as e:
+            logger.error(f"Groq API error in streamed trading recommendation: {str(e)}")
+            yield {"type": "error", "message": "AI analysis failed"}
+        except Exception as e:
+            logger.error(f"Unexpected error in streamed trading recommendation: {str(e)}")
+            yield {"type": "error", "message": "AI analysis failed"}
+        finally:
+            # A client that disconnects mid-stream stops the upstream request
+            if task is not None and not task.done():
+                task.cancel()
+            if streaming:
+                self.response_cache.release("trading_recommendation", inputs)
+    
     async def generate_viral_content(
         self,
         user_id: int,
@@ -111,19 +271,27 @@ class GroqService:
                 logger.warning("Groq API not available, skipping content generation")
                 return None
             
-            async with self.client:
-                result = await self.client.generate_game_content(
-                    content_type=content_type,
-                    user_context=user_context,
-                    game_state=game_state
-                )
-                
-                # Add user context
-                result["user_id"] = user_id
-                result["generated_at"] = datetime.utcnow().isoformat()
-                
-                logger.info(f"Generated {content_type} content for user {user_id}")
-                return result
+            async def generate():
+                async with self.client:
+                    return await self.client.generate_game_content(
+                        content_type=content_type,
+                        user_context=user_context,
+                        game_state=game_state
+                    )
+            
+            # Personalized: only reused for this user and exactly this context
+            result = await self.response_cache.get_or_call(
+                "viral_content",
+                {"user_id": user_id, "content_type": content_type, "user_context": user_context, "game_state": game_state},
+                lambda: self._submit(generate, Priority.BACKGROUND)
+            )
+            
+            # Add user context
+            result["user_id"] = user_id
+            result["generated_at"] = datetime.utcnow().isoformat()
+            
+            logger.info(f"Generated {content_type} content for user {user_id}")
+            return result
                 
         except GroqAPIError as e:
             logger.error(f"Groq API error in content generation: {str(e)}")
@@ -179,20 +347,27 @@ class GroqService:
                 }
             ]
             
-            async with self.client:
-                response = await self.client.chat_completion(messages, temperature=0.2)
-                
-                analysis = {
-                    "user_id": user_id,
+            async def analyze():
+                async with self.client:
+                    response = await self.client.chat_completion(messages, temperature=0.2)
+                return {
                     "analysis": response["choices"][0]["message"]["content"],
                     "model_used": response["model"],
                     "tokens_used": response["usage"]["total_tokens"],
                     "timestamp": datetime.utcnow().isoformat(),
                     "analysis_type": "user_behavior"
                 }
-                
-                logger.info(f"Generated behavior analysis for user {user_id}")
-                return analysis
+            
+            # Analysis of this user's exact log: only reused until it changes
+            analysis = await self.response_cache.get_or_call(
+                "user_behavior",
+                {"user_id": user_id, "user_actions": user_actions, "game_events": game_events},
+                lambda: self._submit(analyze, Priority.BACKGROUND)
+            )
+            analysis["user_id"] = user_id
+            
+            logger.info(f"Generated behavior analysis for user {user_id}")
+            return analysis
                 
         except GroqAPIError as e:
             logger.error(f"Groq API error in behavior analysis: {str(e)}")
@@ -244,9 +419,12 @@ class GroqService:
                 }
             ]
             
-            async with self.client:
-                response = await self.client.chat_completion(messages, temperature=0.7, max_tokens=150)
-                return response["choices"][0]["message"]["content"]
+            async def describe():
+                async with self.client:
+                    return await self.client.chat_completion(messages, temperature=0.7, max_tokens=150)
+            
+            response = await self._submit(describe, Priority.INTERACTIVE)
+            return response["choices"][0]["message"]["content"]
                 
         except GroqAPIError as e:
             logger.error(f"Groq API error in achievement description: {str(e)}")
@@ -269,7 +447,9 @@ class GroqService:
         return {
             "is_available": await self.is_available(),
             "last_health_check": self._last_health_check.isoformat() if self._last_health_check else None,
-            "health_check_interval": self._health_check_interval
+            "health_check_interval": self._health_check_interval,
+            "response_cache": self.response_cache.get_stats(),
+            "scheduler": self.scheduler.get_stats()
         }
 
 
@@ -0,0 +1,217 @@
+"""
+Live Event Stream
+Per-user WebSocket stream of domain events (trades, rewards, achievements).
+
+LiveEventRelay subscribes to every event on the domain event bus and
+forwards the ones that belong to a user (events with a ``user_id``) through
+a pub/sub broker: Redis when configured, LocalInvalidationBroker otherwise.
+Every worker listens on the broker and hands events to its own connections
+through a BroadcastHub, so a user connected to any worker receives events
+raised on any worker.
+
+Each connection is one hub subscriber (a bounded send queue plus one
+writer task) and the endpoint's own task reading client messages. A
+connection subscribes to topic ``user:<id>`` for all of its events, or to
+``user:<id>:<event type>`` for each type it filtered on; an event is
+published to both, serialized once. A client that falls behind by more
+than ``max_queue`` events is disconnected rather than silently losing
+events, and reconnects to refetch state. Heartbeats are queued for every
+connection every ``heartbeat_interval`` seconds by a single task.
+
+Client messages (JSON):
+    {"action": "subscribe", "event_types": ["trade_executed", ...]}
+    {"action": "unsubscribe", "event_types": [...]}  (none left: all events)
+    {"action": "ping"}
+"""
+
+import asyncio
+import dataclasses
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+try:
+    from ..core.broadcast_hub import BroadcastHub, SlowConsumerPolicy, Subscriber, encode_frame
+except ImportError:
+    from core.broadcast_hub import BroadcastHub, SlowConsumerPolicy, Subscriber, encode_frame
+
+logger = logging.getLogger(__name__)
+
+LIVE_CHANNEL = "astratrade:live:events"
+HEARTBEAT = encode_frame({"type": "heartbeat"})
+
+
+def user_topic(user_id: int, event_type: Optional[str] = None) -> str:
+    return f"user:{user_id}" if event_type is None else f"user:{user_id}:{event_type}"
+
+
+def event_payload(event) -> Dict[str, Any]:
+    """JSON-ready dict of a domain event."""
+    payload = dataclasses.asdict(event) if dataclasses.is_dataclass(event) else dict(vars(event))
+    payload["event_type"] = event.event_type
+    return json.loads(json.dumps(payload, default=str))
+
+
+class LiveConnection:
+    """One client's stream: its hub subscriber and event type filters."""
+
+    def __init__(self, user_id: int, subscriber: Subscriber):
+        self.user_id = user_id
+        self.subscriber = subscriber
+        self.event_types: Set[str] = set()
+
+    @property
+    def websocket(self):
+        return self.subscriber.websocket
+
+    def topics(self) -> List[str]:
+        if not self.event_types:
+            return [user_topic(self.user_id)]
+        return [user_topic(self.user_id, event_type) for event_type in self.event_types]
+
+
+class LiveEventRelay:
+    """Relays user-owned domain events to those users' live connections."""
+
+    def __init__(
+        self,
+        broker,
+        max_queue: int = 256,
+        heartbeat_interval: float = 25.0,
+        client_timeout: Optional[float] = None
+    ):
+        self.broker = broker
+        self.hub = BroadcastHub(max_queue=max_queue, policy=SlowConsumerPolicy.DISCONNECT)
+        self.heartbeat_interval = heartbeat_interval
+        self.client_timeout = client_timeout
+        self.events_relayed = 0
+        self.events_delivered = 0
+        self._connections: Set[LiveConnection] = set()
+        self._listener: Optional[asyncio.Task] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Listen for events published by every worker."""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self.broker.listen(self._deliver))
+            self._heartbeat = asyncio.create_task(self._send_heartbeats())
+            await asyncio.sleep(0)
+
+    async def stop(self) -> None:
+        for task in (self._heartbeat, self._listener):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._heartbeat = None
+        self._listener = None
+        await self.hub.close()
+        self._connections.clear()
+
+    async def attach(self, event_bus) -> None:
+        """Relay events emitted on a domain event bus (e.g. shared.event_bus.InMemoryEventBus)."""
+        await event_bus.subscribe("*", self.relay)
+
+    async def relay(self, event) -> None:
+        """EventBus handler: forward a user's event to every worker."""
+        user_id = getattr(event, "user_id", None)
+        if not user_id:
+            return
+        message = {"user_id": user_id, "event_type": event.event_type, "event": event_payload(event)}
+        self.events_relayed += 1
+        if self._listener is None:
+            # Not subscribed: deliver locally so this worker's clients still get it
+            self._deliver(message)
+        try:
+            await self.broker.publish(message)
+        except Exception as e:
+            logger.error(f"Failed to relay {event.event_type} for user {user_id}: {e}")
+
+    async def connect(self, websocket, user_id: int) -> LiveConnection:
+        """Accept a client and stream all of the user's events until it filters them."""
+        subscriber = await self.hub.connect(websocket, topics=[user_topic(user_id)])
+        connection = LiveConnection(user_id, subscriber)
+        self._connections.add(connection)
+        self.hub.send(subscriber, {"type": "connected", "user_id": user_id, "event_types": []})
+        return connection
+
+    async def disconnect(self, connection: LiveConnection) -> None:
+        self._connections.discard(connection)
+        await self.hub.disconnect(connection.subscriber)
+
+    async def receive(self, connection: LiveConnection) -> str:
+        """Next client message; raises asyncio.TimeoutError after ``client_timeout`` of silence."""
+        if self.client_timeout is None:
+            return await connection.websocket.receive_text()
+        return await asyncio.wait_for(connection.websocket.receive_text(), self.client_timeout)
+
+    def handle_client_message(self, connection: LiveConnection, message: str) -> None:
+        """Apply a client's subscribe/unsubscribe/ping message and queue the reply."""
+        try:
+            request = json.loads(message)
+            action = request["action"]
+            event_types = {str(event_type) for event_type in request.get("event_types") or []}
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self.hub.send(connection.subscriber, {"type": "error", "message": "Invalid message"})
+            return
+
+        if action == "ping":
+            self.hub.send(connection.subscriber, {"type": "pong"})
+            return
+        if action == "subscribe":
+            self._set_filters(connection, connection.event_types | event_types)
+        elif action == "unsubscribe":
+            self._set_filters(connection, connection.event_types - event_types)
+        else:
+            self.hub.send(connection.subscriber, {"type": "error", "message": f"Unknown action: {action}"})
+            return
+        self.hub.send(connection.subscriber, {
+            "type": "subscriptions",
+            "event_types": sorted(connection.event_types)
+        })
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self._connections),
+            "events_relayed": self.events_relayed,
+            "events_delivered": self.events_delivered,
+            "hub": self.hub.get_stats()
+        }
+
+    def _set_filters(self, connection: LiveConnection, event_types: Iterable[str]) -> None:
+        self.hub.unsubscribe(connection.subscriber, connection.topics())
+        connection.event_types = set(event_types)
+        self.hub.subscribe(connection.subscriber, connection.topics())
+
+    def _deliver(self, message: Dict[str, Any]) -> None:
+        user_id = message["user_id"]
+        frame = encode_frame({"type": "event", "event_type": message["event_type"], "data": message["event"]})
+        self.events_delivered += self.hub.publish(user_topic(user_id), frame)
+        self.events_delivered += self.hub.publish(user_topic(user_id, message["event_type"]), frame)
+
+    async def _send_heartbeats(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            for connection in list(self._connections):
+                self.hub.send(connection.subscriber, HEARTBEAT)
+
+
+_live_events: Optional[LiveEventRelay] = None
+
+
+def get_live_events() -> LiveEventRelay:
+    """Shared live event relay (FastAPI dependency)."""
+    global _live_events
+    if _live_events is None:
+        from ..core.config import settings
+        from ..core.tiered_cache import LocalInvalidationBroker, RedisInvalidationBroker
+
+        if settings.redis_url:
+            import redis.asyncio as redis
+            broker = RedisInvalidationBroker(redis.from_url(settings.redis_url), channel=LIVE_CHANNEL)
+        else:
+            broker = LocalInvalidationBroker()
+        _live_events = LiveEventRelay(broker)
+    return _live_events
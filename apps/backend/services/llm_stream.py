@@ -0,0 +1,145 @@
+"""
+LLM Response Streaming
+Server-sent event parsing for streamed chat completions, and incremental
+extraction of a JSON answer's fields while it is still being generated.
+
+Groq (like the OpenAI API it mirrors) streams a completion as SSE
+``data:`` lines, each a JSON chunk whose ``choices[0].delta.content`` is
+the next piece of text, ending with ``data: [DONE]``. iter_sse_events turns
+the response lines into chunks and chunk_text pulls the text out of them.
+
+JSONFieldStream is fed those pieces of text and reports each top-level
+field of the answer object as soon as its value is complete, so a client
+can show the recommended action before the reasoning has been written.
+Text before the opening brace (such as a Markdown code fence) is skipped.
+"""
+
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+
+import orjson
+
+# Fields of a streamed trading recommendation, in the order the prompt asks for them
+RECOMMENDATION_FIELDS = ("action", "confidence", "market_assessment", "risk_evaluation", "reasoning")
+
+
+async def iter_sse_events(lines: AsyncIterable[str]) -> AsyncIterator[Dict[str, Any]]:
+    """JSON payloads of the SSE events in ``lines``, up to ``[DONE]``."""
+    data: List[str] = []
+    async for line in lines:
+        line = line.rstrip("\r")
+        if line:
+            if line.startswith(":"):
+                continue
+            name, _, value = line.partition(":")
+            if name == "data":
+                data.append(value[1:] if value.startswith(" ") else value)
+            continue
+        if not data:
+            continue
+        payload, data = "\n".join(data), []
+        if payload == "[DONE]":
+            return
+        yield json.loads(payload)
+    if data and "\n".join(data) != "[DONE]":
+        yield json.loads("\n".join(data))
+
+
+def chunk_text(chunk: Dict[str, Any]) -> str:
+    """Text added by a streamed completion chunk."""
+    choices = chunk.get("choices") or ()
+    if not choices:
+        return ""
+    return (choices[0].get("delta") or {}).get("content") or ""
+
+
+def chunk_usage(chunk: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Token usage, carried by the last chunk (under ``x_groq`` on Groq)."""
+    return (chunk.get("x_groq") or {}).get("usage") or chunk.get("usage")
+
+
+def format_sse(data: Dict[str, Any], event: Optional[str] = None) -> bytes:
+    """One server-sent event for a client."""
+    prefix = f"event: {event}\n".encode() if event else b""
+    return prefix + b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+class JSONFieldStream:
+    """Top-level fields of a streamed JSON object, reported as each value completes."""
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+        self._buffer = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        return self._buffer
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Add text; returns the (name, value) fields it completed."""
+        self._buffer += chunk
+        completed: List[Tuple[str, Any]] = []
+        buffer = self._buffer
+        while self._position < len(buffer) and not self.complete:
+            i = self._position
+            char = buffer[i]
+            self._position += 1
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._value_start is None:
+                        self._key = json.loads(buffer[self._string_start:i + 1])
+                continue
+
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_value(buffer[self._value_start:i] if self._value_start is not None else "", completed)
+                    self.complete = True
+            elif self._depth == 1:
+                if char == ":" and self._key is not None:
+                    self._value_start = i + 1
+                elif char == "," and self._value_start is not None:
+                    self._finish_value(buffer[self._value_start:i], completed)
+        return completed
+
+    def _finish_value(self, raw: str, completed: List[Tuple[str, Any]]) -> None:
+        key, self._key, self._value_start = self._key, None, None
+        if key is None or not raw.strip():
+            return
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        self.fields[key] = value
+        completed.append((key, value))
+
+
+def parse_fields(text: str) -> Dict[str, Any]:
+    """Top-level fields of a complete (possibly fenced) JSON answer."""
+    stream = JSONFieldStream()
+    stream.feed(text)
+    return stream.fields
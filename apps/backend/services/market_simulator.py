@@ -0,0 +1,344 @@
+"""
+Market Simulator
+Deterministic synthetic prices for the mock trading path and load tests.
+
+Each asset follows a jump-diffusion (geometric Brownian motion plus
+Poisson-arrival log-normal jumps) with its own volatility. Price paths are
+generated in NumPy batches of ``batch_steps`` steps; every batch draws
+from its own generator seeded by (seed, symbol, batch), so a path depends
+only on the seed and the asset, never on the order in which callers read
+it. Batches are cached (LRU) and regenerated on demand.
+
+Batches are chained through a coarse path with one draw per batch (its
+total log return), generated in blocks of ``batch_steps`` batches. A batch
+is bridged from its start to its end on the coarse path, so reaching a
+moment months after the start of the path costs a few block draws instead
+of generating every batch before it.
+
+All readers share one SimulationClock, so every mock trade, ticker and
+candle at the same simulated moment sees the same price. The clock counts
+wall-clock seconds since SIMULATION_EPOCH (optionally sped up), so every
+worker process reads the same price at the same moment and prices carry on
+across restarts. For tests and load tests it only moves when advanced.
+
+LatencyModel replaces fixed ``asyncio.sleep`` calls in mock execution
+with a seedable distribution, which is zero by default for load tests.
+"""
+
+import asyncio
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+# Unix time at which simulated time (and every price path) starts: 2026-01-01 UTC
+SIMULATION_EPOCH = 1_767_225_600.0
+
+# Appended to the generator entropy of coarse blocks, beyond any batch number
+_COARSE_BLOCK_TAG = 2 ** 32 - 1
+
+
+@dataclass(frozen=True)
+class AssetModel:
+    """Jump-diffusion parameters of one asset (annualized)."""
+    symbol: str
+    initial_price: float
+    volatility: float
+    drift: float = 0.0
+    jumps_per_year: float = 0.0
+    jump_mean: float = 0.0
+    jump_std: float = 0.0
+
+
+DEFAULT_ASSETS = (
+    AssetModel("BTCUSD", 43250.0, volatility=0.55, jumps_per_year=12, jump_mean=-0.01, jump_std=0.04),
+    AssetModel("ETHUSD", 2580.0, volatility=0.70, jumps_per_year=12, jump_mean=-0.01, jump_std=0.05),
+    AssetModel("SOLUSD", 98.5, volatility=0.95, jumps_per_year=20, jump_mean=-0.01, jump_std=0.07),
+    AssetModel("ADAUSD", 0.485, volatility=0.85, jumps_per_year=15, jump_mean=-0.01, jump_std=0.06),
+    AssetModel("MATICUSD", 0.952, volatility=0.90, jumps_per_year=15, jump_mean=-0.01, jump_std=0.06),
+    AssetModel("LINKUSD", 14.75, volatility=0.85, jumps_per_year=15, jump_mean=-0.01, jump_std=0.06),
+)
+
+# Assets nobody configured trade around 100 with crypto-like volatility
+DEFAULT_PRICE = 100.0
+DEFAULT_VOLATILITY = 0.8
+
+
+def normalize_symbol(symbol: str) -> str:
+    """'BTC-USD', 'btc/usd' and 'BTCUSD' are the same asset."""
+    return symbol.replace("-", "").replace("/", "").replace("_", "").upper()
+
+
+class SimulationClock:
+    """
+    Simulated seconds since ``epoch`` (Unix time), offset by ``start``.
+
+    A running clock is derived from the wall clock alone, so processes with
+    the same settings agree on the simulated moment. A manual clock starts
+    at ``start`` and only moves when advanced.
+    """
+
+    def __init__(self, start: float = 0.0, speed: float = 1.0, manual: bool = False, epoch: float = SIMULATION_EPOCH):
+        self.speed = speed
+        self.manual = manual
+        self.epoch = epoch
+        self._start = start
+        self._manual_now = start
+
+    def now(self) -> float:
+        if self.manual:
+            return self._manual_now
+        return self._start + (time.time() - self.epoch) * self.speed
+
+    def advance(self, seconds: float) -> float:
+        """Move a manual clock forward."""
+        if not self.manual:
+            raise RuntimeError("Only a manual clock can be advanced")
+        self._manual_now += seconds
+        return self._manual_now
+
+    def wall_time(self, at: float) -> float:
+        """Unix time of a simulated moment (for timestamps shown to clients)."""
+        return self.epoch + (at - self._start) / self.speed
+
+
+class _AssetPath:
+    """Lazily generated price path of one asset."""
+
+    def __init__(self, model: AssetModel, seed: int, step_seconds: float, batch_steps: int, cache_batches: int):
+        self.model = model
+        self.batch_steps = batch_steps
+        self.cache_batches = cache_batches
+        self._entropy = (seed, zlib.crc32(model.symbol.encode()))
+        dt = step_seconds / SECONDS_PER_YEAR
+        self._drift = (model.drift - 0.5 * model.volatility ** 2) * dt
+        self._diffusion = model.volatility * np.sqrt(dt)
+        self._jump_rate = model.jumps_per_year * dt
+        # Log price at the start of every coarse block generated so far
+        self._block_starts: List[float] = [float(np.log(model.initial_price))]
+        # Cumulative batch totals of recently used blocks, from 0
+        self._blocks: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._batches: "OrderedDict[int, np.ndarray]" = OrderedDict()
+
+    def price(self, step: int) -> float:
+        batch, offset = divmod(step, self.batch_steps)
+        return float(self._batch(batch)[offset])
+
+    def prices(self, steps: np.ndarray) -> np.ndarray:
+        steps = np.asarray(steps, dtype=np.int64)
+        batch_index, offset = np.divmod(steps, self.batch_steps)
+        # Group the steps by batch with one sort instead of a mask per batch
+        order = np.argsort(batch_index, kind="stable")
+        batches, first = np.unique(batch_index[order], return_index=True)
+        bounds = np.r_[first, len(steps)]
+        prices = np.empty(steps.shape)
+        for i, batch in enumerate(batches.tolist()):
+            selected = order[bounds[i]:bounds[i + 1]]
+            prices[selected] = self._batch(batch)[offset[selected]]
+        return prices
+
+    def _batch(self, batch: int) -> np.ndarray:
+        cached = self._batches.get(batch)
+        if cached is not None:
+            self._batches.move_to_end(batch)
+            return cached
+        return self._generate(batch)
+
+    def _generate(self, batch: int) -> np.ndarray:
+        block, offset = divmod(batch, self.batch_steps)
+        totals = self._block(block)
+        start = self._block_starts[block] + totals[offset]
+        # Bridge the batch so it ends where the coarse path says it does
+        steps = np.cumsum(self._log_returns(batch))
+        steps -= (steps[-1] - (totals[offset + 1] - totals[offset])) * np.linspace(0.0, 1.0, self.batch_steps)
+        prices = np.exp(start + steps)
+        self._batches[batch] = prices
+        if len(self._batches) > self.cache_batches:
+            self._batches.popitem(last=False)
+        return prices
+
+    def _block(self, block: int) -> np.ndarray:
+        cached = self._blocks.get(block)
+        if cached is not None:
+            self._blocks.move_to_end(block)
+            return cached
+        # Later blocks start where the earlier ones ended
+        while len(self._block_starts) <= block:
+            previous = len(self._block_starts) - 1
+            self._block_starts.append(self._block_starts[previous] + float(self._block_totals(previous)[-1]))
+        totals = self._block_totals(block)
+        self._blocks[block] = totals
+        if len(self._blocks) > 4:
+            self._blocks.popitem(last=False)
+        return totals
+
+    def _block_totals(self, block: int) -> np.ndarray:
+        """Cumulative log return at each batch boundary of a block, starting at 0."""
+        rng = np.random.default_rng(np.random.SeedSequence(self._entropy + (_COARSE_BLOCK_TAG, block)))
+        steps = self.batch_steps
+        totals = steps * self._drift + np.sqrt(steps) * self._diffusion * rng.standard_normal(steps)
+        if self._jump_rate > 0:
+            jumps = rng.poisson(self._jump_rate * steps, steps)
+            totals += jumps * self.model.jump_mean + np.sqrt(jumps) * self.model.jump_std * rng.standard_normal(steps)
+        return np.r_[0.0, np.cumsum(totals)]
+
+    def _log_returns(self, batch: int) -> np.ndarray:
+        rng = np.random.default_rng(np.random.SeedSequence(self._entropy + (batch,)))
+        log_returns = self._drift + self._diffusion * rng.standard_normal(self.batch_steps)
+        if self._jump_rate > 0:
+            jumps = rng.poisson(self._jump_rate, self.batch_steps)
+            hit = jumps > 0
+            log_returns[hit] += (
+                jumps[hit] * self.model.jump_mean
+                + np.sqrt(jumps[hit]) * self.model.jump_std * rng.standard_normal(int(hit.sum()))
+            )
+        # The first step of the first batch is the initial price itself
+        if batch == 0:
+            log_returns[0] = 0.0
+        return log_returns
+
+
+class MarketSimulator:
+    """Seedable jump-diffusion prices for every asset on one shared clock."""
+
+    def __init__(
+        self,
+        assets: Iterable[AssetModel] = DEFAULT_ASSETS,
+        seed: int = 0,
+        clock: Optional[SimulationClock] = None,
+        step_seconds: float = 1.0,
+        batch_steps: int = 4096,
+        cache_batches: int = 64
+    ):
+        self.seed = seed
+        self.clock = clock or SimulationClock()
+        self.step_seconds = step_seconds
+        self.batch_steps = batch_steps
+        self.cache_batches = cache_batches
+        self._paths: Dict[str, _AssetPath] = {}
+        for model in assets:
+            self.add_asset(model)
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._paths)
+
+    def add_asset(self, model: AssetModel) -> None:
+        model = AssetModel(**{**model.__dict__, "symbol": normalize_symbol(model.symbol)})
+        self._paths[model.symbol] = _AssetPath(
+            model, self.seed, self.step_seconds, self.batch_steps, self.cache_batches
+        )
+
+    def step_at(self, at: Optional[float] = None) -> int:
+        at = self.clock.now() if at is None else at
+        return max(0, int(at // self.step_seconds))
+
+    def price(self, symbol: str, at: Optional[float] = None) -> float:
+        """Price of ``symbol`` at simulated time ``at`` (now by default)."""
+        return self._path(symbol).price(self.step_at(at))
+
+    def prices(self, symbols: Optional[Iterable[str]] = None, at: Optional[float] = None) -> Dict[str, float]:
+        step = self.step_at(at)
+        symbols = self.symbols if symbols is None else symbols
+        return {symbol: self._path(symbol).price(step) for symbol in symbols}
+
+    def path(self, symbol: str, start: float, end: float) -> np.ndarray:
+        """Prices of every step in [start, end) of simulated time."""
+        return self._path(symbol).prices(np.arange(self.step_at(start), self.step_at(end)))
+
+    def ohlc(self, symbol: str, start: float, end: float, bar_seconds: float) -> np.ndarray:
+        """
+        Bars of ``bar_seconds`` over [start, end) as (timestamp, open, high,
+        low, close, volume) rows, timestamps in simulated seconds.
+
+        Volume is not simulated and is zero.
+        """
+        per_bar = max(1, int(bar_seconds // self.step_seconds))
+        prices = self.path(symbol, start, end)
+        bars = len(prices) // per_bar
+        grid = prices[:bars * per_bar].reshape(bars, per_bar)
+        timestamps = self.step_at(start) * self.step_seconds + np.arange(bars) * per_bar * self.step_seconds
+        return np.column_stack((
+            timestamps, grid[:, 0], grid.max(axis=1), grid.min(axis=1), grid[:, -1], np.zeros(bars)
+        ))
+
+    def _path(self, symbol: str) -> _AssetPath:
+        symbol = normalize_symbol(symbol)
+        path = self._paths.get(symbol)
+        if path is None:
+            self.add_asset(AssetModel(symbol, DEFAULT_PRICE, DEFAULT_VOLATILITY))
+            path = self._paths[symbol]
+        return path
+
+
+class LatencyModel:
+    """
+    Simulated execution latency: ``minimum`` plus a log-normal tail with
+    the given median and shape. The default is no latency at all.
+    """
+
+    def __init__(self, minimum: float = 0.0, median: float = 0.0, sigma: float = 0.5, seed: Optional[int] = None):
+        self.minimum = minimum
+        self.median = median
+        self.sigma = sigma
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def fixed(cls, seconds: float) -> "LatencyModel":
+        return cls(minimum=seconds)
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return self.minimum
+        return self.minimum + float(self.median * np.exp(self.sigma * self._rng.standard_normal()))
+
+    async def wait(self) -> None:
+        delay = self.sample()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class SimulatedExchangeClient:
+    """Exchange client (domains.trading.services.ExchangeClient) filling orders from the simulator."""
+
+    def __init__(self, simulator: MarketSimulator, latency: Optional[LatencyModel] = None, spread_pct: float = 0.0002):
+        self.simulator = simulator
+        self.latency = latency or LatencyModel()
+        self.spread_pct = spread_pct
+        self._orders = 0
+
+    async def place_order(
+        self,
+        symbol: str,
+        side: str,
+        amount: Decimal,
+        leverage: Optional[Decimal] = None
+    ) -> Dict[str, Any]:
+        await self.latency.wait()
+        price = self.simulator.price(symbol)
+        price *= 1 + self.spread_pct if side in ("long", "buy") else 1 - self.spread_pct
+        self._orders += 1
+        return {"price": Decimal(str(round(price, 8))), "order_id": f"SIM-{self._orders}"}
+
+    async def get_current_price(self, symbol: str) -> Decimal:
+        return Decimal(str(round(self.simulator.price(symbol), 8)))
+
+    async def get_trades(self, start_time: int, end_time: int, limit: int = 1000) -> Dict[str, Any]:
+        return {"trades": []}
+
+
+_market_simulator: Optional[MarketSimulator] = None
+
+
+def get_market_simulator() -> MarketSimulator:
+    """Shared simulator: every mock path reads prices from the same clock."""
+    global _market_simulator
+    if _market_simulator is None:
+        _market_simulator = MarketSimulator()
+    return _market_simulator
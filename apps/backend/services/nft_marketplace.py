@@ -0,0 +1,333 @@
+"""
+NFT Marketplace Order Book
+Listing store for NFTs traded on the marketplace.
+
+Listings are rows in marketplace_listings. Each composite index starts with
+the filter columns (status, currency, and optionally rarity or achievement
+type), followed by the sort key and id, so a filtered, sorted page is an
+index range scan. Pages use keyset pagination: the cursor holds the
+(sort key, id) of the last row returned, and the next page seeks past it.
+A page therefore costs O(log n + page) at any depth, instead of scanning
+and discarding every skipped row as OFFSET does.
+
+Buying and unlisting are conditional UPDATEs of the listing row
+(``WHERE status = 'active'``). The database serialises concurrent attempts
+on that row and only one of them matches, so a listing cannot be sold twice
+or sold after it was cancelled. The buyer debit, seller credit and ownership
+transfer are guarded the same way and commit in the same transaction as the
+status change.
+"""
+
+import base64
+import binascii
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import tuple_, update
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = "active"
+SOLD = "sold"
+CANCELLED = "cancelled"
+
+MARKETPLACE_FEE_RATE = 0.025
+RARITY_RANKS = {"common": 1, "rare": 2, "epic": 3, "legendary": 4}
+FEATURED_RARITY_RANK = RARITY_RANKS["epic"]
+SORT_KEYS = ("price", "listed_at", "rarity")
+
+
+class MarketplaceError(Exception):
+    """A marketplace operation that cannot be completed."""
+    status_code = 400
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        self.message = message
+        if status_code is not None:
+            self.status_code = status_code
+        super().__init__(self.message)
+
+
+class ListingNotFound(MarketplaceError):
+    status_code = 404
+
+
+class ListingUnavailable(MarketplaceError):
+    """The listing was sold, cancelled or already exists (a lost race)."""
+    status_code = 409
+
+
+class InsufficientBalance(MarketplaceError):
+    status_code = 400
+
+
+class InvalidCursor(MarketplaceError):
+    status_code = 400
+
+
+@dataclass
+class ListingRow:
+    """An active listing with its seller's public details."""
+    listing: Any  # MarketplaceListing
+    seller_username: str
+    seller_wallet: Optional[str]
+
+
+@dataclass
+class ListingPage:
+    rows: List[ListingRow]
+    next_cursor: Optional[str]
+
+
+@dataclass
+class CompletedSale:
+    listing_id: int
+    artifact_id: int
+    seller_id: int
+    buyer_id: int
+    price: float
+    currency: str
+    fee: float
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, listing_id: int) -> str:
+    """Opaque cursor pointing just past (value, listing_id) in the given ordering."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort_by, "o": sort_order, "v": value, "id": listing_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, int]:
+    """(sort value, listing id) of a cursor issued for the same ordering."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != sort_by or payload["o"] != sort_order:
+            raise InvalidCursor("Cursor was issued for a different sort order")
+        value, listing_id = payload["v"], int(payload["id"])
+        if sort_by == "listed_at":
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, (int, float)):
+            raise InvalidCursor("Invalid cursor")
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    return value, listing_id
+
+
+def rarity_rank(rarity: str) -> int:
+    return RARITY_RANKS.get(rarity, 0)
+
+
+def query_listings(
+    db,
+    currency: str,
+    rarity: Optional[str] = None,
+    achievement_type: Optional[str] = None,
+    seller_id: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort_by: str = "listed_at",
+    sort_order: str = "desc",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    skip: int = 0
+) -> ListingPage:
+    """
+    One page of active listings.
+
+    Pass ``cursor`` (the previous page's ``next_cursor``) to continue a
+    listing. ``skip`` is an OFFSET and is only kept for older clients.
+    """
+    from ..core.database import User
+    from ..models.game_models import MarketplaceListing
+
+    sort_columns = {
+        "price": MarketplaceListing.price,
+        "listed_at": MarketplaceListing.listed_at,
+        "rarity": MarketplaceListing.rarity_rank,
+    }
+    key = sort_columns[sort_by]
+
+    query = db.query(MarketplaceListing, User.username, User.wallet_address).join(
+        User, User.id == MarketplaceListing.seller_id
+    ).filter(
+        MarketplaceListing.status == ACTIVE,
+        MarketplaceListing.currency == currency
+    )
+    if rarity:
+        query = query.filter(MarketplaceListing.rarity == rarity)
+    if achievement_type:
+        query = query.filter(MarketplaceListing.achievement_type == achievement_type)
+    if seller_id is not None:
+        query = query.filter(MarketplaceListing.seller_id == seller_id)
+    if min_price is not None:
+        query = query.filter(MarketplaceListing.price >= min_price)
+    if max_price is not None:
+        query = query.filter(MarketplaceListing.price <= max_price)
+
+    # Ties on the sort key are broken by id so the ordering is total
+    position = tuple_(key, MarketplaceListing.id)
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by, sort_order)
+        after = tuple_(value, last_id)
+        query = query.filter(position < after if sort_order == "desc" else position > after)
+    if sort_order == "desc":
+        query = query.order_by(key.desc(), MarketplaceListing.id.desc())
+    else:
+        query = query.order_by(key.asc(), MarketplaceListing.id.asc())
+    if skip and not cursor:
+        query = query.offset(skip)
+
+    # One extra row tells us whether another page exists
+    results = query.limit(limit + 1).all()
+    rows = [ListingRow(listing, username, wallet) for listing, username, wallet in results[:limit]]
+
+    next_cursor = None
+    if len(results) > limit:
+        last = rows[-1].listing
+        next_cursor = encode_cursor(sort_by, sort_order, getattr(last, key.key), last.id)
+    return ListingPage(rows=rows, next_cursor=next_cursor)
+
+
+def create_listing(db, seller_id: int, artifact_id: int, price: float, currency: str):
+    """List an artifact owned by ``seller_id``. Returns the new MarketplaceListing."""
+    from ..models.game_models import Artifact, MarketplaceListing
+
+    artifact = db.query(Artifact).filter(
+        Artifact.id == artifact_id,
+        Artifact.user_id == seller_id
+    ).first()
+    if not artifact:
+        raise ListingNotFound("NFT not found or not owned by user")
+
+    listing = MarketplaceListing(
+        artifact_id=artifact.id,
+        seller_id=seller_id,
+        price=price,
+        currency=currency,
+        rarity=artifact.rarity,
+        rarity_rank=rarity_rank(artifact.rarity),
+        achievement_type=artifact.artifact_type.replace("genesis_", ""),
+        status=ACTIVE,
+        listed_at=datetime.utcnow()
+    )
+    db.add(listing)
+    try:
+        db.commit()
+    except IntegrityError:
+        # The partial unique index allows one active listing per artifact
+        db.rollback()
+        raise ListingUnavailable("NFT is already listed")
+    db.refresh(listing)
+    return listing
+
+
+def buy_listing(db, listing_id: int, buyer_id: int, fee_rate: float = MARKETPLACE_FEE_RATE) -> CompletedSale:
+    """Buy an active listing; the purchase commits as a whole or not at all."""
+    from ..models.game_models import Artifact, MarketplaceListing, UserGameStats
+
+    try:
+        # Claim the listing: of concurrent buyers, only one matches status = 'active'
+        claimed = db.execute(
+            update(MarketplaceListing)
+            .where(
+                MarketplaceListing.id == listing_id,
+                MarketplaceListing.status == ACTIVE,
+                MarketplaceListing.seller_id != buyer_id
+            )
+            .values(status=SOLD, buyer_id=buyer_id, closed_at=datetime.utcnow())
+            .returning(
+                MarketplaceListing.artifact_id,
+                MarketplaceListing.seller_id,
+                MarketplaceListing.price,
+                MarketplaceListing.currency
+            )
+        ).first()
+        if claimed is None:
+            db.rollback()
+            _raise_unclaimable(db, listing_id, buyer_id)
+        artifact_id, seller_id, price, currency = claimed
+
+        balance = getattr(UserGameStats, currency)
+        debited = db.execute(
+            update(UserGameStats)
+            .where(UserGameStats.user_id == buyer_id, balance >= price)
+            .values({balance: balance - price})
+        ).rowcount
+        if debited != 1:
+            db.rollback()
+            raise InsufficientBalance("Insufficient balance to purchase this NFT")
+
+        fee = round(price * fee_rate, 2)
+        credited = db.execute(
+            update(UserGameStats)
+            .where(UserGameStats.user_id == seller_id)
+            .values({balance: balance + (price - fee)})
+        ).rowcount
+        if credited != 1:
+            logger.warning(f"Seller {seller_id} of listing {listing_id} has no game stats to credit")
+
+        transferred = db.execute(
+            update(Artifact)
+            .where(Artifact.id == artifact_id, Artifact.user_id == seller_id)
+            .values(user_id=buyer_id, is_equipped=False, equipped_at=None)
+        ).rowcount
+        if transferred != 1:
+            db.rollback()
+            raise ListingUnavailable("NFT is no longer owned by the seller")
+
+        db.commit()
+    except MarketplaceError:
+        raise
+    except Exception:
+        db.rollback()
+        raise
+
+    return CompletedSale(
+        listing_id=listing_id,
+        artifact_id=artifact_id,
+        seller_id=seller_id,
+        buyer_id=buyer_id,
+        price=price,
+        currency=currency,
+        fee=fee
+    )
+
+
+def cancel_listing(db, listing_id: int, seller_id: int) -> None:
+    """Cancel the seller's active listing."""
+    from ..models.game_models import MarketplaceListing
+
+    cancelled = db.execute(
+        update(MarketplaceListing)
+        .where(
+            MarketplaceListing.id == listing_id,
+            MarketplaceListing.seller_id == seller_id,
+            MarketplaceListing.status == ACTIVE
+        )
+        .values(status=CANCELLED, closed_at=datetime.utcnow())
+    ).rowcount
+    if cancelled != 1:
+        db.rollback()
+        listing = db.get(MarketplaceListing, listing_id)
+        if listing is None or listing.seller_id != seller_id:
+            raise ListingNotFound("Listing not found")
+        raise ListingUnavailable(f"Listing is already {listing.status}")
+    db.commit()
+
+
+def _raise_unclaimable(db, listing_id: int, buyer_id: int) -> None:
+    """Explain why a listing could not be claimed by ``buyer_id``."""
+    from ..models.game_models import MarketplaceListing
+
+    listing = db.get(MarketplaceListing, listing_id)
+    if listing is None:
+        raise ListingNotFound("Listing not found")
+    if listing.seller_id == buyer_id:
+        raise MarketplaceError("Cannot buy your own listing")
+    raise ListingUnavailable(f"Listing is already {listing.status}")
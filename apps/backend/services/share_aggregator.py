@@ -0,0 +1,412 @@
+"""
+Share Counter Aggregation
+Write-behind buffering of viral content shares.
+
+Shares are counted in memory per content ID and platform. A background task
+flushes them to the database in batches, so a popular meme costs one row
+update per flush instead of one locked read-modify-write per share.
+
+Every share is appended to a write-ahead log before it is acknowledged, and
+the log is replayed on startup, so buffered counts survive a crash. Appends
+are made durable by group commit: one fsync, run in a worker thread, covers
+every record appended while the previous fsync was in flight, so the event
+loop never blocks on the disk and a burst of shares costs a few fsyncs. Each
+worker writes its own log segments and holds a lock on an owner file. A
+worker that starts up adopts the segments of owners that are no longer
+running. Delivery is at-least-once: if a crash lands between a flush commit
+and log truncation, that batch is replayed.
+
+Counts that have not been flushed yet are available from ``pending()``, so
+endpoints can add them to database rows. This gives the sharer
+read-your-writes before the next flush.
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import IO, Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from uuid import uuid4
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .genesis_eligibility import VIRAL_HIT_SCORE, get_genesis_eligibility
+
+logger = logging.getLogger(__name__)
+
+POINTS_PER_SHARE = 10
+
+
+@dataclass
+class PendingShares:
+    """Unflushed shares of one content item."""
+    shares: int = 0
+    platforms: Dict[str, int] = field(default_factory=dict)
+    last_shared_at: float = 0.0
+
+    def add(self, platforms: Iterable[str], at: float) -> None:
+        for platform in platforms:
+            self.platforms[platform] = self.platforms.get(platform, 0) + 1
+            self.shares += 1
+        self.last_shared_at = max(self.last_shared_at, at)
+
+    def merge(self, other: "PendingShares") -> None:
+        self.shares += other.shares
+        for platform, count in other.platforms.items():
+            self.platforms[platform] = self.platforms.get(platform, 0) + count
+        self.last_shared_at = max(self.last_shared_at, other.last_shared_at)
+
+
+class ShareWAL:
+    """Segmented append-only log of share events for one worker, with group commit."""
+
+    def __init__(self, directory: str, fsync: bool = True):
+        self.directory = directory
+        self.fsync = fsync
+        self.owner = uuid4().hex
+        os.makedirs(directory, exist_ok=True)
+
+        self._owner_lock = open(self._owner_path(self.owner), "w")
+        if fcntl is not None:
+            fcntl.flock(self._owner_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        self.segment = 0
+        self._truncated = 0
+        self._file = None
+        self._adopted: List[str] = []
+        self._adopted_locks: List[IO] = []
+        self._open_segment()
+
+        # Group commit state: records appended / known durable, descriptors
+        # of rotated segments that still need an fsync, and the fsync in flight
+        self._appended = 0
+        self._synced = 0
+        self._unsynced: List[int] = []
+        self._sync_task: Optional[asyncio.Task] = None
+        self.syncs = 0
+
+    def append(self, content_id: int, platforms: List[str], at: float) -> None:
+        """Write a record to the OS; ``sync()`` makes it durable."""
+        self._file.write(json.dumps({"content_id": content_id, "platforms": platforms, "at": at}) + "\n")
+        self._file.flush()
+        self._appended += 1
+
+    async def sync(self) -> None:
+        """Wait until every record appended so far is on disk."""
+        if not self.fsync:
+            return
+        target = self._appended
+        while self._synced < target:
+            if self._sync_task is None:
+                self._sync_task = asyncio.create_task(self._group_commit())
+            await asyncio.shield(self._sync_task)
+
+    async def _group_commit(self) -> None:
+        try:
+            appended = self._appended
+            # Duplicated descriptors stay valid if the segment is rotated meanwhile
+            descriptors, self._unsynced = self._unsynced + [os.dup(self._file.fileno())], []
+            await asyncio.to_thread(_fsync_all, descriptors)
+            self._synced = max(self._synced, appended)
+            self.syncs += 1
+        finally:
+            self._sync_task = None
+
+    def recover(self) -> Iterable[dict]:
+        """Records left by workers that are no longer running (adopted by this one)."""
+        for owner_path in glob.glob(os.path.join(self.directory, "owner-*.lock")):
+            owner = os.path.basename(owner_path)[len("owner-"):-len(".lock")]
+            if owner == self.owner:
+                continue
+            handle = self._claim_owner(owner_path)
+            if handle is None:
+                continue
+            # Keep the dead owner's lock so no other worker adopts the same segments
+            self._adopted_locks.append(handle)
+            segments = sorted(glob.glob(os.path.join(self.directory, f"{owner}-*.log")))
+            for path in segments:
+                yield from self._read_segment(path)
+            self._adopted.extend(segments)
+            self._adopted.append(owner_path)
+
+    def rotate(self) -> int:
+        """Start a new segment, returning the number of the closed one."""
+        closed = self.segment
+        if self.fsync:
+            # Its tail is synced by the next group commit
+            self._unsynced.append(os.dup(self._file.fileno()))
+        self._file.close()
+        self._open_segment()
+        return closed
+
+    def truncate(self, up_to: int) -> None:
+        """Delete segments (and adopted logs) whose records have been flushed."""
+        for segment in range(self._truncated + 1, up_to + 1):
+            self._remove(self._segment_path(segment))
+        self._truncated = max(self._truncated, up_to)
+        for path in self._adopted:
+            self._remove(path)
+        for handle in self._adopted_locks:
+            handle.close()
+        self._adopted = []
+        self._adopted_locks = []
+
+    def close(self) -> None:
+        """Close the log, removing it entirely if everything has been flushed."""
+        empty = self._file.tell() == 0
+        self._file.close()
+        for descriptor in self._unsynced:
+            os.close(descriptor)
+        self._unsynced = []
+        if empty and self._truncated == self.segment - 1 and not self._adopted:
+            self._remove(self._segment_path(self.segment))
+            self._remove(self._owner_path(self.owner))
+        for handle in self._adopted_locks:
+            handle.close()
+        self._owner_lock.close()
+
+    def _open_segment(self) -> None:
+        self.segment += 1
+        self._file = open(self._segment_path(self.segment), "a")
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{self.owner}-{segment:08d}.log")
+
+    def _owner_path(self, owner: str) -> str:
+        return os.path.join(self.directory, f"owner-{owner}.lock")
+
+    @staticmethod
+    def _claim_owner(owner_path: str) -> Optional[IO]:
+        """Lock the owner file of a worker that is no longer running, or None if it is alive."""
+        try:
+            handle = open(owner_path)
+        except FileNotFoundError:
+            # Adopted and cleaned up by another worker
+            return None
+        if fcntl is None:
+            # Without file locks only a single worker may use the directory
+            return handle
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return None
+        return handle
+
+    @staticmethod
+    def _read_segment(path: str) -> Iterable[dict]:
+        with open(path) as handle:
+            for line in handle:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final write from the crash; the share was never acknowledged
+                    logger.warning(f"Skipping incomplete share log record in {path}")
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _fsync_all(descriptors: List[int]) -> None:
+    try:
+        for descriptor in descriptors:
+            os.fsync(descriptor)
+    finally:
+        for descriptor in descriptors:
+            os.close(descriptor)
+
+
+class ShareAggregator:
+    """Buffers shares per content item and flushes them in batches."""
+
+    def __init__(
+        self,
+        writer: Callable[[Dict[int, PendingShares]], Any],
+        wal: Optional[ShareWAL] = None,
+        flush_interval: float = 2.0,
+        on_flush: Optional[Callable[[Any], Awaitable[None]]] = None
+    ):
+        self.writer = writer
+        self.wal = wal
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self._pending: Dict[int, PendingShares] = {}
+        self._flushing: Dict[int, PendingShares] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.shares_recorded = 0
+        self.shares_flushed = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+
+        if self.wal is not None:
+            recovered = 0
+            for record in self.wal.recover():
+                self._buffer(record["content_id"], record["platforms"], record["at"])
+                recovered += 1
+            if recovered:
+                logger.info(f"Recovered {recovered} unflushed share events from the write-ahead log")
+
+    async def record(self, content_id: int, platforms: List[str], at: Optional[float] = None) -> PendingShares:
+        """Durably log and buffer shares; returns the content item's pending counts."""
+        at = time.time() if at is None else at
+        if self.wal is not None:
+            self.wal.append(content_id, platforms, at)
+        # Buffer before waiting for the fsync: a flush that rotates the log
+        # meanwhile must take these shares along with the segment it truncates
+        self._buffer(content_id, platforms, at)
+        self.shares_recorded += len(platforms)
+        if self.wal is not None:
+            await self.wal.sync()
+        return self.pending(content_id)
+
+    def pending(self, content_id: int) -> PendingShares:
+        """Shares not yet visible in the database (buffered or mid-flush)."""
+        combined = PendingShares()
+        for source in (self._flushing, self._pending):
+            if content_id in source:
+                combined.merge(source[content_id])
+        return combined
+
+    async def flush(self) -> int:
+        """Write buffered shares to the database. Returns the number of shares flushed."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            segment = self.wal.rotate() if self.wal is not None else 0
+            self._flushing = batch
+            try:
+                result = await asyncio.to_thread(self.writer, batch)
+            except Exception as e:
+                # Put the batch back; its log segments are kept until a flush succeeds
+                for content_id, shares in batch.items():
+                    self._pending.setdefault(content_id, PendingShares()).merge(shares)
+                self.failed_flushes += 1
+                logger.error(f"Failed to flush {len(batch)} share counters: {e}")
+                return 0
+            finally:
+                self._flushing = {}
+
+            if self.wal is not None:
+                self.wal.truncate(segment)
+            flushed = sum(shares.shares for shares in batch.values())
+            self.shares_flushed += flushed
+            self.flushes += 1
+
+            if self.on_flush is not None:
+                try:
+                    await self.on_flush(result)
+                except Exception as e:
+                    logger.error(f"Share flush hook failed: {e}")
+            return flushed
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and flush what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self.wal is not None:
+            self.wal.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "pending_items": len(self._pending),
+            "pending_shares": sum(shares.shares for shares in self._pending.values()),
+            "shares_recorded": self.shares_recorded,
+            "shares_flushed": self.shares_flushed,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes
+        }
+
+    def _buffer(self, content_id: int, platforms: List[str], at: float) -> None:
+        self._pending.setdefault(content_id, PendingShares()).add(platforms, at)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+def write_share_batch(session_factory, batch: Dict[int, PendingShares]) -> List[int]:
+    """
+    Apply a batch of share counts to ViralContent rows in one transaction.
+
+    Returns the owner of every content item whose viral score crossed the
+    Genesis viral hit threshold in this batch (one entry per item).
+    """
+    from ..models.game_models import ViralContent
+
+    crossed: List[int] = []
+    db = session_factory()
+    try:
+        rows = db.query(ViralContent).filter(
+            ViralContent.id.in_(list(batch))
+        ).with_for_update().all()
+
+        for content in rows:
+            shares = batch[content.id]
+            platform_shares = dict(content.platform_shares or {})
+            for platform, count in shares.platforms.items():
+                platform_shares[platform] = platform_shares.get(platform, 0) + count
+
+            content.platform_shares = platform_shares
+            content.share_count = (content.share_count or 0) + shares.shares
+            previous_score = content.viral_score or 0
+            content.viral_score = previous_score + shares.shares * POINTS_PER_SHARE
+            if previous_score < VIRAL_HIT_SCORE <= content.viral_score:
+                crossed.append(content.user_id)
+            content.last_shared_at = max(
+                content.last_shared_at or datetime.min,
+                datetime.utcfromtimestamp(shares.last_shared_at)
+            )
+            hours_elapsed = max(1, (content.last_shared_at - content.created_at).total_seconds() / 3600)
+            content.engagement_rate = content.share_count / hours_elapsed
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return crossed
+
+
+_share_aggregator: Optional[ShareAggregator] = None
+
+
+def get_share_aggregator() -> ShareAggregator:
+    """Shared share counter aggregator (FastAPI dependency)."""
+    global _share_aggregator
+    if _share_aggregator is None:
+        from ..core.config import settings
+        from ..core.database import SessionLocal
+
+        wal = ShareWAL(settings.share_wal_dir) if settings.share_wal_dir else None
+        _share_aggregator = ShareAggregator(
+            lambda batch: write_share_batch(SessionLocal, batch),
+            wal=wal,
+            flush_interval=settings.share_flush_interval,
+            on_flush=get_genesis_eligibility().record_viral_hits
+        )
+    return _share_aggregator
@@ -0,0 +1,278 @@
+"""
+Trading Domain Runtime
+Composition root for the trading domain inside the API process.
+
+Owns the domain event bus that TradingDomainService publishes on, builds
+TradingDomainService over an async session (repositories/ trade, portfolio
+and outbox repositories in one unit of work, orders filled by the market
+simulator), and starts/stops the domain's background consumers with the
+app:
+
+- CopyTradingEngine mirrors leader trades (TradeExecutedEvent) into their
+  followers' accounts. Follows and balances are read on a fresh session per
+  call; each copy order runs on its own TradingDomainService and session.
+  Its dedupe and daily-limit state is keyed in Redis when ``redis_url`` is
+  set.
+- StarknetOutboxWorker delivers the outbox rows TradingDomainService writes
+  with each trade. It needs a Starknet chain; without one it is not started
+  and messages stay pending in the outbox until it is.
+
+Both need ``async_database_url``; without it neither is started. The
+Genesis eligibility engine is subscribed to TradeExecutedEvent regardless,
+so its snapshots count the trades executed here.
+
+With ``event_store_path`` set, every event on the bus is also appended to a
+SQLiteEventStore there, keyed by trade (or clan battle) as its aggregate, so
+a trade's history can be replayed and audited after a restart. The append
+is synchronous in emit(); WAL mode without fsync per commit keeps it short.
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, Optional, Set
+
+from fastapi import HTTPException
+
+from ..domains.shared.event_bus import InMemoryEventBus
+from ..domains.trading.copy_trading import (
+    CopyOrder,
+    CopyRiskLimits,
+    CopyTradingEngine,
+    CopyTradingState,
+    TradingServiceCopySubmitter,
+)
+from ..domains.trading.outbox import StarknetOutboxWorker
+from ..domains.trading.services import TRADING_EVENT_TYPES, TradingDomainService
+from ..domains.trading.value_objects import Asset, AssetCategory, RiskParameters
+
+logger = logging.getLogger(__name__)
+
+
+def _resolve_asset(symbol: str) -> Asset:
+    # Trade events carry only the symbol; copies trade it as a crypto asset
+    return Asset(symbol=symbol, name=symbol, category=AssetCategory.CRYPTO)
+
+
+class _SessionPerCall:
+    """Repository proxy running every call on a fresh session, for long-lived consumers."""
+
+    def __init__(self, session_factory: Callable[[], Any], repository_class: type):
+        self._session_factory = session_factory
+        self._repository_class = repository_class
+
+    def __getattr__(self, name: str):
+        async def call(*args, **kwargs):
+            async with self._session_factory() as session:
+                return await getattr(self._repository_class(session), name)(*args, **kwargs)
+        return call
+
+
+class TradingDomainRuntime:
+    """Domain event bus plus the trading domain's services and background consumers."""
+
+    def __init__(
+        self,
+        event_bus: InMemoryEventBus,
+        session_factory: Optional[Callable[[], Any]] = None,
+        exchange_client=None,
+        starknet_client=None,
+        ai_service=None,
+        redis_client=None,
+        mock_latency=None,
+        copy_limits: Optional[CopyRiskLimits] = None,
+        outbox_poll_interval: float = 1.0,
+        genesis_eligibility=None,
+        event_store=None
+    ):
+        self.event_bus = event_bus
+        self.session_factory = session_factory
+        self.exchange_client = exchange_client
+        self.starknet_client = starknet_client
+        self.ai_service = ai_service
+        self.redis_client = redis_client
+        self.mock_latency = mock_latency
+        self.copy_limits = copy_limits or CopyRiskLimits()
+        self.outbox_poll_interval = outbox_poll_interval
+        self.genesis_eligibility = genesis_eligibility
+        # Store the event bus persists to, closed with the bus
+        self.event_store = event_store
+        self.copy_trading: Optional[CopyTradingEngine] = None
+        self.outbox_worker: Optional[StarknetOutboxWorker] = None
+        self._worker_session = None
+        # Sessions of copy orders, closed once their post-trade stage is done
+        self._closing_sessions: Set[asyncio.Task] = set()
+
+    def trading_service(self, session) -> TradingDomainService:
+        """TradingDomainService whose repositories share ``session`` in one unit of work"""
+        from ..repositories.outbox_repository import OutboxRepository
+        from ..repositories.portfolio_repository import PortfolioRepository
+        from ..repositories.trade_repository import TradeRepository
+        from ..repositories.unit_of_work import SqlAlchemyUnitOfWork
+
+        unit_of_work = SqlAlchemyUnitOfWork(session)
+        return TradingDomainService(
+            trade_repository=TradeRepository(session, unit_of_work),
+            portfolio_repository=PortfolioRepository(session),
+            exchange_client=self.exchange_client,
+            starknet_client=self.starknet_client,
+            ai_analysis_service=self.ai_service,
+            event_bus=self.event_bus,
+            outbox=OutboxRepository(session),
+            unit_of_work=unit_of_work,
+            mock_latency=self.mock_latency
+        )
+
+    @asynccontextmanager
+    async def trading_service_session(self) -> AsyncIterator[TradingDomainService]:
+        """TradingDomainService on a fresh session, closed on exit"""
+        async with self.session_factory() as session:
+            yield self.trading_service(session)
+
+    async def start(self):
+        """Subscribe event consumers, start copy trading and, when it can deliver, the outbox worker."""
+        if self.genesis_eligibility is not None:
+            await self.genesis_eligibility.register_event_handlers(self.event_bus)
+
+        if self.session_factory is None:
+            logger.warning("Copy trading and Starknet outbox worker not started: async database not configured")
+            return
+
+        await self._start_copy_trading()
+
+        if self.starknet_client is None:
+            logger.warning("Starknet outbox worker not started: Starknet chain not configured")
+            return
+
+        from ..repositories.outbox_repository import OutboxRepository
+
+        self._worker_session = self.session_factory()
+        self.outbox_worker = StarknetOutboxWorker(
+            OutboxRepository(self._worker_session),
+            self.starknet_client,
+            poll_interval=self.outbox_poll_interval
+        )
+        await self.outbox_worker.start()
+
+    async def stop(self):
+        """Finish in-flight fan-outs, stop the consumers, then close the event bus."""
+        # Lifespan shutdown runs after the server stopped taking requests
+        await self.event_bus.drain()
+        if self._closing_sessions:
+            await asyncio.gather(*list(self._closing_sessions), return_exceptions=True)
+        if self.copy_trading is not None:
+            await self.copy_trading.stop(self.event_bus)
+            self.copy_trading = None
+        if self.outbox_worker is not None:
+            await self.outbox_worker.stop()
+            self.outbox_worker = None
+        if self._worker_session is not None:
+            await self._worker_session.close()
+            self._worker_session = None
+        await self.event_bus.close()
+        if self.event_store is not None:
+            self.event_store.close()
+
+    async def _start_copy_trading(self):
+        from ..repositories.copy_follow_repository import CopyFollowRepository
+        from ..repositories.portfolio_repository import PortfolioRepository
+
+        self.copy_trading = CopyTradingEngine(
+            follows=_SessionPerCall(self.session_factory, CopyFollowRepository),
+            balances=_SessionPerCall(self.session_factory, PortfolioRepository),
+            submit=self._submit_copy,
+            limits=self.copy_limits,
+            state=CopyTradingState(self.redis_client)
+        )
+        await self.copy_trading.start(self.event_bus)
+
+    async def _submit_copy(self, order: CopyOrder) -> str:
+        """Execute one copy order on its own session and TradingDomainService"""
+        session = self.session_factory()
+        service = self.trading_service(session)
+        submit = TradingServiceCopySubmitter(
+            service,
+            _resolve_asset,
+            RiskParameters(
+                max_position_pct=self.copy_limits.max_position_pct,
+                stop_loss_pct=Decimal("2"),
+                take_profit_pct=Decimal("6")
+            ),
+            # Followers' exchange accounts are not linked: copies are
+            # simulator-filled paper trades
+            is_mock=True
+        )
+        try:
+            return await submit(order)
+        finally:
+            # Not awaited here: the post-trade stage emits the copy's
+            # TradeExecutedEvent, which queues behind this fan-out
+            self._close_after_post_trade(service, session)
+
+    def _close_after_post_trade(self, service: TradingDomainService, session) -> None:
+        async def close():
+            try:
+                await service.wait_for_post_trade()
+            finally:
+                await session.close()
+
+        task = asyncio.create_task(close())
+        self._closing_sessions.add(task)
+        task.add_done_callback(self._closing_sessions.discard)
+
+
+_trading_domain: Optional[TradingDomainRuntime] = None
+
+
+def get_trading_domain() -> TradingDomainRuntime:
+    """Shared trading domain runtime."""
+    global _trading_domain
+    if _trading_domain is None:
+        from ..core.config import settings
+        from ..core.database import get_async_sessionmaker
+        from ..domains.shared.event_store import SQLiteEventStore
+        from .genesis_eligibility import get_genesis_eligibility
+        from .groq_service import groq_service
+        from .market_simulator import LatencyModel, SimulatedExchangeClient, get_market_simulator
+
+        redis_client = None
+        if settings.redis_url:
+            import redis.asyncio as redis
+            redis_client = redis.from_url(settings.redis_url)
+
+        event_store = None
+        if settings.event_store_path:
+            os.makedirs(os.path.dirname(settings.event_store_path) or ".", exist_ok=True)
+            event_store = SQLiteEventStore(settings.event_store_path, event_types=TRADING_EVENT_TYPES)
+
+        # Roughly the 0.5-2.0s of a real fill, as in TradingService
+        latency = LatencyModel(minimum=0.5, median=0.4)
+        _trading_domain = TradingDomainRuntime(
+            InMemoryEventBus(event_store=event_store),
+            session_factory=get_async_sessionmaker(),
+            exchange_client=SimulatedExchangeClient(get_market_simulator(), latency=latency),
+            # There is no RPC-backed MulticallChain yet: outbox rows stay pending
+            starknet_client=None,
+            ai_service=groq_service,
+            redis_client=redis_client,
+            mock_latency=latency.wait,
+            genesis_eligibility=get_genesis_eligibility(),
+            event_store=event_store
+        )
+    return _trading_domain
+
+
+def get_trading_domain_runtime() -> TradingDomainRuntime:
+    """Shared runtime, or 503 without an async database (FastAPI dependency).
+
+    Routes open their session with ``runtime.trading_service_session()``
+    where they use it: a streamed response's body runs after yield
+    dependencies are torn down, so a session yielded by a dependency would
+    already be closed.
+    """
+    runtime = get_trading_domain()
+    if runtime.session_factory is None:
+        raise HTTPException(status_code=503, detail="Trading is not available: async database not configured")
+    return runtime
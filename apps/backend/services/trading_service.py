@@ -1,5 +1,4 @@
 from typing import Optional, Dict, Any
-import asyncio
 from datetime import datetime, timedelta
 import random
 from decimal import Decimal
@@ -11,6 +10,10 @@ from external.starknet_client import StarknetClient
 from core.events import EventBus, TradeExecutedEvent
 from models.trade import Trade, TradeStatus
 from schemas.trade import TradeRequest, TradeResult
+from services.market_simulator import LatencyModel, MarketSimulator, get_market_simulator
+
+# Mock trades are closed this long (simulated seconds) after they open
+MOCK_HOLDING_SECONDS = 3600
 
 class TradingService:
     def __init__(
@@ -19,13 +22,18 @@ class TradingService:
         trade_repo: TradeRepository,
         exchange_client: ExchangeClient,
         starknet_client: StarknetClient,
-        event_bus: EventBus
+        event_bus: EventBus,
+        market_simulator: Optional[MarketSimulator] = None,
+        mock_latency: Optional[LatencyModel] = None
     ):
         self.user_repo = user_repo
         self.trade_repo = trade_repo
         self.exchange_client = exchange_client
         self.starknet_client = starknet_client
         self.event_bus = event_bus
+        self.market_simulator = market_simulator or get_market_simulator()
+        # Roughly the 0.5-2.0s of a real fill; LatencyModel() makes mock trades instant
+        self.mock_latency = mock_latency or LatencyModel(minimum=0.5, median=0.4)
         
     async def execute_trade(
         self,
@@ -136,10 +144,12 @@ class TradingService:
     async def _execute_mock_trade(self, request):
         """Execute a mock trade with realistic simulation"""
         # Simulate execution delay
-        await asyncio.sleep(random.uniform(0.5, 2.0))
+        await self.mock_latency.wait()
         
-        # Generate realistic price movement
-        base_price = await self._get_mock_price(request.asset)
+        # Fill at the simulated market price; the position closes at the
+        # price MOCK_HOLDING_SECONDS later on the same path
+        opened_at = self.market_simulator.clock.now()
+        base_price = self.market_simulator.price(request.asset, at=opened_at)
         spread = base_price * 0.0002  # 0.02% spread
         
         if request.direction == 'long':
@@ -147,13 +157,7 @@ class TradingService:
         else:
             executed_price = base_price - spread
         
-        # Simulate profit/loss based on market conditions
-        market_movement = random.gauss(0, 0.02)  # 2% std dev
-        
-        if request.direction == 'long':
-            exit_price = executed_price * (1 + market_movement)
-        else:
-            exit_price = executed_price * (1 - market_movement)
+        exit_price = self.market_simulator.price(request.asset, at=opened_at + MOCK_HOLDING_SECONDS)
         
         profit_percentage = ((exit_price - executed_price) / executed_price) * 100
         if request.direction == 'short':
@@ -276,12 +280,7 @@ class TradingService:
     
     async def _get_mock_price(self, asset: str) -> float:
         """Get mock price for asset"""
-        prices = {
-            'BTC-USD': 65000.0,
-            'ETH-USD': 3500.0,
-            'SOL-USD': 150.0,
-        }
-        return prices.get(asset, 100.0)
+        return self.market_simulator.price(asset)
     
     async def _get_user_starknet_address(self, user_id: int) -> str:
         """Get user's Starknet address"""
@@ -0,0 +1,364 @@
+"""
+Trending Content Index
+Time-decayed ranking of viral content for social proof.
+
+Every share adds points to a content item's score, and scores decay
+exponentially with a configurable half-life. Decay uses the forward-decay
+trick: a share at time t is stored as points * 2^((t - epoch) / half_life).
+Older entries therefore never need rescoring, and ordering by the stored
+value equals ordering by the decayed score at any moment. The epoch is
+rebased before the stored values grow too large.
+
+The index keeps a sorted view, so trending top-K is amortized O(K): the
+scan skips entries that have left the window and drops them, so each is
+skipped once. Momentum (the decayed activity across all content) and
+shares in the last 24 hours are kept as running aggregates. Entries whose
+decayed score drops below min_score, or that fall outside the window, are
+pruned. When the index outgrows max_entries it is cut back to a low
+watermark below the cap, so the O(n) prune runs once per many new
+entries rather than on every share.
+
+Each worker keeps its own index. Shares are broadcast over pub/sub
+(TrendingShareFeed), so every worker applies every share, and each worker
+warms its index from the database at startup; until ``loaded`` is set,
+readers warm it themselves.
+"""
+
+import asyncio
+import bisect
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SHARE_CHANNEL = "astratrade:trending:shares"
+SECONDS_PER_HOUR = 3600
+
+
+@dataclass
+class TrendingEntry:
+    """A content item in the trending index."""
+    content_id: int
+    score: float  # Decayed score at read time
+    last_shared_at: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class TrendingIndex:
+    """Exponentially decayed trending index with amortized O(K) top-K reads."""
+
+    def __init__(
+        self,
+        half_life_hours: float = 6.0,
+        window_days: float = 7.0,
+        points_per_share: float = 10.0,
+        min_score: float = 0.1,
+        max_entries: int = 10000,
+        max_exponent: float = 50.0,
+        low_watermark: float = 0.9
+    ):
+        self.half_life = half_life_hours * SECONDS_PER_HOUR
+        self.window = window_days * 24 * SECONDS_PER_HOUR
+        self.points_per_share = points_per_share
+        self.min_score = min_score
+        self.max_entries = max_entries
+        self.max_exponent = max_exponent
+        self.low_watermark = low_watermark
+
+        self._epoch: Optional[float] = None
+        self._stored: Dict[int, float] = {}
+        self._order: List[Tuple[float, int]] = []  # (-stored, content_id)
+        self._last_shared: Dict[int, float] = {}
+        self._metadata: Dict[int, Dict[str, Any]] = {}
+        self._total_stored = 0.0
+        self._hourly_shares: Deque[List[int]] = deque()  # [hour, shares]
+        self.loaded = False
+
+    def record_share(
+        self,
+        content_id: int,
+        shares: int = 1,
+        metadata: Optional[Dict[str, Any]] = None,
+        at: Optional[float] = None
+    ) -> None:
+        """Apply ``shares`` new shares of a content item."""
+        at = time.time() if at is None else at
+        self._add_points(content_id, shares * self.points_per_share, at)
+        self._last_shared[content_id] = max(at, self._last_shared.get(content_id, at))
+        if metadata:
+            self._metadata.setdefault(content_id, {}).update(metadata)
+        self._count_hourly(shares, at)
+        if len(self._stored) > self.max_entries:
+            self.prune(at)
+
+    def load(self, rows: Iterable[Tuple[int, float, float, Dict[str, Any]]], now: Optional[float] = None) -> int:
+        """Warm the index from (content_id, points, last_shared_at, metadata) rows."""
+        count = 0
+        for content_id, points, last_shared_at, metadata in rows:
+            self._add_points(content_id, points, last_shared_at)
+            self._last_shared[content_id] = last_shared_at
+            self._metadata[content_id] = dict(metadata)
+            count += 1
+        self.prune(now)
+        self.loaded = True
+        return count
+
+    def empty_copy(self) -> "TrendingIndex":
+        """A new, empty index with the same settings."""
+        return TrendingIndex(
+            half_life_hours=self.half_life / SECONDS_PER_HOUR,
+            window_days=self.window / (24 * SECONDS_PER_HOUR),
+            points_per_share=self.points_per_share,
+            min_score=self.min_score,
+            max_entries=self.max_entries,
+            max_exponent=self.max_exponent,
+            low_watermark=self.low_watermark
+        )
+
+    def top(self, k: int, now: Optional[float] = None) -> List[TrendingEntry]:
+        """
+        Top-K content by decayed score.
+
+        Out-of-window entries met on the way are dropped, so a scan costs
+        O(K + entries expired since the last read).
+        """
+        now = time.time() if now is None else now
+        decay = self._decay_factor(now)
+        cutoff = now - self.window
+        entries = []
+        expired = []
+        for neg_stored, content_id in self._order:
+            if len(entries) == k:
+                break
+            if self._last_shared[content_id] < cutoff:
+                expired.append(content_id)
+                continue
+            entries.append(TrendingEntry(
+                content_id=content_id,
+                score=-neg_stored * decay,
+                last_shared_at=self._last_shared[content_id],
+                metadata=self._metadata.get(content_id, {})
+            ))
+        for content_id in expired:
+            self._remove(content_id)
+        return entries
+
+    def momentum(self, now: Optional[float] = None) -> float:
+        """Decayed activity across all content, scaled to 0-100."""
+        now = time.time() if now is None else now
+        return min(100.0, self._total_stored * self._decay_factor(now) / 100)
+
+    def shares_last_24h(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        current_hour = int(now // SECONDS_PER_HOUR)
+        return sum(count for hour, count in self._hourly_shares if hour > current_hour - 24)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Drop entries outside the window or below min_score; past max_entries, trim to the low watermark."""
+        now = time.time() if now is None else now
+        if self._epoch is None:
+            return 0
+        threshold = self.min_score / self._decay_factor(now)
+        cutoff = now - self.window
+
+        keep = [
+            (neg_stored, content_id) for neg_stored, content_id in self._order
+            if -neg_stored >= threshold and self._last_shared[content_id] >= cutoff
+        ]
+        if len(keep) > self.max_entries:
+            keep = keep[:int(self.max_entries * self.low_watermark)]
+        removed = len(self._order) - len(keep)
+        if removed:
+            kept_ids = {content_id for _, content_id in keep}
+            for content_id in [c for c in self._stored if c not in kept_ids]:
+                del self._stored[content_id]
+                self._last_shared.pop(content_id, None)
+                self._metadata.pop(content_id, None)
+            self._order = keep
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._stored)
+
+    def _remove(self, content_id: int) -> None:
+        stored = self._stored.pop(content_id)
+        del self._order[bisect.bisect_left(self._order, (-stored, content_id))]
+        self._last_shared.pop(content_id, None)
+        self._metadata.pop(content_id, None)
+
+    def _add_points(self, content_id: int, points: float, at: float) -> None:
+        if self._epoch is None:
+            self._epoch = at
+        if (at - self._epoch) / self.half_life > self.max_exponent:
+            self._rebase(at)
+
+        weighted = points * math.pow(2.0, (at - self._epoch) / self.half_life)
+        previous = self._stored.get(content_id)
+        if previous is not None:
+            del self._order[bisect.bisect_left(self._order, (-previous, content_id))]
+        stored = (previous or 0.0) + weighted
+        self._stored[content_id] = stored
+        bisect.insort(self._order, (-stored, content_id))
+        self._total_stored += weighted
+
+    def _rebase(self, new_epoch: float) -> None:
+        """Move the epoch forward, scaling stored values (order is unchanged)."""
+        factor = math.pow(2.0, -(new_epoch - self._epoch) / self.half_life)
+        self._stored = {content_id: stored * factor for content_id, stored in self._stored.items()}
+        self._order = [(neg_stored * factor, content_id) for neg_stored, content_id in self._order]
+        self._total_stored *= factor
+        self._epoch = new_epoch
+
+    def _decay_factor(self, now: float) -> float:
+        if self._epoch is None:
+            return 0.0
+        return math.pow(2.0, -(now - self._epoch) / self.half_life)
+
+    def _count_hourly(self, shares: int, at: float) -> None:
+        hour = int(at // SECONDS_PER_HOUR)
+        if self._hourly_shares and self._hourly_shares[-1][0] == hour:
+            self._hourly_shares[-1][1] += shares
+        else:
+            self._hourly_shares.append([hour, shares])
+        while self._hourly_shares and self._hourly_shares[0][0] <= hour - 24:
+            self._hourly_shares.popleft()
+
+
+class TrendingShareFeed:
+    """Broadcasts shares so every worker's TrendingIndex applies them."""
+
+    def __init__(self, index: TrendingIndex, broker):
+        self.index = index
+        self.broker = broker
+        self._listener: Optional[asyncio.Task] = None
+        self._warmer: Optional[asyncio.Task] = None
+        self._warming: Optional[List[Dict[str, Any]]] = None
+
+    async def start(self, session_factory=None) -> None:
+        """Subscribe to shares and, given a session factory, warm the index in the background."""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self.broker.listen(self._apply))
+            await asyncio.sleep(0)
+        if session_factory is not None and self._warmer is None and not self.index.loaded:
+            self._warmer = asyncio.create_task(self.warm(session_factory))
+
+    async def stop(self) -> None:
+        for task in (self._warmer, self._listener):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._warmer = None
+        self._listener = None
+
+    async def ensure_loaded(self, session_factory) -> None:
+        """Warm the index unless it is loaded, joining a warm already in flight."""
+        if self.index.loaded:
+            return
+        if self._warmer is None or self._warmer.done():
+            self._warmer = asyncio.create_task(self.warm(session_factory))
+        await asyncio.shield(self._warmer)
+
+    async def warm(self, session_factory) -> int:
+        """
+        Build the index from the last week of public content in a worker thread.
+
+        Shares that arrive meanwhile are held back and applied to the new
+        index before it replaces the current one.
+        """
+        self._warming = []
+        index = self.index.empty_copy()
+        try:
+            count = await asyncio.to_thread(index.load, _recent_content_rows(session_factory))
+            for message in self._warming:
+                self._apply_to(index, message)
+            self.index = index
+            logger.info(f"Trending index warmed with {count} content items")
+            return count
+        except Exception as e:
+            logger.error(f"Failed to warm trending index: {e}")
+            raise
+        finally:
+            self._warming = None
+
+    async def publish_share(self, content_id: int, shares: int, metadata: Dict[str, Any]) -> None:
+        """Record a share on every worker (including this one, via the feed)."""
+        message = {"content_id": content_id, "shares": shares, "metadata": metadata, "at": time.time()}
+        if self._listener is None:
+            # Not subscribed: apply locally so this worker stays current
+            self._apply(message)
+        try:
+            await self.broker.publish(message)
+        except Exception as e:
+            logger.error(f"Failed to broadcast share of content {content_id}: {e}")
+
+    def _apply(self, message: Dict[str, Any]) -> None:
+        if self._warming is not None:
+            self._warming.append(message)
+        self._apply_to(self.index, message)
+
+    @staticmethod
+    def _apply_to(index: TrendingIndex, message: Dict[str, Any]) -> None:
+        index.record_share(
+            message["content_id"],
+            shares=message["shares"],
+            metadata=message.get("metadata"),
+            at=message.get("at")
+        )
+
+
+def trending_metadata(content) -> Dict[str, Any]:
+    """Fields served with a trending entry (from a ViralContent row)."""
+    return {
+        "title": content.content_title,
+        "share_count": content.share_count,
+        "content_type": content.content_type,
+        "is_listed": bool(content.is_public and content.moderation_status == "approved")
+    }
+
+
+def _recent_content_rows(session_factory) -> Iterable[Tuple[int, float, float, Dict[str, Any]]]:
+    from ..models.game_models import ViralContent
+
+    db = session_factory()
+    try:
+        query = db.query(ViralContent).filter(
+            ViralContent.is_public == True,
+            ViralContent.moderation_status == "approved",
+            ViralContent.last_shared_at >= datetime.utcnow() - timedelta(days=7)
+        ).yield_per(5000)
+        for content in query:
+            yield (
+                content.id,
+                float(content.viral_score or 0),
+                content.last_shared_at.replace(tzinfo=timezone.utc).timestamp(),
+                trending_metadata(content)
+            )
+    finally:
+        db.close()
+
+
+_trending_feed: Optional[TrendingShareFeed] = None
+
+
+def get_trending_feed() -> TrendingShareFeed:
+    """Shared trending index and share feed (FastAPI dependency)."""
+    global _trending_feed
+    if _trending_feed is None:
+        from ..core.config import settings
+        from ..core.tiered_cache import LocalInvalidationBroker, RedisInvalidationBroker
+
+        if settings.redis_url:
+            import redis.asyncio as redis
+            broker = RedisInvalidationBroker(redis.from_url(settings.redis_url), channel=SHARE_CHANNEL)
+        else:
+            broker = LocalInvalidationBroker()
+        _trending_feed = TrendingShareFeed(TrendingIndex(), broker)
+    return _trending_feed
@@ -0,0 +1 @@
+# This file makes the unit/api directory a Python package.
@@ -0,0 +1,47 @@
+import os
+import unittest
+
+# Only the engine is created at import time; no connection is opened
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from ....api.v1.trading.nft_integration import BatchMintItemRequest, BatchMintRequest, router
+
+
+class TestNFTIntegrationRoutes(unittest.TestCase):
+    """Smoke test that the NFT router imports and registers its routes"""
+
+    def _routes(self):
+        return [(method, route.path) for route in router.routes for method in sorted(route.methods)]
+
+    def test_routes_are_registered(self):
+        routes = self._routes()
+
+        for route in [
+            ("POST", "/nft/genesis/mint"),
+            ("POST", "/nft/genesis/mint/batch"),
+            ("GET", "/nft/genesis/mint/batch/{job_id}"),
+            ("GET", "/nft/genesis/collection/{user_id}"),
+            ("GET", "/nft/marketplace"),
+            ("POST", "/nft/share/{nft_id}"),
+        ]:
+            self.assertIn(route, routes)
+
+    def test_each_route_has_one_handler(self):
+        routes = self._routes()
+        self.assertEqual(len(routes), len(set(routes)))
+
+        names = [route.name for route in router.routes]
+        self.assertEqual(len(names), len(set(names)))
+
+    def test_batch_mint_request_validates_achievement_type(self):
+        request = BatchMintRequest(items=[{"user_id": 1, "achievement_type": "first_trade"}])
+        self.assertEqual(request.items[0].achievement_type, "first_trade")
+
+        with self.assertRaises(ValueError):
+            BatchMintItemRequest(user_id=1, achievement_type="unknown")
+        with self.assertRaises(ValueError):
+            BatchMintRequest(items=[])
+
+
+if __name__ == "__main__":
+    unittest.main()
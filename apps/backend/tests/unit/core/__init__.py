@@ -0,0 +1 @@
+# This file makes the unit/core directory a Python package.
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import time
+import unittest
+
+from core.broadcast_hub import ALL_TOPICS, BroadcastHub, SlowConsumerPolicy
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.sent = []
+        self.accepted = False
+        self.close_code = None
+        self.unblocked = asyncio.Event()
+        self.unblocked.set()
+
+    async def accept(self):
+        self.accepted = True
+
+    async def send_text(self, data):
+        await self.unblocked.wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("socket closed")
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        await self.send_text(data)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+async def _flush():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestBroadcastHub(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.hub = BroadcastHub(max_queue=4)
+
+    async def asyncTearDown(self):
+        await self.hub.close()
+
+    async def test_topic_subscriptions(self):
+        btc = await self.hub.connect(FakeWebSocket(), topics=["BTCUSD"])
+        everything = await self.hub.connect(FakeWebSocket())
+
+        self.assertEqual(self.hub.publish("BTCUSD", {"p": 1}), 2)
+        self.assertEqual(self.hub.publish("ETHUSD", {"p": 2}), 1)
+        await _flush()
+
+        self.assertTrue(btc.websocket.accepted)
+        self.assertEqual(btc.websocket.sent, ['{"p":1}'])
+        self.assertEqual(everything.websocket.sent, ['{"p":1}', '{"p":2}'])
+
+    async def test_subscriber_of_topic_and_wildcard_gets_one_copy(self):
+        subscriber = await self.hub.connect(FakeWebSocket(), topics=[ALL_TOPICS, "BTCUSD"])
+
+        self.assertEqual(self.hub.publish("BTCUSD", "x"), 1)
+        await _flush()
+        self.assertEqual(subscriber.websocket.sent, ["x"])
+
+    async def test_message_is_serialized_once(self):
+        first = await self.hub.connect(FakeWebSocket())
+        second = await self.hub.connect(FakeWebSocket())
+
+        self.hub.publish("BTCUSD", {"p": 1})
+
+        self.assertIs(first._queue[0], second._queue[0])
+
+    async def test_slow_consumer_does_not_delay_others(self):
+        slow = await self.hub.connect(FakeWebSocket())
+        slow.websocket.unblocked.clear()
+        fast = await self.hub.connect(FakeWebSocket())
+
+        for i in range(10):
+            self.hub.publish("BTCUSD", str(i))
+            await _flush()
+
+        self.assertEqual(fast.websocket.sent, [str(i) for i in range(10)])
+        # Drop-oldest keeps the newest frames queued for the stalled client
+        self.assertEqual(list(slow._queue), ["6", "7", "8", "9"])
+        self.assertEqual(slow.frames_dropped, 5)
+
+    async def test_drop_new_policy(self):
+        subscriber = await self.hub.connect(FakeWebSocket(), policy=SlowConsumerPolicy.DROP_NEW)
+        subscriber.websocket.unblocked.clear()
+
+        for i in range(10):
+            self.hub.publish("BTCUSD", str(i))
+        await _flush()
+
+        # "0" is stuck in the writer's send; the rest of the full queue is kept
+        self.assertEqual(list(subscriber._queue), ["1", "2", "3"])
+
+    async def test_disconnect_policy_closes_slow_consumer(self):
+        subscriber = await self.hub.connect(FakeWebSocket(), policy=SlowConsumerPolicy.DISCONNECT)
+        subscriber.websocket.unblocked.clear()
+
+        for i in range(10):
+            self.hub.publish("BTCUSD", str(i))
+        await asyncio.sleep(0.01)
+
+        self.assertTrue(subscriber.closed)
+        self.assertEqual(subscriber.websocket.close_code, 1008)
+        self.assertEqual(len(self.hub), 0)
+        self.assertEqual(self.hub.metrics.slow_disconnects, 1)
+
+    async def test_send_timeout_disconnects(self):
+        hub = BroadcastHub(send_timeout=0.01)
+        subscriber = await hub.connect(FakeWebSocket())
+        subscriber.websocket.unblocked.clear()
+
+        hub.publish("BTCUSD", "x")
+        await asyncio.sleep(0.05)
+
+        self.assertTrue(subscriber.closed)
+        self.assertEqual(len(hub), 0)
+
+    async def test_failed_send_removes_connection(self):
+        broken = await self.hub.connect(FakeWebSocket(fail=True))
+        healthy = await self.hub.connect(FakeWebSocket())
+
+        self.hub.publish("BTCUSD", "x")
+        await _flush()
+
+        self.assertTrue(broken.closed)
+        self.assertEqual(healthy.websocket.sent, ["x"])
+        self.assertEqual(self.hub.metrics.send_errors, 1)
+
+    async def test_personal_messages_keep_order(self):
+        subscriber = await self.hub.connect(FakeWebSocket())
+
+        self.hub.send(subscriber, "welcome")
+        self.hub.publish("BTCUSD", "tick")
+        await _flush()
+
+        self.assertEqual(subscriber.websocket.sent, ["welcome", "tick"])
+
+    async def test_10k_connections(self):
+        # Debug mode records a traceback for every task; measure the production path
+        asyncio.get_running_loop().set_debug(False)
+        subscribers = [
+            await self.hub.connect(FakeWebSocket(), topics=[f"S{i % 6}"]) for i in range(10_000)
+        ]
+
+        started = time.perf_counter()
+        for i in range(6):
+            self.hub.publish(f"S{i}", json.dumps({"symbol": f"S{i}"}))
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(self.hub.metrics.frames_sent, 10_000)
+        self.assertTrue(all(len(s.websocket.sent) == 1 for s in subscribers))
+        self.assertLess(elapsed, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
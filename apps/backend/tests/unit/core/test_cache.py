@@ -0,0 +1,106 @@
+import asyncio
+import unittest
+from datetime import datetime
+from decimal import Decimal
+
+from core.cache import (
+    Cache, CacheKeys, InMemoryCacheBackend, JsonSerializer, cache_key_builder,
+    create_cache, get_serializer
+)
+
+
+class TestCacheKeys(unittest.TestCase):
+    def test_key_builder_joins_namespace_and_parts(self):
+        self.assertEqual(cache_key_builder(CacheKeys.USER_BY_ID, 42), "astratrade:user:id:42")
+
+    def test_unknown_serializer_is_rejected(self):
+        with self.assertRaises(ValueError):
+            get_serializer("pickle")
+
+
+class TestCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache = create_cache(serializer="json", ttl_jitter=0)
+
+    async def test_values_round_trip(self):
+        await self.cache.set("k", {"id": 1, "tags": ["a"]})
+        self.assertEqual(await self.cache.get("k"), {"id": 1, "tags": ["a"]})
+        self.assertIsNone(await self.cache.get("missing"))
+
+    async def test_all_serializers_round_trip(self):
+        for name in ("json", "orjson", "msgpack"):
+            cache = Cache(InMemoryCacheBackend(), serializer=name)
+            await cache.set("k", {"xp": 10, "rank": [1, 2]})
+            self.assertEqual(await cache.get("k"), {"xp": 10, "rank": [1, 2]}, name)
+
+    async def test_expired_entries_are_misses(self):
+        backend = InMemoryCacheBackend()
+        await backend.set("k", b"1", ttl=1)
+        backend._data["k"] = (b"1", 0.0)
+        self.assertIsNone(await backend.get("k"))
+
+    async def test_lru_bound(self):
+        backend = InMemoryCacheBackend(max_entries=2)
+        for key in ("a", "b", "c"):
+            await backend.set(key, b"1")
+        self.assertIsNone(await backend.get("a"))
+        self.assertEqual(await backend.get("c"), b"1")
+
+    async def test_namespace_invalidation_bumps_version(self):
+        key = await self.cache.key(CacheKeys.LEADERBOARD, 100, 0)
+        await self.cache.set(key, [1, 2, 3])
+
+        await self.cache.invalidate_namespace(CacheKeys.LEADERBOARD)
+        new_key = await self.cache.key(CacheKeys.LEADERBOARD, 100, 0)
+
+        self.assertNotEqual(key, new_key)
+        self.assertIsNone(await self.cache.get(new_key))
+
+    async def test_concurrent_misses_load_once(self):
+        loads = 0
+
+        async def loader():
+            nonlocal loads
+            loads += 1
+            await asyncio.sleep(0.01)
+            return {"value": 1}
+
+        results = await asyncio.gather(*(self.cache.get_or_set("hot", loader) for _ in range(20)))
+
+        self.assertEqual(loads, 1)
+        self.assertTrue(all(r == {"value": 1} for r in results))
+        self.assertEqual(await self.cache.get("hot"), {"value": 1})
+
+    async def test_loader_errors_reach_all_waiters_and_release_lock(self):
+        async def failing_loader():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("db down")
+
+        results = await asyncio.gather(
+            *(self.cache.get_or_set("k", failing_loader) for _ in range(3)),
+            return_exceptions=True
+        )
+
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertTrue(await self.cache.backend.add("k:lock", b"1", 10))
+
+    async def test_waits_for_other_worker_holding_lock(self):
+        await self.cache.backend.add("k:lock", b"1", 10)
+
+        async def fill_from_other_worker():
+            await asyncio.sleep(0.02)
+            await self.cache.set("k", "from-other-worker")
+
+        async def loader():
+            return "local"
+
+        _, value = await asyncio.gather(fill_from_other_worker(), self.cache.get_or_set("k", loader))
+        self.assertEqual(value, "from-other-worker")
+
+    def test_json_serializer_handles_datetimes_and_decimals(self):
+        data = JsonSerializer().dumps({"at": datetime(2024, 1, 1), "amount": Decimal("1.5")})
+        self.assertEqual(JsonSerializer().loads(data), {"at": "2024-01-01T00:00:00", "amount": "1.5"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+
+import numpy as np
+
+from core.candles import (
+    CLOSE,
+    HIGH,
+    LOW,
+    OPEN,
+    TIMESTAMP,
+    VOLUME,
+    CandleAggregator,
+    CandleRing,
+    bars_from_klines,
+    candles_to_dicts,
+    rollup,
+)
+
+T0 = 1_700_000_000 - 1_700_000_000 % 86400
+
+
+class TestCandleRing(unittest.TestCase):
+    def test_ticks_build_ohlcv(self):
+        ring = CandleRing(60, capacity=10)
+        for offset, price in ((0, 10.0), (10, 12.0), (20, 9.0), (59, 11.0)):
+            ring.merge(T0 + offset, price, price, price, price, 1.0)
+
+        self.assertEqual(ring.latest().tolist(), [[T0, 10.0, 12.0, 9.0, 11.0, 4.0]])
+
+    def test_wraparound_keeps_newest_bars_contiguous(self):
+        ring = CandleRing(60, capacity=4)
+        for minute in range(11):
+            ring.merge(T0 + minute * 60, minute, minute, minute, minute, 1.0)
+
+        self.assertEqual(len(ring.latest(0)), 0)
+        for limit in range(1, 5):
+            view = ring.latest(limit)
+            self.assertTrue(np.shares_memory(view, ring._data))
+            self.assertEqual(view[:, CLOSE].tolist(), list(range(11 - limit, 11)))
+        self.assertEqual(len(ring.latest(100)), 4)
+
+    def test_views_are_read_only(self):
+        ring = CandleRing(60, capacity=4)
+        ring.merge(T0, 1.0, 1.0, 1.0, 1.0, 1.0)
+        with self.assertRaises(ValueError):
+            ring.latest()[0, CLOSE] = 2.0
+
+    def test_gaps_filled_with_flat_bars_and_late_data_dropped(self):
+        ring = CandleRing(60, capacity=10)
+        ring.merge(T0, 5.0, 6.0, 4.0, 5.5, 2.0)
+        ring.merge(T0 + 180, 6.0, 6.0, 6.0, 6.0, 1.0)
+
+        self.assertFalse(ring.merge(T0 + 30, 1.0, 1.0, 1.0, 1.0, 1.0))
+        bars = ring.latest()
+        self.assertEqual(bars[:, TIMESTAMP].tolist(), [T0, T0 + 60, T0 + 120, T0 + 180])
+        self.assertEqual(bars[1].tolist(), [T0 + 60, 5.5, 5.5, 5.5, 5.5, 0.0])
+        self.assertEqual(ring.late_bars, 1)
+
+
+class TestRollup(unittest.TestCase):
+    def test_five_minute_rollup(self):
+        minutes = np.array([[T0 + i * 60, 10 + i, 20 + i, 5 - i, 11 + i, 1.0] for i in range(7)])
+
+        rolled = rollup(minutes, 300)
+
+        self.assertEqual(rolled[:, TIMESTAMP].tolist(), [T0, T0 + 300])
+        self.assertEqual(rolled[0, [OPEN, HIGH, LOW, CLOSE, VOLUME]].tolist(), [10, 24, 1, 15, 5.0])
+        self.assertEqual(rolled[1, [OPEN, HIGH, LOW, CLOSE, VOLUME]].tolist(), [15, 26, -1, 17, 2.0])
+
+    def test_bars_from_klines(self):
+        bars = bars_from_klines([[(T0 + 60) * 1000, 2, 3, 1, 2.5, 10, "ignored"], [T0 * 1000, 1, 2, 1, 2, 5]])
+        self.assertEqual(bars[:, TIMESTAMP].tolist(), [T0, T0 + 60])
+
+
+class TestCandleAggregator(unittest.TestCase):
+    def setUp(self):
+        self.candles = CandleAggregator()
+
+    def test_higher_intervals_match_rollup_of_minutes(self):
+        rng = np.random.default_rng(3)
+        timestamps = T0 + np.sort(rng.uniform(0, 3 * 3600, 5000))
+        prices = 100 + np.cumsum(rng.normal(0, 0.1, len(timestamps)))
+        volumes = rng.uniform(0, 2, len(timestamps))
+
+        for timestamp, price, volume in zip(timestamps, prices, volumes):
+            self.candles.ingest_tick("BTCUSD", price, volume, timestamp)
+
+        minutes = self.candles.candles("BTCUSD", "1m").copy()
+        for interval, seconds in (("5m", 300), ("1h", 3600), ("1d", 86400)):
+            np.testing.assert_allclose(self.candles.candles("BTCUSD", interval), rollup(minutes, seconds))
+
+        batched = CandleAggregator()
+        batched.ingest_ticks("BTCUSD", timestamps, prices, volumes)
+        for interval in ("1m", "5m", "1h", "1d"):
+            np.testing.assert_allclose(batched.candles("BTCUSD", interval), self.candles.candles("BTCUSD", interval))
+
+    def test_backfilled_bars_roll_up_and_continue_with_ticks(self):
+        minutes = np.array([[T0 + i * 60, 100.0, 101.0, 99.0, 100.5, 3.0] for i in range(120)])
+        self.candles.ingest_bars("ETHUSD", minutes)
+        self.candles.ingest_tick("ETHUSD", 105.0, 1.0, T0 + 120 * 60 + 5)
+
+        hours = self.candles.candles("ETHUSD", "1h")
+        self.assertEqual(hours[:, VOLUME].tolist(), [180.0, 180.0, 1.0])
+        self.assertEqual(self.candles.candles("ETHUSD", "1d")[0, HIGH], 105.0)
+        self.assertEqual(len(self.candles.candles("ETHUSD", "1m", limit=50)), 50)
+
+    def test_unknown_interval_and_symbol(self):
+        with self.assertRaises(ValueError):
+            self.candles.candles("BTCUSD", "2m")
+        self.assertEqual(len(self.candles.candles("DOGEUSD", "1m")), 0)
+
+    def test_candles_to_dicts(self):
+        self.candles.ingest_tick("BTCUSD", 10.0, 2.0, T0 + 1)
+        self.assertEqual(candles_to_dicts(self.candles.candles("BTCUSD")), [
+            {"timestamp": T0 * 1000, "open": 10.0, "high": 10.0, "low": 10.0, "close": 10.0, "volume": 2.0}
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
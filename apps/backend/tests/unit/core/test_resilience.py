@@ -0,0 +1,195 @@
+import asyncio
+import time
+import unittest
+
+from core.resilience import (
+    CallTimeout,
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    ResilienceLayer,
+    endpoint_key,
+    get_resilience_layer,
+    get_resilience_stats,
+)
+
+
+class ClientError(Exception):
+    pass
+
+
+async def _ok(delay=0.0, value="ok"):
+    if delay:
+        await asyncio.sleep(delay)
+    return value
+
+
+async def _fail():
+    raise ConnectionError("down")
+
+
+class TestEndpointKey(unittest.TestCase):
+    def test_values_in_paths_share_a_key(self):
+        self.assertEqual(endpoint_key("get", "/v1/market/ticker/BTCUSD"), "GET /v1/market/ticker/{}")
+        self.assertEqual(endpoint_key("GET", "/v1/orders/8f14e45f-ceea?symbol=X"), "GET /v1/orders/{}")
+        self.assertEqual(endpoint_key("POST", "/openai/v1/chat/completions"), "POST /openai/v1/chat/completions")
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_on_failure_rate_and_recovers_through_probes(self):
+        breaker = CircuitBreaker(min_calls=4, failure_rate=0.5, open_seconds=0.05, half_open_probes=2)
+        for failed in (False, True, False, True):
+            self.assertTrue(breaker.allow())
+            breaker.record(0.01, failed)
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertTrue(breaker.allow())
+        # Only half_open_probes calls are let through at once
+        self.assertFalse(breaker.allow())
+        breaker.record(0.01, False)
+        breaker.record(0.01, False)
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(min_calls=1, open_seconds=0.01)
+        breaker.record(0.01, True)
+        time.sleep(0.02)
+        self.assertTrue(breaker.allow())
+        breaker.record(0.01, True)
+
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+        self.assertEqual(breaker.opened, 2)
+
+    def test_opens_on_slow_calls(self):
+        breaker = CircuitBreaker(min_calls=3, slow_call_seconds=1.0, slow_call_rate=0.6)
+        for latency in (2.0, 0.1, 2.0):
+            breaker.record(latency, False)
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+
+
+class TestResilienceLayer(unittest.IsolatedAsyncioTestCase):
+    def _layer(self, **options):
+        options = {"min_calls": 3, "open_seconds": 60, "min_samples": 5, "min_timeout": 0.01, **options}
+        return ResilienceLayer("test", is_failure=lambda error: not isinstance(error, ClientError), **options)
+
+    async def test_open_circuit_fails_fast(self):
+        layer = self._layer()
+        for _ in range(3):
+            with self.assertRaises(ConnectionError):
+                await layer.call("GET /v1/ticker", _fail)
+
+        calls = []
+
+        async def send():
+            calls.append(1)
+
+        with self.assertRaises(CircuitOpenError) as raised:
+            await layer.call("GET /v1/ticker", send)
+        self.assertEqual(calls, [])
+        self.assertGreater(raised.exception.retry_after, 50)
+        # Other endpoints are unaffected
+        self.assertEqual(await layer.call("GET /v1/balances", _ok), "ok")
+
+        stats = layer.get_stats()
+        self.assertEqual(stats["open_circuits"], ["GET /v1/ticker"])
+        self.assertEqual(stats["endpoints"]["GET /v1/ticker"]["rejected"], 1)
+
+    async def test_client_errors_do_not_trip_the_breaker(self):
+        layer = self._layer()
+
+        async def rejected():
+            raise ClientError("insufficient balance")
+
+        for _ in range(5):
+            with self.assertRaises(ClientError):
+                await layer.call("POST /v1/orders", rejected)
+        self.assertEqual(layer.state("POST /v1/orders"), CircuitState.CLOSED)
+
+    async def test_timeout_adapts_to_latency(self):
+        layer = self._layer(max_timeout=30.0, timeout_multiplier=3.0)
+        self.assertEqual(layer.timeout("GET /v1/ticker"), 30.0)
+        for _ in range(5):
+            await layer.call("GET /v1/ticker", lambda: _ok(0.01), idempotent=True)
+        self.assertLess(layer.timeout("GET /v1/ticker"), 0.1)
+
+        started = time.monotonic()
+        with self.assertRaises(CallTimeout):
+            await layer.call("GET /v1/ticker", lambda: _ok(1.0), idempotent=True)
+        self.assertLess(time.monotonic() - started, 0.2)
+        self.assertEqual(layer.get_stats()["endpoints"]["GET /v1/ticker"]["timeouts"], 1)
+
+    async def test_hedged_request_answers_from_the_faster_attempt(self):
+        layer = self._layer(min_samples=3, max_hedge_ratio=1.0)
+        for _ in range(3):
+            await layer.call("GET /v1/ticker", lambda: _ok(0.01))
+
+        delays = iter([0.5, 0.01])
+        started = time.monotonic()
+        result = await layer.call("GET /v1/ticker", lambda: _ok(next(delays), "fast"), idempotent=True, hedge=True)
+
+        self.assertEqual(result, "fast")
+        self.assertLess(time.monotonic() - started, 0.2)
+        stats = layer.get_stats()["endpoints"]["GET /v1/ticker"]
+        self.assertEqual((stats["hedged"], stats["hedge_wins"]), (1, 1))
+
+    async def test_non_idempotent_calls_are_never_hedged(self):
+        layer = self._layer(min_samples=1, max_hedge_ratio=1.0, min_timeout=1.0)
+        await layer.call("POST /v1/orders", lambda: _ok(0.001))
+        sent = []
+
+        async def send():
+            sent.append(1)
+            await asyncio.sleep(0.03)
+
+        await layer.call("POST /v1/orders", send, idempotent=False, hedge=True)
+        self.assertEqual(sent, [1])
+
+    async def test_non_idempotent_calls_keep_running_past_the_adaptive_timeout(self):
+        layer = self._layer()
+        for _ in range(5):
+            await layer.call("POST /v1/orders", lambda: _ok(0.01))
+        self.assertLess(layer.timeout("POST /v1/orders"), 0.1)
+
+        self.assertEqual(await layer.call("POST /v1/orders", lambda: _ok(0.2, "filled")), "filled")
+        self.assertEqual(layer.get_stats()["endpoints"]["POST /v1/orders"]["timeouts"], 0)
+
+    async def test_hedges_are_limited_to_a_share_of_calls(self):
+        layer = self._layer(min_samples=3, max_hedge_ratio=0.1, min_timeout=1.0)
+        for _ in range(3):
+            await layer.call("GET /v1/ticker", lambda: _ok(0.001))
+        await asyncio.gather(*(
+            layer.call("GET /v1/ticker", lambda: _ok(0.02), idempotent=True, hedge=True) for _ in range(20)
+        ))
+        self.assertLessEqual(layer.get_stats()["endpoints"]["GET /v1/ticker"]["hedged"], 3)
+
+    async def test_guard_for_streams(self):
+        layer = self._layer()
+
+        async def stream():
+            async with layer.guard("POST /chat:stream"):
+                yield "a"
+                yield "b"
+
+        # Closing a stream early is not a failure
+        async for _ in stream():
+            break
+        for _ in range(3):
+            with self.assertRaises(ConnectionError):
+                async with layer.guard("POST /chat:stream"):
+                    raise ConnectionError("reset")
+
+        self.assertEqual(layer.state("POST /chat:stream"), CircuitState.OPEN)
+        self.assertEqual(layer.get_stats()["endpoints"]["POST /chat:stream"]["failures"], 3)
+
+    async def test_layers_are_shared_by_name(self):
+        layer = get_resilience_layer("test-shared", max_timeout=5.0)
+        self.assertIs(get_resilience_layer("test-shared"), layer)
+        await layer.call("GET /v1/ping", _ok)
+        self.assertIn("GET /v1/ping", get_resilience_stats()["test-shared"]["endpoints"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import random
+import unittest
+
+from core.ticker_stream import (
+    Encoding,
+    TickerDeltaStream,
+    apply_delta,
+    decode,
+    encode,
+    ticker_delta,
+)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.unblocked = asyncio.Event()
+        self.unblocked.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        await self.unblocked.wait()
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        await self.send_text(data)
+
+    async def close(self, code=1000):
+        pass
+
+
+class TickerClient:
+    """Reference client: applies in-order deltas and asks for a resync on a gap"""
+
+    def __init__(self):
+        self.tickers = {}
+        self.resyncs = []
+
+    def receive(self, frame):
+        message = decode(frame)
+        if message["t"] == "s":
+            self.tickers.update(message["tickers"])
+        elif message["t"] == "d":
+            ticker = self.tickers.get(message["s"])
+            if ticker is None or message["q"] != ticker["q"] + 1:
+                self.resyncs.append(message["s"])
+                return
+            self.tickers[message["s"]] = {**apply_delta(ticker, message["d"]), "q": message["q"]}
+
+
+def _ticker(price=100.0, volume=1000.0, **fields):
+    return {
+        "symbol": "BTCUSD", "price": price, "change_24h": 1.5, "change_percent_24h": 1.52,
+        "volume_24h": volume, "high_24h": 105.0, "low_24h": 95.0, **fields
+    }
+
+
+async def _flush():
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+class TestTickerDelta(unittest.TestCase):
+    def test_only_changed_fields(self):
+        self.assertEqual(ticker_delta(_ticker(), _ticker(price=101.0)), {"p": 101.0})
+        self.assertEqual(ticker_delta(_ticker(), _ticker()), {})
+        self.assertEqual(len(ticker_delta(None, _ticker())), 6)
+
+    def test_apply_delta_round_trip(self):
+        previous, current = _ticker(), _ticker(price=99.0, volume=1010.0)
+        self.assertEqual(apply_delta(previous, ticker_delta(previous, current)), current)
+
+    def test_msgpack_frames_are_binary(self):
+        message = {"t": "d", "s": "BTCUSD", "q": 7, "d": {"p": 101.25}}
+        frame = encode(message, Encoding.MSGPACK)
+
+        self.assertIsInstance(frame, bytes)
+        self.assertEqual(decode(frame), message)
+        self.assertLess(len(frame), len(encode(message, Encoding.JSON)))
+
+
+class TestTickerDeltaStream(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.stream = TickerDeltaStream(max_queue=4)
+
+    async def asyncTearDown(self):
+        await self.stream.close()
+
+    async def test_sequence_numbers_per_symbol(self):
+        first = self.stream.update("BTCUSD", _ticker())
+        self.assertIsNone(self.stream.update("BTCUSD", _ticker()))
+        second = self.stream.update("BTCUSD", _ticker(price=101.0))
+        eth = self.stream.update("ETHUSD", _ticker(symbol="ETHUSD"))
+
+        self.assertEqual((first["q"], second["q"], eth["q"]), (1, 2, 1))
+        self.assertEqual(second["d"], {"p": 101.0})
+        self.assertEqual(self.stream.snapshot(["BTCUSD"])["tickers"]["BTCUSD"]["q"], 2)
+
+    async def test_snapshot_then_deltas(self):
+        self.stream.update("BTCUSD", _ticker())
+        for encoding in Encoding:
+            websocket = FakeWebSocket()
+            await self.stream.connect(websocket, encoding)
+            self.stream.update("BTCUSD", _ticker(price=101.0))
+            await _flush()
+
+            client = TickerClient()
+            for frame in websocket.sent:
+                client.receive(frame)
+            self.assertEqual(client.resyncs, [])
+            self.assertEqual(client.tickers["BTCUSD"]["price"], 101.0)
+            self.stream.update("BTCUSD", _ticker())
+
+    async def test_symbol_filter(self):
+        self.stream.update("BTCUSD", _ticker())
+        self.stream.update("ETHUSD", _ticker(symbol="ETHUSD"))
+        websocket = FakeWebSocket()
+        await self.stream.connect(websocket, symbols=["ETHUSD"])
+
+        self.stream.update("BTCUSD", _ticker(price=101.0))
+        self.stream.update("ETHUSD", _ticker(symbol="ETHUSD", price=101.0))
+        await _flush()
+
+        messages = [json.loads(frame) for frame in websocket.sent]
+        self.assertEqual(list(messages[0]["tickers"]), ["ETHUSD"])
+        self.assertEqual([message["s"] for message in messages[1:]], ["ETHUSD"])
+
+    async def test_resync_after_dropped_frames(self):
+        self.stream.update("BTCUSD", _ticker())
+        websocket = FakeWebSocket()
+        subscriber = await self.stream.connect(websocket)
+        await _flush()
+        websocket.unblocked.clear()
+
+        # A stalled client: the hub drops the oldest deltas beyond max_queue
+        for step in range(1, 12):
+            self.stream.update("BTCUSD", _ticker(price=100.0 + step))
+        websocket.unblocked.set()
+        await _flush()
+
+        client = TickerClient()
+        for frame in websocket.sent:
+            client.receive(frame)
+        self.assertEqual(client.resyncs[:1], ["BTCUSD"])
+
+        sent = len(websocket.sent)
+        self.stream.handle_client_message(subscriber, Encoding.JSON, json.dumps({"type": "resync"}))
+        await _flush()
+        client.receive(websocket.sent[sent])
+        self.assertEqual(client.tickers["BTCUSD"]["price"], 111.0)
+        self.assertEqual(client.tickers["BTCUSD"]["q"], 12)
+
+    async def test_subscribe_sends_snapshot_of_new_symbols(self):
+        self.stream.update("BTCUSD", _ticker())
+        self.stream.update("ETHUSD", _ticker(symbol="ETHUSD"))
+        websocket = FakeWebSocket()
+        subscriber = await self.stream.connect(websocket, symbols=["BTCUSD"])
+
+        self.stream.handle_client_message(
+            subscriber, Encoding.JSON, json.dumps({"type": "subscribe", "symbols": ["ethusd", "DOGEUSD"]})
+        )
+        await _flush()
+
+        self.assertEqual(subscriber.topics, {"BTCUSD", "ETHUSD"})
+        self.assertEqual(list(json.loads(websocket.sent[-1])["tickers"]), ["ETHUSD"])
+
+    async def test_deltas_are_much_smaller_than_full_tickers(self):
+        rng = random.Random(7)
+        ticker = _ticker()
+        full_bytes = delta_bytes = msgpack_bytes = 0
+        for _ in range(1000):
+            if rng.random() < 0.7:
+                price = round(ticker["price"] * (1 + rng.gauss(0, 0.0005)), 2)
+                ticker = {**ticker, "price": price, "volume_24h": round(ticker["volume_24h"] + rng.uniform(0, 50), 2)}
+            full_bytes += len(json.dumps({"type": "ticker", "data": ticker}, separators=(",", ":")))
+            message = self.stream.update("BTCUSD", ticker)
+            if message is not None:
+                delta_bytes += len(encode(message, Encoding.JSON))
+                msgpack_bytes += len(encode(message, Encoding.MSGPACK))
+
+        self.assertLess(delta_bytes, full_bytes * 0.4)
+        self.assertLess(msgpack_bytes, delta_bytes)
+
+
+if __name__ == "__main__":
+    unittest.main()
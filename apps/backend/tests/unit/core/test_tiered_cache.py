@@ -0,0 +1,158 @@
+import asyncio
+import json
+import unittest
+
+from core.cache import Cache, InMemoryCacheBackend
+from core.tiered_cache import (
+    LocalCache, LocalInvalidationBroker, ProfileCacheKeys, RedisInvalidationBroker, TieredCache
+)
+
+
+class TestLocalCache(unittest.TestCase):
+    def test_lru_eviction_and_size_accounting(self):
+        cache = LocalCache(max_entries=2)
+        cache.set("a", {"v": 1}, size=10)
+        cache.set("b", {"v": 2}, size=20)
+        cache.get("a")
+        cache.set("c", {"v": 3}, size=30)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"v": 1})
+        self.assertEqual(cache.get_stats()["approx_bytes"], 40)
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_expired_entries_are_misses(self):
+        cache = LocalCache(ttl=0)
+        cache.set("a", 1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+
+class TestTieredCache(unittest.IsolatedAsyncioTestCase):
+    """Two workers sharing one L2 backend and invalidation broker"""
+
+    async def asyncSetUp(self):
+        backend = InMemoryCacheBackend()
+        broker = LocalInvalidationBroker()
+        self.worker_a = TieredCache(Cache(backend, serializer="json"), broker=broker)
+        self.worker_b = TieredCache(Cache(backend, serializer="json"), broker=broker)
+        await self.worker_a.start()
+        await self.worker_b.start()
+        self.loads = 0
+
+    async def asyncTearDown(self):
+        await self.worker_a.stop()
+        await self.worker_b.stop()
+
+    async def _load_profile(self):
+        self.loads += 1
+        return {"user_id": 1, "xp": 100 * self.loads}
+
+    async def _get(self, worker):
+        return await worker.get_or_load(ProfileCacheKeys.PRESTIGE_PROFILE, (1,), self._load_profile)
+
+    async def test_reads_fall_through_l1_then_l2(self):
+        await self._get(self.worker_a)
+        await self._get(self.worker_a)
+        await self._get(self.worker_b)
+
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.worker_a.l1.hits, 1)
+        self.assertEqual(self.worker_b.l2.hits, 1)
+
+    async def test_invalidation_reaches_other_workers(self):
+        await self._get(self.worker_a)
+        await self._get(self.worker_b)
+
+        await self.worker_a.invalidate(ProfileCacheKeys.PRESTIGE_PROFILE, 1)
+        await asyncio.sleep(0)
+
+        self.assertEqual(len(self.worker_b.l1), 0)
+        self.assertEqual((await self._get(self.worker_b))["xp"], 200)
+        self.assertEqual(self.worker_b.invalidations_received, 1)
+
+    async def test_namespace_invalidation(self):
+        await self._get(self.worker_a)
+        await self.worker_b.get_or_load(ProfileCacheKeys.SOCIAL_PROOF, ("global",), self._load_profile)
+
+        await self.worker_b.invalidate(ProfileCacheKeys.PRESTIGE_PROFILE)
+        await asyncio.sleep(0)
+
+        self.assertEqual(len(self.worker_a.l1), 0)
+        self.assertEqual(len(self.worker_b.l1), 1)
+        self.assertEqual((await self._get(self.worker_a))["xp"], 300)
+
+    async def test_missing_values_are_not_cached(self):
+        async def missing():
+            return None
+
+        self.assertIsNone(await self.worker_a.get_or_load("user:me", ("ghost",), missing))
+        self.assertEqual(len(self.worker_a.l1), 0)
+
+    async def test_stats_report_both_tiers(self):
+        await self._get(self.worker_a)
+        await self._get(self.worker_a)
+
+        stats = self.worker_a.get_stats()
+        self.assertEqual(stats["l1"]["hit_rate"], 0.5)
+        self.assertGreater(stats["l1"]["approx_bytes"], 0)
+        self.assertIn("hit_rate", stats["l2"])
+
+
+class FlakyPubSub:
+    """Redis pub/sub connection that fails on subscribe or after its messages"""
+
+    def __init__(self, messages, fail_subscribe=False):
+        self.messages = messages
+        self.fail_subscribe = fail_subscribe
+
+    async def subscribe(self, channel):
+        if self.fail_subscribe:
+            raise ConnectionError("Redis unavailable")
+
+    async def listen(self):
+        yield {"type": "subscribe", "data": 1}
+        for message in self.messages:
+            yield {"type": "message", "data": json.dumps(message)}
+        raise ConnectionError("Connection reset by peer")
+
+    async def unsubscribe(self, channel):
+        raise ConnectionError("Connection reset by peer")
+
+    async def close(self):
+        pass
+
+
+class FlakyRedis:
+    def __init__(self, connections):
+        self.connections = connections
+
+    def pubsub(self):
+        if len(self.connections) > 1:
+            return self.connections.pop(0)
+        return self.connections[0]
+
+
+class TestRedisInvalidationBroker(unittest.IsolatedAsyncioTestCase):
+    async def test_listener_resubscribes_after_connection_errors(self):
+        redis = FlakyRedis([
+            FlakyPubSub([], fail_subscribe=True),
+            FlakyPubSub([{"n": 1}]),
+            FlakyPubSub([{"n": 2}]),
+            FlakyPubSub([], fail_subscribe=True),
+        ])
+        broker = RedisInvalidationBroker(redis, reconnect_delay=0.001, max_reconnect_delay=0.004)
+        received = []
+
+        listener = asyncio.create_task(broker.listen(received.append))
+        while broker.reconnects < 6:
+            await asyncio.sleep(0.001)
+        listener.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await listener
+
+        self.assertEqual(received, [{"n": 1}, {"n": 2}])
+
+
+if __name__ == '__main__':
+    unittest.main()
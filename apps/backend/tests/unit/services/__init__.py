@@ -0,0 +1 @@
+# This file makes the unit/services directory a Python package.
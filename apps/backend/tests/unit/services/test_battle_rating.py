@@ -0,0 +1,135 @@
+import asyncio
+import random
+import threading
+import unittest
+
+import numpy as np
+
+from unittest.mock import patch
+
+from services.battle_rating import (
+    DRAW,
+    LOSS,
+    WIN,
+    BattleRecord,
+    EloConfig,
+    EloRatingEngine,
+    _independent_chunks,
+    battle_result,
+    recompute_battle_ratings_once,
+)
+
+
+def _sequential(engine, battles):
+    """Reference: rate battles one at a time with the scalar formula."""
+    config = engine.config
+    state = {}
+    for battle in battles:
+        rc, pc = state.get(battle.challenger_id, (config.initial_rating, 0))
+        rd, pd = state.get(battle.defender_id, (config.initial_rating, 0))
+        expected = 1.0 / (1.0 + 10.0 ** ((rd - rc) / config.scale))
+        kc = engine._k_factor(rc, pc)
+        kd = engine._k_factor(rd, pd)
+        state[battle.challenger_id] = (max(config.min_rating, rc + kc * (battle.result - expected)), pc + 1)
+        state[battle.defender_id] = (max(config.min_rating, rd + kd * (expected - battle.result)), pd + 1)
+    return state
+
+
+class TestBattleResult(unittest.TestCase):
+    def test_result_from_scores(self):
+        self.assertEqual(battle_result(10, 5), WIN)
+        self.assertEqual(battle_result(5, 10), LOSS)
+        self.assertEqual(battle_result(7, 7), DRAW)
+
+
+class TestIndependentChunks(unittest.TestCase):
+    def test_chunk_ends_before_a_repeated_constellation(self):
+        challengers = np.array([1, 3, 1, 5, 6])
+        defenders = np.array([2, 4, 5, 7, 3])
+        self.assertEqual(_independent_chunks(challengers, defenders), [(0, 2), (2, 3), (3, 5)])
+
+    def test_no_battles(self):
+        self.assertEqual(_independent_chunks(np.array([], dtype=np.int64), np.array([], dtype=np.int64)), [])
+
+
+class TestEloRatingEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = EloRatingEngine()
+
+    def test_equal_ratings_win_moves_by_half_k(self):
+        changes = self.engine.settle({1: (1000.0, 20), 2: (1000.0, 20)}, [BattleRecord(1, 2, WIN)])
+        self.assertAlmostEqual(changes[1].delta, 16.0)
+        self.assertAlmostEqual(changes[2].delta, -16.0)
+
+    def test_draw_between_equals_changes_nothing(self):
+        changes = self.engine.settle({1: (1200.0, 20), 2: (1200.0, 20)}, [BattleRecord(1, 2, DRAW)])
+        self.assertAlmostEqual(changes[1].delta, 0.0)
+        self.assertAlmostEqual(changes[2].delta, 0.0)
+
+    def test_k_schedule(self):
+        config = self.engine.config
+        self.assertEqual(self.engine._k_factor(1000.0, 0), config.provisional_k)
+        self.assertEqual(self.engine._k_factor(1000.0, 50), config.k)
+        self.assertEqual(self.engine._k_factor(1700.0, 50), config.established_k)
+        np.testing.assert_array_equal(
+            self.engine.k_factors(np.array([1000.0, 1000.0, 1700.0]), np.array([0, 50, 50])),
+            [config.provisional_k, config.k, config.established_k]
+        )
+
+    def test_rating_floor(self):
+        engine = EloRatingEngine(EloConfig(min_rating=990.0))
+        changes = engine.settle({1: (1000.0, 0), 2: (1000.0, 0)}, [BattleRecord(1, 2, LOSS)])
+        self.assertEqual(changes[1].new_rating, 990.0)
+
+    def test_settle_rates_repeat_battles_in_order(self):
+        battles = [BattleRecord(1, 2, WIN), BattleRecord(1, 2, WIN)]
+        changes = self.engine.settle({1: (1000.0, 0), 2: (1000.0, 0)}, battles)
+        expected = _sequential(self.engine, battles)
+        self.assertAlmostEqual(changes[1].new_rating, expected[1][0])
+        self.assertAlmostEqual(changes[2].new_rating, expected[2][0])
+        self.assertLess(changes[1].delta, 2 * 24.0)  # the second win was expected more
+
+    def test_recompute_matches_sequential(self):
+        rng = random.Random(7)
+        battles = []
+        for _ in range(3000):
+            challenger, defender = rng.sample(range(200), 2)
+            battles.append(BattleRecord(challenger, defender, rng.choice([WIN, DRAW, LOSS])))
+
+        standings = self.engine.recompute(battles)
+        expected = _sequential(self.engine, battles)
+        self.assertEqual(set(standings), set(expected))
+        for constellation_id, (rating, played) in expected.items():
+            self.assertAlmostEqual(standings[constellation_id][0], rating, places=9)
+            self.assertEqual(standings[constellation_id][1], played)
+
+    def test_recompute_empty_history(self):
+        self.assertEqual(self.engine.recompute([]), {})
+
+
+class TestRecomputeSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_recomputes_share_one_replay(self):
+        release = threading.Event()
+        calls = []
+
+        def recompute(session_factory, engine):
+            calls.append(1)
+            release.wait(5)
+            return {}
+
+        with patch("services.battle_rating.recompute_battle_ratings", recompute):
+            callers = [asyncio.ensure_future(recompute_battle_ratings_once(None, EloRatingEngine())) for _ in range(5)]
+            await asyncio.sleep(0.05)
+            release.set()
+            results = await asyncio.gather(*callers)
+
+            self.assertEqual(results, [{}] * 5)
+            self.assertEqual(len(calls), 1)
+
+            # The next recompute replays again
+            await recompute_battle_ratings_once(None, EloRatingEngine())
+            self.assertEqual(len(calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from services.constellation_search import (
+    ConstellationSearchFeed,
+    ConstellationSearchIndex,
+    trigrams,
+)
+from core.tiered_cache import LocalInvalidationBroker
+
+
+def _ids(hits):
+    return [hit.constellation_id for hit in hits]
+
+
+class TestTrigrams(unittest.TestCase):
+    def test_words_are_padded(self):
+        self.assertEqual(trigrams("Ab"), {"  a", " ab", "ab "})
+
+    def test_last_word_can_be_a_prefix(self):
+        self.assertNotIn("ar ", trigrams("sta star", prefix_last=True))
+        self.assertIn("ta ", trigrams("sta star"))
+
+
+class TestConstellationSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ConstellationSearchIndex()
+        self.index.load([
+            (1, "Stellar Traders", "Swing trading across the galaxy", 1000.0, 5, True),
+            (2, "Nova Syndicate", "Stellar scalpers and momentum hunters", 1000.0, 5, True),
+            (3, "Quiet Orbit", "Long term holders", 1000.0, 5, True),
+            (4, "Stellar Secrets", "Invitation only", 1000.0, 5, False),
+        ])
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(_ids(self.index.search("stellar")), [1, 2])
+
+    def test_partial_input_matches_by_prefix(self):
+        self.assertEqual(_ids(self.index.search("stel"))[0], 1)
+        self.assertEqual(_ids(self.index.search("quiet orb")), [3])
+
+    def test_tolerates_typos(self):
+        self.assertEqual(_ids(self.index.search("sindicate")), [2])
+
+    def test_private_constellations_are_not_indexed(self):
+        self.assertEqual(len(self.index), 3)
+        self.assertNotIn(4, _ids(self.index.search("secrets")))
+
+    def test_popularity_breaks_relevance_ties(self):
+        self.index.upsert(5, "Stellar Traders Guild", None, 1000.0, 5)
+        self.index.upsert(6, "Stellar Traders Club", None, 1000.0, 5)
+        self.index.update_stats(6, battle_rating=1800.0, member_count=150)
+
+        self.assertEqual(_ids(self.index.search("stellar traders"))[:2], [6, 1])
+
+    def test_reindexing_replaces_text(self):
+        self.index.upsert(3, "Loud Orbit", "Day traders", 1000.0, 5)
+
+        self.assertEqual(self.index.search("quiet"), [])
+        self.assertEqual(_ids(self.index.search("loud")), [3])
+
+    def test_remove(self):
+        self.index.remove(1)
+        self.index.remove(99)
+
+        self.assertEqual(_ids(self.index.search("stellar")), [2])
+
+    def test_pagination(self):
+        for constellation_id in range(10, 40):
+            self.index.upsert(constellation_id, f"Comet {constellation_id}", None, 1000.0, constellation_id)
+
+        first = _ids(self.index.search("comet", limit=10))
+        second = _ids(self.index.search("comet", limit=10, offset=10))
+        self.assertEqual(len(first + second), 20)
+        self.assertEqual(set(first) & set(second), set())
+
+    def test_many_candidates_scan_matches_full_scan(self):
+        exact = ConstellationSearchIndex(max_scored=10000)
+        pruned = ConstellationSearchIndex(max_scored=50)
+        rows = [
+            (constellation_id, f"Astra {constellation_id % 7} fleet", "cosmic traders",
+             1000.0 + constellation_id, constellation_id % 40, True)
+            for constellation_id in range(1, 500)
+        ]
+        exact.load(rows)
+        pruned.load(rows)
+
+        self.assertEqual(_ids(pruned.search("astra", limit=10)), _ids(exact.search("astra", limit=10)))
+
+    def test_empty_query(self):
+        self.assertEqual(self.index.search("  !! "), [])
+
+
+class TestConstellationSearchFeed(unittest.IsolatedAsyncioTestCase):
+    async def test_updates_reach_every_worker(self):
+        broker = LocalInvalidationBroker()
+        feeds = [ConstellationSearchFeed(ConstellationSearchIndex(), broker) for _ in range(2)]
+        for feed in feeds:
+            await feed.start()
+
+        await feeds[0].publish_upsert(type("Row", (), {
+            "id": 1, "name": "Nebula Navigators", "description": None,
+            "battle_rating": 1000.0, "member_count": 1, "is_public": True
+        })())
+        await feeds[0].publish_stats(1, member_count=9)
+        await asyncio.sleep(0)
+
+        for feed in feeds:
+            self.assertEqual(_ids(feed.index.search("nebula")), [1])
+            await feed.stop()
+
+    async def test_warm_replays_updates_received_while_loading(self):
+        feed = ConstellationSearchFeed(ConstellationSearchIndex(), LocalInvalidationBroker())
+        rows = [(1, "Old Name", None, 1000.0, 1, True)]
+
+        def load_rows(session_factory):
+            # An edit lands while the database rows are being read
+            feed._apply({
+                "op": "upsert", "id": 1, "name": "New Name", "description": None,
+                "battle_rating": 1000.0, "member_count": 1, "is_public": True
+            })
+            return iter(rows)
+
+        with patch("services.constellation_search._constellation_rows", load_rows):
+            self.assertEqual(await feed.warm(session_factory=None), 1)
+
+        self.assertTrue(feed.index.loaded)
+        self.assertEqual(_ids(feed.index.search("new name")), [1])
+        self.assertEqual(feed.index.search("old"), [])
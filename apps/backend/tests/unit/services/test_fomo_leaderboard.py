@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import patch
+
+from services.fomo_leaderboard import FOMOLeaderboard
+
+
+class TestFOMOLeaderboard(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.leaderboard = FOMOLeaderboard()
+
+    async def test_top_is_ordered_by_score(self):
+        for user_id, score in [(1, 10.0), (2, 50.0), (3, 30.0)]:
+            await self.leaderboard.record(7, user_id, score)
+
+        self.assertEqual(await self.leaderboard.top(7, 2), [(1, 2, 50.0), (2, 3, 30.0)])
+        self.assertEqual(await self.leaderboard.top(7, 2, offset=2), [(3, 1, 10.0)])
+
+    async def test_score_updates_move_participants(self):
+        await self.leaderboard.record(7, 1, 10.0)
+        await self.leaderboard.record(7, 2, 20.0)
+        await self.leaderboard.record(7, 1, 30.0)
+
+        self.assertEqual(await self.leaderboard.rank(7, 1), 1)
+        self.assertEqual(await self.leaderboard.rank(7, 2), 2)
+        self.assertEqual(await self.leaderboard.size(7), 2)
+
+    async def test_unknown_participant_has_no_rank(self):
+        self.assertIsNone(await self.leaderboard.rank(7, 99))
+        self.assertEqual(await self.leaderboard.top(7, 10), [])
+
+    async def test_load_rebuilds_large_event(self):
+        rows = [(user_id, float(user_id % 1000)) for user_id in range(20000)]
+
+        await self.leaderboard.load(7, rows)
+
+        self.assertEqual(await self.leaderboard.size(7), 20000)
+        top = await self.leaderboard.top(7, 3)
+        self.assertTrue(all(score == 999.0 for _, _, score in top))
+        self.assertEqual(await self.leaderboard.rank(7, 999), 1)
+
+    async def test_load_keeps_participants_recorded_before_it(self):
+        # Joined since the restart; the view is not complete yet
+        await self.leaderboard.record(7, 3, 40.0)
+        self.assertFalse(await self.leaderboard.is_loaded(7))
+
+        await self.leaderboard.load(7, [(1, 10.0), (2, 20.0), (3, 5.0)])
+
+        self.assertTrue(await self.leaderboard.is_loaded(7))
+        self.assertEqual(await self.leaderboard.top(7, 3), [(1, 3, 40.0), (2, 2, 20.0), (3, 1, 10.0)])
+
+        await self.leaderboard.clear(7)
+        self.assertFalse(await self.leaderboard.is_loaded(7))
+
+    async def test_events_are_independent(self):
+        await self.leaderboard.record(1, 1, 10.0)
+        await self.leaderboard.record(2, 1, 5.0)
+        await self.leaderboard.clear(1)
+
+        self.assertEqual(await self.leaderboard.size(1), 0)
+        self.assertEqual(await self.leaderboard.size(2), 1)
+
+    async def test_local_view_is_reloaded_after_the_refresh_interval(self):
+        with patch("services.fomo_leaderboard.time.monotonic", return_value=100.0):
+            await self.leaderboard.load(7, [(1, 10.0)])
+            self.assertTrue(await self.leaderboard.is_loaded(7))
+
+        with patch("services.fomo_leaderboard.time.monotonic", return_value=106.0):
+            # Another worker's join is only in the database
+            self.assertFalse(await self.leaderboard.is_loaded(7))
+            await self.leaderboard.load(7, [(1, 10.0), (2, 20.0)])
+            self.assertTrue(await self.leaderboard.is_loaded(7))
+
+        self.assertEqual(await self.leaderboard.top(7, 2), [(1, 2, 20.0), (2, 1, 10.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import asyncio
+import unittest
+
+from services.genesis_batch_mint import (
+    BatchJobStatus,
+    BatchMintItem,
+    GenesisBatchMinter,
+    MintItemStatus,
+)
+
+
+class TestGenesisBatchMinter(unittest.IsolatedAsyncioTestCase):
+    """Test pipelined submission, retries and job tracking"""
+
+    def setUp(self):
+        self.minter = GenesisBatchMinter(concurrency=4, max_attempts=3, retry_delay=0)
+
+    @staticmethod
+    def _items(count):
+        return [BatchMintItem(user_id=user_id, achievement_type="first_trade") for user_id in range(count)]
+
+    async def test_submissions_are_bounded_by_concurrency(self):
+        in_flight = 0
+        peak = 0
+
+        async def submit(item):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            return f"0x{item.user_id}"
+
+        items = self._items(50)
+        await self.minter.submit_all(items, submit)
+
+        self.assertEqual(peak, 4)
+        self.assertTrue(all(item.status == MintItemStatus.MINTED for item in items))
+        self.assertEqual(items[7].tx_hash, "0x7")
+
+    async def test_failed_submissions_are_retried_then_reported(self):
+        calls = {}
+
+        async def submit(item):
+            calls[item.user_id] = calls.get(item.user_id, 0) + 1
+            if item.user_id == 0 and calls[0] < 2:
+                raise RuntimeError("nonce too low")
+            if item.user_id == 1:
+                raise RuntimeError("contract reverted")
+            return "0xabc"
+
+        items = self._items(2)
+        await self.minter.submit_all(items, submit)
+
+        self.assertEqual((items[0].status, items[0].attempts), (MintItemStatus.MINTED, 2))
+        self.assertEqual((items[1].status, items[1].attempts), (MintItemStatus.FAILED, 3))
+        self.assertEqual(items[1].reason, "contract reverted")
+
+    async def test_job_reports_per_item_status(self):
+        items = self._items(3)
+        items[2].reject("Achievement requirements not met")
+        job = self.minter.create_job(items, created_by=42)
+
+        async def run(job):
+            async def submit(item):
+                return "0x1"
+            await self.minter.submit_all(job.items[:2], submit)
+
+        await self.minter.start_job(job, run)
+
+        self.assertEqual(self.minter.get_job(job.job_id).status, BatchJobStatus.COMPLETED)
+        self.assertEqual(job.created_by, 42)
+        self.assertEqual(job.summary()["minted"], 2)
+        self.assertEqual(job.summary()["ineligible"], 1)
+        self.assertEqual(len(job.to_dict(offset=1, limit=1)["items"]), 1)
+
+    async def test_job_failure_is_recorded(self):
+        job = self.minter.create_job(self._items(1))
+
+        async def run(job):
+            raise RuntimeError("database unavailable")
+
+        await self.minter.start_job(job, run)
+
+        self.assertEqual(job.status, BatchJobStatus.FAILED)
+        self.assertEqual(job.error, "database unavailable")
+
+
+if __name__ == '__main__':
+    unittest.main()
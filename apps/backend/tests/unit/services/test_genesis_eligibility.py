@@ -0,0 +1,117 @@
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from services.genesis_eligibility import (
+    EligibilitySnapshot,
+    GenesisAchievement,
+    GenesisEligibilityEngine,
+)
+
+
+class TestEligibilitySnapshot(unittest.TestCase):
+    """Test eligibility rules evaluated from snapshot counters"""
+
+    def test_rules(self):
+        snapshot = EligibilitySnapshot(
+            user_id=1, level=30, total_trades=1000, successful_trades=850,
+            viral_hits=5, founded_constellation_id=3
+        )
+
+        self.assertEqual(snapshot.eligible, GenesisAchievement(31))
+        self.assertEqual(EligibilitySnapshot(user_id=1).eligible, GenesisAchievement(0))
+
+    def test_trading_master_needs_win_rate(self):
+        snapshot = EligibilitySnapshot(user_id=1, total_trades=1000, successful_trades=700)
+
+        self.assertFalse(snapshot.eligible & GenesisAchievement.TRADING_MASTER)
+        self.assertTrue(snapshot.eligible & GenesisAchievement.FIRST_TRADE)
+
+    def test_minted_achievements_are_not_available(self):
+        snapshot = EligibilitySnapshot(user_id=1, total_trades=5, level=25, minted=int(GenesisAchievement.FIRST_TRADE))
+
+        self.assertEqual(snapshot.available, GenesisAchievement.LEVEL_MILESTONE)
+        self.assertTrue(snapshot.has_minted(GenesisAchievement.FIRST_TRADE))
+
+    def test_round_trips_redis_hash_fields(self):
+        snapshot = EligibilitySnapshot(user_id=7, level=12, last_trade_at=1.5, founded_constellation_name="Orion")
+        raw = {name.encode(): str(value).encode() for name, value in snapshot.to_fields().items()}
+
+        self.assertEqual(EligibilitySnapshot.from_fields(raw), snapshot)
+
+
+class TestGenesisEligibilityEngine(unittest.IsolatedAsyncioTestCase):
+    """Test snapshot reads and incremental updates"""
+
+    async def asyncSetUp(self):
+        self.engine = GenesisEligibilityEngine()
+        self.loads = 0
+
+    async def _load(self):
+        self.loads += 1
+        return EligibilitySnapshot(user_id=1, level=24)
+
+    async def test_snapshot_is_built_once(self):
+        await self.engine.get(1, self._load)
+        await self.engine.get(1, self._load)
+
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.engine.get_stats(), {"hits": 1, "builds": 1})
+
+    async def test_get_many_builds_missing_snapshots_in_one_load(self):
+        await self.engine.get(1, self._load)
+        requested = []
+
+        async def load_many(user_ids):
+            requested.append(user_ids)
+            return {user_id: EligibilitySnapshot(user_id=user_id, total_trades=1) for user_id in user_ids}
+
+        snapshots = await self.engine.get_many([1, 2, 3, 2], load_many)
+
+        self.assertEqual(requested, [[2, 3]])
+        self.assertEqual(snapshots[1].level, 24)
+        self.assertEqual(snapshots[3].available, GenesisAchievement.FIRST_TRADE)
+        self.assertEqual((await self.engine.get(2, self._load)).total_trades, 1)
+
+    async def test_incremental_updates_change_eligibility(self):
+        await self.engine.get(1, self._load)
+
+        await self.engine.record_level(1, 25)
+        await self.engine.record_level(1, 20)  # Never moves backwards
+        await self.engine.record_trade(1, successful=True)
+        await self.engine.record_founder(1, 9, "Andromeda")
+        await self.engine.record_viral_hits([1, 1, 1, 1, 1, 2])
+
+        snapshot = await self.engine.get(1, self._load)
+        self.assertEqual(snapshot.level, 25)
+        self.assertEqual(snapshot.founded_constellation_name, "Andromeda")
+        self.assertEqual(snapshot.available, GenesisAchievement(15))
+        self.assertEqual(self.loads, 1)
+
+    async def test_mint_clears_availability(self):
+        await self.engine.get(1, self._load)
+        await self.engine.record_level(1, 30)
+        await self.engine.record_mint(1, "level_milestone")
+
+        snapshot = await self.engine.get(1, self._load)
+        self.assertTrue(snapshot.has_minted(GenesisAchievement.LEVEL_MILESTONE))
+        self.assertEqual(snapshot.available, GenesisAchievement(0))
+
+    async def test_updates_skip_users_without_snapshot(self):
+        await self.engine.record_trade(5)
+
+        self.assertIsNone(await self.engine.store.get("astratrade:genesis:eligibility:5"))
+
+    async def test_trade_executed_events(self):
+        await self.engine.get(1, self._load)
+        executed_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+        await self.engine.handle_trade_executed(SimpleNamespace(user_id=1, executed_at=executed_at))
+
+        snapshot = await self.engine.get(1, self._load)
+        self.assertEqual(snapshot.total_trades, 1)
+        self.assertEqual(snapshot.last_trade_at, executed_at.timestamp())
+
+
+if __name__ == '__main__':
+    unittest.main()
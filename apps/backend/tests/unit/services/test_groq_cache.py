@@ -0,0 +1,144 @@
+import asyncio
+import unittest
+
+from services.groq_cache import (
+    create_groq_response_cache,
+    normalize,
+    significant,
+    summarize_records,
+)
+
+
+class TestNormalization(unittest.TestCase):
+    def test_similar_inputs_share_a_form(self):
+        first = {"symbol": "BTCUSD", "price": 43251.7, "change_percent_24h": 2.31, "timestamp": "12:00:01"}
+        second = {"timestamp": "12:00:42", "change_percent_24h": 1.9, "price": 43280.2, "symbol": " btcusd"}
+
+        self.assertEqual(normalize(first), normalize(second))
+        self.assertNotEqual(normalize(first), normalize({**first, "price": 44900.0}))
+
+    def test_profile_numbers_are_bucketed_and_ids_dropped(self):
+        profile = {"user_id": 7, "username": "CryptoTrader", "level": 23, "balance": 10450.0, "risk_tolerance": "High"}
+        similar = {"user_id": 9, "username": "DeFiMaster", "level": 23, "balance": 9960.0, "risk_tolerance": "high"}
+
+        self.assertEqual(normalize(profile), normalize(similar))
+        self.assertEqual(normalize(profile), {"balance": 10000.0, "level": 23.0, "risk_tolerance": "high"})
+
+    def test_significant(self):
+        self.assertEqual(significant(43251.7, 3), 43300.0)
+        self.assertEqual(significant(0.48537, 3), 0.485)
+        self.assertEqual(significant(0.0, 3), 0.0)
+
+    def test_summarize_records(self):
+        trades = [{"direction": "long", "profit": 5}, {"direction": "long", "profit": -2}, {"direction": "short", "profit": 1}]
+
+        summary = summarize_records(trades, kind_keys=("direction",))
+
+        self.assertEqual(summary, {"count": 3.0, "kinds": {"long": 2.0, "short": 1.0}, "win_rate": 0.7})
+
+
+class TestGroqResponseCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.cache = create_groq_response_cache(max_entries=100)
+        self.calls = 0
+
+    async def _call(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"analysis": f"response {self.calls}"}
+
+    async def test_similar_requests_hit_the_cache(self):
+        first = await self.cache.get_or_call("trading_recommendation", {"price": 43251.7, "user_id": 1}, self._call)
+        second = await self.cache.get_or_call("trading_recommendation", {"price": 43282.0, "user_id": 2}, self._call)
+        other = await self.cache.get_or_call("viral_content", {"price": 43248.0}, self._call)
+
+        self.assertEqual(first, second)
+        self.assertEqual(other, {"analysis": "response 2"})
+        self.assertEqual(self.calls, 2)
+
+    async def test_personal_kinds_are_not_shared_between_users(self):
+        actions = [{"type": "trade", "profit": 12.5}]
+        first = await self.cache.get_or_call("user_behavior", {"user_id": 1, "user_actions": actions}, self._call)
+        other_user = await self.cache.get_or_call("user_behavior", {"user_id": 2, "user_actions": actions}, self._call)
+        other_log = await self.cache.get_or_call(
+            "user_behavior", {"user_id": 1, "user_actions": [{"type": "trade", "profit": 13.0}]}, self._call
+        )
+        again = await self.cache.get_or_call("user_behavior", {"user_id": 1, "user_actions": actions}, self._call)
+
+        self.assertEqual(self.calls, 3)
+        self.assertNotEqual(first, other_user)
+        self.assertNotEqual(first, other_log)
+        self.assertEqual(first, again)
+
+    async def test_returned_dicts_are_copies(self):
+        first = await self.cache.get_or_call("viral_content", {"a": 1}, self._call)
+        first["user_id"] = 1
+        second = await self.cache.get_or_call("viral_content", {"a": 1}, self._call)
+
+        self.assertNotIn("user_id", second)
+
+    async def test_concurrent_identical_requests_are_coalesced(self):
+        results = await asyncio.gather(*(
+            self.cache.get_or_call("trading_recommendation", {"symbol": "BTCUSD", "price": 43300 + i}, self._call)
+            for i in range(50)
+        ))
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(result == results[0] for result in results))
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["requests"], stats["upstream_calls"], stats["saved_calls"]), (50, 1, 49))
+        self.assertAlmostEqual(stats["saved_rate"], 0.98)
+
+    async def test_errors_and_none_are_not_cached(self):
+        async def failing():
+            raise ConnectionError("Groq unavailable")
+
+        with self.assertRaises(ConnectionError):
+            await self.cache.get_or_call("user_behavior", {"a": 1}, failing)
+        self.assertEqual(await self.cache.get_or_call("user_behavior", {"a": 1}, self._call), {"analysis": "response 1"})
+
+    async def test_invalidate_kind(self):
+        await self.cache.get_or_call("viral_content", {"a": 1}, self._call)
+        await self.cache.invalidate("viral_content")
+        await self.cache.get_or_call("viral_content", {"a": 1}, self._call)
+
+        self.assertEqual(self.calls, 2)
+
+    async def test_streamed_responses_share_the_cache(self):
+        inputs = {"price": 43251.7}
+        self.assertIsNone(await self.cache.lookup("trading_recommendation", inputs))
+        await self.cache.store("trading_recommendation", inputs, {"analysis": "streamed"})
+
+        cached = await self.cache.get_or_call("trading_recommendation", {"price": 43282.0}, self._call)
+        self.assertEqual(cached, {"analysis": "streamed"})
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(self.cache.get_stats()["by_kind"]["trading_recommendation"]["upstream_calls"], 1)
+
+    async def test_concurrent_streamed_misses_are_coalesced(self):
+        self.assertIsNone(await self.cache.lookup("trading_recommendation", {"price": 43251.7}))
+        waiting = [
+            asyncio.create_task(self.cache.lookup("trading_recommendation", {"price": 43300.0 + i}))
+            for i in range(10)
+        ]
+        await asyncio.sleep(0.01)
+        self.assertFalse(any(task.done() for task in waiting))
+
+        await self.cache.store("trading_recommendation", {"price": 43251.7}, {"analysis": "streamed"})
+
+        self.assertEqual(await asyncio.gather(*waiting), [{"analysis": "streamed"}] * 10)
+        stats = self.cache.get_stats()["by_kind"]["trading_recommendation"]
+        self.assertEqual((stats["requests"], stats["upstream_calls"]), (11, 1))
+
+    async def test_released_stream_lets_a_waiting_lookup_stream(self):
+        inputs = {"price": 43251.7}
+        self.assertIsNone(await self.cache.lookup("trading_recommendation", inputs))
+        waiting = asyncio.create_task(self.cache.lookup("trading_recommendation", inputs))
+        await asyncio.sleep(0.01)
+
+        self.cache.release("trading_recommendation", inputs)
+
+        self.assertIsNone(await waiting)
+
+
+if __name__ == "__main__":
+    unittest.main()
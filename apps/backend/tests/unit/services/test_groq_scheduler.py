@@ -0,0 +1,144 @@
+import asyncio
+import time
+import unittest
+
+from services.groq_scheduler import (
+    LLMRequestScheduler,
+    Priority,
+    RequestExpired,
+    SchedulerOverloaded,
+    TokenBucket,
+)
+
+
+class TestLLMRequestScheduler(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.scheduler = LLMRequestScheduler(
+            max_concurrency=2, max_background=1, requests_per_second=1000, burst=100
+        )
+
+    async def asyncTearDown(self):
+        await self.scheduler.stop()
+
+    async def _blocked(self, priority, release, order=None, name=None):
+        async def call():
+            if order is not None:
+                order.append(name)
+            await release.wait()
+            return name
+        return await self.scheduler.submit(call, priority=priority)
+
+    async def test_interactive_jumps_queued_background_work(self):
+        release = asyncio.Event()
+        order = []
+        running = asyncio.create_task(self._blocked(Priority.BACKGROUND, release, order, "bg-running"))
+        await asyncio.sleep(0.01)
+
+        queued = [
+            asyncio.create_task(self._blocked(Priority.BACKGROUND, release, order, "bg-queued")),
+            asyncio.create_task(self._blocked(Priority.INTERACTIVE, release, order, "interactive")),
+        ]
+        await asyncio.sleep(0.01)
+
+        # The background slot is taken, so the free worker runs the interactive call
+        self.assertEqual(order, ["bg-running", "interactive"])
+        release.set()
+        results = await asyncio.gather(running, *queued)
+        self.assertEqual(results, ["bg-running", "bg-queued", "interactive"])
+        self.assertEqual(order[-1], "bg-queued")
+
+    async def test_expired_requests_are_dropped_before_running(self):
+        release = asyncio.Event()
+        calls = []
+        blockers = [
+            asyncio.create_task(self._blocked(Priority.INTERACTIVE, release)) for _ in range(2)
+        ]
+        await asyncio.sleep(0.01)
+
+        async def call():
+            calls.append("ran")
+
+        with self.assertRaises(RequestExpired):
+            stale = asyncio.create_task(self.scheduler.submit(call, timeout=0.02))
+            await asyncio.sleep(0.05)
+            release.set()
+            await stale
+        await asyncio.gather(*blockers)
+
+        self.assertEqual(calls, [])
+        self.assertEqual(self.scheduler.get_stats()["interactive"]["expired"], 1)
+
+    async def test_cancelled_callers_do_not_reach_the_api(self):
+        release = asyncio.Event()
+        blockers = [
+            asyncio.create_task(self._blocked(Priority.INTERACTIVE, release)) for _ in range(2)
+        ]
+        await asyncio.sleep(0.01)
+        calls = []
+
+        async def call():
+            calls.append("ran")
+
+        abandoned = asyncio.create_task(self.scheduler.submit(call))
+        await asyncio.sleep(0.01)
+        abandoned.cancel()
+        release.set()
+        await asyncio.gather(*blockers)
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(calls, [])
+        self.assertEqual(self.scheduler.get_stats()["interactive"]["cancelled"], 1)
+
+    async def test_failures_propagate_and_are_counted(self):
+        async def call():
+            raise ValueError("bad response")
+
+        with self.assertRaises(ValueError):
+            await self.scheduler.submit(call, priority=Priority.BACKGROUND)
+        self.assertEqual(self.scheduler.get_stats()["background"]["failed"], 1)
+
+    async def test_background_rejected_when_overloaded(self):
+        scheduler = LLMRequestScheduler(max_concurrency=1, max_background=1, max_pending=1)
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+
+        running = asyncio.create_task(scheduler.submit(call, priority=Priority.BACKGROUND))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(scheduler.submit(call, priority=Priority.BACKGROUND))
+        await asyncio.sleep(0.01)
+
+        with self.assertRaises(SchedulerOverloaded):
+            await scheduler.submit(call, priority=Priority.BACKGROUND)
+        release.set()
+        await asyncio.gather(running, queued)
+        await scheduler.stop()
+
+    async def test_concurrency_limit(self):
+        active = peak = 0
+
+        async def call():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.005)
+            active -= 1
+
+        await asyncio.gather(*(self.scheduler.submit(call) for _ in range(10)))
+        self.assertEqual(peak, 2)
+        self.assertEqual(self.scheduler.get_stats()["interactive"]["completed"], 10)
+
+
+class TestTokenBucket(unittest.IsolatedAsyncioTestCase):
+    async def test_paces_after_burst(self):
+        bucket = TokenBucket(rate=100, burst=5)
+        started = time.monotonic()
+        for _ in range(10):
+            await bucket.acquire()
+        # Five immediate tokens, then five more at 10 ms apart
+        self.assertGreater(time.monotonic() - started, 0.04)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import unittest
+from decimal import Decimal
+
+from core.tiered_cache import LocalInvalidationBroker
+from domains.shared.event_bus import InMemoryEventBus
+from domains.trading.services import TradeExecutedEvent, TradingRewardsCalculatedEvent
+from services.live_events import LiveEventRelay
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+        self.unblocked = asyncio.Event()
+        self.unblocked.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        await self.unblocked.wait()
+        self.sent.append(json.loads(data))
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+    def of_type(self, message_type):
+        return [message for message in self.sent if message["type"] == message_type]
+
+
+def _trade(user_id=7, trade_id="t1"):
+    return TradeExecutedEvent(trade_id=trade_id, user_id=user_id, asset_symbol="BTCUSD",
+                              direction="long", amount=Decimal("100"))
+
+
+async def _settle():
+    await asyncio.sleep(0.01)
+
+
+class TestLiveEventRelay(unittest.IsolatedAsyncioTestCase):
+    """Two workers sharing one broker; events are emitted on worker A's bus"""
+
+    async def asyncSetUp(self):
+        broker = LocalInvalidationBroker()
+        self.worker_a = LiveEventRelay(broker)
+        self.worker_b = LiveEventRelay(broker)
+        await self.worker_a.start()
+        await self.worker_b.start()
+        self.bus = InMemoryEventBus()
+        await self.worker_a.attach(self.bus)
+
+    async def asyncTearDown(self):
+        await self.bus.close()
+        await self.worker_a.stop()
+        await self.worker_b.stop()
+
+    async def test_events_reach_the_user_on_any_worker(self):
+        on_a, on_b, other_user = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await self.worker_a.connect(on_a, 7)
+        await self.worker_b.connect(on_b, 7)
+        await self.worker_b.connect(other_user, 8)
+
+        await self.bus.emit(_trade())
+        await self.bus.drain()
+        await _settle()
+
+        for websocket in (on_a, on_b):
+            events = websocket.of_type("event")
+            self.assertEqual(len(events), 1)
+            self.assertEqual(events[0]["event_type"], "trade_executed")
+            self.assertEqual(events[0]["data"]["trade_id"], "t1")
+            self.assertEqual(events[0]["data"]["amount"], "100")
+        self.assertEqual(other_user.of_type("event"), [])
+
+    async def test_event_type_filters(self):
+        websocket = FakeWebSocket()
+        connection = await self.worker_b.connect(websocket, 7)
+
+        self.worker_b.handle_client_message(
+            connection, json.dumps({"action": "subscribe", "event_types": ["trading_rewards_calculated"]})
+        )
+        await self.bus.emit(_trade())
+        await self.bus.emit(TradingRewardsCalculatedEvent(user_id=7, trade_id="t1", xp_gained=10))
+        await self.bus.drain()
+        await _settle()
+
+        self.assertEqual(websocket.of_type("subscriptions")[0]["event_types"], ["trading_rewards_calculated"])
+        self.assertEqual([event["event_type"] for event in websocket.of_type("event")],
+                         ["trading_rewards_calculated"])
+
+        # Removing the last filter streams every event again
+        self.worker_b.handle_client_message(
+            connection, json.dumps({"action": "unsubscribe", "event_types": ["trading_rewards_calculated"]})
+        )
+        await self.bus.emit(_trade(trade_id="t2"))
+        await self.bus.drain()
+        await _settle()
+        self.assertEqual(websocket.of_type("event")[-1]["data"]["trade_id"], "t2")
+
+    async def test_ping_and_invalid_messages(self):
+        websocket = FakeWebSocket()
+        connection = await self.worker_a.connect(websocket, 7)
+
+        self.worker_a.handle_client_message(connection, '{"action": "ping"}')
+        self.worker_a.handle_client_message(connection, "not json")
+        self.worker_a.handle_client_message(connection, '{"action": "dance"}')
+        await _settle()
+
+        self.assertEqual([m["type"] for m in websocket.sent], ["connected", "pong", "error", "error"])
+
+    async def test_slow_client_is_disconnected(self):
+        relay = LiveEventRelay(LocalInvalidationBroker(), max_queue=2)
+        websocket = FakeWebSocket()
+        websocket.unblocked.clear()
+        connection = await relay.connect(websocket, 7)
+
+        for i in range(5):
+            await relay.relay(_trade(trade_id=f"t{i}"))
+        await _settle()
+
+        self.assertTrue(connection.subscriber.closed)
+        self.assertEqual(websocket.close_code, 1008)
+        await relay.disconnect(connection)
+        self.assertEqual(relay.get_stats()["connections"], 0)
+
+    async def test_heartbeats(self):
+        relay = LiveEventRelay(LocalInvalidationBroker(), heartbeat_interval=0.01)
+        await relay.start()
+        websocket = FakeWebSocket()
+        await relay.connect(websocket, 7)
+
+        await asyncio.sleep(0.05)
+        await relay.stop()
+
+        self.assertGreaterEqual(len(websocket.of_type("heartbeat")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
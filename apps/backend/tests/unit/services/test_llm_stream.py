@@ -0,0 +1,89 @@
+import json
+import unittest
+
+from services.llm_stream import (
+    JSONFieldStream,
+    chunk_text,
+    chunk_usage,
+    format_sse,
+    iter_sse_events,
+    parse_fields,
+)
+
+
+async def _lines(*lines):
+    for line in lines:
+        yield line
+
+
+def _chunk(text, **extra):
+    return json.dumps({"choices": [{"delta": {"content": text}}], **extra})
+
+
+class TestSSEParsing(unittest.IsolatedAsyncioTestCase):
+    async def test_events_until_done(self):
+        lines = _lines(
+            ": keep-alive", "",
+            f"data: {_chunk('Hel')}", "",
+            f"data: {_chunk('lo', x_groq={'usage': {'total_tokens': 12}})}", "",
+            "data: [DONE]", "",
+            f"data: {_chunk('ignored')}", "",
+        )
+        chunks = [chunk async for chunk in iter_sse_events(lines)]
+
+        self.assertEqual("".join(chunk_text(chunk) for chunk in chunks), "Hello")
+        self.assertEqual(chunk_usage(chunks[-1]), {"total_tokens": 12})
+
+    async def test_multiline_data_and_missing_trailing_blank_line(self):
+        chunks = [chunk async for chunk in iter_sse_events(_lines('data: {"a":', "data: 1}"))]
+        self.assertEqual(chunks, [{"a": 1}])
+
+    def test_chunk_without_content(self):
+        self.assertEqual(chunk_text({"choices": [{"delta": {"role": "assistant"}}]}), "")
+        self.assertEqual(chunk_text({"choices": []}), "")
+
+    def test_format_sse(self):
+        self.assertEqual(
+            format_sse({"type": "field", "name": "action"}, event="field"),
+            b'event: field\ndata: {"type":"field","name":"action"}\n\n'
+        )
+
+
+class TestJSONFieldStream(unittest.TestCase):
+    ANSWER = (
+        '```json\n{"action": "buy", "confidence": 0.72, '
+        '"market_assessment": "Trend up, \\"strong\\" {momentum}", '
+        '"levels": {"stop": [41000, 40500]}, "reasoning": "Breakout, with volume."}\n```'
+    )
+
+    def test_fields_complete_as_text_arrives(self):
+        stream = JSONFieldStream()
+        seen = []
+        for i in range(0, len(self.ANSWER), 3):
+            for name, value in stream.feed(self.ANSWER[i:i + 3]):
+                seen.append((name, value, len(stream.text)))
+
+        self.assertEqual([name for name, _, _ in seen], [
+            "action", "confidence", "market_assessment", "levels", "reasoning"
+        ])
+        self.assertEqual(seen[2][1], 'Trend up, "strong" {momentum}')
+        self.assertEqual(seen[3][1], {"stop": [41000, 40500]})
+        # The action is known long before the answer is finished
+        self.assertLess(seen[0][2], len(self.ANSWER) // 4)
+        self.assertTrue(stream.complete)
+
+    def test_matches_whole_parse(self):
+        start = self.ANSWER.index("{")
+        end = self.ANSWER.rindex("}") + 1
+        self.assertEqual(parse_fields(self.ANSWER), json.loads(self.ANSWER[start:end]))
+
+    def test_unfinished_and_invalid_values(self):
+        stream = JSONFieldStream()
+        self.assertEqual(stream.feed('{"action": "se'), [])
+        self.assertEqual(stream.feed('ll", "confidence": high, "reasoning": "x"'), [("action", "sell")])
+        self.assertFalse(stream.complete)
+        self.assertEqual(parse_fields("no json here"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import asyncio
+import time
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+
+from services.market_simulator import (
+    DEFAULT_ASSETS,
+    SECONDS_PER_YEAR,
+    SIMULATION_EPOCH,
+    AssetModel,
+    LatencyModel,
+    MarketSimulator,
+    SimulatedExchangeClient,
+    SimulationClock,
+)
+
+
+def _simulator(seed=7, **kwargs):
+    return MarketSimulator(seed=seed, clock=SimulationClock(manual=True), **kwargs)
+
+
+class TestMarketSimulator(unittest.TestCase):
+    def test_same_seed_same_paths_in_any_read_order(self):
+        forward = _simulator(batch_steps=256)
+        backward = _simulator(batch_steps=256, cache_batches=2)
+
+        expected = forward.path("BTCUSD", 0, 5000)
+        for at in range(4999, -1, -97):
+            self.assertEqual(backward.price("BTCUSD", at=at), expected[at])
+        self.assertNotEqual(_simulator(seed=8).price("BTCUSD", at=4999), expected[4999])
+
+    def test_paths_chained_over_many_blocks_are_read_order_independent(self):
+        forward = _simulator(batch_steps=16)
+        backward = _simulator(batch_steps=16, cache_batches=2)
+
+        expected = forward.path("BTCUSD", 0, 5000)
+        for at in range(4999, -1, -89):
+            self.assertEqual(backward.price("BTCUSD", at=at), expected[at])
+        # Batches are bridged: no gap where one batch ends and the next starts
+        log_returns = np.abs(np.diff(np.log(expected)))
+        self.assertLess(log_returns[15::16].mean(), 3 * log_returns.mean())
+
+    def test_distant_moments_do_not_generate_the_path_before_them(self):
+        simulator = _simulator()
+        at = 2 * SECONDS_PER_YEAR
+
+        price = simulator.price("BTCUSD", at=at)
+
+        self.assertEqual(len(simulator._path("BTCUSD")._batches), 1)
+        self.assertEqual(_simulator().path("BTCUSD", at - 10, at + 1)[-1], price)
+
+    def test_paths_start_at_initial_price_and_are_independent_per_asset(self):
+        simulator = _simulator()
+        self.assertAlmostEqual(simulator.price("ETHUSD"), 2580.0)
+
+        extended = _simulator(assets=(AssetModel("XYZUSD", 5.0, 0.3), *DEFAULT_ASSETS))
+        self.assertEqual(extended.price("BTCUSD", at=3000), simulator.price("BTCUSD", at=3000))
+
+    def test_realized_volatility_matches_model(self):
+        simulator = _simulator(assets=(AssetModel("BTCUSD", 40000.0, volatility=0.6),))
+        log_returns = np.diff(np.log(simulator.path("BTCUSD", 0, 200_000)))
+
+        realized = log_returns.std() * np.sqrt(SECONDS_PER_YEAR)
+        self.assertAlmostEqual(realized, 0.6, delta=0.01)
+
+    def test_jumps_fatten_the_tails(self):
+        calm = AssetModel("CALM", 100.0, volatility=0.5)
+        jumpy = AssetModel("JUMPY", 100.0, volatility=0.5, jumps_per_year=50_000, jump_std=0.01)
+        simulator = _simulator(assets=(calm, jumpy))
+
+        def kurtosis(symbol):
+            returns = np.diff(np.log(simulator.path(symbol, 0, 100_000)))
+            return ((returns - returns.mean()) ** 4).mean() / returns.var() ** 2
+
+        self.assertLess(abs(kurtosis("CALM") - 3), 0.3)
+        self.assertGreater(kurtosis("JUMPY"), 4)
+
+    def test_shared_clock_and_symbol_aliases(self):
+        simulator = _simulator()
+        simulator.clock.advance(600)
+
+        self.assertEqual(simulator.price("BTC-USD"), simulator.price("BTCUSD", at=600))
+        self.assertAlmostEqual(simulator.price("unknown", at=0), 100.0)
+
+    def test_running_clocks_are_anchored_to_wall_time(self):
+        with patch("services.market_simulator.time.time", return_value=SIMULATION_EPOCH + 1000):
+            clocks = [SimulationClock(), SimulationClock()]
+            fast = SimulationClock(speed=2)
+
+            self.assertEqual([clock.now() for clock in clocks], [1000, 1000])
+            self.assertEqual(fast.now(), 2000)
+        self.assertEqual(clocks[0].wall_time(1000), SIMULATION_EPOCH + 1000)
+        self.assertEqual(fast.wall_time(2000), SIMULATION_EPOCH + 1000)
+
+    def test_ohlc_bars(self):
+        simulator = _simulator()
+        prices = simulator.path("SOLUSD", 120, 420)
+        bars = simulator.ohlc("SOLUSD", 120, 420, bar_seconds=60)
+
+        self.assertEqual(bars[:, 0].tolist(), [120, 180, 240, 300, 360])
+        self.assertEqual(bars[0, 1], prices[0])
+        self.assertEqual(bars[0, 2], prices[:60].max())
+        self.assertEqual(bars[-1, 4], prices[-1])
+
+
+class TestLatencyModel(unittest.IsolatedAsyncioTestCase):
+    def test_seeded_samples(self):
+        samples = [LatencyModel(minimum=0.1, median=0.2, seed=3).sample() for _ in range(2)]
+        self.assertEqual(samples[0], samples[1])
+        self.assertGreater(samples[0], 0.1)
+        self.assertEqual(LatencyModel.fixed(0.5).sample(), 0.5)
+
+    async def test_default_is_instant(self):
+        started = time.perf_counter()
+        await LatencyModel().wait()
+        self.assertLess(time.perf_counter() - started, 0.01)
+
+
+class TestSimulatedExchangeClient(unittest.IsolatedAsyncioTestCase):
+    async def test_fills_at_simulated_price_with_spread(self):
+        simulator = _simulator()
+        client = SimulatedExchangeClient(simulator, spread_pct=0.001)
+
+        long = await client.place_order("BTCUSD", "long", Decimal("10"))
+        short = await client.place_order("BTCUSD", "short", Decimal("10"))
+
+        self.assertEqual(long["price"], Decimal(str(round(43250 * 1.001, 8))))
+        self.assertEqual(short["price"], Decimal(str(round(43250 * 0.999, 8))))
+        self.assertNotEqual(long["order_id"], short["order_id"])
+
+    async def test_thousands_of_mock_trades_per_second(self):
+        asyncio.get_running_loop().set_debug(False)
+        simulator = _simulator()
+        client = SimulatedExchangeClient(simulator)
+        symbols = ["BTCUSD", "ETHUSD", "SOLUSD"]
+
+        started = time.perf_counter()
+        fills = []
+        for i in range(5000):
+            simulator.clock.advance(1)
+            fills.append(await client.place_order(symbols[i % 3], "long", Decimal("1")))
+        elapsed = time.perf_counter() - started
+
+        self.assertGreater(5000 / elapsed, 2000)
+        replay = _simulator()
+        replay.clock.advance(5000)
+        # The last fill (ETHUSD at t=5000) is reproducible from the seed alone
+        replayed = await SimulatedExchangeClient(replay).place_order("ETHUSD", "long", Decimal("1"))
+        self.assertEqual(fills[-1]["price"], replayed["price"])
+        self.assertEqual(len({fill["order_id"] for fill in fills}), 5000)
+        self.assertTrue(all(fill["price"] > 0 for fill in fills))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from datetime import datetime
+
+from services.nft_marketplace import (
+    InvalidCursor,
+    MarketplaceError,
+    ListingUnavailable,
+    decode_cursor,
+    encode_cursor,
+    rarity_rank,
+)
+
+
+class TestListingCursor(unittest.TestCase):
+    def test_price_cursor_round_trips(self):
+        cursor = encode_cursor("price", "asc", 250.5, 42)
+        self.assertEqual(decode_cursor(cursor, "price", "asc"), (250.5, 42))
+
+    def test_listed_at_cursor_round_trips(self):
+        listed_at = datetime(2026, 10, 18, 12, 30, 15, 123456)
+        cursor = encode_cursor("listed_at", "desc", listed_at, 7)
+        self.assertEqual(decode_cursor(cursor, "listed_at", "desc"), (listed_at, 7))
+
+    def test_cursor_is_url_safe(self):
+        cursor = encode_cursor("rarity", "desc", 4, 123456789)
+        self.assertNotIn("=", cursor)
+        self.assertNotIn("/", cursor)
+        self.assertNotIn("+", cursor)
+
+    def test_cursor_for_another_ordering_is_rejected(self):
+        cursor = encode_cursor("price", "asc", 10.0, 1)
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(cursor, "price", "desc")
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(cursor, "listed_at", "asc")
+
+    def test_malformed_cursor_is_rejected(self):
+        for cursor in ["garbage", "", encode_cursor("price", "asc", "cheap", 1)]:
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(cursor, "price", "asc")
+
+
+class TestMarketplaceErrors(unittest.TestCase):
+    def test_status_codes(self):
+        self.assertEqual(ListingUnavailable("sold").status_code, 409)
+        self.assertEqual(InvalidCursor("bad").status_code, 400)
+        self.assertEqual(MarketplaceError("teapot", status_code=418).status_code, 418)
+
+    def test_rarity_rank_orders_rarities(self):
+        ranks = [rarity_rank(r) for r in ("common", "rare", "epic", "legendary")]
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertEqual(rarity_rank("unknown"), 0)
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from services.share_aggregator import ShareAggregator, ShareWAL
+
+
+class RecordingWriter:
+    """Collects flushed batches, optionally failing"""
+
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    def __call__(self, batch):
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        self.batches.append({content_id: (shares.shares, dict(shares.platforms)) for content_id, shares in batch.items()})
+
+
+class TestShareAggregator(unittest.IsolatedAsyncioTestCase):
+    """Test buffering, batch flushes and write-ahead log recovery"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.writer = RecordingWriter()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _aggregator(self):
+        return ShareAggregator(self.writer, wal=ShareWAL(self.directory.name, fsync=False))
+
+    async def test_shares_are_aggregated_into_one_batch(self):
+        aggregator = self._aggregator()
+        await aggregator.record(1, ["twitter", "discord"])
+        pending = await aggregator.record(1, ["twitter"])
+        await aggregator.record(2, ["instagram"])
+
+        self.assertEqual(pending.shares, 3)
+        self.assertEqual(await aggregator.flush(), 4)
+        self.assertEqual(self.writer.batches, [{
+            1: (3, {"twitter": 2, "discord": 1}),
+            2: (1, {"instagram": 1})
+        }])
+        self.assertEqual(aggregator.pending(1).shares, 0)
+        await aggregator.stop()
+
+    async def test_flush_hook_receives_writer_result(self):
+        results = []
+
+        async def on_flush(result):
+            results.append(result)
+
+        aggregator = ShareAggregator(lambda batch: sorted(batch), on_flush=on_flush)
+        await aggregator.record(2, ["twitter"])
+        await aggregator.record(1, ["twitter"])
+        await aggregator.flush()
+
+        self.assertEqual(results, [[1, 2]])
+
+    async def test_failed_flush_keeps_shares_pending(self):
+        aggregator = self._aggregator()
+        await aggregator.record(1, ["twitter"])
+        self.writer.fail = True
+
+        self.assertEqual(await aggregator.flush(), 0)
+        await aggregator.record(1, ["discord"])
+        self.assertEqual(aggregator.pending(1).shares, 2)
+
+        self.writer.fail = False
+        self.assertEqual(await aggregator.flush(), 2)
+        self.assertEqual(aggregator.get_stats()["failed_flushes"], 1)
+        await aggregator.stop()
+
+    async def test_unflushed_shares_survive_a_crash(self):
+        crashed = ShareWAL(self.directory.name, fsync=False)
+        await ShareAggregator(self.writer, wal=crashed).record(5, ["twitter", "telegram"])
+        # Simulate the process dying: handles go away, files stay behind
+        crashed._file.close()
+        crashed._owner_lock.close()
+
+        recovered = self._aggregator()
+        self.assertEqual(recovered.pending(5).shares, 2)
+
+        await recovered.flush()
+        await recovered.stop()
+        self.assertEqual(self.writer.batches, [{5: (2, {"twitter": 1, "telegram": 1})}])
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    async def test_running_worker_logs_are_not_adopted(self):
+        alive = ShareAggregator(self.writer, wal=ShareWAL(self.directory.name, fsync=False))
+        await alive.record(1, ["twitter"])
+
+        other = self._aggregator()
+
+        self.assertEqual(other.pending(1).shares, 0)
+        await alive.stop()
+        await other.stop()
+
+
+class TestShareWALGroupCommit(unittest.IsolatedAsyncioTestCase):
+    """Test that concurrent appends share fsyncs"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    async def test_concurrent_shares_are_committed_together(self):
+        wal = ShareWAL(self.directory.name)
+        aggregator = ShareAggregator(RecordingWriter(), wal=wal)
+
+        await asyncio.gather(*(aggregator.record(i, ["twitter"]) for i in range(50)))
+
+        # Every append lands before the first fsync starts, so one covers all
+        self.assertEqual(wal.syncs, 1)
+        self.assertEqual(aggregator.get_stats()["pending_shares"], 50)
+        await aggregator.stop()
+
+    async def test_flush_during_a_commit_takes_the_share_along(self):
+        aggregator = ShareAggregator(RecordingWriter(), wal=ShareWAL(self.directory.name))
+        await aggregator.record(1, ["twitter"])
+
+        recording = asyncio.create_task(aggregator.record(2, ["discord"]))
+        await asyncio.sleep(0)
+        # The share's segment is truncated by this flush, so the share is in its batch
+        self.assertEqual(await aggregator.flush(), 2)
+        await recording
+
+        self.assertEqual(aggregator.pending(2).shares, 0)
+        self.assertEqual(aggregator.writer.batches, [{1: (1, {"twitter": 1}), 2: (1, {"discord": 1})}])
+        await aggregator.stop()
+
+    async def test_rotated_segment_is_synced_by_the_next_commit(self):
+        wal = ShareWAL(self.directory.name)
+        wal.append(1, ["twitter"], 0.0)
+        wal.rotate()
+        self.assertEqual(len(wal._unsynced), 1)
+
+        await wal.sync()
+
+        self.assertEqual(wal._unsynced, [])
+        wal.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from datetime import datetime, timezone
+
+from ....domains.shared.event_bus import InMemoryEventBus
+from ....domains.shared.event_store import SQLiteEventStore
+from ....domains.trading.services import TRADING_EVENT_TYPES, TradeExecutedEvent, TradingRewardsCalculatedEvent
+from ....services.genesis_eligibility import EligibilitySnapshot, GenesisEligibilityEngine
+from ....services.trading_domain import TradingDomainRuntime
+
+
+class TestTradingDomainRuntime(unittest.IsolatedAsyncioTestCase):
+    """Test the consumers the runtime subscribes on its event bus"""
+
+    async def test_trades_reach_the_genesis_eligibility_engine(self):
+        engine = GenesisEligibilityEngine()
+        runtime = TradingDomainRuntime(InMemoryEventBus(), genesis_eligibility=engine)
+
+        async def load():
+            return EligibilitySnapshot(user_id=1)
+
+        await engine.get(1, load)
+        await runtime.start()
+        executed_at = datetime(2026, 10, 18, tzinfo=timezone.utc)
+        await runtime.event_bus.emit(TradeExecutedEvent(trade_id="t1", user_id=1, executed_at=executed_at))
+        await runtime.stop()
+
+        snapshot = await engine.get(1, load)
+        self.assertEqual(snapshot.total_trades, 1)
+        self.assertEqual(snapshot.last_trade_at, executed_at.timestamp())
+
+    async def test_trade_events_are_persisted_per_trade(self):
+        store = SQLiteEventStore(event_types=TRADING_EVENT_TYPES)
+        runtime = TradingDomainRuntime(InMemoryEventBus(event_store=store), event_store=store)
+
+        await runtime.start()
+        await runtime.event_bus.emit(TradeExecutedEvent(trade_id="t1", user_id=1))
+        await runtime.event_bus.emit(TradeExecutedEvent(trade_id="t2", user_id=1))
+        await runtime.event_bus.emit(TradingRewardsCalculatedEvent(trade_id="t1", user_id=1, xp_gained=25))
+
+        snapshot, events = store.load_aggregate("t1")
+        self.assertIsNone(snapshot)
+        self.assertEqual([e.event.event_type for e in events], ["trade_executed", "trading_rewards_calculated"])
+        self.assertEqual(events[1].event.xp_gained, 25)
+        await runtime.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
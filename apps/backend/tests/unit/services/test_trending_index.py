@@ -0,0 +1,147 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from services.trending_index import TrendingIndex, TrendingShareFeed
+from core.tiered_cache import LocalInvalidationBroker
+
+HOUR = 3600
+NOW = 1_700_000_000.0
+
+
+class TestTrendingIndex(unittest.TestCase):
+    """Test decayed ranking, pruning and aggregates"""
+
+    def setUp(self):
+        self.index = TrendingIndex(half_life_hours=6, window_days=7, points_per_share=10)
+
+    def test_recent_shares_outrank_older_bursts(self):
+        self.index.record_share(1, shares=3, at=NOW - 12 * HOUR)  # 30 points, two half-lives ago
+        self.index.record_share(2, shares=1, at=NOW)  # 10 points now
+
+        top = self.index.top(2, now=NOW)
+
+        self.assertEqual([entry.content_id for entry in top], [2, 1])
+        self.assertAlmostEqual(top[0].score, 10.0)
+        self.assertAlmostEqual(top[1].score, 7.5)
+
+    def test_top_k_and_repeated_shares_accumulate(self):
+        for content_id in range(5):
+            self.index.record_share(content_id, at=NOW)
+        self.index.record_share(3, shares=2, metadata={"title": "moon"}, at=NOW)
+
+        top = self.index.top(2, now=NOW)
+
+        self.assertEqual(top[0].content_id, 3)
+        self.assertAlmostEqual(top[0].score, 30.0)
+        self.assertEqual(top[0].metadata, {"title": "moon"})
+        self.assertEqual(len(top), 2)
+
+    def test_prune_drops_stale_and_decayed_entries(self):
+        self.index.record_share(1, at=NOW - 8 * 24 * HOUR)
+        self.index.record_share(2, at=NOW)
+
+        self.assertEqual(self.index.prune(now=NOW), 1)
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual([entry.content_id for entry in self.index.top(10, now=NOW)], [2])
+
+    def test_overflow_prunes_to_the_low_watermark(self):
+        index = TrendingIndex(max_entries=10, low_watermark=0.8)
+        for content_id in range(10):
+            index.record_share(content_id, shares=content_id + 1, at=NOW)
+        self.assertEqual(len(index), 10)
+
+        index.record_share(10, shares=20, at=NOW)
+
+        self.assertEqual(len(index), 8)
+        self.assertEqual([entry.content_id for entry in index.top(3, now=NOW)], [10, 9, 8])
+        # The freed headroom absorbs new entries without another prune
+        index.record_share(11, shares=30, at=NOW)
+        index.record_share(12, shares=30, at=NOW)
+        self.assertEqual(len(index), 10)
+
+    def test_rebase_keeps_scores_and_order(self):
+        index = TrendingIndex(half_life_hours=1, max_exponent=5)
+        index.record_share(1, shares=5, at=NOW)
+        index.record_share(2, shares=1, at=NOW + 5 * HOUR)
+        index.record_share(3, shares=1, at=NOW + 10 * HOUR)  # Triggers a rebase
+
+        top = index.top(3, now=NOW + 10 * HOUR)
+
+        self.assertEqual([entry.content_id for entry in top], [3, 2, 1])
+        self.assertAlmostEqual(top[1].score, 10 * 2 ** -5)
+        self.assertAlmostEqual(top[2].score, 50 * 2 ** -10)
+
+    def test_aggregates(self):
+        self.index.record_share(1, shares=2, at=NOW - 30 * HOUR)
+        self.index.record_share(2, shares=3, at=NOW - 2 * HOUR)
+        self.index.record_share(3, shares=4, at=NOW)
+
+        self.assertEqual(self.index.shares_last_24h(now=NOW), 7)
+        self.assertGreater(self.index.momentum(now=NOW), 0)
+        self.assertLessEqual(self.index.momentum(now=NOW), 100)
+
+    def test_load_warms_from_rows(self):
+        count = self.index.load([
+            (1, 100.0, NOW - 24 * HOUR, {"title": "old"}),
+            (2, 20.0, NOW, {"title": "new"})
+        ], now=NOW)
+
+        self.assertEqual(count, 2)
+        self.assertTrue(self.index.loaded)
+        self.assertEqual([entry.content_id for entry in self.index.top(2, now=NOW)], [2, 1])
+
+    def test_top_drops_entries_that_left_the_window(self):
+        self.index.record_share(1, shares=100, at=NOW - 6 * 24 * HOUR)
+        self.index.record_share(2, at=NOW)
+
+        # Still in the window a day later for entry 2 only
+        later = NOW + 2 * 24 * HOUR
+        self.assertEqual([entry.content_id for entry in self.index.top(5, now=later)], [2])
+        self.assertEqual(len(self.index), 1)
+
+
+class TestTrendingShareFeed(unittest.IsolatedAsyncioTestCase):
+    """Test share broadcast between workers"""
+
+    async def test_shares_reach_every_worker(self):
+        broker = LocalInvalidationBroker()
+        worker_a = TrendingShareFeed(TrendingIndex(), broker)
+        worker_b = TrendingShareFeed(TrendingIndex(), broker)
+        await worker_a.start()
+        await worker_b.start()
+        try:
+            await worker_a.publish_share(7, 2, {"title": "gm"})
+            await asyncio.sleep(0)
+
+            self.assertEqual(worker_a.index.top(1)[0].content_id, 7)
+            self.assertEqual(worker_b.index.top(1)[0].metadata, {"title": "gm"})
+        finally:
+            await worker_a.stop()
+            await worker_b.stop()
+
+    async def test_warm_replays_shares_received_while_loading(self):
+        feed = TrendingShareFeed(TrendingIndex(), LocalInvalidationBroker())
+
+        def load_rows(session_factory):
+            # A share lands while the database rows are being read
+            feed._apply({"content_id": 2, "shares": 1, "metadata": {}, "at": None})
+            return iter([(1, 20.0, time.time(), {"title": "gm"})])
+
+        with patch("services.trending_index._recent_content_rows", load_rows):
+            await asyncio.gather(feed.ensure_loaded(None), feed.ensure_loaded(None))
+
+        self.assertTrue(feed.index.loaded)
+        self.assertEqual(sorted(entry.content_id for entry in feed.index.top(5)), [1, 2])
+
+    async def test_applies_locally_when_not_listening(self):
+        feed = TrendingShareFeed(TrendingIndex(), LocalInvalidationBroker())
+
+        await feed.publish_share(1, 1, {})
+
+        self.assertEqual(len(feed.index), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()